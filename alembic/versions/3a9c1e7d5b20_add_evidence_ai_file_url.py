@@ -0,0 +1,28 @@
+"""add evidence ai_file_url
+
+Revision ID: 3a9c1e7d5b20
+Revises: b84d7f5a8cf2
+Create Date: 2026-10-19 10:12:31.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9c1e7d5b20'
+down_revision: Union[str, Sequence[str], None] = 'b84d7f5a8cf2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('evidences', sa.Column('ai_file_url', sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('evidences', 'ai_file_url')
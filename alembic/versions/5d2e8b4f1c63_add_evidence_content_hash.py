@@ -0,0 +1,30 @@
+"""add evidence content_hash
+
+Revision ID: 5d2e8b4f1c63
+Revises: 3a9c1e7d5b20
+Create Date: 2026-10-19 11:03:47.581902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8b4f1c63'
+down_revision: Union[str, Sequence[str], None] = '3a9c1e7d5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('evidences', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_evidences_content_hash'), 'evidences', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_evidences_content_hash'), table_name='evidences')
+    op.drop_column('evidences', 'content_hash')
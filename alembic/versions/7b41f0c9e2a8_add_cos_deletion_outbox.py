@@ -0,0 +1,42 @@
+"""add cos deletion outbox
+
+Revision ID: 7b41f0c9e2a8
+Revises: 5d2e8b4f1c63
+Create Date: 2026-10-19 13:26:05.734112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b41f0c9e2a8'
+down_revision: Union[str, Sequence[str], None] = '5d2e8b4f1c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cos_deletion_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('object_key', sa.String(length=500), nullable=False, comment='待删除的COS对象键'),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False, comment='已尝试删除次数'),
+    sa.Column('last_error', sa.Text(), nullable=True, comment='最近一次删除失败的错误信息'),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='下次尝试删除的时间'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    comment='COS对象删除发件箱，与业务删除同事务写入，由定时任务批量删除'
+    )
+    op.create_index(op.f('ix_cos_deletion_outbox_id'), 'cos_deletion_outbox', ['id'], unique=False)
+    op.create_index(op.f('ix_cos_deletion_outbox_next_attempt_at'), 'cos_deletion_outbox', ['next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_cos_deletion_outbox_next_attempt_at'), table_name='cos_deletion_outbox')
+    op.drop_index(op.f('ix_cos_deletion_outbox_id'), table_name='cos_deletion_outbox')
+    op.drop_table('cos_deletion_outbox')
@@ -0,0 +1,46 @@
+"""add evidence card integrity
+
+Revision ID: 9c4d2a6e8f17
+Revises: 7b41f0c9e2a8
+Create Date: 2026-10-19 16:02:41.218530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4d2a6e8f17'
+down_revision: Union[str, Sequence[str], None] = '7b41f0c9e2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('evidence_cards', sa.Column('is_normal', sa.Boolean(), server_default='true', nullable=False, comment='引用的证据是否都存在'))
+    op.add_column('evidence_cards', sa.Column('abnormal_indices', postgresql.JSONB(astext_type=sa.Text()), server_default='[]', nullable=False, comment='已删除证据在evidence_ids中的位置'))
+    # 回填已有卡片：记录已删除证据在 evidence_ids 中的位置（从0开始）
+    op.execute("""
+        UPDATE evidence_cards AS c
+        SET abnormal_indices = a.indices,
+            is_normal = (a.indices = '[]'::jsonb)
+        FROM (
+            SELECT c2.id,
+                   COALESCE(jsonb_agg(t.idx - 1 ORDER BY t.idx) FILTER (WHERE e.id IS NULL), '[]'::jsonb) AS indices
+            FROM evidence_cards AS c2
+            CROSS JOIN LATERAL jsonb_array_elements(COALESCE(c2.evidence_ids, '[]'::jsonb)) WITH ORDINALITY AS t(evidence_id, idx)
+            LEFT JOIN evidences AS e ON e.id = (t.evidence_id #>> '{}')::integer
+            GROUP BY c2.id
+        ) AS a
+        WHERE c.id = a.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('evidence_cards', 'abnormal_indices')
+    op.drop_column('evidence_cards', 'is_normal')
@@ -0,0 +1,266 @@
+"""add case search summaries
+
+Revision ID: a4d8e2b6c913
+Revises: f3c9a2d71b58
+Create Date: 2026-10-20 10:26:53.904172
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d8e2b6c913'
+down_revision: Union[str, Sequence[str], None] = 'f3c9a2d71b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_table('case_search_summaries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('case_id', sa.Integer(), nullable=False, comment='案件ID'),
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='案件所属用户ID'),
+    sa.Column('case_type', postgresql.ENUM(name='casetype', create_type=False), nullable=True),
+    sa.Column('case_status', postgresql.ENUM(name='casestatus', create_type=False), nullable=False),
+    sa.Column('loan_amount', sa.Float(), nullable=True),
+    sa.Column('case_created_at', sa.DateTime(timezone=True), nullable=False, comment='案件创建时间'),
+    sa.Column('case_updated_at', sa.DateTime(timezone=True), nullable=False, comment='案件更新时间'),
+    sa.Column('creditor_name', sa.String(length=50), nullable=True),
+    sa.Column('creditor_type', sa.String(length=50), nullable=True),
+    sa.Column('debtor_name', sa.String(length=50), nullable=True),
+    sa.Column('debtor_type', sa.String(length=50), nullable=True),
+    sa.Column('evidence_count', sa.Integer(), server_default='0', nullable=False, comment='证据总数'),
+    sa.Column('evidence_status_counts', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False, comment='{evidence_status: 数量}'),
+    sa.Column('last_activity_at', sa.DateTime(timezone=True), nullable=False, comment='案件、当事人或证据最近一次变更的时间'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('case_id')
+    )
+    op.create_index(op.f('ix_case_search_summaries_id'), 'case_search_summaries', ['id'], unique=False)
+    op.create_index(op.f('ix_case_search_summaries_user_id'), 'case_search_summaries', ['user_id'], unique=False)
+    op.create_index(op.f('ix_case_search_summaries_loan_amount'), 'case_search_summaries', ['loan_amount'], unique=False)
+    op.create_index(op.f('ix_case_search_summaries_case_created_at'), 'case_search_summaries', ['case_created_at'], unique=False)
+    op.create_index(op.f('ix_case_search_summaries_case_updated_at'), 'case_search_summaries', ['case_updated_at'], unique=False)
+    op.create_index(op.f('ix_case_search_summaries_last_activity_at'), 'case_search_summaries', ['last_activity_at'], unique=False)
+    op.create_index('ix_case_search_summaries_creditor_name_trgm', 'case_search_summaries', ['creditor_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'creditor_name': 'gin_trgm_ops'})
+    op.create_index('ix_case_search_summaries_debtor_name_trgm', 'case_search_summaries', ['debtor_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'debtor_name': 'gin_trgm_ops'})
+    # 摘要按案件重算时需要按 case_id 聚合当事人和证据
+    op.create_index(op.f('ix_evidences_case_id'), 'evidences', ['case_id'], unique=False)
+    op.create_index(op.f('ix_case_partys_case_id'), 'case_partys', ['case_id'], unique=False)
+
+    # 按案件重算摘要。先锁定已有的摘要行，并发变更同一案件时后一个事务等待前一个提交，
+    # 之后的 INSERT 语句使用新快照，能看到前一个事务写入的证据和当事人
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_case_search_summaries(target_case_ids integer[]) RETURNS void AS $$
+        BEGIN
+            PERFORM 1 FROM case_search_summaries
+            WHERE case_id = ANY(target_case_ids)
+            ORDER BY case_id
+            FOR UPDATE;
+
+            INSERT INTO case_search_summaries (
+                case_id, user_id, case_type, case_status, loan_amount, case_created_at, case_updated_at,
+                creditor_name, creditor_type, debtor_name, debtor_type,
+                evidence_count, evidence_status_counts, last_activity_at
+            )
+            SELECT c.id, c.user_id, c.case_type, c.case_status, c.loan_amount, c.created_at, c.updated_at,
+                   cr.party_name, cr.party_type, dr.party_name, dr.party_type,
+                   COALESCE(ev.total, 0), COALESCE(ev.status_counts, '{}'::jsonb),
+                   GREATEST(c.updated_at, cr.updated_at, dr.updated_at, ev.last_updated_at)
+            FROM cases AS c
+            LEFT JOIN LATERAL (
+                SELECT p.party_name, p.party_type, p.updated_at FROM case_partys AS p
+                WHERE p.case_id = c.id AND p.party_role = 'creditor' ORDER BY p.id LIMIT 1
+            ) AS cr ON true
+            LEFT JOIN LATERAL (
+                SELECT p.party_name, p.party_type, p.updated_at FROM case_partys AS p
+                WHERE p.case_id = c.id AND p.party_role = 'debtor' ORDER BY p.id LIMIT 1
+            ) AS dr ON true
+            LEFT JOIN LATERAL (
+                SELECT sum(s.n)::integer AS total,
+                       jsonb_object_agg(s.status, s.n) AS status_counts,
+                       max(s.last_updated_at) AS last_updated_at
+                FROM (
+                    SELECT COALESCE(e.evidence_status, 'unknown') AS status, count(*) AS n, max(e.updated_at) AS last_updated_at
+                    FROM evidences AS e
+                    WHERE e.case_id = c.id
+                    GROUP BY 1
+                ) AS s
+            ) AS ev ON true
+            WHERE c.id = ANY(target_case_ids)
+            ON CONFLICT (case_id) DO UPDATE SET
+                user_id = EXCLUDED.user_id,
+                case_type = EXCLUDED.case_type,
+                case_status = EXCLUDED.case_status,
+                loan_amount = EXCLUDED.loan_amount,
+                case_created_at = EXCLUDED.case_created_at,
+                case_updated_at = EXCLUDED.case_updated_at,
+                creditor_name = EXCLUDED.creditor_name,
+                creditor_type = EXCLUDED.creditor_type,
+                debtor_name = EXCLUDED.debtor_name,
+                debtor_type = EXCLUDED.debtor_type,
+                evidence_count = EXCLUDED.evidence_count,
+                evidence_status_counts = EXCLUDED.evidence_status_counts,
+                -- 删除证据或当事人也算一次活动
+                last_activity_at = GREATEST(EXCLUDED.last_activity_at, now()),
+                updated_at = now();
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION case_search_summary_case_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM refresh_case_search_summaries(ARRAY[NEW.id]);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER case_search_summary_case_changed
+        AFTER INSERT OR UPDATE ON cases
+        FOR EACH ROW EXECUTE FUNCTION case_search_summary_case_changed()
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION case_search_summary_party_changed() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM refresh_case_search_summaries(ARRAY[NEW.case_id]);
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM refresh_case_search_summaries(ARRAY[OLD.case_id]);
+            ELSE
+                PERFORM refresh_case_search_summaries(ARRAY(SELECT DISTINCT unnest(ARRAY[OLD.case_id, NEW.case_id])));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER case_search_summary_party_changed
+        AFTER INSERT OR UPDATE OR DELETE ON case_partys
+        FOR EACH ROW EXECUTE FUNCTION case_search_summary_party_changed()
+    """)
+
+    # 证据的新增和删除按语句触发，批量上传/删除时每个案件只重算一次
+    op.execute("""
+        CREATE OR REPLACE FUNCTION case_search_summary_evidences_changed() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM refresh_case_search_summaries(ARRAY(SELECT DISTINCT case_id FROM new_rows));
+            ELSE
+                PERFORM refresh_case_search_summaries(ARRAY(SELECT DISTINCT case_id FROM old_rows));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # 证据的更新按行触发：ORM 批量更新状态时逐行执行语句，按语句重算会对每一行重新统计整个案件。
+    # 状态或所属案件变化时增量调整计数，其余更新只更新最近活动时间
+    op.execute("""
+        CREATE OR REPLACE FUNCTION adjust_case_search_summary_evidences(
+            target_case_id integer, status text, delta integer
+        ) RETURNS void AS $$
+        BEGIN
+            UPDATE case_search_summaries
+            SET evidence_count = evidence_count + delta,
+                evidence_status_counts = CASE
+                    WHEN COALESCE((evidence_status_counts ->> status)::integer, 0) + delta <= 0
+                        THEN evidence_status_counts - status
+                    ELSE jsonb_set(
+                        evidence_status_counts, ARRAY[status],
+                        to_jsonb(COALESCE((evidence_status_counts ->> status)::integer, 0) + delta)
+                    )
+                END,
+                last_activity_at = GREATEST(last_activity_at, now()),
+                updated_at = now()
+            WHERE case_id = target_case_id;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION case_search_summary_evidence_moved() RETURNS trigger AS $$
+        BEGIN
+            PERFORM adjust_case_search_summary_evidences(OLD.case_id, COALESCE(OLD.evidence_status, 'unknown'), -1);
+            PERFORM adjust_case_search_summary_evidences(NEW.case_id, COALESCE(NEW.evidence_status, 'unknown'), 1);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # 同一事务内的后续更新不再写摘要行
+    op.execute("""
+        CREATE OR REPLACE FUNCTION case_search_summary_evidence_touched() RETURNS trigger AS $$
+        BEGIN
+            UPDATE case_search_summaries
+            SET last_activity_at = now(), updated_at = now()
+            WHERE case_id = NEW.case_id AND last_activity_at < now();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER case_search_summary_evidences_inserted
+        AFTER INSERT ON evidences REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION case_search_summary_evidences_changed()
+    """)
+    op.execute("""
+        CREATE TRIGGER case_search_summary_evidence_moved
+        AFTER UPDATE ON evidences
+        FOR EACH ROW
+        WHEN (OLD.evidence_status IS DISTINCT FROM NEW.evidence_status OR OLD.case_id IS DISTINCT FROM NEW.case_id)
+        EXECUTE FUNCTION case_search_summary_evidence_moved()
+    """)
+    op.execute("""
+        CREATE TRIGGER case_search_summary_evidence_touched
+        AFTER UPDATE ON evidences
+        FOR EACH ROW
+        WHEN (OLD.evidence_status IS NOT DISTINCT FROM NEW.evidence_status AND OLD.case_id IS NOT DISTINCT FROM NEW.case_id)
+        EXECUTE FUNCTION case_search_summary_evidence_touched()
+    """)
+    op.execute("""
+        CREATE TRIGGER case_search_summary_evidences_deleted
+        AFTER DELETE ON evidences REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION case_search_summary_evidences_changed()
+    """)
+
+    # 回填已有案件
+    op.execute("SELECT refresh_case_search_summaries(ARRAY(SELECT id FROM cases))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS case_search_summary_evidences_deleted ON evidences")
+    op.execute("DROP TRIGGER IF EXISTS case_search_summary_evidence_touched ON evidences")
+    op.execute("DROP TRIGGER IF EXISTS case_search_summary_evidence_moved ON evidences")
+    op.execute("DROP TRIGGER IF EXISTS case_search_summary_evidences_inserted ON evidences")
+    op.execute("DROP TRIGGER IF EXISTS case_search_summary_party_changed ON case_partys")
+    op.execute("DROP TRIGGER IF EXISTS case_search_summary_case_changed ON cases")
+    op.execute("DROP FUNCTION IF EXISTS case_search_summary_evidence_touched()")
+    op.execute("DROP FUNCTION IF EXISTS case_search_summary_evidence_moved()")
+    op.execute("DROP FUNCTION IF EXISTS adjust_case_search_summary_evidences(integer, text, integer)")
+    op.execute("DROP FUNCTION IF EXISTS case_search_summary_evidences_changed()")
+    op.execute("DROP FUNCTION IF EXISTS case_search_summary_party_changed()")
+    op.execute("DROP FUNCTION IF EXISTS case_search_summary_case_changed()")
+    op.execute("DROP FUNCTION IF EXISTS refresh_case_search_summaries(integer[])")
+    op.drop_index(op.f('ix_case_partys_case_id'), table_name='case_partys')
+    op.drop_index(op.f('ix_evidences_case_id'), table_name='evidences')
+    op.drop_index('ix_case_search_summaries_debtor_name_trgm', table_name='case_search_summaries', postgresql_using='gin')
+    op.drop_index('ix_case_search_summaries_creditor_name_trgm', table_name='case_search_summaries', postgresql_using='gin')
+    op.drop_index(op.f('ix_case_search_summaries_last_activity_at'), table_name='case_search_summaries')
+    op.drop_index(op.f('ix_case_search_summaries_case_updated_at'), table_name='case_search_summaries')
+    op.drop_index(op.f('ix_case_search_summaries_case_created_at'), table_name='case_search_summaries')
+    op.drop_index(op.f('ix_case_search_summaries_loan_amount'), table_name='case_search_summaries')
+    op.drop_index(op.f('ix_case_search_summaries_user_id'), table_name='case_search_summaries')
+    op.drop_index(op.f('ix_case_search_summaries_id'), table_name='case_search_summaries')
+    op.drop_table('case_search_summaries')
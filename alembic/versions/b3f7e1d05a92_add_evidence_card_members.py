@@ -0,0 +1,50 @@
+"""add evidence card members
+
+Revision ID: b3f7e1d05a92
+Revises: 9c4d2a6e8f17
+Create Date: 2026-10-19 18:47:12.903415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f7e1d05a92'
+down_revision: Union[str, Sequence[str], None] = '9c4d2a6e8f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('evidence_card_members',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('card_id', sa.Integer(), nullable=False, comment='卡片ID'),
+    sa.Column('evidence_id', sa.Integer(), nullable=False, comment='引用的证据ID'),
+    sa.Column('position', sa.Integer(), nullable=False, comment='证据在卡片evidence_ids中的位置（从0开始）'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['card_id'], ['evidence_cards.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('card_id', 'position', name='uq_evidence_card_member_position'),
+    comment='证据卡片成员索引，按证据查卡片、按顺序查卡片证据'
+    )
+    op.create_index(op.f('ix_evidence_card_members_id'), 'evidence_card_members', ['id'], unique=False)
+    op.create_index(op.f('ix_evidence_card_members_evidence_id'), 'evidence_card_members', ['evidence_id'], unique=False)
+    # 回填已有卡片的成员索引（position 从0开始）
+    op.execute("""
+        INSERT INTO evidence_card_members (card_id, evidence_id, position)
+        SELECT c.id, (t.evidence_id #>> '{}')::integer, t.idx - 1
+        FROM evidence_cards AS c
+        CROSS JOIN LATERAL jsonb_array_elements(COALESCE(c.evidence_ids, '[]'::jsonb)) WITH ORDINALITY AS t(evidence_id, idx)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_evidence_card_members_evidence_id'), table_name='evidence_card_members')
+    op.drop_index(op.f('ix_evidence_card_members_id'), table_name='evidence_card_members')
+    op.drop_table('evidence_card_members')
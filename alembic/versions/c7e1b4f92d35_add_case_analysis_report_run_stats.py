@@ -0,0 +1,33 @@
+"""add case analysis report run stats
+
+Revision ID: c7e1b4f92d35
+Revises: a4d8e2b6c913
+Create Date: 2026-10-20 14:08:21.637045
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1b4f92d35'
+down_revision: Union[str, Sequence[str], None] = 'a4d8e2b6c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('case_analysis_reports', sa.Column('analysis_mode', sa.String(length=20), nullable=True))
+    op.add_column('case_analysis_reports', sa.Column('base_report_id', sa.Integer(), nullable=True))
+    op.add_column('case_analysis_reports', sa.Column('run_stats', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('case_analysis_reports', 'run_stats')
+    op.drop_column('case_analysis_reports', 'base_report_id')
+    op.drop_column('case_analysis_reports', 'analysis_mode')
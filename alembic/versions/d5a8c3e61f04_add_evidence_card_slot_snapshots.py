@@ -0,0 +1,43 @@
+"""add evidence card slot snapshots
+
+Revision ID: d5a8c3e61f04
+Revises: b3f7e1d05a92
+Create Date: 2026-10-19 20:12:35.417820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8c3e61f04'
+down_revision: Union[str, Sequence[str], None] = 'b3f7e1d05a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('evidence_card_slot_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('case_id', sa.Integer(), nullable=False),
+    sa.Column('template_id', sa.String(length=200), nullable=False, comment='模板ID'),
+    sa.Column('version', sa.Integer(), server_default='0', nullable=False, comment='快照版本号，每次变更加一'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('case_id', 'template_id', name='uq_case_template_snapshot'),
+    comment='证据卡片槽位快照版本表，用于槽位关联的乐观并发控制'
+    )
+    op.create_index(op.f('ix_evidence_card_slot_snapshots_id'), 'evidence_card_slot_snapshots', ['id'], unique=False)
+    op.create_index(op.f('ix_evidence_card_slot_snapshots_case_id'), 'evidence_card_slot_snapshots', ['case_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_evidence_card_slot_snapshots_case_id'), table_name='evidence_card_slot_snapshots')
+    op.drop_index(op.f('ix_evidence_card_slot_snapshots_id'), table_name='evidence_card_slot_snapshots')
+    op.drop_table('evidence_card_slot_snapshots')
@@ -0,0 +1,42 @@
+"""add evidence chain dashboards
+
+Revision ID: e7b2f94c3a16
+Revises: d5a8c3e61f04
+Create Date: 2026-10-19 21:05:48.226371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2f94c3a16'
+down_revision: Union[str, Sequence[str], None] = 'd5a8c3e61f04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('evidence_chain_dashboards',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('case_id', sa.Integer(), nullable=False, comment='案件ID'),
+    sa.Column('requirements', postgresql.JSONB(astext_type=sa.Text()), nullable=False, comment='{chain_id::requirement_key: {fingerprint, kind, requirement}}'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    comment='证据链看板物化结果，按证据要求粒度增量重算'
+    )
+    op.create_index(op.f('ix_evidence_chain_dashboards_id'), 'evidence_chain_dashboards', ['id'], unique=False)
+    op.create_index(op.f('ix_evidence_chain_dashboards_case_id'), 'evidence_chain_dashboards', ['case_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_evidence_chain_dashboards_case_id'), table_name='evidence_chain_dashboards')
+    op.drop_index(op.f('ix_evidence_chain_dashboards_id'), table_name='evidence_chain_dashboards')
+    op.drop_table('evidence_chain_dashboards')
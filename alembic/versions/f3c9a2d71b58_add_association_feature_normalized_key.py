@@ -0,0 +1,70 @@
+"""add association feature normalized key
+
+Revision ID: f3c9a2d71b58
+Revises: e7b2f94c3a16
+Create Date: 2026-10-19 23:41:08.215634
+
+"""
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9a2d71b58'
+down_revision: Union[str, Sequence[str], None] = 'e7b2f94c3a16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 与 app.cases.services.normalize_slot_group_name 保持一致（迁移不依赖应用代码）
+_TRANSLATION = str.maketrans({
+    **dict.fromkeys(
+        [chr(c) for c in (*range(0x9, 0xe), *range(0x1c, 0x21), 0x85, 0xa0, 0x1680)]
+        + [chr(c) for c in (*range(0x2000, 0x200b), 0x2028, 0x2029, 0x202f, 0x205f, 0x3000)]
+    ),
+    '（': '(', '）': ')', '【': '[', '】': ']', '｛': '{', '｝': '}',
+    '＋': '+', '－': '-', '×': '*', '÷': '/', '＝': '=', '≠': '!=',
+    '：': ':', '；': ';', '，': ',', '。': '.', '！': '!', '？': '?',
+    '、': ',', '…': '...', '—': '-', '–': '-',
+    '『': '"', '』': '"',
+    '～': '~', '＠': '@', '＃': '#', '＄': '$', '％': '%', '＆': '&',
+    '＊': '*', '＼': '\\', '｜': '|', '／': '/',
+})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('association_evidence_features', sa.Column('normalized_key', sa.String(length=100), nullable=True))
+
+    # 回填标准化分组名：同一案件内标准化后重复的旧记录只保留最早一条的键（与原先按顺序取第一条匹配一致），
+    # 其余记录的键为空，不参与唯一约束，数据保持不变
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        'SELECT id, case_id, slot_group_name FROM association_evidence_features ORDER BY id'
+    )).all()
+    seen = set()
+    updates = []
+    for row in rows:
+        key = unicodedata.normalize('NFKC', row.slot_group_name).translate(_TRANSLATION)
+        if (row.case_id, key) in seen:
+            continue
+        seen.add((row.case_id, key))
+        updates.append({'id': row.id, 'normalized_key': key})
+    if updates:
+        bind.execute(
+            sa.text('UPDATE association_evidence_features SET normalized_key = :normalized_key WHERE id = :id'),
+            updates,
+        )
+
+    op.create_unique_constraint(
+        'uq_association_feature_case_key', 'association_evidence_features', ['case_id', 'normalized_key']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_association_feature_case_key', 'association_evidence_features', type_='unique')
+    op.drop_column('association_evidence_features', 'normalized_key')
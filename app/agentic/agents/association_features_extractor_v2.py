@@ -1,17 +1,20 @@
 from typing import Optional, List, Dict, Any, Union
 from agno.agent import Agent
 from agno.media import Image
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 from enum import Enum
 from app.agentic.llm.base import openai_image_model
 from app.agentic.llm.base import qwen_muti_model
 from app.core.config_manager import config_manager
+from app.agentic.llm.image_refs import ImageRefs
 
 
 class ImageSequenceInfo(BaseModel):
-    """上下文图片URL"""
-    url: str
+    """上下文图片"""
+    image_id: str = Field(description="图片编号，如 E1")
     sequence_number: int
+    url: SkipJsonSchema[Optional[str]] = None  # 服务端根据图片编号回填，不由模型输出
 
     
 class SlotExtraction(BaseModel):
@@ -21,7 +24,8 @@ class SlotExtraction(BaseModel):
     slot_value_type: str
     slot_required: Any
     slot_value: Optional[Union[str, int, float, bool]]  # 无法提取时输出None
-    slot_value_from_url: List[str]
+    slot_value_from_image_ids: List[str] = Field(description="该值来源图片的编号列表，如 [\"E1\", \"E3\"]")
+    slot_value_from_url: SkipJsonSchema[List[str]] = []  # 服务端根据图片编号回填，不由模型输出
     confidence: float
     reasoning: str
     
@@ -104,7 +108,7 @@ class AssociationFeaturesExtractor:
            - slot_extraction: 该分组下提取的所有词槽信息列表，每个元素是一个SlotExtraction
            
         3. ImageSequenceInfo结构说明：
-           - url: 图片的URL地址
+           - image_id: 图片编号（用户消息中给出的 E1、E2 等）
            - sequence_number: 图片在分组中的编号，用于确定图片顺序
            
         4. SlotExtraction结构说明：
@@ -113,7 +117,7 @@ class AssociationFeaturesExtractor:
            - slot_value_type: 词槽值类型，如"string"、"number"、"date"等
            - slot_required: 是否必填，true表示必须提取，false表示可选
            - slot_value: 提取到的词槽值
-           - slot_value_from_url: 该值来源于哪些图片URL的列表
+           - slot_value_from_image_ids: 该值来源于哪些图片的编号列表
            - confidence: 提取结果的置信度，0-1之间的浮点数
            - reasoning: 提取该值的推理过程和依据
            
@@ -127,7 +131,7 @@ class AssociationFeaturesExtractor:
            
         6. 关键约束：
            - 每个图片必须包含在某个分组的image_sequence_info中
-           - 每个词槽必须引用其值来源的图片URL
+           - 每个词槽必须引用其值来源的图片编号
            - 置信度必须基于提取的确定性给出合理评估
            - 推理过程必须清晰说明如何从图片内容得出词槽值
            - 如果无法从图片中提取到词槽值，slot_value必须输出None，不能使用"未提及"、"无具体日期"、"无利息约定"等替代字符串
@@ -140,7 +144,7 @@ class AssociationFeaturesExtractor:
         4. 你开始提取每张图片的`债务人微信备注名`, 并根据`债务人微信备注名`将图片进行分组，分组后会赋值给输出结果中的`slot_group_name`，同时也会赋值给`image_sequence_info`中的`slot_group_name`。
         5. 你开始按照session_state中的target_slots_to_extract配置，逐个提取每个目标词槽的信息：
            a) 对于每个目标词槽，分析所有相关图片内容
-           b) 提取词槽值，并记录该值来源于哪些图片URL
+           b) 提取词槽值，并记录该值来源于哪些图片（图片编号）
            c) 评估提取结果的置信度（基于图片清晰度、信息完整性等）
            d) 详细记录推理过程，说明如何从图片内容得出该值
         6. 对于每个图片，确保在image_sequence_info中正确设置sequence_number，反映图片在对话中的时间顺序
@@ -199,13 +203,21 @@ class AssociationFeaturesExtractor:
            - 如果对话中没有明确提及约定还款利息，则输出None
         </目标字段提取说明>
         """
-    async def arun(self, image_urls: List[str]) -> AssociationFeaturesExtractionResults:
-        message_parts = ["请从以下证据图片中提取关键信息:"]
-        for i, image_url in enumerate(image_urls):
-            message_parts.append(f"\n{i+1}. 图片: {image_url}")
-        message = "\n".join(message_parts)
-        images = [Image(url=url) for url in image_urls]
-        return await self.agent.arun(input=message, images=images)
+    async def arun(self, image_urls: List[str]):
+        # 提示词中只使用图片编号，结果中的编号在服务端还原为URL
+        refs = ImageRefs(image_urls)
+        message = "\n".join(["请从以下证据图片中提取关键信息（按图片顺序编号）:", *refs.prompt_lines()])
+        images = [Image(url=url) for url in refs.urls]
+        run_response = await self.agent.arun(input=message, images=images)
+        content = getattr(run_response, "content", None)
+        if isinstance(content, AssociationFeaturesExtractionResults):
+            for result_item in content.results:
+                for info in result_item.image_sequence_info:
+                    info.url = refs.resolve(info.image_id)
+                result_item.image_sequence_info = [info for info in result_item.image_sequence_info if info.url]
+                for slot in result_item.slot_extraction:
+                    slot.slot_value_from_url = refs.resolve_all(slot.slot_value_from_image_ids)
+        return run_response
     
     def reload_config(self):
         """重新加载配置"""
@@ -32,6 +32,111 @@ def get_legal_report_schema() -> str:
     return json.dumps(schema, ensure_ascii=False, indent=2)
 
 
+def _parse_timestamp(value: str) -> datetime:
+    """解析 ISO 格式的时间；不带时区的时间（datetime.now() 写入）按本地时区处理，便于与带时区的时间比较"""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.astimezone()
+
+
+def select_new_commits(
+    commits: List[Dict[str, Any]],
+    ref_commit_ids: List[int],
+    analyzed_at: Optional[str] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    找出上一版报告之后新增的提交记录
+    
+    Args:
+        commits: 全部提交记录（updated_at 为 ISO 格式的修改时间）
+        ref_commit_ids: 上一版报告引用的提交记录ID
+        analyzed_at: 上一版报告的完成时间（ISO 格式），提供时检查引用的提交记录在此之后是否被修改
+    
+    Returns:
+        新增的提交记录（保持原顺序）；上一版没有引用任何提交记录，或引用的提交记录已被删除、被修改时返回 None，需要全量分析
+    """
+    previous_ids = set(ref_commit_ids)
+    current_ids = {commit.get('id') for commit in commits}
+    if not previous_ids or not previous_ids <= current_ids:
+        return None
+    if analyzed_at:
+        completed_at = _parse_timestamp(analyzed_at)
+        for commit in commits:
+            updated_at = commit.get('updated_at')
+            if commit.get('id') in previous_ids and updated_at and _parse_timestamp(updated_at) > completed_at:
+                return None
+    return [commit for commit in commits if commit.get('id') not in previous_ids]
+
+
+def estimate_input_chars(prompt_chars: int, max_turns: int, previous_turns: Optional[int] = None) -> int:
+    """
+    估算一次分析发送给 Claude 的输入量（字符数）
+    
+    Agent 每一轮都会重新发送完整的上下文，输入量约为提示词长度乘以轮数。
+    上一版报告记录了实际轮数时按它估算（不超过本模式的最大轮数），否则按最大轮数估算。
+    """
+    turns = min(max_turns, previous_turns) if previous_turns else max_turns
+    return prompt_chars * turns
+
+
+# 报告中各论点块的路径（与 LegalReport 结构一致）
+_ARGUMENT_BLOCK_PATHS = (
+    ("cause_of_action",),
+    ("parties", "plaintiff"),
+    ("parties", "defendant"),
+    ("jurisdiction",),
+    ("claims",),
+    ("rights_and_obligations_process", "formation"),
+    ("rights_and_obligations_process", "performance"),
+    ("rights_and_obligations_process", "breach"),
+)
+
+
+def condense_report(content: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    压缩上一版报告，只保留增量分析需要沿用的事实认定和结论
+    
+    每个论点块保留观点、证据维度的回答（证据附引用的材料）和结论维度的回答；
+    省略预设问题、回答原因、法律维度、引用的系统资源和追问问题，这些内容由增量分析按新的 JSON Schema 重新生成。
+    
+    Args:
+        content: 上一版报告内容（LegalReport 格式的字典）
+        
+    Returns:
+        {"case_title": ..., 论点路径: {"view_points": [...], "evidences": [...], "conclusion": [...]}, "conclusion": {...}}
+    """
+    def answers(section: Any) -> List[Any]:
+        results = (section or {}).get('results') or []
+        return [result.get('answer') for result in results if isinstance(result, dict) and result.get('answer')]
+    
+    condensed: Dict[str, Any] = {"case_title": content.get('case_title')}
+    for path in _ARGUMENT_BLOCK_PATHS:
+        block: Any = content
+        for key in path:
+            block = (block or {}).get(key)
+        if not isinstance(block, dict):
+            continue
+        
+        evidences = []
+        for result in (block.get('evidences') or {}).get('results') or []:
+            if not isinstance(result, dict) or not result.get('answer'):
+                continue
+            materials = (result.get('refs_case_resources') or {}).get('materials')
+            evidences.append({"answer": result['answer'], "materials": materials} if materials else result['answer'])
+        
+        condensed[".".join(path)] = {
+            "view_points": answers(block.get('view_points')),
+            "evidences": evidences,
+            "conclusion": answers(block.get('conclusion')),
+        }
+    
+    conclusion = content.get('conclusion') or {}
+    condensed["conclusion"] = {
+        "summary": conclusion.get('summary'),
+        "probability_assessment": conclusion.get('probability_assessment'),
+    }
+    return condensed
+
+
 class CaseAnalysisAgent:
     """
     基于 Claude Agent SDK 的案件分析智能体
@@ -118,29 +223,34 @@ class CaseAnalysisAgent:
         if commits:
             context_parts.append("\n## 案情陈述与材料")
             context_parts.append(f"共有 {len(commits)} 条提交记录\n")
-            
-            for i, commit in enumerate(commits, 1):
-                context_parts.append(f"### 提交记录 #{commit.get('id', i)}")
-                context_parts.append(f"- 提交时间: {commit.get('created_at', 'N/A')}")
-                
-                statement = commit.get('statement')
-                if statement:
-                    context_parts.append(f"- 用户陈述:\n  > {statement}")
-                
-                materials = commit.get('materials', [])
-                if materials:
-                    context_parts.append(f"- 相关材料: {len(materials)} 份")
-                    for mat in materials:
-                        mat_name = mat.get('name', mat.get('file_name', '未知材料'))
-                        mat_url = mat.get('url', '')
-                        context_parts.append(f"  - {mat_name}")
-                        if mat_url:
-                            context_parts.append(f"    URL: {mat_url}")
-                
-                context_parts.append("")
+            context_parts.extend(self._format_commits(commits))
         
         return "\n".join(context_parts)
     
+    def _format_commits(self, commits: List[Dict[str, Any]]) -> List[str]:
+        """将提交记录格式化为上下文行"""
+        lines = []
+        for i, commit in enumerate(commits, 1):
+            lines.append(f"### 提交记录 #{commit.get('id', i)}")
+            lines.append(f"- 提交时间: {commit.get('created_at', 'N/A')}")
+            
+            statement = commit.get('statement')
+            if statement:
+                lines.append(f"- 用户陈述:\n  > {statement}")
+            
+            materials = commit.get('materials', [])
+            if materials:
+                lines.append(f"- 相关材料: {len(materials)} 份")
+                for mat in materials:
+                    mat_name = mat.get('name', mat.get('file_name', '未知材料'))
+                    mat_url = mat.get('url', '')
+                    lines.append(f"  - {mat_name}")
+                    if mat_url:
+                        lines.append(f"    URL: {mat_url}")
+            
+            lines.append("")
+        return lines
+    
     def _build_analysis_prompt(self, case_context: str) -> str:
         """
         构建分析请求的完整提示词
@@ -151,8 +261,6 @@ class CaseAnalysisAgent:
         Returns:
             完整的分析提示词
         """
-        schema_info = get_legal_report_schema()
-        
         prompt = f"""
 请分析以下案件信息，并生成一份完整的案件论证报告。
 
@@ -166,7 +274,14 @@ class CaseAnalysisAgent:
 2. **忽略未验证信息**：【案件基本信息】和【当事人信息】仅作为背景参考。如果这些信息在【案情陈述与材料】中没有对应的陈述或证据支持，请勿直接采信。即：事实必须来自用户的明确陈述或提交的证据材料。
 3. **保持客观**：如果在提交记录中未找到必要信息（如未提及对方姓名），请在报告对应字段填写"未知"或根据现有材料如实描述，不要编造，也不要直接使用背景信息填充。
 
-## 输出要求
+{self._build_output_requirements()}"""
+        return prompt
+
+    def _build_output_requirements(self) -> str:
+        """全量和增量分析共用的输出要求"""
+        schema_info = get_legal_report_schema()
+        
+        return f"""## 输出要求
 
 请严格按照以下 JSON Schema 格式输出报告：
 
@@ -185,6 +300,62 @@ class CaseAnalysisAgent:
 
 请直接输出 JSON 格式的报告，不要包含其他内容。
 """
+    
+    def _build_incremental_prompt(
+        self,
+        case_info: Dict[str, Any],
+        previous_report: Dict[str, Any],
+        new_commits: List[Dict[str, Any]]
+    ) -> str:
+        """
+        构建增量分析的提示词：压缩后的上一版报告 + 新增的提交记录
+        
+        上一版报告只发送事实认定和结论（见 condense_report），完整报告的 JSON 与 Schema 本身长度相当，
+        直接发送会使增量提示词比全量提示词更长。
+        
+        Args:
+            case_info: 案件基本信息
+            previous_report: 上一版报告（content 为报告内容，ref_commit_ids 为其引用的提交记录）
+            new_commits: 上一版报告之后新增的提交记录
+            
+        Returns:
+            增量分析提示词
+        """
+        case_context = self._build_case_context(case_info, [])
+        # 紧凑序列化，减少上一版报告占用的 token
+        previous_content = json.dumps(
+            condense_report(previous_report["content"]), ensure_ascii=False, separators=(",", ":")
+        )
+        new_commits_context = "\n".join(self._format_commits(new_commits))
+        
+        prompt = f"""
+请基于上一版案件论证报告和新增的提交记录，更新并输出一份完整的案件论证报告。
+
+{case_context}
+
+## 上一版论证报告
+上一版报告基于 {len(previous_report.get('ref_commit_ids') or [])} 条提交记录生成，其中的事实认定已经核实，可以直接沿用。
+以下为各论点（键为论点在报告中的路径）观点、证据和结论维度的回答，以及报告总结论；输出时按 JSON Schema 补全预设问题、原因、法律依据等其余字段：
+
+```json
+{previous_content}
+```
+
+## 新增案情陈述与材料
+共有 {len(new_commits)} 条新增提交记录
+
+{new_commits_context}
+
+---
+
+## 核心原则（CRITICAL）
+
+1. **事实来源严格限制**：事实认定只能来自【上一版论证报告】已认定的内容和【新增案情陈述与材料】。
+2. **增量更新**：保留上一版报告中未受新增内容影响的论点；新增内容补充、修正或推翻原有认定时，更新对应的论点和总结论。新增内容与原有认定矛盾时，以较新的陈述或证据为准，并在结论中说明。
+3. **忽略未验证信息**：【案件基本信息】和【当事人信息】仅作为背景参考，没有陈述或证据支持的信息请勿直接采信。
+4. **保持客观**：仍然缺少的必要信息请如实填写"未知"，不要编造。
+
+{self._build_output_requirements()}"""
         return prompt
     
     async def analyze(
@@ -192,16 +363,25 @@ class CaseAnalysisAgent:
         case_id: int,
         case_info: Dict[str, Any],
         commits: List[Dict[str, Any]],
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        previous_report: Optional[Dict[str, Any]] = None,
+        run_stats: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         执行案件分析
         
+        提供上一版报告时优先增量分析：只把上一版报告和其后新增的提交记录发给 Claude。
+        上一版引用的提交记录已被删除或修改、没有新增提交、增量分析预估输入量过大或增量分析失败时回退到全量分析。
+        
         Args:
             case_id: 案件ID
             case_info: 案件基本信息
-            commits: 提交记录列表
+            commits: 全部提交记录列表
             progress_callback: 可选的进度回调函数
+            previous_report: 可选的上一版已完成报告
+                {"content": 报告内容, "ref_commit_ids": 引用的提交记录ID, "completed_at": ISO 格式的完成时间,
+                 "num_turns": 上一版分析的实际轮数（可选）}
+            run_stats: 可选，传入时写入本次分析的模式、提示词长度、耗时和 token 用量
             
         Returns:
             LegalReport 格式的分析报告（字典形式）
@@ -218,33 +398,63 @@ class CaseAnalysisAgent:
                 "progress": 10
             })
         
-        # 1. 构建案件上下文
-        case_context = self._build_case_context(case_info, commits)
-        
-        if progress_callback:
-            await progress_callback({
-                "status": "processing",
-                "message": "正在调用 Claude 进行分析...",
-                "progress": 30
-            })
-        
-        # 2. 构建分析提示词
-        analysis_prompt = self._build_analysis_prompt(case_context)
-        
-        # 3. 调用 Claude 进行分析
         try:
-            # 使用 Claude Agent SDK 进行分析
-            response = await self._call_claude_agent(analysis_prompt, case_id, progress_callback)
+            report_data = None
+            new_commits = None
+            if previous_report and previous_report.get("content"):
+                new_commits = select_new_commits(
+                    commits, previous_report.get("ref_commit_ids") or [], previous_report.get("completed_at")
+                )
             
-            if progress_callback:
-                await progress_callback({
-                    "status": "processing",
-                    "message": "正在解析分析结果...",
-                    "progress": 80
-                })
+            full_prompt = self._build_analysis_prompt(self._build_case_context(case_info, commits))
+            fallback_reason = None
+            if new_commits:
+                incremental_prompt = self._build_incremental_prompt(case_info, previous_report, new_commits)
+                # 提交记录很少时压缩后的上一版报告仍可能比它替代的提交记录长，但增量分析的轮数上限更低，
+                # 按提示词长度和轮数估算两种模式的输入量
+                previous_turns = previous_report.get("num_turns")
+                incremental_input = estimate_input_chars(
+                    len(incremental_prompt), settings.CASE_ANALYSIS_INCREMENTAL_MAX_TURNS, previous_turns
+                )
+                full_input = estimate_input_chars(len(full_prompt), settings.CASE_ANALYSIS_MAX_TURNS, previous_turns)
+                if incremental_input >= full_input * settings.CASE_ANALYSIS_INCREMENTAL_MAX_INPUT_RATIO:
+                    fallback_reason = "增量分析预估输入量过大"
+                else:
+                    logger.info(f"案件 #{case_id} 增量分析：复用上一版报告，新增 {len(new_commits)} 条提交记录")
+                    try:
+                        report_data = await self._run_analysis(
+                            case_id,
+                            case_info,
+                            incremental_prompt,
+                            settings.CASE_ANALYSIS_INCREMENTAL_MAX_TURNS,
+                            progress_callback,
+                            run_stats
+                        )
+                        if run_stats is not None:
+                            run_stats.update(
+                                mode="incremental",
+                                new_commit_count=len(new_commits),
+                                full_prompt_chars=len(full_prompt)
+                            )
+                    except Exception as e:
+                        logger.warning(f"案件 #{case_id} 增量分析失败，回退到全量分析: {e}")
+                        fallback_reason = str(e)
+                        if run_stats is not None:
+                            run_stats.clear()
             
-            # 4. 解析响应
-            report_data = self._parse_response(response, case_id, case_info)
+            if report_data is None:
+                report_data = await self._run_analysis(
+                    case_id,
+                    case_info,
+                    full_prompt,
+                    settings.CASE_ANALYSIS_MAX_TURNS,
+                    progress_callback,
+                    run_stats
+                )
+                if run_stats is not None:
+                    run_stats.update(mode="full", new_commit_count=len(commits))
+                    if fallback_reason:
+                        run_stats["fallback_reason"] = fallback_reason
             
             if progress_callback:
                 await progress_callback({
@@ -266,11 +476,50 @@ class CaseAnalysisAgent:
                 })
             raise
     
+    async def _run_analysis(
+        self,
+        case_id: int,
+        case_info: Dict[str, Any],
+        prompt: str,
+        max_turns: int,
+        progress_callback: Optional[callable] = None,
+        run_stats: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """调用 Claude 执行一次分析并解析出报告"""
+        if progress_callback:
+            await progress_callback({
+                "status": "processing",
+                "message": "正在调用 Claude 进行分析...",
+                "progress": 30
+            })
+        
+        started = time.perf_counter()
+        response = await self._call_claude_agent(
+            prompt, case_id, progress_callback, max_turns=max_turns, run_stats=run_stats
+        )
+        
+        if progress_callback:
+            await progress_callback({
+                "status": "processing",
+                "message": "正在解析分析结果...",
+                "progress": 80
+            })
+        
+        report_data = self._parse_response(response, case_id, case_info)
+        if run_stats is not None:
+            run_stats.update(
+                prompt_chars=len(prompt),
+                latency_ms=round((time.perf_counter() - started) * 1000)
+            )
+        return report_data
+    
     async def _call_claude_agent(
         self, 
         prompt: str, 
         case_id: int,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        max_turns: Optional[int] = None,
+        run_stats: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         调用 Claude Agent SDK 执行分析（使用 ClaudeSDKClient）
@@ -278,6 +527,8 @@ class CaseAnalysisAgent:
         Args:
             prompt: 分析提示词
             case_id: 案件ID (用于生成 session_id)
+            max_turns: 最大轮数，默认 CASE_ANALYSIS_MAX_TURNS
+            run_stats: 可选，传入时写入 ResultMessage 中的 token 用量、轮数和耗时
             
         Returns:
             Claude 的响应文本
@@ -307,7 +558,7 @@ class CaseAnalysisAgent:
                     "include_partial_messages": True,
                     "max_thinking_tokens": 8000,
                     # Remove max_turns=1 restriction to allow tool use
-                    "max_turns": 20, 
+                    "max_turns": max_turns or settings.CASE_ANALYSIS_MAX_TURNS,
                 }
                 
                 options = ClaudeAgentOptions(**agent_options_kwargs)
@@ -406,6 +657,13 @@ class CaseAnalysisAgent:
                         # 3. 处理结果消息（完成信号）
                         elif isinstance(msg, ResultMessage):
                             logger.info(f"[Event #{event_count}] ✅ 收到 ResultMessage，任务完成")
+                            if run_stats is not None:
+                                run_stats.update(
+                                    usage=getattr(msg, "usage", None),
+                                    num_turns=getattr(msg, "num_turns", None),
+                                    duration_ms=getattr(msg, "duration_ms", None),
+                                    total_cost_usd=getattr(msg, "total_cost_usd", None)
+                                )
                             break
                         
                         # 4. 其他类型
@@ -556,7 +814,9 @@ async def run_case_analysis(
     case_id: int,
     case_info: Dict[str, Any],
     commits: List[Dict[str, Any]],
-    progress_callback: Optional[callable] = None
+    progress_callback: Optional[callable] = None,
+    previous_report: Optional[Dict[str, Any]] = None,
+    run_stats: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     执行案件分析的快捷函数
@@ -566,6 +826,8 @@ async def run_case_analysis(
         case_info: 案件基本信息
         commits: 提交记录列表
         progress_callback: 可选的进度回调函数
+        previous_report: 可选的上一版已完成报告，提供时优先增量分析
+        run_stats: 可选，传入时写入本次分析的统计信息
         
     Returns:
         LegalReport 格式的分析报告
@@ -574,5 +836,7 @@ async def run_case_analysis(
         case_id=case_id,
         case_info=case_info,
         commits=commits,
-        progress_callback=progress_callback
+        progress_callback=progress_callback,
+        previous_report=previous_report,
+        run_stats=run_stats
     )
@@ -1,9 +1,11 @@
 import asyncio
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Awaitable, Callable
 from agno.agent import Agent
 from agno.media import Image
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 from app.agentic.llm.base import openai_image_model, qwen_muti_model
+from app.agentic.llm.image_refs import ImageRefs
 from app.core.config_manager import config_manager
 
 
@@ -53,7 +55,8 @@ def get_evidence_type_features_guide_v2():
 
 
 class EvidenceClassifiResult(BaseModel):
-    image_url: str
+    image_id: str = Field(description="图片编号，如 E1")
+    image_url: SkipJsonSchema[Optional[str]] = None  # 服务端根据图片编号回填，不由模型输出
     evidence_type: str  # 改为字符串，不再使用枚举
     confidence: float
     reasoning: str
@@ -63,6 +66,11 @@ class EvidenceClassifiResults(BaseModel):
     results: List[EvidenceClassifiResult]
 
 
+class ShardedClassifiResults(EvidenceClassifiResults):
+    """分片分类结果：合并后的分类结果，以及重试后仍未得到结果的图片"""
+    failed_image_urls: List[str] = []
+
+
 class EvidenceClassifier:
     """基于config_manager和YAML配置的证据分类器V2"""
 
@@ -103,6 +111,7 @@ class EvidenceClassifier:
 
 4. **输出格式:**
    * 你的最终输出必须是一个JSON对象，格式为 `EvidenceClassifiResults`
+   * `image_id` 字段必须是用户消息中给出的图片编号（如 `E1`），每张图片输出一个结果
    * `evidence_type` 字段必须是配置中定义的有效证据类型名称
    * `confidence` 字段表示你的置信度（0.0到1.0之间）
    * `reasoning` 字段需要详细解释你的分类理由
@@ -138,14 +147,16 @@ class EvidenceClassifier:
 {evidence_type_descriptions}
 """
 
-    async def arun(self,image_urls: List[str]):
-        # 构建 message
-        message_parts = ["请分析分类以下证据图片:"]
-        for i, url in enumerate(image_urls):
-            message_parts.append(f"{i + 1}. {url}")
-        message = "\n".join(message_parts)
-        images = [Image(url=url) for url in image_urls]
-        return await self.agent.arun(input=message, images=images)
+    async def arun(self, image_urls: List[str]):
+        # 提示词中只使用图片编号，结果中的编号在服务端还原为URL
+        refs = ImageRefs(image_urls)
+        message = "\n".join(["请分析分类以下证据图片（按图片顺序编号）:", *refs.prompt_lines()])
+        images = [Image(url=url) for url in refs.urls]
+        run_response = await self.agent.arun(input=message, images=images)
+        content = getattr(run_response, "content", None)
+        if isinstance(content, EvidenceClassifiResults):
+            content.results = refs.resolve_results(content.results)
+        return run_response
 
     def reload_config(self):
         """重新加载配置"""
@@ -159,6 +170,100 @@ class EvidenceClassifier:
         })
 
 
+async def classify_evidences_sharded(
+    image_urls: List[str],
+    chunk_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    chunk_timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    on_chunk_done: Optional[Callable[[List[EvidenceClassifiResult]], Awaitable[None]]] = None,
+) -> ShardedClassifiResults:
+    """分片并发分类证据图片
+
+    将图片拆分为多个分片，在服务商并发限制内并发调用分类器，合并各分片结果。
+    超时或失败的分片（以及分片返回结果中缺失的图片）会重新分片重试，
+    已成功的结果始终保留，不会因为个别分片失败而整体丢弃。
+
+    Args:
+        image_urls: 图片URL列表
+        chunk_size: 每个分片的图片数量，默认 settings.EVIDENCE_CLASSIFY_CHUNK_SIZE
+        max_concurrency: 本次调用的最大并发分片数，默认 settings.EVIDENCE_CLASSIFY_MAX_CONCURRENCY
+            （同时受服务商共享的并发上限约束）
+        chunk_timeout: 单个分片超时时间（秒），默认 settings.EVIDENCE_CLASSIFY_CHUNK_TIMEOUT
+        max_retries: 失败图片的最大重试轮数，默认 settings.EVIDENCE_CLASSIFY_MAX_RETRIES
+        on_chunk_done: 每个分片成功后的回调（参数为该分片新得到的结果），用于及时持久化检查点
+
+    Returns:
+        ShardedClassifiResults: 按输入顺序排列的分类结果，以及最终失败的图片URL
+    """
+    from loguru import logger
+    from app.core.config import settings
+    from app.agentic.llm.concurrency import get_provider_semaphore
+
+    chunk_size = max(1, chunk_size or settings.EVIDENCE_CLASSIFY_CHUNK_SIZE)
+    max_concurrency = max_concurrency or settings.EVIDENCE_CLASSIFY_MAX_CONCURRENCY
+    chunk_timeout = chunk_timeout or settings.EVIDENCE_CLASSIFY_CHUNK_TIMEOUT
+    max_retries = settings.EVIDENCE_CLASSIFY_MAX_RETRIES if max_retries is None else max_retries
+
+    # 本次调用自己的并发上限嵌套在服务商共享的并发上限之内：
+    # 共享信号量可能已由其他调用方按不同的上限创建，max_concurrency 不能依赖它生效
+    call_semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    provider_semaphore = get_provider_semaphore("qwen", settings.EVIDENCE_CLASSIFY_MAX_CONCURRENCY)
+
+    async def run_chunk(chunk: List[str]) -> List[EvidenceClassifiResult]:
+        async with call_semaphore, provider_semaphore:
+            try:
+                run_response = await asyncio.wait_for(
+                    EvidenceClassifier().arun(chunk),
+                    timeout=chunk_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"证据分类分片超时: {len(chunk)} 张图片, timeout={chunk_timeout}s")
+                return []
+            except Exception as e:
+                logger.warning(f"证据分类分片失败: {len(chunk)} 张图片, 错误: {str(e)}")
+                return []
+        content = getattr(run_response, "content", None)
+        if not isinstance(content, EvidenceClassifiResults):
+            logger.warning(f"证据分类分片结果为空: {len(chunk)} 张图片")
+            return []
+        return content.results
+
+    # 以URL为键合并结果（结果URL由图片编号还原，与输入完全一致），输入中的重复URL只分类一次
+    merged: Dict[str, EvidenceClassifiResult] = {}
+    pending: List[str] = list(dict.fromkeys(image_urls))
+
+    for attempt in range(max_retries + 1):
+        if not pending:
+            break
+        if attempt > 0:
+            logger.info(f"证据分类重试第 {attempt} 轮: 剩余 {len(pending)} 张图片")
+
+        async def run_and_merge(chunk: List[str]) -> None:
+            results = await run_chunk(chunk)
+            # 只接受属于本分片的图片结果
+            chunk_keys = set(chunk)
+            accepted = []
+            for res in results:
+                if res.image_url in chunk_keys and res.image_url not in merged:
+                    merged[res.image_url] = res
+                    accepted.append(res)
+            if accepted and on_chunk_done:
+                await on_chunk_done(accepted)
+
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        await asyncio.gather(*(run_and_merge(chunk) for chunk in chunks))
+
+        pending = [url for url in pending if url not in merged]
+
+    ordered_results = [merged[url] for url in dict.fromkeys(image_urls) if url in merged]
+
+    if pending:
+        logger.warning(f"证据分类完成，{len(pending)} 张图片在 {max_retries} 次重试后仍失败")
+
+    return ShardedClassifiResults(results=ordered_results, failed_image_urls=pending)
+
+
 if __name__ == '__main__':
     # 模拟外部传入的图片 URL 列表
     image_urls = [
@@ -1,8 +1,10 @@
 from typing import Optional, List, Dict, Any, Union
 from agno.agent import Agent
 from agno.media import Image
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 from app.agentic.llm.base import openai_image_model, qwen_muti_model
+from app.agentic.llm.image_refs import ImageRefs
 from app.core.config_manager import config_manager
 
 
@@ -33,7 +35,8 @@ class SlotExtraction(BaseModel):
 
 class ResultItem(BaseModel):
     """单个词槽提取结果"""
-    image_url: str
+    image_id: str = Field(description="图片编号，如 E1")
+    image_url: SkipJsonSchema[Optional[str]] = None  # 服务端根据图片编号回填，不由模型输出
     classification_category: str
     slot_extraction: List[SlotExtraction]
    
@@ -111,6 +114,7 @@ class EvidenceFeaturesExtractor:
         </Extraction Process>
         
         <Output Format>
+        0. 每张图片输出一个结果，image_id 必须是用户消息中给出的图片编号（如 E1）
         1. 严格按照配置中指定证据类型的词槽进行提取
         2. 每个词槽都要包含：slot_name, slot_value, confidence, reasoning, slot_desc, slot_value_type, slot_required
         3. slot_value必须符合指定的数据类型（如果能提取到值），如果无法提取则必须输出None
@@ -133,17 +137,18 @@ class EvidenceFeaturesExtractor:
             self.agent.session_state = {}
         self.agent.session_state["extraction_guide"] = extraction_guide
         
-        # 构建消息
-        message_parts = ["请从以下证据图片中提取关键信息:"]
-        for i, image in enumerate(evidence_images):
-            message_parts.append(f"\n{i+1}. 证据类型: {image.evidence_type}")
-            message_parts.append(f"   图片url: {image.url}")
-        
-        message = "\n".join(message_parts)
+        # 构建消息：提示词中只使用图片编号，结果中的编号在服务端还原为URL
+        refs = ImageRefs(image.url for image in evidence_images)
+        evidence_types = {image.url: f"证据类型: {image.evidence_type}" for image in evidence_images}
+        message = "\n".join(["请从以下证据图片中提取关键信息（按图片顺序编号）:", *refs.prompt_lines(evidence_types)])
         
         # 创建图片对象，直接使用URL（文件名已在上传时清理）
-        images = [Image(url=image.url) for image in evidence_images]
-        return await self.agent.arun(input=message, images=images)
+        images = [Image(url=url) for url in refs.urls]
+        run_response = await self.agent.arun(input=message, images=images)
+        content = getattr(run_response, "content", None)
+        if isinstance(content, EvidenceExtractionResults):
+            content.results = refs.resolve_results(content.results)
+        return run_response
 
     def reload_config(self):
         """重新加载配置"""
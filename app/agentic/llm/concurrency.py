@@ -0,0 +1,33 @@
+"""
+模型服务商并发控制
+
+同一事件循环内，对同一服务商（qwen/openai/xunfei 等）的并发调用共享一个信号量，
+避免分片/并行调用时触发服务商限流。
+Celery 任务中每次 asyncio.run 都会创建新的事件循环，因此信号量按事件循环隔离缓存。
+"""
+import asyncio
+import weakref
+from typing import Dict
+
+
+_loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_provider_semaphore(provider: str, limit: int) -> asyncio.Semaphore:
+    """获取当前事件循环下某个服务商的并发信号量
+
+    Args:
+        provider: 服务商标识，如 "qwen"、"openai"、"xunfei"
+        limit: 最大并发数（仅在首次创建时生效，之后的调用方拿到的是已创建的信号量；
+            需要单独限制某次调用的并发时，在外层再嵌套一个调用自己的信号量）
+
+    Returns:
+        asyncio.Semaphore: 当前事件循环共享的信号量
+    """
+    loop = asyncio.get_running_loop()
+    semaphores = _loop_semaphores.setdefault(loop, {})
+    if provider not in semaphores:
+        semaphores[provider] = asyncio.Semaphore(max(1, limit))
+    return semaphores[provider]
@@ -0,0 +1,64 @@
+"""
+提示词中的图片编号
+
+向模型发送图片时，提示词中只使用短编号（E1..En）标识图片，不再回显完整的COS URL：
+- 减少提示词和输出中的 token（COS URL 通常上百个字符）
+- 模型输出的编号在服务端通过字典还原为发送时的原始 URL，结果合并为 O(n) 的字典查找，
+  不再需要对每个结果反复 unquote 并与所有证据 URL 逐一比较
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import unquote
+
+IMAGE_ID_PREFIX = "E"
+
+
+class ImageRefs:
+    """一次模型调用中的图片编号表（编号顺序与发送给模型的图片顺序一致）"""
+
+    def __init__(self, urls: Iterable[str]):
+        # 重复的 URL 只编号一次
+        self.urls: List[str] = list(dict.fromkeys(urls))
+        self.ids: List[str] = [f"{IMAGE_ID_PREFIX}{i + 1}" for i in range(len(self.urls))]
+        self._url_by_id: Dict[str, str] = dict(zip(self.ids, self.urls))
+        # 兼容模型仍然回显 URL 的情况
+        self._url_by_url: Dict[str, str] = {unquote(url): url for url in self.urls}
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def items(self):
+        """(编号, URL) 列表"""
+        return zip(self.ids, self.urls)
+
+    def resolve(self, ref: Optional[str]) -> Optional[str]:
+        """将模型输出的图片编号还原为原始 URL，未知编号返回 None"""
+        if not ref:
+            return None
+        ref = ref.strip()
+        url = self._url_by_id.get(ref.upper())
+        if url is None:
+            url = self._url_by_url.get(unquote(ref))
+        return url
+
+    def resolve_all(self, refs: Iterable[str]) -> List[str]:
+        """批量还原图片编号，忽略未知编号"""
+        return [url for url in (self.resolve(ref) for ref in refs) if url]
+
+    def resolve_results(self, results: List[Any]) -> List[Any]:
+        """根据结果的 image_id 回填 image_url，丢弃编号无法识别的结果"""
+        resolved = []
+        for res in results:
+            res.image_url = self.resolve(res.image_id)
+            if res.image_url:
+                resolved.append(res)
+        return resolved
+
+    def prompt_lines(self, extra: Optional[Dict[str, str]] = None) -> List[str]:
+        """提示词中的图片列表，extra 为每张图片附加的说明（按 URL）"""
+        lines = []
+        for index, (image_id, url) in enumerate(self.items(), start=1):
+            line = f"{image_id}: 第{index}张图片"
+            if extra and url in extra:
+                line = f"{line}，{extra[url]}"
+            lines.append(line)
+        return lines
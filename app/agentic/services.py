@@ -6,9 +6,8 @@ from app.agentic.agents.evidence_classifier import EvidenceClassifier, EvidenceC
 from app.agentic.agents.evidence_features_extractor import EvidenceFeaturesExtractor, EvidenceType, EvidenceExtractionResults
 from app.integrations.cos import COSService
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.evidences.models import Evidence
+from app.evidences.services import load_evidences_by_urls
 from app.db.session import SessionLocal
-from sqlalchemy import select
 
 
 async def classify_evidence(
@@ -84,10 +83,10 @@ async def classify_evidence_by_urls(
 
     # 更新数据库individual_features
     if db is not None and result and result.results:
+        evidences_by_url, _ = await load_evidences_by_urls(db, [r.image_url for r in result.results])
         for r in result.results:
             # 查找Evidence
-            q = await db.execute(select(Evidence).where(Evidence.file_url == r.image_url))
-            evidence = q.scalars().first()
+            evidence = evidences_by_url.get(r.image_url)
             if evidence:
                 # 合并现有数据，而不是覆盖
                 if evidence.individual_features is None:
@@ -163,10 +162,8 @@ async def extract_evidence_features(
     # 更新数据库individual_features
     if db is not None and result and result.results:
         # 为每个URL更新对应的证据记录
-        for url in urls:
-            # 查找Evidence
-            q = await db.execute(select(Evidence).where(Evidence.file_url == url))
-            evidence = q.scalars().first()
+        evidences_by_url, _ = await load_evidences_by_urls(db, urls)
+        for url, evidence in evidences_by_url.items():
             if evidence:
                 # 收集该URL相关的提取结果
                 url_features = []
@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional, List, Dict
 
-from sqlalchemy import Column, DateTime, Enum as SQLAlchemyEnum, ForeignKey, Integer, String, Text, Float
+from sqlalchemy import Column, DateTime, Enum as SQLAlchemyEnum, ForeignKey, Integer, String, Text, Float, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -92,6 +92,48 @@ class Case(Base):
 
 
 
+class CaseSearchSummary(Base):
+    """案件列表检索摘要
+
+    每个案件一行，冗余案件列表需要筛选和排序的字段：债权人/债务人名称与类型、各状态证据数量、最近活动时间。
+    由数据库触发器在 cases / case_partys / evidences 变更时维护（见迁移 a4d8e2b6c913），应用只读。
+    """
+    __tablename__ = "case_search_summaries"
+    __table_args__ = (
+        # 当事人名称按 ILIKE '%...%' 筛选，使用 pg_trgm 三元组索引
+        Index('ix_case_search_summaries_creditor_name_trgm', 'creditor_name',
+              postgresql_using='gin', postgresql_ops={'creditor_name': 'gin_trgm_ops'}),
+        Index('ix_case_search_summaries_debtor_name_trgm', 'debtor_name',
+              postgresql_using='gin', postgresql_ops={'debtor_name': 'gin_trgm_ops'}),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    case_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("cases.id", ondelete="CASCADE"), nullable=False, unique=True, comment="案件ID"
+    )
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True, comment="案件所属用户ID")
+    case_type: Mapped[Optional[CaseType]] = mapped_column(SQLAlchemyEnum(CaseType), nullable=True)
+    case_status: Mapped[CaseStatus] = mapped_column(SQLAlchemyEnum(CaseStatus), nullable=False)
+    loan_amount: Mapped[Optional[float]] = mapped_column(Float, nullable=True, index=True)
+    case_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True, comment="案件创建时间")
+    case_updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True, comment="案件更新时间")
+
+    # 当事人（每个案件有且仅有一个债权人和一个债务人）
+    creditor_name: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    creditor_type: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    debtor_name: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    debtor_type: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+
+    # 证据统计
+    evidence_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="证据总数")
+    evidence_status_counts: Mapped[Dict[str, int]] = mapped_column(
+        JSONB, nullable=False, default=dict, comment="{evidence_status: 数量}"
+    )
+    last_activity_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True, comment="案件、当事人或证据最近一次变更的时间"
+    )
+
+
 class CaseParty(Base):
     """案件当事人模型"""
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
@@ -121,15 +163,21 @@ class CaseParty(Base):
     bank_phone: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     
     # 外键
-    case_id: Mapped[int] = mapped_column(Integer, ForeignKey("cases.id"), nullable=False)
+    case_id: Mapped[int] = mapped_column(Integer, ForeignKey("cases.id"), nullable=False, index=True)
     case = relationship("Case", back_populates="case_parties")
     
     
 class AssociationEvidenceFeature(Base):
     """关联证据特征模型"""
+    __table_args__ = (
+        UniqueConstraint('case_id', 'normalized_key', name='uq_association_feature_case_key'),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     
     slot_group_name: Mapped[str] = mapped_column(String(50), nullable=False)
+    # 标准化后的分组名，同一案件内唯一，用于提取结果按分组 upsert（迁移前已重复的旧记录为空）
+    normalized_key: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     association_evidence_ids: Mapped[List[int]] = mapped_column(JSONB, nullable=False)
     evidence_feature_status: Mapped[str] = mapped_column(String(20), default=AssociationEvidenceFeatureStatus.FEATURES_EXTRACTED)
     evidence_features: Mapped[List[Dict]] = mapped_column(JSONB, nullable=False)
@@ -202,6 +250,11 @@ class CaseAnalysisReport(Base):
     )  # 报告状态
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # 错误信息
     
+    # 分析方式与统计
+    analysis_mode: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)  # 分析模式：full / incremental
+    base_report_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # 增量分析复用的上一版报告ID
+    run_stats: Mapped[Optional[Dict]] = mapped_column(JSONB, nullable=True)  # 提示词长度、耗时、token 用量等
+    
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False)
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # 完成时间
 
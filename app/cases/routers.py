@@ -421,7 +421,7 @@ async def trigger_case_analysis(
     
     Args:
         case_id: 案件ID
-        request: 触发请求，包含触发类型和引用的 commit IDs（可选）
+        request: 触发请求，包含触发类型、引用的 commit IDs 和是否强制全量分析（可选）
         
     Returns:
         包含 report_id, task_id, status, message 的响应
@@ -430,17 +430,20 @@ async def trigger_case_analysis(
         # 解析请求参数
         trigger_type = "manual"
         commit_ids = None
+        full_analysis = False
         
         if request:
             trigger_type = request.trigger_type
             commit_ids = request.commit_ids if request.commit_ids else None
+            full_analysis = request.full_analysis
         
         # 触发分析
         result = await case_service.trigger_case_analysis(
             db=db,
             case_id=case_id,
             trigger_type=trigger_type,
-            ref_commit_ids=commit_ids
+            ref_commit_ids=commit_ids,
+            full_analysis=full_analysis
         )
         
         return SingleResponse(code=200, message="分析任务已提交", data=result)
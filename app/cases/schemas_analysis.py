@@ -13,6 +13,7 @@ class CaseInfoCommit(BaseSchema):
     statement: Optional[str] = None
     materials: List[Dict[str, Any]]
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -35,6 +36,11 @@ class CaseAnalysisReport(BaseSchema):
     status: str  # pending, processing, completed, failed
     error_message: Optional[str] = None
     
+    # 分析方式与统计
+    analysis_mode: Optional[str] = None  # full, incremental
+    base_report_id: Optional[int] = None  # 增量分析复用的上一版报告ID
+    run_stats: Optional[Dict[str, Any]] = None  # 提示词长度、耗时、token 用量等
+    
     created_at: datetime
     completed_at: Optional[datetime] = None
 
@@ -46,6 +52,7 @@ class TriggerAnalysisRequest(BaseModel):
     """触发分析请求模型"""
     trigger_type: str = "manual"  # commit_added, commit_updated, commit_removed, manual
     commit_ids: List[int] = []  # 引用的 commits ID 列表（空则使用全量）
+    full_analysis: bool = False  # 是否强制全量分析（默认复用上一版报告增量分析）
 
 
 class TriggerAnalysisResponse(BaseModel):
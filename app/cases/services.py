@@ -1,12 +1,14 @@
+import unicodedata
 from datetime import datetime
 from typing import Optional, Tuple, List, Callable, Awaitable, Any
 from fastapi import UploadFile
 
-from sqlalchemy import select, func
+from sqlalchemy import and_, false, func, or_, select, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
-from urllib.parse import unquote
-from app.cases.models import Case as CaseModel, CaseParty as CasePartyModel, AssociationEvidenceFeature, PartyType
+from sqlalchemy.orm import joinedload, selectinload
+from app.cases.models import Case as CaseModel, CaseParty as CasePartyModel, AssociationEvidenceFeature, CaseSearchSummary, PartyType
 from app.cases.schemas import CaseCreate, CaseUpdate, Case as CaseSchema, CasePartyCreate, CasePartyUpdate
 from agno.agent import RunOutput as RunResponse
 from agno.media import Image
@@ -15,8 +17,7 @@ from app.users.services import get_by_id_card, get_by_phone, create as create_us
 from app.users.schemas import UserCreate
 from app.users.schemas import User as UserSchema
 from loguru import logger
-from app.evidences.services import batch_create
-from app.evidences.models import Evidence
+from app.evidences.services import batch_create, load_evidences_by_ids
 from app.agentic.agents.association_features_extractor_v2 import AssociationFeaturesExtractor, AssociationFeaturesExtractionResults
 from app.agentic.agents.evidence_proofreader import EvidenceProofreader
 from fastapi import HTTPException
@@ -507,6 +508,41 @@ async def delete(db: AsyncSession, case_id: int) -> bool:
     return True
 
 
+# 案件列表可排序字段 -> 检索摘要中的列
+_CASE_LIST_SORT_FIELDS = {
+    'created_at': CaseSearchSummary.case_created_at,
+    'updated_at': CaseSearchSummary.case_updated_at,
+    'loan_amount': CaseSearchSummary.loan_amount,
+    'case_type': CaseSearchSummary.case_type,
+    'case_status': CaseSearchSummary.case_status,
+    'last_activity_at': CaseSearchSummary.last_activity_at,
+    'evidence_count': CaseSearchSummary.evidence_count,
+}
+
+# 当事人角色 -> 检索摘要中的 (名称, 类型) 列
+_CASE_LIST_PARTY_COLUMNS = {
+    'creditor': (CaseSearchSummary.creditor_name, CaseSearchSummary.creditor_type),
+    'debtor': (CaseSearchSummary.debtor_name, CaseSearchSummary.debtor_type),
+}
+
+
+def _party_filter(party_name: Optional[str], party_type: Optional[str], party_role: Optional[str]):
+    """同一个当事人同时满足名称、类型、角色条件（与原先 join 当事人表的语义一致）"""
+    roles = [party_role] if party_role else list(_CASE_LIST_PARTY_COLUMNS)
+    conditions = []
+    for role in roles:
+        if role not in _CASE_LIST_PARTY_COLUMNS:
+            continue
+        name_column, type_column = _CASE_LIST_PARTY_COLUMNS[role]
+        role_conditions = []
+        if party_name:
+            role_conditions.append(name_column.ilike(f"%{party_name}%"))
+        if party_type:
+            role_conditions.append(type_column == party_type)
+        conditions.append(and_(*role_conditions) if role_conditions else true())
+    return or_(*conditions) if conditions else false()
+
+
 async def get_multi_with_count(
     db: AsyncSession, *, skip: int = 0, limit: int = 100, user_id: Optional[int] = None,
     party_name: Optional[str] = None, party_type: Optional[str] = None,
@@ -514,88 +550,50 @@ async def get_multi_with_count(
     min_loan_amount: Optional[float] = None, max_loan_amount: Optional[float] = None,
     sort_by: Optional[str] = None, sort_order: Optional[str] = "desc"
 ) -> Tuple[list[CaseModel], int]:
-    """获取多个案件和总数，支持动态排序和多种筛选条件"""
-    from loguru import logger
-    
-    # 添加调试日志
+    """获取多个案件和总数，支持动态排序和多种筛选条件
+
+    筛选、排序和分页都在案件检索摘要（case_search_summaries）上完成，只为当前页的案件加载用户和当事人。
+    """
     logger.debug(f"Sorting parameters: sort_by={sort_by}, sort_order={sort_order}")
     logger.debug(f"Filter parameters: user_id={user_id}, party_name={party_name}, party_type={party_type}, party_role={party_role}, min_loan_amount={min_loan_amount}, max_loan_amount={max_loan_amount}")
     
-    # 构建基础查询，包含 joinedload
-    query = select(CaseModel).options(
-        joinedload(CaseModel.user),
-        joinedload(CaseModel.case_parties)
-    )
-    
-    # 跟踪是否已经join了当事人表
-    has_joined_parties = False
-    
-    # 应用用户ID筛选
+    conditions = []
     if user_id is not None:
-        query = query.where(CaseModel.user_id == user_id)
-    
-    # 如果需要筛选当事人类型或角色，或者需要按当事人姓名筛选，则需要join当事人表
-    needs_party_join = party_name or party_type or party_role
-    if needs_party_join and not has_joined_parties:
-        query = query.join(CaseModel.case_parties)
-        has_joined_parties = True
-    
-    # 应用当事人姓名筛选
-    if party_name:
-        query = query.where(CasePartyModel.party_name.ilike(f"%{party_name}%"))
-    
-    # 应用当事人类型筛选
-    if party_type:
-        query = query.where(CasePartyModel.party_type == party_type)
-    
-    # 应用当事人角色筛选
-    if party_role:
-        query = query.where(CasePartyModel.party_role == party_role)
-    
-    # 应用欠款金额区间筛选
+        conditions.append(CaseSearchSummary.user_id == user_id)
+    if party_name or party_type or party_role:
+        conditions.append(_party_filter(party_name, party_type, party_role))
     if min_loan_amount is not None:
-        query = query.where(CaseModel.loan_amount >= min_loan_amount)
-    
+        conditions.append(CaseSearchSummary.loan_amount >= min_loan_amount)
     if max_loan_amount is not None:
-        query = query.where(CaseModel.loan_amount <= max_loan_amount)
+        conditions.append(CaseSearchSummary.loan_amount <= max_loan_amount)
 
     # 查询总数
-    total_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(total_query)
+    total_result = await db.execute(select(func.count()).select_from(CaseSearchSummary).where(*conditions))
     total = total_result.scalar_one()
 
-    # 添加排序
-    if sort_by:
-        # 验证排序字段
-        valid_sort_fields = {
-            'created_at': CaseModel.created_at,
-            'updated_at': CaseModel.updated_at,
-            'loan_amount': CaseModel.loan_amount,
-            'case_type': CaseModel.case_type,
-            'case_status': CaseModel.case_status
-        }
-        
-        if sort_by in valid_sort_fields:
-            sort_column = valid_sort_fields[sort_by]
-            if sort_order and sort_order.lower() == 'desc':
-                logger.debug(f"Applying DESC sort on {sort_by}")
-                query = query.order_by(sort_column.desc())
-            else:
-                logger.debug(f"Applying ASC sort on {sort_by}")
-                query = query.order_by(sort_column.asc())
-        else:
-            # 默认按创建时间倒序
-            logger.debug("Invalid sort field, using default DESC sort on created_at")
-            query = query.order_by(CaseModel.created_at.desc())
-    else:
-        # 默认按创建时间倒序
-        logger.debug("No sort field provided, using default DESC sort on created_at")
-        query = query.order_by(CaseModel.created_at.desc())
-
-    # 获取数据，保持 joinedload
-    items_query = query.offset(skip).limit(limit)
-    items_result = await db.execute(items_query)
-    items = list(items_result.scalars().unique().all())
+    # 添加排序，默认按创建时间倒序；以案件ID作为次要排序，保证分页稳定
+    sort_column = _CASE_LIST_SORT_FIELDS.get(sort_by, CaseSearchSummary.case_created_at)
+    if sort_by and sort_by not in _CASE_LIST_SORT_FIELDS:
+        logger.debug("Invalid sort field, using default DESC sort on created_at")
+    descending = sort_by not in _CASE_LIST_SORT_FIELDS or (sort_order and sort_order.lower() == 'desc')
+    order_by = [sort_column.desc(), CaseSearchSummary.case_id.desc()] if descending \
+        else [sort_column.asc(), CaseSearchSummary.case_id.asc()]
+
+    page_result = await db.execute(
+        select(CaseSearchSummary.case_id).where(*conditions).order_by(*order_by).offset(skip).limit(limit)
+    )
+    case_ids = list(page_result.scalars().all())
+    if not case_ids:
+        return [], total
+
+    items_result = await db.execute(
+        select(CaseModel).options(
+            joinedload(CaseModel.user),
+            selectinload(CaseModel.case_parties)
+        ).where(CaseModel.id.in_(case_ids))
+    )
+    cases_by_id = {case.id: case for case in items_result.scalars().unique().all()}
+    items = [cases_by_id[case_id] for case_id in case_ids if case_id in cases_by_id]
 
     return items, total
     
@@ -615,9 +613,19 @@ async def update_association_evidence_feature(
     for field, value in update_data.items():
         if hasattr(feature, field):
             setattr(feature, field, value)
+    if "slot_group_name" in update_data:
+        feature.normalized_key = normalize_slot_group_name(feature.slot_group_name)
     
     db.add(feature)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # 同一案件下标准化后的分组名唯一
+        await db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=f"该案件已存在同名的关联特征分组: {update_data.get('slot_group_name')}"
+        )
     await db.refresh(feature)
     return feature
 
@@ -631,17 +639,68 @@ async def get_association_evidence_feature_by_id(
     return result.scalars().first()
 
 
+# 分组名标准化：NFKC 之后一次 str.translate 完成去除空白和统一中英文标点
+_SLOT_GROUP_NAME_TRANSLATION = str.maketrans({
+    # 空白字符（与 str.isspace() 判定的字符集合一致）
+    **dict.fromkeys(
+        [chr(c) for c in (*range(0x9, 0xe), *range(0x1c, 0x21), 0x85, 0xa0, 0x1680)]
+        + [chr(c) for c in (*range(0x2000, 0x200b), 0x2028, 0x2029, 0x202f, 0x205f, 0x3000)]
+    ),
+    # 括号类
+    '（': '(', '）': ')', '【': '[', '】': ']', '｛': '{', '｝': '}',
+    # 数学符号
+    '＋': '+', '－': '-', '×': '*', '÷': '/', '＝': '=', '≠': '!=',
+    # 标点符号
+    '：': ':', '；': ';', '，': ',', '。': '.', '！': '!', '？': '?',
+    '、': ',', '…': '...', '—': '-', '–': '-',
+    # 引号类
+    '『': '"', '』': '"',
+    # 其他常见符号
+    '～': '~', '＠': '@', '＃': '#', '＄': '$', '％': '%', '＆': '&',
+    '＊': '*', '＼': '\\', '｜': '|', '／': '/',
+})
+
+
+def normalize_slot_group_name(name: str) -> str:
+    """标准化关联特征分组名，处理全半角、空白和中英文标点等格式差异"""
+    return unicodedata.normalize('NFKC', name).translate(_SLOT_GROUP_NAME_TRANSLATION)
+
+
+async def upsert_association_evidence_features(
+    db: AsyncSession, rows: List[dict]
+) -> List[AssociationEvidenceFeature]:
+    """按 (case_id, normalized_key) 批量插入或更新关联特征分组，一条语句完成，不加载案件已有的分组"""
+    if not rows:
+        return []
+    stmt = pg_insert(AssociationEvidenceFeature).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AssociationEvidenceFeature.case_id, AssociationEvidenceFeature.normalized_key],
+        set_={
+            "association_evidence_ids": stmt.excluded.association_evidence_ids,
+            "evidence_features": stmt.excluded.evidence_features,
+            "features_extracted_at": stmt.excluded.features_extracted_at,
+            "evidence_feature_status": stmt.excluded.evidence_feature_status,
+            "updated_at": func.now(),
+        },
+    ).returning(AssociationEvidenceFeature)
+    result = await db.execute(
+        select(AssociationEvidenceFeature).from_statement(stmt).execution_options(populate_existing=True)
+    )
+    # RETURNING 不保证与 VALUES 同序，按传入顺序返回
+    order = {row["normalized_key"]: position for position, row in enumerate(rows)}
+    return sorted(result.scalars().all(), key=lambda feature: order[feature.normalized_key])
+
+
 async def auto_process(
     db: AsyncSession, case_id: int, 
     evidence_ids: List[int], 
     send_progress: Any = None) -> Optional[List[AssociationEvidenceFeature]]:
     """自动处理案件"""
-    evidence_ids = [int(eid) for eid in evidence_ids]
-    evidences = []
-    for evidence_id in evidence_ids:
-        q = await db.execute(select(Evidence).where(Evidence.id == evidence_id, Evidence.case_id == case_id, Evidence.classification_category == "微信聊天记录"))
-        if evidence := q.scalars().first():
-            evidences.append(evidence)
+    evidences, missing_ids = await load_evidences_by_ids(
+        db, evidence_ids, case_id=case_id, classification_category="微信聊天记录"
+    )
+    if missing_ids:
+        logger.warning(f"以下证据不存在、不属于案件 {case_id} 或未分类为`微信聊天记录`: {missing_ids}")
     if not evidences:
         logger.error("未检索到有效的相关证据, 请确保证据已存在且已分类为`微信聊天记录`")
         return []
@@ -665,12 +724,13 @@ async def auto_process(
             "progress": 50
         })
     
-    evidence_extraction_results: AssociationFeaturesExtractionResults = await asyncio.wait_for(
-        association_features_extractor.arun(image_urls=[ev.file_url for ev in evidences]),
+    run_response = await asyncio.wait_for(
+        association_features_extractor.arun(image_urls=[ev.ai_image_url for ev in evidences]),
         timeout=180.0
     )
     
-    results = evidence_extraction_results.results
+    evidence_extraction_results: Optional[AssociationFeaturesExtractionResults] = run_response.content
+    results = evidence_extraction_results.results if evidence_extraction_results else []
     if not results:
         logger.error("证据特征提取失败")
         if send_progress:
@@ -680,49 +740,10 @@ async def auto_process(
             })
         return []
     
-    # 预先查询所有相同case_id的记录，避免在循环中重复查询
-    logger.info(f"预先查询case_id={case_id}的所有记录")
-    all_features_query = await db.execute(
-        select(AssociationEvidenceFeature).where(
-            AssociationEvidenceFeature.case_id == case_id
-        )
-    )
-    all_features = all_features_query.scalars().all()
-    logger.info(f"当前case_id={case_id}的所有记录: {[(f.id, f.slot_group_name) for f in all_features]}")
+    # 创建URL到证据ID的映射（结果URL由图片编号还原，与发送给模型的AI图片URL完全一致）
+    url_to_evidence_id = {evidence.ai_image_url: evidence.id for evidence in evidences}
     
-    # 使用更宽松的字符串匹配，处理各种格式差异
-    def normalize_string(s: str) -> str:
-        """标准化字符串，处理各种格式差异"""
-        import unicodedata
-        
-        # 1. Unicode标准化 (NFKC: 兼容性分解 + 组合)
-        s = unicodedata.normalize('NFKC', s)
-        
-        # 2. 移除所有空白字符（包括空格、制表符、换行符等）
-        s = ''.join(s.split())
-        
-        # 3. 统一常见的中英文标点符号
-        replacements = {
-            # 括号类
-            '（': '(', '）': ')', '【': '[', '】': ']', '｛': '{', '｝': '}',
-            # 数学符号
-            '＋': '+', '－': '-', '×': '*', '÷': '/', '＝': '=', '≠': '!=',
-            # 标点符号
-            '：': ':', '；': ';', '，': ',', '。': '.', '！': '!', '？': '?',
-            '、': ',', '…': '...', '—': '-', '–': '-',
-            # 引号类
-            '"': '"', '"': '"', ''': "'", ''': "'", '『': '"', '』': '"',
-            # 其他常见符号
-            '～': '~', '＠': '@', '＃': '#', '＄': '$', '％': '%', '＆': '&',
-            '＊': '*', '＼': '\\', '｜': '|', '／': '/'
-        }
-        
-        for old, new in replacements.items():
-            s = s.replace(old, new)
-        
-        return s
-    
-    association_evidence_features = []
+    group_rows = {}
     for res in results:
         slot_group_name = res.slot_group_name
         slot_extraction = res.slot_extraction
@@ -731,23 +752,16 @@ async def auto_process(
         all_evidence_ids = set()
         processed_evidence_features = []
         
-        # 创建URL到证据ID的映射
-        url_to_evidence_id = {}
-        for evidence in evidences:
-            url_to_evidence_id[evidence.file_url] = evidence.id
-        
         # 按照image_sequence_info中的sequence_number排序证据ID
         sorted_evidence_ids = []
         for image_info in res.image_sequence_info:
-            url = unquote(image_info.url)
-            if url in url_to_evidence_id:
-                sorted_evidence_ids.append(url_to_evidence_id[url])
+            if image_info.url in url_to_evidence_id:
+                sorted_evidence_ids.append(url_to_evidence_id[image_info.url])
         
         for slot in slot_extraction:
-            slot_value_from_url = [unquote(url) for url in slot.slot_value_from_url]
             # 找到对应的证据ID
             slot_evidence_ids = []
-            for url in slot_value_from_url:
+            for url in slot.slot_value_from_url:
                 if url in url_to_evidence_id:
                     slot_evidence_ids.append(str(url_to_evidence_id[url]))  # 转换为字符串
                     all_evidence_ids.add(url_to_evidence_id[url])
@@ -765,26 +779,9 @@ async def auto_process(
             }
             processed_evidence_features.append(processed_slot)
         
-        # 检查是否已存在相同的case_id和slot_group_name记录
-        logger.info(f"检查重复记录: case_id={case_id}, slot_group_name='{slot_group_name}'")
-        
-        normalized_slot_group_name = normalize_string(slot_group_name)
+        normalized_slot_group_name = normalize_slot_group_name(slot_group_name)
         logger.info(f"标准化后的名称: '{slot_group_name}' -> '{normalized_slot_group_name}'")
         
-        # 在预先查询的记录中查找标准化后匹配的记录
-        existing_feature = None
-        for feature in all_features:
-            normalized_existing = normalize_string(feature.slot_group_name)
-            if normalized_existing == normalized_slot_group_name:
-                existing_feature = feature
-                logger.info(f"找到匹配记录: '{feature.slot_group_name}' (ID: {feature.id})")
-                break
-        
-        if not existing_feature:
-            logger.info("未找到匹配的记录，将创建新记录")
-        
-        logger.info(f"查询结果: existing_feature={existing_feature.id if existing_feature else None}")
-        
         # 发送数据库处理进度
         if send_progress:
             await send_progress({
@@ -793,38 +790,22 @@ async def auto_process(
                 "progress": 80
             })
         
-        if existing_feature:
-            # 更新现有记录
-            existing_feature.association_evidence_ids = sorted_evidence_ids
-            existing_feature.evidence_features = processed_evidence_features
-            existing_feature.features_extracted_at = datetime.now()
-
-            existing_feature.evidence_feature_status = "features_extracted"  # 重置为特征已提取状态
-            association_evidence_features.append(existing_feature)
-        else:
-            # 创建新记录，使用标准化的slot_group_name
-            association_evidence_feature = AssociationEvidenceFeature(
-                case_id=case_id,
-                slot_group_name=normalized_slot_group_name,
-                association_evidence_ids=sorted_evidence_ids,
-                evidence_features=processed_evidence_features,
-                features_extracted_at=datetime.now()
-            )
-            association_evidence_features.append(association_evidence_feature)
-    
-    # 批量保存或更新
-    for feature in association_evidence_features:
-        if feature.id is None:
-            # 新记录，添加到数据库
-            db.add(feature)
-        # 现有记录会自动更新
+        # 同一批结果中标准化后同名的分组以最后一个为准（同一条 upsert 语句不能两次更新同一行）
+        group_rows.pop(normalized_slot_group_name, None)
+        group_rows[normalized_slot_group_name] = {
+            "case_id": case_id,
+            # 新记录使用标准化的slot_group_name，已存在的记录保留原名称
+            "slot_group_name": normalized_slot_group_name,
+            "normalized_key": normalized_slot_group_name,
+            "association_evidence_ids": sorted_evidence_ids,
+            "evidence_features": processed_evidence_features,
+            "features_extracted_at": datetime.now(),
+            "evidence_feature_status": "features_extracted",
+        }
     
+    association_evidence_features = await upsert_association_evidence_features(db, list(group_rows.values()))
     await db.commit()
     
-    # 刷新所有记录以获取最新数据
-    for association_evidence_feature in association_evidence_features:
-        await db.refresh(association_evidence_feature)
-    
     # 发送完成进度
     if send_progress:
         await send_progress({
@@ -967,7 +948,8 @@ async def trigger_case_analysis(
     db: AsyncSession,
     case_id: int,
     trigger_type: str = "manual",
-    ref_commit_ids: List[int] = None
+    ref_commit_ids: List[int] = None,
+    full_analysis: bool = False
 ) -> dict:
     """
     触发案件分析（异步执行）
@@ -977,6 +959,7 @@ async def trigger_case_analysis(
         case_id: 案件ID
         trigger_type: 触发类型 (commit_added, commit_updated, commit_removed, manual)
         ref_commit_ids: 引用的 commits ID 列表
+        full_analysis: 是否强制全量分析（默认复用上一版报告增量分析）
         
     Returns:
         包含 report_id 和 task_id 的字典
@@ -1008,7 +991,8 @@ async def trigger_case_analysis(
             'case_id': case_id,
             'report_id': report.id,
             'trigger_type': trigger_type,
-            'ref_commit_ids': ref_commit_ids
+            'ref_commit_ids': ref_commit_ids,
+            'full_analysis': full_analysis
         }
     )
     
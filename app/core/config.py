@@ -93,6 +93,12 @@ class Settings(BaseSettings):
     ANTHROPIC_BASE_URL: str = ""
     ANTHROPIC_MODEL: str = "claude-sonnet-4-20250514"
 
+    # 案件分析配置（增量模式复用上一版报告，只分析新增的提交记录）
+    CASE_ANALYSIS_INCREMENTAL_ENABLED: bool = True  # 是否启用增量分析
+    CASE_ANALYSIS_MAX_TURNS: int = 20  # 全量分析的最大轮数
+    CASE_ANALYSIS_INCREMENTAL_MAX_TURNS: int = 8  # 增量分析的最大轮数
+    CASE_ANALYSIS_INCREMENTAL_MAX_INPUT_RATIO: float = 1.0  # 增量与全量分析的预估输入量（提示词长度×轮数）之比不小于该值时使用全量分析
+
     # Wecom
     WECOM_CORP_ID: str
     WECOM_CORP_SECRET: str
@@ -106,4 +112,41 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str = "redis://localhost:6380/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6380/0"
 
+    # 证据分类分片配置（大批量图片拆分为多个分片并发分类）
+    EVIDENCE_CLASSIFY_CHUNK_SIZE: int = 8  # 每个分片的图片数量
+    EVIDENCE_CLASSIFY_MAX_CONCURRENCY: int = 4  # 分类服务商的最大并发分片数
+    EVIDENCE_CLASSIFY_CHUNK_TIMEOUT: float = 120.0  # 单个分片的超时时间（秒）
+    EVIDENCE_CLASSIFY_MAX_RETRIES: int = 2  # 失败分片的最大重试次数
+
+    # 证据卡片铸造特征提取配置（OCR / Agent 按卡片并发提取）
+    EVIDENCE_OCR_MAX_CONCURRENCY: int = 4  # 讯飞OCR的最大并发请求数
+    EVIDENCE_CARD_FEATURE_TIMEOUT: float = 120.0  # 单张卡片特征提取的超时时间（秒）
+    EVIDENCE_ASSOCIATION_MAX_CONCURRENCY: int = 2  # 关联特征提取（批次调用）的最大并发数，与单卡提取分开限流
+    EVIDENCE_ASSOCIATION_TIMEOUT: float = 300.0  # 关联特征提取的超时时间（秒）
+
+    # 证据分析流水线重试配置（从证据状态检查点继续）
+    EVIDENCE_PIPELINE_MAX_RETRIES: int = 3  # Celery 任务最大重试次数
+    EVIDENCE_PIPELINE_RETRY_BACKOFF: int = 30  # 首次重试延迟（秒），之后指数递增
+
+    # 证据图片预处理配置（AI使用的衍生图）
+    EVIDENCE_AI_IMAGE_MAX_SIDE: int = 1600  # 衍生图长边上限（像素）
+    EVIDENCE_AI_IMAGE_QUALITY: int = 85  # 衍生图JPEG压缩质量
+
+    # 多案件证据链看板配置（集合查询批量加载，大批量在进程池中并行计算）
+    EVIDENCE_CHAIN_BATCH_MAX_CASES: int = 100  # 单次请求的最大案件数
+    EVIDENCE_CHAIN_PROCESS_POOL_THRESHOLD: int = 200  # 需要重算的证据要求数达到该值时使用进程池
+    EVIDENCE_CHAIN_PROCESS_POOL_WORKERS: int = 4  # 进程池的进程数
+
+    # COS上传配置（大文件分块上传，批量上传并发）
+    COS_MULTIPART_THRESHOLD_MB: int = 20  # 超过该大小使用分块上传
+    COS_MULTIPART_PART_SIZE_MB: int = 8  # 分块大小
+    COS_MULTIPART_MAX_BUFFER_MB: int = 32  # 单个文件分块上传时最多缓存的数据量
+    COS_MULTIPART_THREADS: int = 4  # 单个文件分块上传的线程数
+    EVIDENCE_UPLOAD_MAX_CONCURRENCY: int = 4  # 批量创建证据时同时上传的文件数
+
+    # COS删除发件箱配置
+    COS_DELETION_BATCH_SIZE: int = 1000  # 每次批量删除的对象数（COS上限1000）
+    COS_DELETION_MAX_ATTEMPTS: int = 10  # 单个对象的最大删除尝试次数
+    COS_DELETION_DRAIN_INTERVAL: float = 300.0  # 定时清理发件箱的间隔（秒）
+
 settings = Settings()
\ No newline at end of file
@@ -375,6 +375,10 @@ class ConfigManager:
         """重新加载证据链配置（清除缓存）"""
         self._evidence_chains_config = None
     
+    def reload_evidence_card_slots_config(self):
+        """重新加载证据卡槽配置（清除缓存，依赖配置对象的缓存随之失效）"""
+        self._evidence_card_slots_config = None
+    
     def reload_dynamic_config(self):
         """重新加载动态配置（清除缓存）"""
         self._config_cache.clear()
@@ -384,6 +388,7 @@ class ConfigManager:
         self.reload_business_config()
         self.reload_evidence_types_config()
         self.reload_evidence_chains_config()
+        self.reload_evidence_card_slots_config()
         self.reload_dynamic_config()
 
 # 全局配置管理器实例
@@ -5,7 +5,8 @@ from app.db.base_class import Base  # noqa
 from app.staffs.models import Staff  # noqa
 from app.users.models import User  # noqa
 from app.cases.models import Case  # noqa
-from app.evidences.models import Evidence, EvidenceCard  # noqa - 导入 EvidenceCard 以确保关联表被检测到
+from app.evidences.models import Evidence, EvidenceCard, EvidenceCardMember, EvidenceCardSlotSnapshot, CosDeletionOutbox  # noqa - 导入 EvidenceCard 以确保关联表被检测到
+from app.evidence_chains.models import EvidenceChainDashboardSnapshot  # noqa
 from app.wecom.models import WeComStaff, ExternalContact, CustomerSession, ContactWay, CustomerEventLog  # noqa
 from app.documents_management.models import Document  # noqa
 from app.video_creation.models import VideoCreationSession, VideoCreationMessage, VideoScript  # noqa
\ No newline at end of file
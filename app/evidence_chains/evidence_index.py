@@ -0,0 +1,204 @@
+"""
+证据链计算的证据索引
+
+每次看板计算只遍历一次案件的证据和关联特征，按证据分类、角色和词槽名建立索引，
+证据要求的计算改为查表：
+- 分类索引：要求图中每个证据类型的匹配器只与不同的分类（通常十余个）比较一次，结果按匹配器缓存
+- 角色索引：按 (匹配器, 角色) 缓存匹配的证据
+- 关联特征：预先计算每个关联特征引用的证据分类，不再对每个要求遍历全部证据
+- 词槽索引：每个证据的特征按词槽名建立字典
+
+查表结果保持证据和关联特征原有的顺序，最佳证据的选择结果与逐个扫描一致。
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app.evidence_chains.requirement_graph import RequirementNode, TypeMatcher
+
+
+@dataclass(frozen=True)
+class EvidenceRecord:
+    """证据链计算所需的证据字段（可序列化，供进程池计算使用）"""
+    id: int
+    classification_category: Optional[str]
+    evidence_role: Optional[str]
+    evidence_features: Optional[List[Dict[str, Any]]]
+
+    @classmethod
+    def from_model(cls, evidence: Any) -> "EvidenceRecord":
+        return cls(
+            id=evidence.id,
+            classification_category=evidence.classification_category,
+            evidence_role=evidence.evidence_role,
+            evidence_features=evidence.evidence_features,
+        )
+
+
+@dataclass(frozen=True)
+class AssociationRecord:
+    """证据链计算所需的关联特征字段（可序列化，供进程池计算使用）"""
+    id: int
+    slot_group_name: Optional[str]
+    association_evidence_ids: Optional[List[int]]
+    evidence_features: Optional[List[Dict[str, Any]]]
+
+    @classmethod
+    def from_model(cls, feature: Any) -> "AssociationRecord":
+        return cls(
+            id=feature.id,
+            slot_group_name=feature.slot_group_name,
+            association_evidence_ids=feature.association_evidence_ids,
+            evidence_features=feature.evidence_features,
+        )
+
+
+def _normalize_category(category: Optional[str]) -> Optional[str]:
+    return category.lower().strip() if category else None
+
+
+class EvidenceIndex:
+    """案件证据与关联特征的索引（一次看板计算内有效）"""
+
+    def __init__(self, evidences: Iterable[Any], association_features: Iterable[Any] = ()):
+        self.evidences: List[Any] = list(evidences)
+        self.association_features: List[Any] = list(association_features)
+        self.by_id: Dict[int, Any] = {evidence.id: evidence for evidence in self.evidences}
+
+        # 分类 -> [(原始位置, 证据)]
+        self._by_category: Dict[str, List[Tuple[int, Any]]] = {}
+        for position, evidence in enumerate(self.evidences):
+            category = _normalize_category(evidence.classification_category)
+            if category:
+                self._by_category.setdefault(category, []).append((position, evidence))
+
+        # 关联特征引用的证据分类
+        self._association_categories: List[FrozenSet[str]] = []
+        for feature in self.association_features:
+            categories = set()
+            for evidence_id in feature.association_evidence_ids or []:
+                evidence = self.by_id.get(evidence_id)
+                category = _normalize_category(evidence.classification_category) if evidence is not None else None
+                if category:
+                    categories.add(category)
+            self._association_categories.append(frozenset(categories))
+
+        self._matching_categories: Dict[TypeMatcher, FrozenSet[str]] = {}
+        self._matching_evidences: Dict[TypeMatcher, List[Any]] = {}
+        self._role_evidences: Dict[Tuple[TypeMatcher, str], List[Any]] = {}
+        self._matching_associations: Dict[TypeMatcher, List[Any]] = {}
+        self._last_slot_features: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._first_slot_features: Dict[int, Dict[str, Dict[str, Any]]] = {}
+
+    def get(self, evidence_id: int) -> Optional[Any]:
+        """按ID查找证据"""
+        return self.by_id.get(evidence_id)
+
+    def categories_for(self, matcher: TypeMatcher) -> FrozenSet[str]:
+        """与证据类型匹配的分类"""
+        categories = self._matching_categories.get(matcher)
+        if categories is None:
+            categories = frozenset(category for category in self._by_category if matcher.matches(category))
+            self._matching_categories[matcher] = categories
+        return categories
+
+    def evidences_for(self, matcher: TypeMatcher) -> List[Any]:
+        """匹配证据类型的证据（保持原有顺序）"""
+        evidences = self._matching_evidences.get(matcher)
+        if evidences is None:
+            categories = self.categories_for(matcher)
+            if len(categories) == 1:
+                evidences = [evidence for _, evidence in self._by_category[next(iter(categories))]]
+            else:
+                evidences = [
+                    evidence for _, evidence in sorted(
+                        (item for category in categories for item in self._by_category[category]),
+                        key=lambda item: item[0],
+                    )
+                ]
+            self._matching_evidences[matcher] = evidences
+        return evidences
+
+    def evidences_for_role(self, matcher: TypeMatcher, role: str) -> List[Any]:
+        """匹配证据类型且角色相同的证据"""
+        key = (matcher, role)
+        evidences = self._role_evidences.get(key)
+        if evidences is None:
+            evidences = [e for e in self.evidences_for(matcher) if getattr(e, "evidence_role", None) == role]
+            self._role_evidences[key] = evidences
+        return evidences
+
+    def associations_for(self, matcher: TypeMatcher) -> List[Any]:
+        """引用了匹配证据类型的证据的关联特征（保持原有顺序）"""
+        associations = self._matching_associations.get(matcher)
+        if associations is None:
+            categories = self.categories_for(matcher)
+            associations = [
+                feature for feature, referenced in zip(self.association_features, self._association_categories)
+                if not categories.isdisjoint(referenced)
+            ]
+            self._matching_associations[matcher] = associations
+        return associations
+
+    def slot_features(self, evidence: Any) -> Dict[str, Dict[str, Any]]:
+        """词槽名 -> 特征（同名词槽取最后一个，词槽顺序为首次出现的顺序）"""
+        features = self._last_slot_features.get(evidence.id)
+        if features is None:
+            features = {}
+            for feature in evidence.evidence_features or []:
+                features[feature.get("slot_name")] = feature
+            self._last_slot_features[evidence.id] = features
+        return features
+
+    def first_slot_feature(self, evidence: Any, slot_name: str) -> Optional[Dict[str, Any]]:
+        """证据中指定词槽的特征（同名词槽取第一个）"""
+        features = self._first_slot_features.get(evidence.id)
+        if features is None:
+            features = {}
+            for feature in evidence.evidence_features or []:
+                features.setdefault(feature.get("slot_name"), feature)
+            self._first_slot_features[evidence.id] = features
+        return features.get(slot_name)
+
+
+class FingerprintIndex:
+    """计算证据要求依赖指纹用的轻量行索引（证据与关联特征只含ID、分类、角色、更新时间等列）
+
+    - 证据行按分类分桶，每个证据类型的匹配器只与不同的分类比较一次，结果按匹配器缓存
+    - 关联特征行按引用的证据ID分桶，匹配的关联特征由匹配的证据ID直接查表
+    """
+
+    def __init__(self, evidence_rows: Iterable[Any], association_rows: Iterable[Any] = ()):
+        # 分类 -> 证据行
+        self._by_category: Dict[str, List[Any]] = {}
+        for row in evidence_rows:
+            if row.classification_category:
+                self._by_category.setdefault(row.classification_category, []).append(row)
+
+        # 证据ID -> 引用了该证据的关联特征行
+        self._associations_by_evidence: Dict[int, List[Any]] = {}
+        for row in association_rows:
+            for evidence_id in dict.fromkeys(row.association_evidence_ids or []):
+                self._associations_by_evidence.setdefault(evidence_id, []).append(row)
+
+        self._matching_categories: Dict[TypeMatcher, FrozenSet[str]] = {}
+
+    def categories_for(self, matcher: TypeMatcher) -> FrozenSet[str]:
+        """与证据类型匹配的分类（原始分类值）"""
+        categories = self._matching_categories.get(matcher)
+        if categories is None:
+            categories = frozenset(category for category in self._by_category if matcher.matches(category))
+            self._matching_categories[matcher] = categories
+        return categories
+
+    def evidence_rows_for(self, node: RequirementNode) -> List[Any]:
+        """匹配证据要求中任一证据类型的证据行"""
+        categories = set().union(*(self.categories_for(type_requirement.matcher) for type_requirement in node.types))
+        return [row for category in categories for row in self._by_category[category]]
+
+    def association_rows_for(self, evidence_ids: Iterable[int]) -> List[Any]:
+        """引用了任一给定证据的关联特征行（去重）"""
+        rows: Dict[int, Any] = {}
+        for evidence_id in evidence_ids:
+            for row in self._associations_by_evidence.get(evidence_id, ()):
+                rows[row.id] = row
+        return list(rows.values())
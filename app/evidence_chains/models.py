@@ -3,8 +3,14 @@
 from enum import Enum
 from typing import Optional, List, Dict, Any
 
-# 证据链不需要复杂的数据库模型
-# 只需要简单的状态枚举即可
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+# 证据链状态通过实时计算得出，只需要简单的状态枚举
+# 计算结果按案件物化在 evidence_chain_dashboards 中，按要求粒度增量失效
 
 class EvidenceRequirementStatus(str, Enum):
     """证据要求状态"""
@@ -19,5 +25,24 @@ class EvidenceChainStatus(str, Enum):
     IN_PROGRESS = "in_progress"      # 进行中（部分要求已满足）
     COMPLETED = "completed"          # 已完成（所有要求都满足）
 
-# 不需要复杂的数据库表
-# 证据链状态完全通过实时查询计算得出
\ No newline at end of file
+
+class EvidenceChainDashboardSnapshot(Base):
+    """证据链看板物化结果
+
+    每个案件一行，requirements 按 "{chain_id}::{requirement_key}" 保存每个证据要求的计算结果及其依赖指纹：
+    指纹覆盖要求配置、匹配的证据与关联特征（含 updated_at）、案件与当事人，
+    读取看板时只重新计算指纹变化的要求，其余直接复用。
+    """
+    __tablename__ = "evidence_chain_dashboards"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    case_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("cases.id", ondelete="CASCADE"), nullable=False, unique=True, index=True, comment="案件ID"
+    )
+    requirements: Mapped[Dict[str, Any]] = mapped_column(
+        JSONB, nullable=False, default=dict, comment="{chain_id::requirement_key: {fingerprint, kind, requirement}}"
+    )
+
+    __table_args__ = (
+        {"comment": "证据链看板物化结果，按证据要求粒度增量重算"},
+    )
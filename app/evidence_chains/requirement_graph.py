@@ -0,0 +1,265 @@
+"""
+证据链要求图
+
+evidence_chains.yaml 在加载时编译为不可变的要求图，按 (案件类型, 债权人类型, 债务人类型) 建立索引：
+- 证据链 -> 证据要求（同一 or_group 的证据类型合并为一个要求）-> 证据类型要求
+- 每个证据类型要求预先计算必需槽位、核心槽位、提取槽位以及可匹配的证据分类
+- 每个证据要求预先计算配置摘要，供看板物化结果的依赖指纹使用
+
+编译结果按 (证据链配置对象, 证据类型配置对象) 缓存，任一配置重新加载后自动重新编译，
+每次请求的证据链计算只需要处理证据数据。
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from app.core.config_manager import config_manager
+
+# 数据库当事人类型 -> YAML配置中的中文值
+PARTY_TYPE_LABELS: Mapping[str, str] = MappingProxyType({
+    "person": "个人",
+    "company": "公司",
+    "individual": "个体工商户",
+})
+
+# 证据类型 -> 可匹配的证据分类（精确映射，避免跨类型污染）
+EVIDENCE_TYPE_ALIASES: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "身份证": ("身份证", "居民身份证"),
+    "中华人民共和国居民户籍档案": ("中华人民共和国居民户籍档案", "户籍档案", "户口簿"),
+    "公司营业执照": ("公司营业执照", "营业执照"),
+    "个体工商户营业执照": ("个体工商户营业执照", "个体户营业执照"),
+    "公司全国企业公示系统截图": ("公司全国企业公示系统截图", "企业公示系统"),
+    "个体工商户全国企业公示系统截图": ("个体工商户全国企业公示系统截图", "个体户公示系统"),
+    "经常居住地证明": ("经常居住地证明", "居住证明"),
+    "微信聊天记录": ("微信聊天记录", "微信聊天"),
+    "微信个人主页": ("微信个人主页", "微信主页"),
+    "微信支付转账电子凭证": ("微信支付转账电子凭证", "微信支付凭证"),
+    "微信转账页面": ("微信转账页面", "微信转账"),
+    "短信聊天记录": ("短信聊天记录", "短信"),
+    "支付宝转账页面": ("支付宝转账页面", "支付宝转账"),
+    "货款欠条": ("货款欠条", "欠条"),
+    "借款借条": ("借款借条", "借条"),
+    "银行转账记录": ("银行转账记录", "银行转账"),
+    "增值税发票": ("增值税发票", "发票"),
+    "电话号码截图": ("电话号码截图", "电话号码"),
+    "收款银行账户截图": ("收款银行账户截图", "银行账户"),
+})
+
+
+@dataclass(frozen=True)
+class TypeMatcher:
+    """证据分类匹配规则"""
+    required_type: str  # 小写、去首尾空白后的证据类型
+    accepted: Optional[FrozenSet[str]]  # 精确映射的分类；None 表示按包含关系匹配
+
+    @classmethod
+    def of(cls, evidence_type: str) -> "TypeMatcher":
+        required_type = evidence_type.lower().strip()
+        aliases = EVIDENCE_TYPE_ALIASES.get(required_type)
+        return cls(required_type=required_type, accepted=frozenset(aliases) if aliases else None)
+
+    def matches(self, classification_category: Optional[str]) -> bool:
+        if not classification_category:
+            return False
+        category = classification_category.lower().strip()
+        if category == self.required_type:
+            return True
+        if self.accepted is not None:
+            return category in self.accepted
+        # 没有映射关系时，只有证据类型是分类的子字符串才匹配
+        return self.required_type in category
+
+
+@dataclass(frozen=True)
+class TypeRequirement:
+    """证据链中对单个证据类型的要求"""
+    evidence_type: str
+    core_slots: Tuple[str, ...]  # 证据链配置的核心槽位（core_evidence_slot，保持配置顺序）
+    required_slots: Tuple[str, ...]  # 证据类型配置中 slot_required=true 的槽位（按提取槽位顺序）
+    extraction_slots: Tuple[str, ...]  # 证据类型配置中的全部提取槽位
+    required_slot_set: FrozenSet[str]
+    role_group: Tuple[str, ...]  # 需要分别满足的角色
+    or_group: Optional[str]
+    matcher: TypeMatcher
+
+    def matches(self, classification_category: Optional[str]) -> bool:
+        return self.matcher.matches(classification_category)
+
+
+@dataclass(frozen=True)
+class RequirementNode:
+    """证据链中的一个证据要求：单个证据类型，或同一 or_group 中满足其一即可的多个证据类型"""
+    key: str  # 在证据链内唯一的要求键
+    kind: str  # "or_group" 或 "evidence_type"
+    or_group: Optional[str]
+    types: Tuple[TypeRequirement, ...]
+    config_digest: str  # 要求配置与相关证据类型配置的摘要
+
+    def matches(self, classification_category: Optional[str]) -> bool:
+        return any(type_requirement.matches(classification_category) for type_requirement in self.types)
+
+
+@dataclass(frozen=True)
+class ChainNode:
+    chain_id: str
+    applicable_case_types: Tuple[str, ...]
+    creditor_type: Optional[str]  # 中文当事人类型
+    debtor_type: Optional[str]
+    requirements: Tuple[RequirementNode, ...]
+
+
+def _digest(payload: Any) -> str:
+    return hashlib.sha1(
+        json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def _compile_type_requirement(
+    evidence_type_config: Dict[str, Any],
+    type_configs: Dict[str, Dict[str, Any]],
+) -> TypeRequirement:
+    evidence_type = str(evidence_type_config.get("evidence_type"))
+    extraction_slots = (type_configs.get(evidence_type) or {}).get("extraction_slots", []) or []
+
+    # 只使用配置中定义且 slot_required=true 的槽位（核心槽位也必须在配置中且为必需槽位）
+    required_slots = tuple(
+        slot["slot_name"] for slot in extraction_slots
+        if slot.get("slot_name") and slot.get("slot_required", True)
+    )
+    return TypeRequirement(
+        evidence_type=evidence_type,
+        core_slots=tuple(evidence_type_config.get("core_evidence_slot", []) or []),
+        required_slots=required_slots,
+        required_slot_set=frozenset(required_slots),
+        extraction_slots=tuple(slot.get("slot_name") for slot in extraction_slots if slot.get("slot_name")),
+        role_group=tuple(evidence_type_config.get("role_group", []) or []),
+        or_group=evidence_type_config.get("or_group"),
+        matcher=TypeMatcher.of(evidence_type),
+    )
+
+
+def _compile_chain(chain_config: Dict[str, Any], type_configs: Dict[str, Dict[str, Any]]) -> ChainNode:
+    chain_id = chain_config.get("chain_id")
+    if not chain_id:
+        raise ValueError("证据链配置缺少chain_id")
+
+    required_evidence_types = chain_config.get("required_evidence_types", []) or []
+    requirements: List[RequirementNode] = []
+    or_groups_processed = set()
+
+    for evidence_type_config in required_evidence_types:
+        if not evidence_type_config.get("evidence_type"):
+            raise ValueError("证据类型配置缺少evidence_type")
+        or_group = evidence_type_config.get("or_group")
+        if or_group and or_group in or_groups_processed:
+            continue
+        if or_group:
+            configs = [cfg for cfg in required_evidence_types if cfg.get("or_group") == or_group]
+            or_groups_processed.add(or_group)
+            kind, name = "or_group", or_group
+        else:
+            configs = [evidence_type_config]
+            kind, name = "evidence_type", evidence_type_config.get("evidence_type")
+
+        requirements.append(RequirementNode(
+            key=f"{len(requirements)}:{name}",
+            kind=kind,
+            or_group=or_group,
+            types=tuple(_compile_type_requirement(cfg, type_configs) for cfg in configs),
+            config_digest=_digest({
+                "configs": configs,
+                "type_configs": [type_configs.get(str(cfg.get("evidence_type"))) for cfg in configs],
+            }),
+        ))
+
+    return ChainNode(
+        chain_id=str(chain_id),
+        applicable_case_types=tuple(chain_config.get("applicable_case_types", []) or []),
+        creditor_type=chain_config.get("applicable_creditor_type"),
+        debtor_type=chain_config.get("applicable_debtor_type"),
+        requirements=tuple(requirements),
+    )
+
+
+class RequirementGraph:
+    """编译后的证据链要求图（不可变）"""
+
+    def __init__(self, chains_config: List[Dict[str, Any]], evidence_types: Dict[str, Dict[str, Any]]):
+        # 编译所用配置的摘要：进程池中计算时据此判断 worker 的要求图是否与调用方一致
+        self.config_digest = _digest({"chains": chains_config, "evidence_types": evidence_types})
+
+        # 证据类型名称（type）-> 证据类型配置（同名时取第一个）
+        type_configs: Dict[str, Dict[str, Any]] = {}
+        for config in evidence_types.values():
+            if config.get("type"):
+                type_configs.setdefault(config["type"], config)
+
+        self.chains: Tuple[ChainNode, ...] = tuple(_compile_chain(chain, type_configs) for chain in chains_config)
+        self._requirements: Mapping[Tuple[str, str], RequirementNode] = MappingProxyType({
+            (chain.chain_id, node.key): node for chain in self.chains for node in chain.requirements
+        })
+
+        by_case_type: Dict[str, List[ChainNode]] = {}
+        by_profile: Dict[Tuple[str, str, str], List[ChainNode]] = {}
+        for chain in self.chains:
+            for case_type in chain.applicable_case_types:
+                by_case_type.setdefault(case_type, []).append(chain)
+                by_profile.setdefault((case_type, chain.creditor_type, chain.debtor_type), []).append(chain)
+        self._by_case_type: Mapping[str, Tuple[ChainNode, ...]] = MappingProxyType(
+            {key: tuple(chains) for key, chains in by_case_type.items()}
+        )
+        self._by_profile: Mapping[Tuple[str, str, str], Tuple[ChainNode, ...]] = MappingProxyType(
+            {key: tuple(chains) for key, chains in by_profile.items()}
+        )
+
+        # 证据分类 -> 支持的角色（证据选择时判断角色是否匹配）
+        self.supported_roles: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+            type_name: tuple(config["supported_roles"])
+            for type_name, config in type_configs.items()
+            if config.get("supported_roles")
+        })
+
+    def chains_for(
+        self,
+        case_type: Optional[str],
+        creditor_type: Optional[str] = None,
+        debtor_type: Optional[str] = None,
+    ) -> Tuple[ChainNode, ...]:
+        """适用于案件的证据链
+
+        Args:
+            case_type: 案件类型（如 debt、contract）
+            creditor_type / debtor_type: 数据库中的当事人类型（person/company/individual）；
+                任一缺失时返回该案件类型的全部证据链
+        """
+        if not case_type:
+            return ()
+        if not creditor_type or not debtor_type:
+            return self._by_case_type.get(case_type, ())
+        return self._by_profile.get((
+            case_type,
+            PARTY_TYPE_LABELS.get(creditor_type, creditor_type),
+            PARTY_TYPE_LABELS.get(debtor_type, debtor_type),
+        ), ())
+
+    def requirement(self, chain_id: str, key: str) -> Optional[RequirementNode]:
+        """按证据链ID和要求键查找证据要求"""
+        return self._requirements.get((chain_id, key))
+
+
+_requirement_graph_cache: Optional[Tuple[Any, Any, RequirementGraph]] = None
+
+
+def get_requirement_graph() -> RequirementGraph:
+    """获取编译后的证据链要求图，证据链或证据类型配置重新加载后自动重新编译"""
+    global _requirement_graph_cache
+    chains_config = config_manager.load_evidence_chains_config()
+    types_config = config_manager.load_evidence_types_config()
+    if (_requirement_graph_cache is None
+            or _requirement_graph_cache[0] is not chains_config
+            or _requirement_graph_cache[1] is not types_config):
+        graph = RequirementGraph(chains_config.evidence_chains, types_config.evidence_types)
+        _requirement_graph_cache = (chains_config, types_config, graph)
+    return _requirement_graph_cache[2]
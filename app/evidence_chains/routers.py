@@ -4,10 +4,13 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.deps import DBSession, get_current_staff
 from app.staffs.models import Staff
 from app.evidence_chains.services import EvidenceChainService
-from app.evidence_chains.schemas import EvidenceChainDashboard
+from app.evidence_chains.schemas import (
+    EvidenceChainBatchDashboard, EvidenceChainBatchRequest, EvidenceChainDashboard
+)
 
 router = APIRouter()
 
@@ -34,6 +37,31 @@ async def get_evidence_chain_dashboard(
         raise HTTPException(status_code=500, detail=f"获取证据链看板失败: {str(e)}")
 
 
+@router.post("/dashboards", response_model=EvidenceChainBatchDashboard)
+async def get_evidence_chain_dashboards(
+    request: EvidenceChainBatchRequest,
+    db: DBSession,
+    current_staff: Annotated[Staff, Depends(get_current_staff)]
+):
+    """
+    批量获取多个案件的证据链看板摘要
+    
+    返回每个案件的完成度、可行和已激活的证据链统计；include_details=true 时附带完整看板
+    """
+    if len(request.case_ids) > settings.EVIDENCE_CHAIN_BATCH_MAX_CASES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"单次最多查询 {settings.EVIDENCE_CHAIN_BATCH_MAX_CASES} 个案件"
+        )
+    
+    service = EvidenceChainService(db)
+    
+    try:
+        return await service.get_cases_evidence_dashboards(request.case_ids, request.include_details)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量获取证据链看板失败: {str(e)}")
+
+
 @router.get("/templates")
 async def get_evidence_chain_templates(
     db: DBSession,
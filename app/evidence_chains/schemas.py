@@ -127,4 +127,39 @@ class EvidenceChainDashboard(BaseModel):
     # 简单的统计信息
     total_requirements: int
     satisfied_requirements: int
-    missing_requirements: int
\ No newline at end of file
+    missing_requirements: int
+
+class EvidenceChainBatchRequest(BaseModel):
+    """多案件证据链看板请求"""
+    case_ids: List[int] = Field(..., min_length=1, description="案件ID列表")
+    include_details: bool = Field(False, description="是否返回每个案件的完整看板")
+
+
+class EvidenceChainSummary(BaseModel):
+    """证据链摘要"""
+    chain_id: str
+    completion_percentage: float
+    feasibility_status: EvidenceChainFeasibilityStatus
+    feasibility_completion: float
+    is_feasible: bool
+    is_activated: bool
+
+
+class EvidenceChainCaseSummary(BaseModel):
+    """单个案件的证据链看板摘要"""
+    case_id: int
+    overall_completion: float
+    overall_feasibility_completion: float
+    total_chains: int
+    feasible_chains_count: int
+    activated_chains_count: int
+    total_requirements: int
+    satisfied_requirements: int
+    chains: List[EvidenceChainSummary]
+    dashboard: Optional[EvidenceChainDashboard] = None  # include_details=true 时返回完整看板
+
+
+class EvidenceChainBatchDashboard(BaseModel):
+    """多案件证据链看板"""
+    items: List[EvidenceChainCaseSummary]
+    missing_case_ids: List[int]  # 不存在的案件
@@ -1,20 +1,112 @@
 # 简化版证据链服务 - 纯粹的状态检查器（异步版本）
 
-from typing import List, Dict, Any, Optional, Set, Union
+import asyncio
+import atexit
+import hashlib
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import joinedload
 
 from app.evidence_chains.schemas import (
     EvidenceChainDashboard, EvidenceChain, EvidenceTypeRequirement, EvidenceSlotDetail,
     EvidenceChainStatus, EvidenceRequirementStatus, EvidenceChainFeasibilityStatus,
-    RoleBasedRequirement, RoleGroupRequirement, OrGroupRequirement
+    RoleBasedRequirement, RoleGroupRequirement, OrGroupRequirement, EvidenceRequirement,
+    EvidenceChainBatchDashboard, EvidenceChainCaseSummary, EvidenceChainSummary
+)
+from app.core.config import settings
+from app.core.config_manager import config_manager
+from app.evidence_chains.evidence_index import AssociationRecord, EvidenceIndex, EvidenceRecord, FingerprintIndex
+from app.evidence_chains.models import EvidenceChainDashboardSnapshot
+from app.evidence_chains.requirement_graph import (
+    ChainNode, RequirementGraph, RequirementNode, TypeRequirement, get_requirement_graph
 )
 from app.cases.models import Case
 from app.evidences.models import Evidence
 from app.cases.models import AssociationEvidenceFeature
-from app.core.config_manager import config_manager
 from app.agentic.agents.evidence_proofreader import EvidenceProofreader
+from loguru import logger
+
+# 物化结果格式版本，计算逻辑变化时递增以使已物化的结果全部失效
+DASHBOARD_MATERIALIZATION_VERSION = 1
+
+# 物化结果中要求的类型 -> 响应模型
+REQUIREMENT_MODELS = {
+    "or_group": OrGroupRequirement,
+    "role_group": RoleGroupRequirement,
+    "evidence_type": EvidenceTypeRequirement,
+}
+
+# 批量看板的计算进程池（首次使用时创建，进程常驻复用）
+_evaluation_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_evaluation_pool() -> ProcessPoolExecutor:
+    global _evaluation_pool
+    if _evaluation_pool is None:
+        # spawn 启动：避免 fork 继承事件循环和数据库连接
+        _evaluation_pool = ProcessPoolExecutor(
+            max_workers=settings.EVIDENCE_CHAIN_PROCESS_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        atexit.register(shutdown_evaluation_pool)
+    return _evaluation_pool
+
+
+def shutdown_evaluation_pool() -> None:
+    """关闭批量看板的计算进程池（进程退出时自动调用），下次使用时重新创建"""
+    global _evaluation_pool
+    pool, _evaluation_pool = _evaluation_pool, None
+    if pool is not None:
+        atexit.unregister(shutdown_evaluation_pool)
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# 批量看板的计算任务：(案件ID, [(物化键, 证据链ID, 要求键)], 证据, 关联特征, 调用方要求图的配置摘要)
+EvaluationJob = Tuple[int, List[Tuple[str, str, str]], List[EvidenceRecord], List[AssociationRecord], str]
+
+
+def _requirement_graph_for(config_digest: str) -> RequirementGraph:
+    """获取与调用方配置一致的要求图
+
+    进程池 worker 常驻复用，调用方 reload_config() 后 worker 内缓存的配置仍是旧的；
+    摘要不一致时重新加载证据链与证据类型配置并重新编译。
+    """
+    graph = get_requirement_graph()
+    if graph.config_digest != config_digest:
+        config_manager.reload_evidence_chains_config()
+        config_manager.reload_evidence_types_config()
+        graph = get_requirement_graph()
+        if graph.config_digest != config_digest:
+            logger.warning("证据链计算进程重新加载后的配置与调用方不一致，使用重新加载的配置计算")
+    return graph
+
+
+def evaluate_case_requirements(job: EvaluationJob) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+    """计算单个案件需要重算的证据要求（可在进程池中执行）
+    
+    Args:
+        job: (案件ID, [(物化键, 证据链ID, 要求键)], 证据, 关联特征, 调用方要求图的配置摘要)
+    
+    Returns:
+        (案件ID, 物化键 -> {"kind", "requirement"})
+    """
+    case_id, requirement_keys, evidences, association_features, config_digest = job
+    graph = _requirement_graph_for(config_digest)
+    service = EvidenceChainService(None)
+    index = EvidenceIndex(evidences, association_features)
+    results = {}
+    for cache_key, chain_id, node_key in requirement_keys:
+        requirement = service._evaluate_requirement(graph.requirement(chain_id, node_key), index)
+        results[cache_key] = {
+            "kind": service._requirement_kind(requirement),
+            "requirement": requirement.model_dump(mode="json"),
+        }
+    return case_id, results
 
 
 class EvidenceChainService:
@@ -24,7 +116,12 @@ class EvidenceChainService:
         self.db = db
     
     async def get_case_evidence_dashboard(self, case_id: int) -> EvidenceChainDashboard:
-        """获取案件证据链看板 - 核心方法（异步版本）"""
+        """获取案件证据链看板 - 核心方法（异步版本）
+        
+        看板按案件物化：先只加载证据、关联特征的轻量列计算每个证据要求的依赖指纹，
+        指纹未变化的要求直接复用物化结果；只有指纹变化的要求才加载完整证据、重新校对并重算，
+        然后回写物化结果。证据、特征、关联特征或当事人的任何写入都会改变对应要求的指纹。
+        """
         # 获取案件信息，预加载case_parties关系
         case_result = await self.db.execute(
             select(Case).options(joinedload(Case.case_parties)).where(Case.id == case_id)
@@ -33,11 +130,286 @@ class EvidenceChainService:
         if not case:
             raise ValueError(f"案件不存在: {case_id}")
         
-        # 获取案件的所有证据和特征，预加载case关系以供校对使用
-        evidences_result = await self.db.execute(
-            select(Evidence).options(joinedload(Evidence.case).joinedload(Case.case_parties)).where(Evidence.case_id == case_id)
+        # 只加载计算依赖指纹所需的列
+        evidence_rows = (await self.db.execute(
+            select(Evidence.id, Evidence.classification_category, Evidence.evidence_role, Evidence.updated_at)
+            .where(Evidence.case_id == case_id)
+        )).all()
+        association_rows = (await self.db.execute(
+            select(AssociationEvidenceFeature.id, AssociationEvidenceFeature.association_evidence_ids,
+                   AssociationEvidenceFeature.updated_at)
+            .where(AssociationEvidenceFeature.case_id == case_id)
+        )).all()
+        materialized = (await self.db.execute(
+            select(EvidenceChainDashboardSnapshot.requirements)
+            .where(EvidenceChainDashboardSnapshot.case_id == case_id)
+        )).scalar_one_or_none() or {}
+        
+        chain_entries, stale, stale_evidence_ids, stale_association_ids = self._plan_requirements(
+            case, FingerprintIndex(evidence_rows, association_rows), materialized
+        )
+        
+        requirements: Dict[str, EvidenceRequirement] = {}
+        if stale:
+            logger.info(f"案件 {case_id} 证据链看板需要重算 {len(stale)} 个证据要求: {[key for key, _ in stale]}")
+            evidences, association_features = await self._load_requirement_sources(
+                [case_id], stale_evidence_ids, stale_association_ids
+            )
+            # 证据和关联特征只索引一次，各证据要求的计算都是查表
+            index = EvidenceIndex(evidences, association_features)
+            for cache_key, node in stale:
+                requirements[cache_key] = self._evaluate_requirement(node, index)
+        
+        dashboard, updated_materialized = self._assemble_dashboard(case_id, chain_entries, requirements, materialized)
+        if stale or set(updated_materialized) != set(materialized):
+            await self._save_materialized(case_id, updated_materialized)
+        
+        return dashboard
+    
+    async def get_cases_evidence_dashboards(
+        self,
+        case_ids: List[int],
+        include_details: bool = False,
+    ) -> EvidenceChainBatchDashboard:
+        """批量获取多个案件的证据链看板摘要
+        
+        与单案件看板使用相同的物化结果：案件、证据与关联特征的轻量列、物化结果各用一次集合查询加载，
+        所有案件需要重算的证据要求合并为一次完整证据加载和一次关联特征加载，
+        重算按案件拆分为独立任务；需要重算的要求较多时在进程池中并行计算，最后一次性回写物化结果。
+        
+        Args:
+            case_ids: 案件ID列表（保持请求顺序，重复ID只计算一次）
+            include_details: 是否返回每个案件的完整看板
+        """
+        case_ids = list(dict.fromkeys(case_ids))
+        cases_result = await self.db.execute(
+            select(Case).options(joinedload(Case.case_parties)).where(Case.id.in_(case_ids))
         )
-        evidences = list(evidences_result.scalars().unique().all())
+        cases = {case.id: case for case in cases_result.scalars().unique().all()}
+        found_ids = [case_id for case_id in case_ids if case_id in cases]
+        
+        evidence_rows_by_case: Dict[int, List[Any]] = {case_id: [] for case_id in found_ids}
+        association_rows_by_case: Dict[int, List[Any]] = {case_id: [] for case_id in found_ids}
+        materialized_by_case: Dict[int, Dict[str, Any]] = {}
+        if found_ids:
+            evidence_rows = (await self.db.execute(
+                select(Evidence.case_id, Evidence.id, Evidence.classification_category,
+                       Evidence.evidence_role, Evidence.updated_at)
+                .where(Evidence.case_id.in_(found_ids))
+            )).all()
+            for row in evidence_rows:
+                evidence_rows_by_case[row.case_id].append(row)
+            association_rows = (await self.db.execute(
+                select(AssociationEvidenceFeature.case_id, AssociationEvidenceFeature.id,
+                       AssociationEvidenceFeature.association_evidence_ids, AssociationEvidenceFeature.updated_at)
+                .where(AssociationEvidenceFeature.case_id.in_(found_ids))
+            )).all()
+            for row in association_rows:
+                association_rows_by_case[row.case_id].append(row)
+            materialized_rows = (await self.db.execute(
+                select(EvidenceChainDashboardSnapshot.case_id, EvidenceChainDashboardSnapshot.requirements)
+                .where(EvidenceChainDashboardSnapshot.case_id.in_(found_ids))
+            )).all()
+            materialized_by_case = {row.case_id: row.requirements or {} for row in materialized_rows}
+        
+        plans = {}
+        stale_evidence_ids: Set[int] = set()
+        stale_association_ids: Set[int] = set()
+        for case_id in found_ids:
+            plan = self._plan_requirements(
+                cases[case_id],
+                FingerprintIndex(evidence_rows_by_case[case_id], association_rows_by_case[case_id]),
+                materialized_by_case.get(case_id, {}),
+            )
+            plans[case_id] = plan
+            stale_evidence_ids.update(plan[2])
+            stale_association_ids.update(plan[3])
+        
+        # 所有案件需要重算的要求共用一次证据加载和校对，按案件拆分为计算任务
+        jobs: List[EvaluationJob] = []
+        config_digest = get_requirement_graph().config_digest
+        stale_cases = [case_id for case_id in found_ids if plans[case_id][1]]
+        if stale_cases:
+            evidences, association_features = await self._load_requirement_sources(
+                stale_cases, stale_evidence_ids, stale_association_ids
+            )
+            evidences_by_case: Dict[int, List[EvidenceRecord]] = {case_id: [] for case_id in stale_cases}
+            for evidence in evidences:
+                evidences_by_case[evidence.case_id].append(EvidenceRecord.from_model(evidence))
+            associations_by_case: Dict[int, List[AssociationRecord]] = {case_id: [] for case_id in stale_cases}
+            for feature in association_features:
+                associations_by_case[feature.case_id].append(AssociationRecord.from_model(feature))
+            for case_id in stale_cases:
+                chain_entries, stale, _, _ = plans[case_id]
+                stale_keys = {cache_key for cache_key, _ in stale}
+                requirement_keys = [
+                    (cache_key, chain.chain_id, node.key)
+                    for chain, entries in chain_entries
+                    for cache_key, node, _ in entries
+                    if cache_key in stale_keys
+                ]
+                jobs.append((
+                    case_id, requirement_keys, evidences_by_case[case_id], associations_by_case[case_id], config_digest
+                ))
+        
+        stale_count = sum(len(job[1]) for job in jobs)
+        if stale_count:
+            logger.info(f"批量证据链看板: {len(found_ids)} 个案件，{len(jobs)} 个案件共需重算 {stale_count} 个证据要求")
+        computed = await self._run_evaluation_jobs(jobs, stale_count)
+        
+        summaries = []
+        to_save: Dict[int, Dict[str, Any]] = {}
+        for case_id in found_ids:
+            chain_entries, stale, _, _ = plans[case_id]
+            materialized = materialized_by_case.get(case_id, {})
+            requirements = {
+                cache_key: REQUIREMENT_MODELS[entry["kind"]].model_validate(entry["requirement"])
+                for cache_key, entry in computed.get(case_id, {}).items()
+            }
+            dashboard, updated_materialized = self._assemble_dashboard(
+                case_id, chain_entries, requirements, materialized
+            )
+            if stale or set(updated_materialized) != set(materialized):
+                to_save[case_id] = updated_materialized
+            summaries.append(self._summarize_dashboard(dashboard, include_details))
+        
+        if to_save:
+            await self._save_materialized_batch(to_save)
+        
+        return EvidenceChainBatchDashboard(
+            items=summaries,
+            missing_case_ids=[case_id for case_id in case_ids if case_id not in cases],
+        )
+    
+    async def _run_evaluation_jobs(
+        self,
+        jobs: List[EvaluationJob],
+        stale_count: int,
+    ) -> Dict[int, Dict[str, Dict[str, Any]]]:
+        """执行各案件的重算任务；需要重算的要求达到阈值且有多个案件时在进程池中并行计算"""
+        if not jobs:
+            return {}
+        if len(jobs) > 1 and stale_count >= settings.EVIDENCE_CHAIN_PROCESS_POOL_THRESHOLD:
+            loop = asyncio.get_running_loop()
+            pool = _get_evaluation_pool()
+            results = await asyncio.gather(*(
+                loop.run_in_executor(pool, evaluate_case_requirements, job) for job in jobs
+            ))
+        else:
+            results = [evaluate_case_requirements(job) for job in jobs]
+        return dict(results)
+    
+    def _plan_requirements(
+        self,
+        case: Case,
+        rows: FingerprintIndex,
+        materialized: Dict[str, Any],
+    ) -> Tuple[
+        List[Tuple[ChainNode, List[Tuple[str, RequirementNode, str]]]],
+        List[Tuple[str, RequirementNode]],
+        Set[int],
+        Set[int],
+    ]:
+        """计算每个证据要求的依赖指纹，找出需要重算的要求
+        
+        Args:
+            rows: 案件证据与关联特征轻量列的索引（各要求共用一次分桶）
+        
+        Returns:
+            (各证据链的 (物化键, 要求, 指纹) 列表, 需要重算的 (物化键, 要求), 需要加载的证据ID, 需要加载的关联特征ID)
+        """
+        # 获取适用的证据链配置
+        applicable_chains = self._get_applicable_chains_for_case(case)
+        case_token = self._case_dependency_token(case)
+        
+        chain_entries: List[Tuple[ChainNode, List[Tuple[str, RequirementNode, str]]]] = []
+        stale: List[Tuple[str, RequirementNode]] = []
+        stale_evidence_ids: Set[int] = set()
+        stale_association_ids: Set[int] = set()
+        for chain in applicable_chains:
+            entries = []
+            for node in chain.requirements:
+                cache_key = f"{chain.chain_id}::{node.key}"
+                evidence_ids, association_ids, fingerprint = self._requirement_fingerprint(node, rows, case_token)
+                entries.append((cache_key, node, fingerprint))
+                cached = materialized.get(cache_key)
+                if not cached or cached.get("fingerprint") != fingerprint:
+                    stale.append((cache_key, node))
+                    stale_evidence_ids.update(evidence_ids)
+                    stale_association_ids.update(association_ids)
+            chain_entries.append((chain, entries))
+        return chain_entries, stale, stale_evidence_ids, stale_association_ids
+    
+    def _assemble_dashboard(
+        self,
+        case_id: int,
+        chain_entries: List[Tuple[ChainNode, List[Tuple[str, RequirementNode, str]]]],
+        requirements: Dict[str, EvidenceRequirement],
+        materialized: Dict[str, Any],
+    ) -> Tuple[EvidenceChainDashboard, Dict[str, Any]]:
+        """组装看板，复用未失效的物化结果，返回看板和新的物化结果"""
+        chains = []
+        updated_materialized: Dict[str, Any] = {}
+        for chain, entries in chain_entries:
+            chain_requirements = []
+            for cache_key, node, fingerprint in entries:
+                requirement = requirements.get(cache_key)
+                if requirement is None:
+                    cached = materialized[cache_key]
+                    requirement = REQUIREMENT_MODELS[cached["kind"]].model_validate(cached["requirement"])
+                    updated_materialized[cache_key] = cached
+                else:
+                    updated_materialized[cache_key] = {
+                        "fingerprint": fingerprint,
+                        "kind": self._requirement_kind(requirement),
+                        "requirement": requirement.model_dump(mode="json"),
+                    }
+                chain_requirements.append((node, requirement))
+            chains.append(self._summarize_chain(chain, chain_requirements))
+        return self._build_dashboard(case_id, chains), updated_materialized
+    
+    def _summarize_dashboard(self, dashboard: EvidenceChainDashboard, include_details: bool) -> EvidenceChainCaseSummary:
+        """看板的紧凑摘要"""
+        return EvidenceChainCaseSummary(
+            case_id=dashboard.case_id,
+            overall_completion=dashboard.overall_completion,
+            overall_feasibility_completion=dashboard.overall_feasibility_completion,
+            total_chains=len(dashboard.chains),
+            feasible_chains_count=dashboard.feasible_chains_count,
+            activated_chains_count=dashboard.activated_chains_count,
+            total_requirements=dashboard.total_requirements,
+            satisfied_requirements=dashboard.satisfied_requirements,
+            chains=[
+                EvidenceChainSummary(
+                    chain_id=chain.chain_id,
+                    completion_percentage=chain.completion_percentage,
+                    feasibility_status=chain.feasibility_status,
+                    feasibility_completion=chain.feasibility_completion,
+                    is_feasible=chain.is_feasible,
+                    is_activated=chain.is_activated,
+                )
+                for chain in dashboard.chains
+            ],
+            dashboard=dashboard if include_details else None,
+        )
+    
+    async def _load_requirement_sources(
+        self,
+        case_ids: List[int],
+        evidence_ids: Set[int],
+        association_ids: Set[int],
+    ) -> Tuple[List[Evidence], List[AssociationEvidenceFeature]]:
+        """加载需要重算的要求所依赖的完整证据（并执行校对）和关联特征（可跨多个案件）"""
+        evidences: List[Evidence] = []
+        if evidence_ids:
+            # 预加载case关系以供校对使用
+            evidences_result = await self.db.execute(
+                select(Evidence)
+                .options(joinedload(Evidence.case).joinedload(Case.case_parties))
+                .where(Evidence.case_id.in_(case_ids))
+                .where(Evidence.id.in_(evidence_ids))
+            )
+            evidences = list(evidences_result.scalars().unique().all())
         
         # 为每个证据添加校对信息，确保使用最新的校对结果
         from app.evidences.services import enhance_evidence_with_proofreading
@@ -45,35 +417,92 @@ class EvidenceChainService:
         for evidence in evidences:
             enhanced_evidence = await enhance_evidence_with_proofreading(evidence, self.db)
             enhanced_evidences.append(enhanced_evidence)
+        # 校对结果只存在于内存中，移出会话，避免回写物化结果提交时被一并写回证据
+        for evidence in enhanced_evidences:
+            self.db.expunge(evidence)
+        
+        association_features: List[AssociationEvidenceFeature] = []
+        if association_ids:
+            association_features_result = await self.db.execute(
+                select(AssociationEvidenceFeature)
+                .where(AssociationEvidenceFeature.case_id.in_(case_ids))
+                .where(AssociationEvidenceFeature.id.in_(association_ids))
+            )
+            association_features = list(association_features_result.scalars().all())
         
-        evidences = enhanced_evidences
-        
-        # 设置当前证据列表，供角色检查方法使用
-        self._current_evidences = evidences
-        
-        association_features_result = await self.db.execute(
-            select(AssociationEvidenceFeature).where(AssociationEvidenceFeature.case_id == case_id)
+        return enhanced_evidences, association_features
+    
+    async def _save_materialized(self, case_id: int, requirements: Dict[str, Any]) -> None:
+        """回写案件的看板物化结果（物化失败不影响看板返回）"""
+        stmt = insert(EvidenceChainDashboardSnapshot).values(case_id=case_id, requirements=requirements)
+        await self._execute_materialized_upsert(stmt, f"案件 {case_id}")
+    
+    async def _save_materialized_batch(self, requirements_by_case: Dict[int, Dict[str, Any]]) -> None:
+        """一条语句回写多个案件的看板物化结果"""
+        stmt = insert(EvidenceChainDashboardSnapshot).values([
+            {"case_id": case_id, "requirements": requirements}
+            for case_id, requirements in requirements_by_case.items()
+        ])
+        await self._execute_materialized_upsert(stmt, f"{len(requirements_by_case)} 个案件")
+    
+    async def _execute_materialized_upsert(self, stmt, target: str) -> None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EvidenceChainDashboardSnapshot.case_id],
+            set_={"requirements": stmt.excluded.requirements, "updated_at": func.now()},
         )
-        association_features = list(association_features_result.scalars().all())
+        try:
+            await self.db.execute(stmt)
+            await self.db.commit()
+        except Exception as e:
+            logger.error(f"保存{target}证据链看板物化结果失败: {e}")
+            await self.db.rollback()
+    
+    def _case_dependency_token(self, case: Case) -> List[Any]:
+        """案件与当事人的依赖标识（校对与角色依赖案件和当事人信息）"""
+        parties = sorted((party.id, str(party.updated_at)) for party in case.case_parties or [])
+        return [case.id, str(case.updated_at), parties]
+    
+    def _requirement_fingerprint(
+        self,
+        node: RequirementNode,
+        rows: FingerprintIndex,
+        case_token: List[Any],
+    ) -> Tuple[Set[int], Set[int], str]:
+        """计算证据要求的依赖指纹
         
-        # 获取适用的证据链配置
-        applicable_chains = self._get_applicable_chains_for_case(case)
+        依赖包括：要求配置及相关证据类型配置（编译时预先计算的摘要）、匹配该要求证据类型的证据、
+        引用了这些证据的关联特征、案件与当事人。
         
-
-        # 检查每个证据链的状态
-        chains = []
+        Returns:
+            (匹配的证据ID集合, 匹配的关联特征ID集合, 指纹)
+        """
+        matched_evidences = rows.evidence_rows_for(node)
+        evidence_ids = {row.id for row in matched_evidences}
+        matched_associations = rows.association_rows_for(evidence_ids)
+        
+        payload = {
+            "version": DASHBOARD_MATERIALIZATION_VERSION,
+            "config": node.config_digest,
+            "case": case_token,
+            "evidences": sorted(
+                (row.id, row.classification_category, row.evidence_role, str(row.updated_at)) for row in matched_evidences
+            ),
+            "associations": sorted((row.id, str(row.updated_at)) for row in matched_associations),
+        }
+        digest = hashlib.sha1(
+            json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return evidence_ids, {row.id for row in matched_associations}, digest
+    
+    def _build_dashboard(self, case_id: int, chains: List[EvidenceChain]) -> EvidenceChainDashboard:
+        """根据各证据链的状态汇总看板"""
         total_requirements = 0
         satisfied_requirements = 0
         feasible_chains_count = 0
         activated_chains_count = 0
         total_feasibility_completion = 0.0
         
-        for chain_config in applicable_chains:
-            chain = self._check_evidence_chain_status(
-                chain_config, evidences, association_features
-            )
-            chains.append(chain)
-            
+        for chain in chains:
             total_requirements += len(chain.requirements)
             satisfied_requirements += len([r for r in chain.requirements if r.status == EvidenceRequirementStatus.SATISFIED])
             
@@ -102,16 +531,13 @@ class EvidenceChainService:
             missing_requirements=total_requirements - satisfied_requirements
         )
     
-    def _get_applicable_chains_for_case(self, case: Case) -> List[Dict[str, Any]]:
-        """获取适用于案件的证据链"""
+    def _get_applicable_chains_for_case(self, case: Case) -> Tuple[ChainNode, ...]:
+        """获取适用于案件的证据链（从编译后的要求图中按案件类型和当事人类型查找）"""
         if not case.case_type:
-            return []
+            return ()
         
         case_type_str = case.case_type.value if hasattr(case.case_type, 'value') else str(case.case_type)
         
-        # 获取所有匹配案件类型的证据链
-        all_chains = config_manager.get_evidence_chains_by_case_type(case_type_str)
-        
         # 获取债权人和债务人类型
         creditor_type = None
         debtor_type = None
@@ -123,123 +549,78 @@ class EvidenceChainService:
                 elif party.party_role == "debtor":
                     debtor_type = party.party_type
         
-        # 如果没有设置债权人和债务人类型，返回所有匹配案件类型的证据链
-        if not creditor_type or not debtor_type:
-            return all_chains
+        # 没有设置债权人或债务人类型时，返回所有匹配案件类型的证据链
+        applicable_chains = get_requirement_graph().chains_for(case_type_str, creditor_type, debtor_type)
         
-        # 将数据库枚举值映射到YAML配置中的中文值
-        type_mapping = {
-            'person': '个人',
-            'company': '公司', 
-            'individual': '个体工商户'
-        }
-        
-        creditor_type_chinese = type_mapping.get(creditor_type, creditor_type)
-        debtor_type_chinese = type_mapping.get(debtor_type, debtor_type)
-        
-        # 筛选匹配债权人和债务人类型的证据链
-        applicable_chains = []
-        for chain in all_chains:
-            chain_creditor_type = chain.get('applicable_creditor_type')
-            chain_debtor_type = chain.get('applicable_debtor_type')
-            
-            # 检查债权人和债务人类型是否匹配
-            if (chain_creditor_type == creditor_type_chinese and 
-                chain_debtor_type == debtor_type_chinese):
-                applicable_chains.append(chain)
-        
-        # 添加日志记录，方便调试
-        from loguru import logger
         logger.info(f"案件 {case.id} 筛选证据链: case_type={case_type_str}, "
-                   f"creditor_type={creditor_type}->{creditor_type_chinese}, "
-                   f"debtor_type={debtor_type}->{debtor_type_chinese}, "
-                   f"总证据链数={len(all_chains)}, 适用证据链数={len(applicable_chains)}")
+                   f"creditor_type={creditor_type}, debtor_type={debtor_type}, "
+                   f"适用证据链数={len(applicable_chains)}")
         
         return applicable_chains
     
     def _check_evidence_chain_status(
         self,
-        chain_config: Dict[str, Any],
+        chain: ChainNode,
         evidences: List[Evidence],
         association_features: List[AssociationEvidenceFeature]
     ) -> EvidenceChain:
         """检查单个证据链的状态，支持"或"关系"""
-        chain_id = chain_config.get("chain_id")
-        if not chain_id:
-            raise ValueError("证据链配置缺少chain_id")
-        
-        required_evidence_types = chain_config.get("required_evidence_types", [])
+        index = EvidenceIndex(evidences, association_features)
+        chain_requirements = [
+            (node, self._evaluate_requirement(node, index))
+            for node in chain.requirements
+        ]
+        return self._summarize_chain(chain, chain_requirements)
+    
+    def _evaluate_requirement(self, node: RequirementNode, index: EvidenceIndex) -> EvidenceRequirement:
+        """计算单个证据要求的状态"""
+        if node.kind == "or_group":
+            # 处理"或"关系组，合并为一个要求
+            return self._process_or_group_requirement(node, index)
+        # 普通证据类型
+        return self._check_evidence_requirement_status(node.types[0], index)
+    
+    def _requirement_kind(self, requirement: EvidenceRequirement) -> str:
+        """证据要求对应的物化类型"""
+        if isinstance(requirement, OrGroupRequirement):
+            return "or_group"
+        if isinstance(requirement, RoleGroupRequirement):
+            return "role_group"
+        return "evidence_type"
+    
+    def _summarize_chain(
+        self,
+        chain: ChainNode,
+        chain_requirements: List[Tuple[RequirementNode, EvidenceRequirement]]
+    ) -> EvidenceChain:
+        """根据证据链各要求的状态汇总证据链状态"""
+        chain_id = chain.chain_id
         
         requirements = []
         satisfied_count = 0
         
-        # 处理"或"关系分组
-        or_groups = self._process_or_relationships(chain_config)
-        
         # 统计核心特征相关的数据
         core_requirements_count = 0  # 有核心特征要求的证据类型数量
         core_requirements_satisfied = 0  # 核心特征完备的证据类型数量
         
-        # 处理"或"关系组，合并证据类型要求
-        requirements = []
-        satisfied_count = 0
-        
-        # 第一遍：收集所有"或"关系组
-        or_groups_processed = set()
-        
-        for evidence_type_config in required_evidence_types:
-            or_group = evidence_type_config.get("or_group")
+        for node, requirement in chain_requirements:
+            requirements.append(requirement)
             
-
-            if or_group and or_group not in or_groups_processed:
-                # 处理"或"关系组，合并为一个要求
-                or_group_processed = self._process_or_group_requirement(
-                    or_group, 
-                    [cfg for cfg in required_evidence_types if cfg.get("or_group") == or_group],
-                    evidences, 
-                    association_features
-                )
-                requirements.append(or_group_processed)
-                
-                # 统计
-                if or_group_processed.status == EvidenceRequirementStatus.SATISFIED:
-                    satisfied_count += 1
-                
-                # 只有有核心特征要求时才计入核心证据类型数量
-                if or_group_processed.core_slots_count > 0:
+            if requirement.status == EvidenceRequirementStatus.SATISFIED:
+                satisfied_count += 1
+            
+            if isinstance(requirement, (OrGroupRequirement, RoleGroupRequirement)):
+                # "或"关系组和role_group类型：基于实际的核心槽位数量，且基于状态而不是完成度百分比
+                if requirement.core_slots_count > 0:
                     core_requirements_count += 1
-                    # 对于"或"关系组，基于状态而不是完成度百分比
-                    if or_group_processed.status == EvidenceRequirementStatus.SATISFIED:
+                    if requirement.status == EvidenceRequirementStatus.SATISFIED:
+                        core_requirements_satisfied += 1
+            else:
+                # 普通证据类型：基于配置中的core_evidence_slot
+                if node.types[0].core_slots:
+                    core_requirements_count += 1
+                    if requirement.core_completion_percentage == 100.0:
                         core_requirements_satisfied += 1
-                
-                or_groups_processed.add(or_group)
-                
-            elif not or_group:
-                # 普通证据类型
-                requirement = self._check_evidence_requirement_status(
-                    evidence_type_config, evidences, association_features
-                )
-                requirements.append(requirement)
-                
-                if requirement.status == EvidenceRequirementStatus.SATISFIED:
-                    satisfied_count += 1
-                
-                # 检查是否有核心特征要求
-                # 对于配置了role_group的证据类型，需要检查其实际的核心槽位数量
-                from app.evidence_chains.schemas import RoleGroupRequirement
-                if isinstance(requirement, RoleGroupRequirement):
-                    # role_group类型：基于实际的核心槽位数量
-                    if requirement.core_slots_count > 0:
-                        core_requirements_count += 1
-                        if requirement.status == EvidenceRequirementStatus.SATISFIED:
-                            core_requirements_satisfied += 1
-                else:
-                    # 普通证据类型：基于配置中的core_evidence_slot
-                    core_slots_config = evidence_type_config.get("core_evidence_slot", [])
-                    if core_slots_config and len(core_slots_config) > 0:
-                        core_requirements_count += 1
-                        if requirement.core_completion_percentage == 100.0:
-                            core_requirements_satisfied += 1
         
         # 计算完成度
         total_count = len(requirements)
@@ -292,80 +673,24 @@ class EvidenceChainService:
             requirements=requirements
         )
     
-    def _process_or_relationships(self, chain_config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
-        """处理"或"关系分组，合并槽位并判断满足状态"""
-        or_groups = {}
-        
-        # 第一遍：收集所有"或"关系组
-        for evidence_type_config in chain_config.get("required_evidence_types", []):
-            or_group = evidence_type_config.get("or_group")
-            if or_group:
-                if or_group not in or_groups:
-                    or_groups[or_group] = {
-                        "evidence_types": [],
-                        "core_slots": set(),  # 合并后的核心槽位
-                        "satisfied": False
-                    }
-                or_groups[or_group]["evidence_types"].append(evidence_type_config["evidence_type"])
-                # 合并核心槽位
-                core_slots = evidence_type_config.get("core_evidence_slot", [])
-                or_groups[or_group]["core_slots"].update(core_slots)
-        
-        return or_groups
-    
     def _check_evidence_requirement_status(
         self,
-        evidence_type_config: Dict[str, Any],
-        evidences: List[Evidence],
-        association_features: List[AssociationEvidenceFeature]
+        type_requirement: TypeRequirement,
+        index: EvidenceIndex
     ) -> Union[EvidenceTypeRequirement, RoleGroupRequirement]:
         """检查单个证据要求的状态"""
-        evidence_type = evidence_type_config.get("evidence_type")
-        if not evidence_type:
-            raise ValueError("证据类型配置缺少evidence_type")
-        
-        core_slots = evidence_type_config.get("core_evidence_slot", [])
+        evidence_type = type_requirement.evidence_type
+        core_slots = type_requirement.core_slots
         
-        # 检查该证据类型是否在evidence_chains.yaml中配置了role_group
-        role_group = evidence_type_config.get("role_group", [])
-        has_role_group = len(role_group) > 0
-        
-        # 如果配置了role_group，需要为每个角色创建单独的要求
-        if has_role_group:
+        # 如果在evidence_chains.yaml中配置了role_group，需要为每个角色创建单独的要求
+        if type_requirement.role_group:
             return self._process_role_based_evidence_requirement(
-                evidence_type, core_slots, role_group, evidences, association_features
+                type_requirement, index
             )
         
         # 原有的处理逻辑（没有role_group的情况）
-        slot_details = []
-        
-        # 从配置文件获取该证据类型的所有槽位
-        config_slots = []
-        try:
-            from app.core.config_manager import config_manager
-            evidence_type_config_full = config_manager.get_evidence_type_by_type_name(str(evidence_type))
-            if evidence_type_config_full and "extraction_slots" in evidence_type_config_full:
-                config_slots = evidence_type_config_full["extraction_slots"]
-        except Exception as e:
-            # 如果获取配置失败，记录日志但继续执行
-            print(f"获取证据类型 {evidence_type} 的配置失败: {e}")
-        
-        # 收集所有可能的槽位（只使用配置中定义的槽位，避免数据污染）
-        all_slots = set()
-        
-        # 只添加配置文件中定义的且slot_required=true的槽位
-        for slot_config in config_slots:
-            slot_name = slot_config.get("slot_name")
-            slot_required = slot_config.get("slot_required", True)  # 默认为True
-            if slot_name and slot_required:  # 只添加slot_required=true的槽位
-                all_slots.add(slot_name)
-        
-        # 添加配置中的核心槽位（如果不在配置槽位中且slot_required=true）
-        for core_slot in core_slots:
-            # 检查核心槽位是否在配置中且slot_required=true
-            core_slot_config = next((slot for slot in config_slots if slot.get("slot_name") == core_slot), None)
-            if core_slot_config and core_slot_config.get("slot_required", True):
-                all_slots.add(core_slot)
+        # 只使用配置中定义且slot_required=true的槽位（要求图编译时预先计算），避免数据污染
+        all_slots = type_requirement.required_slot_set
         
         # 不再从实际证据和关联证据中收集槽位，只使用配置中定义的
         # 这样可以避免数据污染，确保每个证据类型只包含其配置中定义的槽位
@@ -377,41 +702,40 @@ class EvidenceChainService:
         evidence_slot_groups = {}  # evidence_id -> {slot_name -> feature_data}
         association_slot_groups = {}  # group_name -> {slot_name -> feature_data}
         
-        # 检查普通证据，按证据实例分组
-        for evidence in evidences:
-            if self._is_evidence_matching_type(evidence, str(evidence_type)):
-                if evidence.evidence_features:
-                    evidence_slot_groups[evidence.id] = {}
-                    for feature in evidence.evidence_features:
-                        slot_name = feature.get("slot_name")
-                        if slot_name in all_slots:
-                            evidence_slot_groups[evidence.id][slot_name] = {
-                                "source_type": "evidence",
-                                "source_id": evidence.id,
-                                "confidence": feature.get("confidence", 0.0),
-                                "feature_data": feature
-                            }
+        # 检查普通证据，按证据实例分组（同名槽位取最后一个特征）
+        matching_evidences = index.evidences_for(type_requirement.matcher)
+        for evidence in matching_evidences:
+            if evidence.evidence_features:
+                evidence_slot_groups[evidence.id] = {}
+                for slot_name, feature in index.slot_features(evidence).items():
+                    if slot_name in all_slots:
+                        evidence_slot_groups[evidence.id][slot_name] = {
+                            "source_type": "evidence",
+                            "source_id": evidence.id,
+                            "confidence": feature.get("confidence", 0.0),
+                            "feature_data": feature
+                        }
         
         # 检查关联证据特征，按分组统计
-        for assoc_feature in association_features:
-            if self._is_association_feature_matching_type(assoc_feature, str(evidence_type), evidences):
-                if assoc_feature.evidence_features:
-                    group_name = assoc_feature.slot_group_name
-                    if group_name not in association_slot_groups:
-                        association_slot_groups[group_name] = {}
-                    for feature in assoc_feature.evidence_features:
-                        slot_name = feature.get("slot_name")
-                        if slot_name in all_slots:
-                            association_slot_groups[group_name][slot_name] = {
-                                "source_type": "association_group",
-                                "source_id": group_name,
-                                "confidence": feature.get("confidence", 0.0),
-                                "feature_data": feature
-                            }
+        matching_associations = index.associations_for(type_requirement.matcher)
+        for assoc_feature in matching_associations:
+            if assoc_feature.evidence_features:
+                group_name = assoc_feature.slot_group_name
+                if group_name not in association_slot_groups:
+                    association_slot_groups[group_name] = {}
+                for feature in assoc_feature.evidence_features:
+                    slot_name = feature.get("slot_name")
+                    if slot_name in all_slots:
+                        association_slot_groups[group_name][slot_name] = {
+                            "source_type": "association_group",
+                            "source_id": group_name,
+                            "confidence": feature.get("confidence", 0.0),
+                            "feature_data": feature
+                        }
         
         # 选择最完整的证据实例或分组作为该证据类型的代表
         best_source = self._select_best_evidence_source(
-            evidence_slot_groups, association_slot_groups, all_slots, core_slots
+            evidence_slot_groups, association_slot_groups, all_slots, core_slots, index
         )
         
         # 根据最佳源构建槽位详情
@@ -446,12 +770,10 @@ class EvidenceChainService:
         # 核心特征：在 evidence_chains.yaml 的 core_evidence_slot 中定义的特征
         # 补充特征：不在 core_evidence_slot 中，但在 evidence_types.yaml 中定义的特征
         
-        # 检查是否是"或"关系的一部分，如果是，需要特殊处理槽位合并
-        or_group = evidence_type_config.get("or_group")
         core_slot_details = []
         non_core_slot_details = []
         
-        for slot in all_slots:
+        for slot in type_requirement.required_slots:
             is_satisfied, source_type, source_id, confidence = slot_satisfaction.get(slot, (False, None, None, None))
             # 判断是否是核心特征：基于 evidence_chains.yaml 配置，不是 slot_required
             is_core = slot in core_slots
@@ -470,13 +792,6 @@ class EvidenceChainService:
                 slot_is_consistent = feature_data.get("slot_is_consistent")
                 slot_expected_value = feature_data.get("slot_expected_value")
                 slot_proofread_reasoning = feature_data.get("slot_proofread_reasoning")
-                
-                # 调试：检查校对信息是否正确提取
-                if slot == "债务人脱敏真名" or slot == "转账账户真名":
-                    evidence_role = getattr(evidence, 'evidence_role', 'unknown') if best_source["source_type"] == "evidence" else "association_group"
-                    print(f"字段 {slot} 校对信息: proofread_at={slot_proofread_at}, consistent={slot_is_consistent}, expected={slot_expected_value}, role={evidence_role}")
-                    print(f"完整feature_data: {feature_data}")
-                
 
             
             slot_detail = EvidenceSlotDetail(
@@ -514,8 +829,7 @@ class EvidenceChainService:
         core_completion_percentage = (core_slots_satisfied / core_slots_count * 100) if core_slots_count > 0 else 100.0
         supplementary_completion_percentage = (supplementary_slots_satisfied / supplementary_slots_count * 100) if supplementary_slots_count > 0 else 100.0
         
-        # 调试：检查完成度计算
-        print(f"证据类型 {evidence_type} 完成度: 核心={core_slots_satisfied}/{core_slots_count} ({core_completion_percentage:.1f}%), 补充={supplementary_slots_satisfied}/{supplementary_slots_count} ({supplementary_completion_percentage:.1f}%)")
+        logger.debug(f"证据类型 {evidence_type} 完成度: 核心={core_slots_satisfied}/{core_slots_count} ({core_completion_percentage:.1f}%), 补充={supplementary_slots_satisfied}/{supplementary_slots_count} ({supplementary_completion_percentage:.1f}%)")
         
         # 确定状态（只基于核心槽位，且slot_required=true）
         # 过滤核心槽位，只保留slot_required=true的
@@ -523,12 +837,7 @@ class EvidenceChainService:
         core_satisfied_count = sum(1 for slot in filtered_core_slots if slot_satisfaction.get(slot, (False, None, None, None))[0])
         
         # 判断是否有匹配的证据（用于确定 MISSING 状态）
-        has_matching_evidence = any(
-            self._is_evidence_matching_type(evidence, str(evidence_type)) for evidence in evidences
-        ) or any(
-            self._is_association_feature_matching_type(assoc_feature, str(evidence_type), evidences) 
-            for assoc_feature in association_features
-        )
+        has_matching_evidence = bool(matching_evidences) or bool(matching_associations)
         
         if not has_matching_evidence:
             status = EvidenceRequirementStatus.MISSING
@@ -558,56 +867,10 @@ class EvidenceChainService:
             supplementary_completion_percentage=supplementary_completion_percentage
         )
     
-    def _is_evidence_matching_type(self, evidence: Evidence, required_type: str) -> bool:
-        """判断证据是否匹配要求的类型"""
-        if not evidence.classification_category:
-            return False
-        
-        # 严格的类型匹配，避免跨类型污染
-        evidence_category = evidence.classification_category.lower().strip()
-        required_type_lower = required_type.lower().strip()
-        
-        # 直接相等匹配
-        if evidence_category == required_type_lower:
-            return True
-        
-        # 对于特殊情况，使用精确的映射关系
-        type_mapping = {
-            "身份证": ["身份证", "居民身份证"],
-            "中华人民共和国居民户籍档案": ["中华人民共和国居民户籍档案", "户籍档案", "户口簿"],
-            "公司营业执照": ["公司营业执照", "营业执照"],
-            "个体工商户营业执照": ["个体工商户营业执照", "个体户营业执照"],
-            "公司全国企业公示系统截图": ["公司全国企业公示系统截图", "企业公示系统"],
-            "个体工商户全国企业公示系统截图": ["个体工商户全国企业公示系统截图", "个体户公示系统"],
-            "经常居住地证明": ["经常居住地证明", "居住证明"],
-            "微信聊天记录": ["微信聊天记录", "微信聊天"],
-            "微信个人主页": ["微信个人主页", "微信主页"],
-            "微信支付转账电子凭证": ["微信支付转账电子凭证", "微信支付凭证"],
-            "微信转账页面": ["微信转账页面", "微信转账"],
-            "短信聊天记录": ["短信聊天记录", "短信"],
-            "支付宝转账页面": ["支付宝转账页面", "支付宝转账"],
-            "货款欠条": ["货款欠条", "欠条"],
-            "借款借条": ["借款借条", "借条"],
-            "银行转账记录": ["银行转账记录", "银行转账"],
-            "增值税发票": ["增值税发票", "发票"],
-            "电话号码截图": ["电话号码截图", "电话号码"],
-            "收款银行账户截图": ["收款银行账户截图", "银行账户"]
-        }
-        
-        # 检查映射关系
-        if required_type_lower in type_mapping:
-            return evidence_category in type_mapping[required_type_lower]
-        
-        # 如果没有映射关系，使用严格的包含匹配（避免跨类型污染）
-        # 只有当required_type是evidence_category的子字符串时才匹配
-        return required_type_lower in evidence_category
-    
     def _process_or_group_requirement(
         self,
-        or_group_name: str,
-        evidence_type_configs: List[Dict[str, Any]],
-        evidences: List[Evidence],
-        association_features: List[AssociationEvidenceFeature]
+        node: RequirementNode,
+        index: EvidenceIndex
     ) -> OrGroupRequirement:
         """处理"或"关系组，构建正确的嵌套结构
         
@@ -616,7 +879,7 @@ class EvidenceChainService:
         2. 内层：每个证据类型内部是role_group（债权人 和 债务人）
         3. 每个role_group内部是具体的角色要求
         """
-        print(f"处理or_group: {or_group_name}，构建嵌套结构")
+        logger.debug(f"处理or_group: {node.or_group}，构建嵌套结构")
         
         sub_groups = []
         total_core_slots = 0
@@ -625,17 +888,13 @@ class EvidenceChainService:
         total_supplementary_satisfied = 0
         
         # 处理每个证据类型
-        for config in evidence_type_configs:
-            evidence_type = config.get("evidence_type")
-            if evidence_type:
+        for type_requirement in node.types:
+            if type_requirement.evidence_type:
                 # 检查是否有角色要求 - 使用evidence_chains.yaml中的role_group配置
-                role_group = config.get("role_group", [])
-                has_role_requirements = len(role_group) > 0
-                
-                if has_role_requirements:
+                if type_requirement.role_group:
                     # 有角色要求：创建role_group
                     role_group_requirement = self._create_role_group_requirement(
-                        evidence_type, role_group, evidences, association_features
+                        type_requirement, index
                     )
                     sub_groups.append(role_group_requirement)
                     
@@ -647,7 +906,7 @@ class EvidenceChainService:
                 else:
                     # 没有角色要求：创建普通证据类型要求
                     requirement = self._check_evidence_requirement_status(
-                        config, evidences, association_features
+                        type_requirement, index
                     )
                     sub_groups.append(requirement)
                     
@@ -670,7 +929,7 @@ class EvidenceChainService:
             status = EvidenceRequirementStatus.MISSING
         
         # 生成组合名称
-        evidence_type_names = [config.get("evidence_type", "") for config in evidence_type_configs if config.get("evidence_type")]
+        evidence_type_names = [type_requirement.evidence_type for type_requirement in node.types]
         combined_name = " 或 ".join(evidence_type_names)
         
         return OrGroupRequirement(
@@ -688,13 +947,13 @@ class EvidenceChainService:
     
     def _create_role_group_requirement(
         self,
-        evidence_type: str,
-        supported_roles: List[str],
-        evidences: List[Evidence],
-        association_features: List[AssociationEvidenceFeature]
+        type_requirement: TypeRequirement,
+        index: EvidenceIndex
     ) -> RoleGroupRequirement:
         """创建角色组要求"""
-        print(f"创建角色组要求: {evidence_type}，角色: {supported_roles}")
+        evidence_type = type_requirement.evidence_type
+        supported_roles = list(type_requirement.role_group)
+        logger.debug(f"创建角色组要求: {evidence_type}，角色: {supported_roles}")
         
         sub_requirements = []
         total_core_slots = 0
@@ -705,7 +964,7 @@ class EvidenceChainService:
         # 为每个角色创建要求
         for role in supported_roles:
             role_requirement = self._create_role_based_requirement(
-                evidence_type, role, evidences, association_features
+                type_requirement, role, index
             )
             sub_requirements.append(role_requirement)
             
@@ -743,13 +1002,13 @@ class EvidenceChainService:
     
     def _create_role_based_requirement(
         self,
-        evidence_type: str,
+        type_requirement: TypeRequirement,
         role: str,
-        evidences: List[Evidence],
-        association_features: List[AssociationEvidenceFeature]
+        index: EvidenceIndex
     ) -> RoleBasedRequirement:
         """创建基于角色的证据要求"""
-        print(f"创建基于角色的要求: {evidence_type} ({role})")
+        evidence_type = type_requirement.evidence_type
+        logger.debug(f"创建基于角色的要求: {evidence_type} ({role})")
         
         # 角色名称映射
         role_name_mapping = {
@@ -761,16 +1020,13 @@ class EvidenceChainService:
         # 构建证据类型名称
         evidence_type_with_role = f"{evidence_type} ({role_name_cn})"
         
-        # 获取该证据类型的配置
+        # 该证据类型的全部提取槽位（要求图编译时预先计算）
         try:
-            from app.core.config_manager import config_manager
-            evidence_type_config_full = config_manager.get_evidence_type_by_type_name(str(evidence_type))
-            if evidence_type_config_full and "extraction_slots" in evidence_type_config_full:
-                extraction_slots = evidence_type_config_full["extraction_slots"]
-                
+            extraction_slots = type_requirement.extraction_slots
+            if extraction_slots:
                 # 查找该角色的证据
-                role_evidences = [e for e in evidences if self._is_evidence_matching_type(e, str(evidence_type)) and getattr(e, 'evidence_role', None) == role]
-                print(f"找到角色 {role} 的证据数量: {len(role_evidences)}")
+                role_evidences = index.evidences_for_role(type_requirement.matcher, role)
+                logger.debug(f"找到角色 {role} 的证据数量: {len(role_evidences)}")
                 
                 # 创建槽位详情
                 slots = []
@@ -781,15 +1037,13 @@ class EvidenceChainService:
                 
                 if role_evidences:
                     # 有证据：选择最好的证据来填充槽位信息
-                    all_slots_set = set(slot.get("slot_name", "") for slot in extraction_slots)
-                    best_evidence = self._select_best_evidence_for_role(role_evidences, all_slots_set, [])
+                    best_evidence = self._select_best_evidence_for_role(role_evidences, frozenset(extraction_slots), [])
                     
                     if best_evidence:
-                        for slot_config in extraction_slots:
-                            slot_name = slot_config.get("slot_name", "")
+                        for slot_name in extraction_slots:
                             if slot_name:
                                 # 从最佳证据中获取槽位信息
-                                slot_info = self._get_slot_info_from_evidence(best_evidence, slot_name)
+                                slot_info = self._get_slot_info_from_evidence(best_evidence, slot_name, index)
                                 
                                 slot_detail = EvidenceSlotDetail(
                                     slot_name=slot_name,
@@ -812,8 +1066,7 @@ class EvidenceChainService:
                                 supplementary_slots_count += 1
                 else:
                     # 没有证据：创建空的槽位
-                    for slot_config in extraction_slots:
-                        slot_name = slot_config.get("slot_name", "")
+                    for slot_name in extraction_slots:
                         if slot_name:
                             slot_detail = EvidenceSlotDetail(
                                 slot_name=slot_name,
@@ -855,7 +1108,7 @@ class EvidenceChainService:
                     supplementary_completion_percentage=supplementary_completion_percentage
                 )
         except Exception as e:
-            print(f"创建基于角色的要求失败: {e}")
+            logger.error(f"创建基于角色的要求失败: {e}")
         
         # 如果出错，返回空的角色要求
         return RoleBasedRequirement(
@@ -873,37 +1126,16 @@ class EvidenceChainService:
     
     def _process_role_based_evidence_requirement(
         self,
-        evidence_type: str,
-        core_slots: List[str],
-        supported_roles: List[str],
-        evidences: List[Evidence],
-        association_features: List[AssociationEvidenceFeature]
+        type_requirement: TypeRequirement,
+        index: EvidenceIndex
     ) -> RoleGroupRequirement:
         """处理基于角色的证据要求，返回RoleGroupRequirement结构"""
+        evidence_type = type_requirement.evidence_type
+        core_slots = type_requirement.core_slots
+        supported_roles = list(type_requirement.role_group)
         
-        # 从配置文件获取该证据类型的所有槽位
-        config_slots = []
-        try:
-            from app.core.config_manager import config_manager
-            evidence_type_config_full = config_manager.get_evidence_type_by_type_name(str(evidence_type))
-            if evidence_type_config_full and "extraction_slots" in evidence_type_config_full:
-                config_slots = evidence_type_config_full["extraction_slots"]
-        except Exception as e:
-            print(f"获取证据类型 {evidence_type} 的配置失败: {e}")
-        
-        # 收集所有可能的槽位
-        all_slots = set()
-        for slot_config in config_slots:
-            slot_name = slot_config.get("slot_name")
-            slot_required = slot_config.get("slot_required", True)
-            if slot_name and slot_required:
-                all_slots.add(slot_name)
-        
-        # 添加配置中的核心槽位
-        for core_slot in core_slots:
-            core_slot_config = next((slot for slot in config_slots if slot.get("slot_name") == core_slot), None)
-            if core_slot_config and core_slot_config.get("slot_required", True):
-                all_slots.add(core_slot)
+        # 所有可能的槽位：配置中slot_required=true的槽位（要求图编译时预先计算）
+        all_slots = type_requirement.required_slot_set
         
         # 为每个角色创建要求
         sub_requirements = []
@@ -920,7 +1152,7 @@ class EvidenceChainService:
         
         for role in supported_roles:
             # 查找该角色的证据
-            role_evidences = [e for e in evidences if self._is_evidence_matching_type(e, str(evidence_type)) and getattr(e, 'evidence_role', None) == role]
+            role_evidences = index.evidences_for_role(type_requirement.matcher, role)
             
             if role_evidences:
                 # 选择该角色中最好的证据
@@ -932,11 +1164,11 @@ class EvidenceChainService:
                     role_core_slots_satisfied = 0
                     role_supplementary_slots_satisfied = 0
                     
-                    for slot_name in all_slots:
+                    for slot_name in type_requirement.required_slots:
                         is_core = slot_name in core_slots
                         
                         # 从最佳证据中获取槽位信息
-                        slot_info = self._get_slot_info_from_evidence(best_evidence, slot_name)
+                        slot_info = self._get_slot_info_from_evidence(best_evidence, slot_name, index)
                         
                         # 创建槽位详情，包含中文角色信息
                         slot_detail = EvidenceSlotDetail(
@@ -1008,7 +1240,7 @@ class EvidenceChainService:
                 else:
                     # 如果没有找到最佳证据，创建空的角色要求
                     role_slots = []
-                    for slot_name in all_slots:
+                    for slot_name in type_requirement.required_slots:
                         is_core = slot_name in core_slots
                         slot_detail = EvidenceSlotDetail(
                             slot_name=f"{slot_name}",
@@ -1048,7 +1280,7 @@ class EvidenceChainService:
             else:
                 # 如果没有该角色的证据，创建空的角色要求
                 role_slots = []
-                for slot_name in all_slots:
+                for slot_name in type_requirement.required_slots:
                     is_core = slot_name in core_slots
                     slot_detail = EvidenceSlotDetail(
                         slot_name=f"{slot_name}",
@@ -1129,21 +1361,6 @@ class EvidenceChainService:
         
         return slot_proofread_at, slot_is_consistent, slot_expected_value, slot_proofread_reasoning
     
-    def _is_association_feature_matching_type(
-        self, 
-        assoc_feature: AssociationEvidenceFeature, 
-        required_type: str, 
-        evidences: List[Evidence]
-    ) -> bool:
-        """判断关联证据特征是否与要求的证据类型匹配"""
-        # 检查关联证据特征的来源证据是否与当前证据类型匹配
-        for evidence_id in assoc_feature.association_evidence_ids:
-            for evidence in evidences:
-                if evidence.id == evidence_id:
-                    if self._is_evidence_matching_type(evidence, required_type):
-                        return True
-        return False
-    
     def _is_slot_satisfied(self, feature: Dict[str, Any]) -> bool:
         """判断槽位是否真正满足条件
         
@@ -1174,7 +1391,8 @@ class EvidenceChainService:
         evidence_slot_groups: Dict[int, Dict[str, Dict[str, Any]]],
         association_slot_groups: Dict[str, Dict[str, Dict[str, Any]]],
         all_slots: set,
-        core_slots: List[str]
+        core_slots: List[str],
+        index: EvidenceIndex
     ) -> Optional[Dict[str, Any]]:
         """选择最完整的证据实例或分组作为该证据类型的代表
         
@@ -1196,7 +1414,7 @@ class EvidenceChainService:
             score, proofread_status = self._calculate_source_score_with_proofread(slot_data, all_slots, core_slots)
             
             # 检查角色匹配（如果证据有角色信息）
-            role_match = self._check_evidence_role_match(evidence_id, slot_data)
+            role_match = self._check_evidence_role_match(evidence_id, slot_data, index)
             
             # 优先选择校对状态更好的证据，在相同校对状态下优先选择角色匹配的
             should_update = False
@@ -1379,34 +1597,31 @@ class EvidenceChainService:
         
         return latest_timestamp
 
-    def _check_evidence_role_match(self, evidence_id: int, slot_data: Dict[str, Dict[str, Any]]) -> bool:
+    def _check_evidence_role_match(
+        self,
+        evidence_id: int,
+        slot_data: Dict[str, Dict[str, Any]],
+        index: EvidenceIndex
+    ) -> bool:
         """检查证据角色是否匹配配置要求
         
         Args:
             evidence_id: 证据ID
             slot_data: 槽位数据
+            index: 证据索引
             
         Returns:
             是否角色匹配
         """
-        # 从evidences列表中查找对应的证据对象
-        for evidence in getattr(self, '_current_evidences', []):
-            if evidence.id == evidence_id:
-                # 检查证据是否有角色信息
-                if hasattr(evidence, 'evidence_role') and evidence.evidence_role:
-                    # 检查该证据类型是否配置了supported_roles
-                    evidence_type = evidence.classification_category
-                    if evidence_type:
-                        try:
-                            from app.core.config_manager import config_manager
-                            evidence_type_config = config_manager.get_evidence_type_by_type_name(str(evidence_type))
-                            if evidence_type_config and "supported_roles" in evidence_type_config:
-                                supported_roles = evidence_type_config["supported_roles"]
-                                return evidence.evidence_role in supported_roles
-                        except Exception as e:
-                            # 如果获取配置失败，记录日志但继续执行
-                            print(f"获取证据类型 {evidence_type} 的配置失败: {e}")
-                break
+        evidence = index.get(evidence_id)
+        # 检查证据是否有角色信息
+        if evidence is not None and getattr(evidence, 'evidence_role', None):
+            # 检查该证据类型是否配置了supported_roles
+            evidence_type = evidence.classification_category
+            if evidence_type:
+                supported_roles = get_requirement_graph().supported_roles.get(str(evidence_type))
+                if supported_roles:
+                    return evidence.evidence_role in supported_roles
         
         # 如果没有角色信息或配置中没有supported_roles，返回False
         return False
@@ -1517,7 +1732,7 @@ class EvidenceChainService:
         
         return best_status
     
-    def _get_slot_info_from_evidence(self, evidence: Evidence, slot_name: str) -> Dict[str, Any]:
+    def _get_slot_info_from_evidence(self, evidence: Evidence, slot_name: str, index: EvidenceIndex) -> Dict[str, Any]:
         """从证据中获取指定槽位的信息"""
         slot_info = {
             "is_satisfied": False,
@@ -1531,16 +1746,15 @@ class EvidenceChainService:
         if not evidence.evidence_features:
             return slot_info
         
-        # 查找对应的特征
-        for feature in evidence.evidence_features:
-            if feature.get("slot_name") == slot_name:
-                # 检查槽位是否满足条件
-                slot_info["is_satisfied"] = self._is_slot_satisfied(feature)
-                slot_info["confidence"] = feature.get("confidence", 0.0)
-                slot_info["slot_proofread_at"] = feature.get("slot_proofread_at")
-                slot_info["slot_is_consistent"] = feature.get("slot_is_consistent")
-                slot_info["slot_expected_value"] = feature.get("slot_expected_value")
-                slot_info["slot_proofread_reasoning"] = feature.get("slot_proofread_reasoning")
-                break
+        # 查找对应的特征（同名槽位取第一个）
+        feature = index.first_slot_feature(evidence, slot_name)
+        if feature is not None:
+            # 检查槽位是否满足条件
+            slot_info["is_satisfied"] = self._is_slot_satisfied(feature)
+            slot_info["confidence"] = feature.get("confidence", 0.0)
+            slot_info["slot_proofread_at"] = feature.get("slot_proofread_at")
+            slot_info["slot_is_consistent"] = feature.get("slot_is_consistent")
+            slot_info["slot_expected_value"] = feature.get("slot_expected_value")
+            slot_info["slot_proofread_reasoning"] = feature.get("slot_proofread_reasoning")
         
         return slot_info
\ No newline at end of file
@@ -1,7 +1,7 @@
 from enum import Enum
 from typing import Optional, List, Dict
 from datetime import datetime
-from sqlalchemy import Enum as SQLAlchemyEnum, ForeignKey, Integer, String, Text, Float, Boolean, JSON, DateTime, Table, Column, UniqueConstraint
+from sqlalchemy import Enum as SQLAlchemyEnum, ForeignKey, Integer, String, Text, Float, Boolean, JSON, DateTime, Table, Column, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import JSONB  # 使用JSONB替代JSON以获得更好的性能
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -27,6 +27,10 @@ class Evidence(Base):
     file_name: Mapped[str] = mapped_column(String(200), nullable=False)
     file_size: Mapped[int] = mapped_column(Integer, nullable=False)
     file_extension: Mapped[str] = mapped_column(String(20), nullable=False)
+    # AI使用的衍生图（校正方向、限制分辨率、重新压缩），员工查看的仍是原图 file_url
+    ai_file_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    # 文件内容SHA-256，用于上传去重（同案件重复提示，跨案件复用COS对象与AI结果）
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
     evidence_status: Mapped[str] = mapped_column(String(20), default=EvidenceStatus.UPLOADED)
     validation_status: Mapped[str] = mapped_column(String(20), default=VaildationStatus.PENDING)
     evidence_role: Mapped[str] = mapped_column(String(20), nullable=True, default=None)
@@ -44,11 +48,16 @@ class Evidence(Base):
 
     
     # 关系
-    case_id: Mapped[int] = mapped_column(Integer, ForeignKey("cases.id"), nullable=False)
+    case_id: Mapped[int] = mapped_column(Integer, ForeignKey("cases.id"), nullable=False, index=True)
     case = relationship("Case", back_populates="evidences")
 
     # 证据不再通过ORM关系关联到卡片，而是通过EvidenceCard的evidence_ids字段记录
 
+    @property
+    def ai_image_url(self) -> str:
+        """AI阶段（分类、OCR、特征提取）使用的图片url，无衍生图时回退为原图"""
+        return self.ai_file_url or self.file_url
+
     async def get_associated_cards(
         self,
         db,
@@ -78,10 +87,11 @@ class Evidence(Base):
         """
         from sqlalchemy import select, and_, func, cast, Text
         
-        # 构建基础查询：从evidence_ids字段中查找包含该证据ID的卡片
-        # 使用JSONB的@>操作符检查数组是否包含该证据ID
+        # 构建基础查询：通过卡片成员索引查找包含该证据ID的卡片
         query = select(EvidenceCard).where(
-            EvidenceCard.evidence_ids.contains([self.id])
+            EvidenceCard.id.in_(
+                select(EvidenceCardMember.card_id).where(EvidenceCardMember.evidence_id == self.id)
+            )
         )
         
         # 应用筛选条件
@@ -139,13 +149,18 @@ class EvidenceCard(Base):
         "card_features": [...]
     }
     
-    evidence_ids 存储引用的证据ID列表，按顺序存储，支持查询时动态检查证据是否存在。
+    evidence_ids 存储引用的证据ID列表，按顺序存储；evidence_card_members 是它的规范化索引，
+    写入 evidence_ids 时通过 sync_members 同步，按证据查卡片、按顺序查卡片证据都走索引。
+    is_normal / abnormal_indices 是引用完整性的物化结果：写入 evidence_ids 时计算，
+    证据删除时同步更新，列表查询无需再检查证据是否存在。
     """
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     case_id: Mapped[int] = mapped_column(Integer, ForeignKey("cases.id"), nullable=False, index=True, comment="关联的案件ID")
     card_info: Mapped[Optional[Dict]] = mapped_column(JSONB, nullable=True)  # 改为 Dict 类型
     evidence_ids: Mapped[Optional[List[int]]] = mapped_column(JSONB, nullable=True, default=list, comment="引用的证据ID列表，按顺序存储")
     updated_times: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    is_normal: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default="true", comment="引用的证据是否都存在")
+    abnormal_indices: Mapped[List[int]] = mapped_column(JSONB, nullable=False, default=list, server_default="[]", comment="已删除证据在evidence_ids中的位置")
 
     async def get_associated_evidences(
         self,
@@ -175,13 +190,16 @@ class EvidenceCard(Base):
         """
         from sqlalchemy import select, and_
         
-        # 构建基础查询：从evidence_ids字段中查找关联的证据
+        # 构建基础查询：通过卡片成员索引关联证据，按在卡片中的位置排序
         # 如果evidence_ids为空，返回空列表
         if not self.evidence_ids:
             return []
         
-        query = select(Evidence).where(
-            Evidence.id.in_(self.evidence_ids)
+        query = (
+            select(Evidence)
+            .join(EvidenceCardMember, EvidenceCardMember.evidence_id == Evidence.id)
+            .where(EvidenceCardMember.card_id == self.id)
+            .order_by(EvidenceCardMember.position)
         )
         
         # 应用筛选条件
@@ -209,6 +227,20 @@ class EvidenceCard(Base):
         result = await db.execute(query)
         return list(result.scalars().unique().all())
 
+    async def sync_members(self, db) -> None:
+        """按 evidence_ids 重建卡片的成员索引（需要卡片已有ID，由调用方提交）"""
+        from sqlalchemy import delete, insert
+
+        await db.execute(delete(EvidenceCardMember).where(EvidenceCardMember.card_id == self.id))
+        if self.evidence_ids:
+            await db.execute(
+                insert(EvidenceCardMember),
+                [
+                    {"card_id": self.id, "evidence_id": evidence_id, "position": position}
+                    for position, evidence_id in enumerate(self.evidence_ids)
+                ],
+            )
+
     @classmethod
     async def update_or_create(
         cls,
@@ -265,17 +297,16 @@ class EvidenceCard(Base):
         sorted_evidence_ids = sorted(unique_evidence_ids)
         
         # 查找关联了这些 evidence_ids 的所有卡片
-        # 使用JSONB的contains操作符检查数组是否包含任一evidence_id
+        # 先通过卡片成员索引查找该案件下包含任一evidence_id的卡片
         # 然后进一步检查数组长度和内容是否完全相同
-        
-        # 先查找该案件下所有包含任一evidence_id的卡片（使用JSONB的contains操作符）
-        from sqlalchemy import or_, and_
-        card_conditions = []
-        for ev_id in sorted_evidence_ids:
-            card_conditions.append(cls.evidence_ids.contains([ev_id]))
-        
+        from sqlalchemy import and_
         result = await db.execute(
-            select(cls).where(and_(cls.case_id == case_id, or_(*card_conditions)))
+            select(cls).where(and_(
+                cls.case_id == case_id,
+                cls.id.in_(
+                    select(EvidenceCardMember.card_id).where(EvidenceCardMember.evidence_id.in_(sorted_evidence_ids))
+                ),
+            ))
         )
         candidate_cards = result.scalars().all()
 
@@ -329,6 +360,7 @@ class EvidenceCard(Base):
             )
             db.add(new_card)
             await db.flush()
+            await new_card.sync_members(db)
             await db.commit()
             await db.refresh(new_card)
             return new_card
@@ -484,6 +516,54 @@ class EvidenceCard(Base):
         return True
 
 
+class EvidenceCardMember(Base):
+    """证据卡片成员索引（EvidenceCard.evidence_ids 的规范化形式）
+
+    每张卡片引用的每个证据一行，position 为证据在 evidence_ids 中的位置（从0开始）。
+    evidence_id 不设外键：证据删除后保留成员行，与 evidences 左连接即可找出悬空引用。
+    卡片删除时成员行级联删除。
+    """
+    __tablename__ = "evidence_card_members"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    card_id: Mapped[int] = mapped_column(Integer, ForeignKey("evidence_cards.id", ondelete="CASCADE"), nullable=False, comment="卡片ID")
+    evidence_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True, comment="引用的证据ID")
+    position: Mapped[int] = mapped_column(Integer, nullable=False, comment="证据在卡片evidence_ids中的位置（从0开始）")
+
+    __table_args__ = (
+        UniqueConstraint('card_id', 'position', name='uq_evidence_card_member_position'),
+        {"comment": "证据卡片成员索引，按证据查卡片、按顺序查卡片证据"},
+    )
+
+
+class SlotSnapshotVersionConflict(ValueError):
+    """槽位快照版本冲突：客户端提交的 expected_version 与当前版本不一致"""
+
+    def __init__(self, expected_version: int, current_version: int):
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(f"槽位快照已被修改（期望版本 {expected_version}，当前版本 {current_version}），请刷新后重试")
+
+
+class EvidenceCardSlotSnapshot(Base):
+    """槽位快照版本
+
+    每个案件、每个模板一行，槽位关联每次变更（单个更新、批量更新、重置）都在同一事务中将 version 加一，
+    客户端提交批量变更时携带读取快照时的版本号实现乐观并发控制。
+    """
+    __tablename__ = "evidence_card_slot_snapshots"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    case_id: Mapped[int] = mapped_column(Integer, ForeignKey("cases.id"), nullable=False, index=True)
+    template_id: Mapped[str] = mapped_column(String(200), nullable=False, comment="模板ID")
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0", comment="快照版本号，每次变更加一")
+
+    __table_args__ = (
+        UniqueConstraint('case_id', 'template_id', name='uq_case_template_snapshot'),
+        {"comment": "证据卡片槽位快照版本表，用于槽位关联的乐观并发控制"},
+    )
+
+
 class EvidenceCardSlotAssignment(Base):
     """证据卡片槽位关联模型
     
@@ -532,6 +612,118 @@ class EvidenceCardSlotAssignment(Base):
         
         return {assignment.slot_id: assignment.card_id for assignment in assignments}
     
+    @classmethod
+    async def get_version(
+        cls,
+        db,
+        case_id: int,
+        template_id: str,
+    ) -> int:
+        """获取某个案件、某个模板的槽位快照版本号（从未变更过为0）"""
+        from sqlalchemy import select
+
+        result = await db.execute(
+            select(EvidenceCardSlotSnapshot.version)
+            .where(EvidenceCardSlotSnapshot.case_id == case_id)
+            .where(EvidenceCardSlotSnapshot.template_id == template_id)
+        )
+        return result.scalar_one_or_none() or 0
+
+    @classmethod
+    async def _bump_version(
+        cls,
+        db,
+        case_id: int,
+        template_id: str,
+        expected_version: Optional[int] = None,
+    ) -> int:
+        """
+        在当前事务中递增快照版本号（不提交）
+
+        使用 INSERT ... ON CONFLICT DO UPDATE 原子地加一，版本行的行锁使同一快照的并发变更串行化。
+        传入 expected_version 时仅当当前版本与之相同才递增，否则回滚并抛出 SlotSnapshotVersionConflict。
+
+        Returns:
+            int: 递增后的版本号
+        """
+        from sqlalchemy.dialects.postgresql import insert
+
+        table = EvidenceCardSlotSnapshot
+        stmt = insert(table).values(case_id=case_id, template_id=template_id, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.case_id, table.template_id],
+            set_={"version": table.version + 1, "updated_at": func.now()},
+            where=(table.version == expected_version) if expected_version is not None else None,
+        ).returning(table.version)
+        result = await db.execute(stmt)
+        version = result.scalar_one_or_none()
+
+        if expected_version is not None and version != expected_version + 1:
+            # 版本行已存在但版本不一致（未更新返回空），或版本行不存在而客户端期望非0版本
+            await db.rollback()
+            current_version = await cls.get_version(db, case_id, template_id)
+            raise SlotSnapshotVersionConflict(expected_version, current_version)
+        return version
+
+    @classmethod
+    async def bulk_update_assignments(
+        cls,
+        db,
+        case_id: int,
+        template_id: str,
+        assignments: Dict[str, Optional[int]],
+        expected_version: Optional[int] = None,
+    ) -> int:
+        """
+        在一个事务中批量应用槽位快照的变更
+
+        card_id 不为 None 的槽位通过 INSERT ... ON CONFLICT (case_id, template_id, slot_id) DO UPDATE 一次写入，
+        card_id 为 None 的槽位一次删除，随后递增快照版本号并提交。
+
+        Args:
+            db: 数据库会话
+            case_id: 案件ID
+            template_id: 模板ID
+            assignments: 槽位ID到卡片ID的映射（只需包含变更的槽位，None表示删除关联记录）
+            expected_version: 客户端读取快照时的版本号，None表示不做并发检查
+
+        Returns:
+            int: 变更后的快照版本号
+
+        Raises:
+            SlotSnapshotVersionConflict: expected_version 与当前版本不一致
+        """
+        from sqlalchemy import delete
+        from sqlalchemy.dialects.postgresql import insert
+
+        # 先递增版本：版本冲突时不写入任何槽位，且持有版本行锁直到提交
+        version = await cls._bump_version(db, case_id, template_id, expected_version)
+
+        upserts = [
+            {"case_id": case_id, "template_id": template_id, "slot_id": slot_id, "card_id": card_id}
+            for slot_id, card_id in assignments.items()
+            if card_id is not None
+        ]
+        removals = [slot_id for slot_id, card_id in assignments.items() if card_id is None]
+
+        if upserts:
+            stmt = insert(cls).values(upserts)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[cls.case_id, cls.template_id, cls.slot_id],
+                set_={"card_id": stmt.excluded.card_id, "updated_at": func.now()},
+            )
+            await db.execute(stmt)
+        if removals:
+            await db.execute(
+                delete(cls)
+                .where(cls.case_id == case_id)
+                .where(cls.template_id == template_id)
+                .where(cls.slot_id.in_(removals))
+            )
+
+        await db.commit()
+        return version
+
     @classmethod
     async def update_assignment(
         cls,
@@ -542,7 +734,7 @@ class EvidenceCardSlotAssignment(Base):
         card_id: Optional[int],
     ) -> Optional["EvidenceCardSlotAssignment"]:
         """
-        更新或创建槽位关联
+        更新或创建槽位关联（单个槽位的批量更新）
         
         Args:
             db: 数据库会话
@@ -554,46 +746,20 @@ class EvidenceCardSlotAssignment(Base):
         Returns:
             Optional[EvidenceCardSlotAssignment]: 更新或创建的关联记录，如果删除则返回None
         """
-        from sqlalchemy import select, delete
-        
-        # 查找现有记录
+        from sqlalchemy import select
+
+        await cls.bulk_update_assignments(db, case_id, template_id, {slot_id: card_id})
+        if card_id is None:
+            return None
+
         result = await db.execute(
             select(cls)
             .where(cls.case_id == case_id)
             .where(cls.template_id == template_id)
             .where(cls.slot_id == slot_id)
+            .execution_options(populate_existing=True)
         )
-        assignment = result.scalar_one_or_none()
-        
-        if card_id is None:
-            # 如果 card_id 为 None，删除关联记录
-            if assignment:
-                await db.delete(assignment)
-                await db.commit()
-                return None
-            else:
-                # 记录不存在，无需删除
-                return None
-        else:
-            # card_id 不为 None，创建或更新关联
-            if assignment:
-                # 更新现有记录
-                assignment.card_id = card_id
-                await db.commit()
-                await db.refresh(assignment)
-                return assignment
-            else:
-                # 创建新记录
-                assignment = cls(
-                    case_id=case_id,
-                    template_id=template_id,
-                    slot_id=slot_id,
-                    card_id=card_id,
-                )
-                db.add(assignment)
-                await db.commit()
-                await db.refresh(assignment)
-                return assignment
+        return result.scalar_one_or_none()
     
     @classmethod
     async def reset_snapshot(
@@ -610,6 +776,7 @@ class EvidenceCardSlotAssignment(Base):
         """
         from sqlalchemy import delete
         
+        await cls._bump_version(db, case_id, template_id)
         result = await db.execute(
             delete(cls)
             .where(cls.case_id == case_id)
@@ -617,4 +784,26 @@ class EvidenceCardSlotAssignment(Base):
         )
         await db.commit()
         return result.rowcount
-    
\ No newline at end of file
+    
+
+class CosDeletionOutbox(Base):
+    """COS对象删除发件箱
+
+    删除证据时与证据删除写在同一事务中，由 Celery 任务异步批量删除COS对象：
+    - 事务回滚时不会误删文件
+    - 慢速的COS调用不再占用数据库事务
+    删除成功后记录被移除；失败的记录累加重试次数并延后下次尝试时间。
+    """
+    __tablename__ = "cos_deletion_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    object_key: Mapped[str] = mapped_column(String(500), nullable=False, comment="待删除的COS对象键")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0", comment="已尝试删除次数")
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True, comment="最近一次删除失败的错误信息")
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True, comment="下次尝试删除的时间"
+    )
+
+    __table_args__ = (
+        {"comment": "COS对象删除发件箱，与业务删除同事务写入，由定时任务批量删除"},
+    )
@@ -0,0 +1,241 @@
+"""
+证据角色标注匹配器
+
+根据证据类型配置中 extraction_slots 的 proofread_rules，将证据的词槽值与案件当事人信息匹配，
+为证据标注角色（creditor/debtor）。
+
+- 规则预编译：每个证据类型的规则只解析一次，按 (证据类型, 配置对象) 缓存，配置重新加载后自动重新编译
+- 当事人索引：每个案件的当事人字段值只标准化一次（数字去尾随零、去首尾空白）
+- 批量标注：一批证据在一次遍历中完成标注
+
+匹配语义与原 auto_process 中的逐层循环保持一致：按词槽 -> 规则 -> 当事人 -> 条件的顺序，
+第一个匹配成功的当事人角色即为证据角色。
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config_manager import config_manager
+from app.evidences.models import Evidence, EvidenceStatus
+from app.evidences.services import _normalize_numeric_value
+
+DEFAULT_TARGET_ROLES = ("creditor", "debtor")
+
+
+@dataclass(frozen=True)
+class MatchValue:
+    """预先标准化的匹配值"""
+    stripped: str  # 去除首尾空白，用于 contains/startswith/endswith
+    exact: str  # 数字标准化后的字符串，用于 exact
+
+    @classmethod
+    def of(cls, value: Any) -> "MatchValue":
+        return cls(stripped=str(value).strip(), exact=str(_normalize_numeric_value(value)).strip())
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    party_type: str
+    target_fields: Tuple[str, ...]
+    match_strategy: str
+    match_condition: str
+
+    def matches(self, slot_value: MatchValue, party: "IndexedParty") -> bool:
+        match_results = []
+        for party_field in self.target_fields:
+            party_value = party.value(party_field)
+            if party_value is None:
+                continue
+            if self.match_strategy == "contains":
+                is_match = party_value.stripped in slot_value.stripped
+            elif self.match_strategy == "startswith":
+                is_match = slot_value.stripped.startswith(party_value.stripped)
+            elif self.match_strategy == "endswith":
+                is_match = slot_value.stripped.endswith(party_value.stripped)
+            else:
+                # exact 以及未知策略均按标准化后的精确匹配
+                is_match = slot_value.exact == party_value.exact
+            match_results.append(is_match)
+
+        if not match_results:
+            return False
+        if self.match_condition == "all":
+            return all(match_results)
+        if self.match_condition == "any":
+            return any(match_results)
+        if self.match_condition == "majority":
+            return sum(match_results) > len(match_results) / 2
+        return False
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    rule_name: str
+    target_roles: Tuple[str, ...]
+    conditions: Tuple[CompiledCondition, ...]
+
+
+@dataclass(frozen=True)
+class CompiledSlot:
+    slot_name: str
+    rules: Tuple[CompiledRule, ...]
+
+
+def compile_slot_rules(evidence_type_config: Optional[Dict[str, Any]]) -> Tuple[CompiledSlot, ...]:
+    """将证据类型配置编译为角色标注规则（只保留针对当事人的规则）"""
+    if not evidence_type_config:
+        return ()
+
+    compiled_slots = []
+    for slot_config in evidence_type_config.get("extraction_slots", []) or []:
+        slot_name = slot_config.get("slot_name")
+        proofread_rules = slot_config.get("proofread_rules", []) or []
+        if not slot_name or not proofread_rules:
+            continue
+
+        rules = []
+        for rule in proofread_rules:
+            if rule.get("target_type", "case_party") != "case_party":
+                continue
+            conditions = tuple(
+                CompiledCondition(
+                    party_type=condition.get("party_type"),
+                    target_fields=tuple(condition.get("target_fields", []) or []),
+                    match_strategy=condition.get("match_strategy", "exact"),
+                    match_condition=condition.get("match_condition", "any"),
+                )
+                for condition in rule.get("conditions", []) or []
+                if condition.get("target_fields")
+            )
+            if not conditions:
+                continue
+            rules.append(CompiledRule(
+                rule_name=rule.get("rule_name", ""),
+                target_roles=tuple(rule.get("party_role") or DEFAULT_TARGET_ROLES),
+                conditions=conditions,
+            ))
+
+        if rules:
+            compiled_slots.append(CompiledSlot(slot_name=slot_name, rules=tuple(rules)))
+    return tuple(compiled_slots)
+
+
+class RuleRegistry:
+    """按证据类型缓存编译后的规则，证据类型配置重新加载后自动失效"""
+
+    def __init__(self):
+        self._source = None
+        self._compiled: Dict[str, Tuple[CompiledSlot, ...]] = {}
+
+    def get(self, evidence_type: str) -> Tuple[CompiledSlot, ...]:
+        source = config_manager.load_evidence_types_config()
+        if source is not self._source:
+            self._source = source
+            self._compiled = {}
+        if evidence_type not in self._compiled:
+            self._compiled[evidence_type] = compile_slot_rules(
+                config_manager.get_evidence_type_by_type_name(evidence_type)
+            )
+        return self._compiled[evidence_type]
+
+
+rule_registry = RuleRegistry()
+
+
+class IndexedParty:
+    """当事人及其按需标准化、缓存的字段值"""
+
+    __slots__ = ("party", "party_role", "party_type", "_values")
+
+    def __init__(self, party: Any):
+        self.party = party
+        self.party_role = party.party_role
+        self.party_type = party.party_type
+        self._values: Dict[str, Optional[MatchValue]] = {}
+
+    def value(self, party_field: str) -> Optional[MatchValue]:
+        if party_field not in self._values:
+            raw = getattr(self.party, party_field, None)
+            self._values[party_field] = None if raw is None else MatchValue.of(raw)
+        return self._values[party_field]
+
+
+class PartyIndex:
+    """案件当事人索引：标准化字段值，并缓存每条规则的候选当事人（保持当事人原有顺序）"""
+
+    def __init__(self, case_parties: Iterable[Any]):
+        self.parties = [IndexedParty(party) for party in case_parties or []]
+        self._candidates: Dict[CompiledRule, List[Tuple[IndexedParty, Tuple[CompiledCondition, ...]]]] = {}
+
+    def candidates(self, rule: CompiledRule) -> List[Tuple[IndexedParty, Tuple[CompiledCondition, ...]]]:
+        """规则的候选当事人及其适用的条件"""
+        if rule not in self._candidates:
+            self._candidates[rule] = [
+                (party, conditions)
+                for party in self.parties
+                if party.party_role in rule.target_roles
+                and (conditions := tuple(c for c in rule.conditions if c.party_type == party.party_type))
+            ]
+        return self._candidates[rule]
+
+
+def _slot_values(evidence_features: List[Any]) -> Dict[str, Any]:
+    """词槽名 -> 词槽值（同名词槽取第一个）"""
+    values: Dict[str, Any] = {}
+    for feature in evidence_features:
+        if isinstance(feature, dict):
+            slot_name = feature.get("slot_name")
+            if slot_name is not None and slot_name not in values:
+                values[slot_name] = feature.get("slot_value")
+    return values
+
+
+def match_evidence_role(
+    evidence: Evidence,
+    party_index: PartyIndex,
+    registry: RuleRegistry = rule_registry,
+) -> Optional[Tuple[str, str]]:
+    """为单个证据匹配角色
+
+    Returns:
+        (角色, 规则名称)；不满足标注条件或没有匹配的当事人时返回 None
+    """
+    if not (evidence.evidence_status == EvidenceStatus.FEATURES_EXTRACTED.value
+            and evidence.classification_category
+            and evidence.evidence_features):
+        return None
+
+    compiled_slots = registry.get(evidence.classification_category)
+    if not compiled_slots:
+        return None
+
+    slot_values = _slot_values(evidence.evidence_features)
+    for slot in compiled_slots:
+        raw_value = slot_values.get(slot.slot_name)
+        if not raw_value or raw_value == "未知":
+            continue
+        slot_value = MatchValue.of(raw_value)
+        for rule in slot.rules:
+            for party, conditions in party_index.candidates(rule):
+                for condition in conditions:
+                    if condition.matches(slot_value, party):
+                        return party.party_role, rule.rule_name
+    return None
+
+
+def annotate_evidence_roles(
+    evidences: Iterable[Evidence],
+    case_parties: Iterable[Any],
+    registry: RuleRegistry = rule_registry,
+) -> List[Tuple[Evidence, str]]:
+    """批量标注证据角色（一次遍历），返回角色被设置的证据及匹配的规则名称
+
+    没有匹配到当事人的证据保留原有角色。
+    """
+    party_index = PartyIndex(case_parties)
+    annotated = []
+    for evidence in evidences:
+        matched = match_evidence_role(evidence, party_index, registry)
+        if matched:
+            evidence.evidence_role, rule_name = matched
+            annotated.append((evidence, rule_name))
+    return annotated
@@ -12,6 +12,7 @@ from app.core.response import SingleResponse, ListResponse, Pagination
 from app.staffs.models import Staff
 from app.evidences.schemas import (
     EvidenceResponse,
+    EvidenceBatchCreateResponse,
     BatchDeleteRequest,
     EvidenceEditRequest,
     BatchCheckEvidenceRequest,
@@ -20,14 +21,18 @@ from app.evidences.schemas import (
     EvidenceCardUpdateRequest,
     EvidenceCardSlotTemplate,
     SlotAssignmentUpdateRequest,
+    SlotAssignmentBulkUpdateRequest,
+    SlotAssignmentBulkUpdateResponse,
     SlotAssignmentSnapshotResponse,
     SlotAssignmentResetRequest,
     SlotProofreadRequest,
-    CardSlotProofreadResponse
+    CardSlotProofreadResponse,
+    CardSlotBatchProofreadRequest,
+    CardSlotBatchProofreadResponse
 )
 from app.cases import services as case_service
 from app.evidences import services as evidence_service
-from app.evidences.models import Evidence
+from app.evidences.models import Evidence, SlotSnapshotVersionConflict
 
 router = APIRouter()
 
@@ -218,7 +223,7 @@ async def list_evidence_cards(
     
     card_responses = []
     for card in cards:
-        card_response = await card_to_response(card, db)
+        card_response = card_to_response(card)
         card_responses.append(card_response)
     
     return ListResponse(
@@ -258,7 +263,7 @@ async def get_evidence_card(
         )
     
     # 转换为响应模型
-    card_response = await card_to_response(card, db)
+    card_response = card_to_response(card)
     
     return SingleResponse(data=card_response)
 
@@ -322,7 +327,7 @@ async def update_evidence_card(
         card = await update_card(db, card_id, update_request)
         
         # 转换为响应模型
-        card_response = await card_to_response(card, db)
+        card_response = card_to_response(card)
         
         return SingleResponse(data=card_response)
     except ValueError as e:
@@ -399,7 +404,7 @@ async def update_party_info_from_evidence(
         )
 
 
-@router.post("/batch", status_code=status.HTTP_201_CREATED, response_model=ListResponse[EvidenceResponse])
+@router.post("/batch", status_code=status.HTTP_201_CREATED, response_model=EvidenceBatchCreateResponse)
 async def batch_create_evidences(
     db: DBSession,
     current_staff: Annotated[Staff, Depends(get_current_staff)],
@@ -408,7 +413,8 @@ async def batch_create_evidences(
 ):
     """批量创建证据
 
-    允许一次上传多个文件并创建多个证据
+    允许一次上传多个文件并创建多个证据。
+    按文件内容去重：案件中已存在或本次重复上传的文件不会重复创建，通过 duplicates 返回
     """
     from loguru import logger
 
@@ -439,10 +445,14 @@ async def batch_create_evidences(
     try:
         # 批量创建证据
         logger.info(f"开始批量创建证据: 案件ID={case_id}, 文件数量={len(files)}")
-        evidences = await evidence_service.batch_create(
+        evidences, duplicates = await evidence_service.batch_create_deduplicated(
             db, case_id, files
         )
 
+        if not evidences and duplicates:
+            logger.info(f"所有文件均为重复文件: 重复数量={len(duplicates)}")
+            return EvidenceBatchCreateResponse(data=[], duplicates=duplicates, message="所有文件均已存在")
+
         if not evidences:
             # 收集文件信息用于调试
             files_info = []
@@ -477,8 +487,8 @@ async def batch_create_evidences(
                 detail=error_detail,
             )
 
-        logger.info(f"批量创建证据成功: 成功数量={len(evidences)}")
-        return ListResponse(data=evidences)
+        logger.info(f"批量创建证据成功: 成功数量={len(evidences)}, 重复数量={len(duplicates)}")
+        return EvidenceBatchCreateResponse(data=evidences, duplicates=duplicates)
     except Exception as e:
         logger.error(f"批量创建证据异常: {str(e)}")
         import traceback
@@ -930,6 +940,7 @@ async def get_slot_assignment_snapshot(
     template_id: str,
     db: DBSession,
     current_staff: Annotated[Staff, Depends(get_current_staff)],
+    include_proofread: bool = Query(True, description="是否附带各槽位的校对结果"),
 ):
     """获取某个案件、某个模板的槽位快照
     
@@ -938,13 +949,14 @@ async def get_slot_assignment_snapshot(
         template_id: 模板ID
         db: 数据库会话
         current_staff: 当前员工（认证）
+        include_proofread: 是否附带各槽位的校对结果
         
     Returns:
         SingleResponse[SlotAssignmentSnapshotResponse]: 槽位快照响应
     """
     try:
         snapshot_data = await evidence_service.get_slot_assignment_snapshot(
-            db, case_id, template_id
+            db, case_id, template_id, include_proofread=include_proofread
         )
         return SingleResponse(
             data=SlotAssignmentSnapshotResponse(
@@ -952,7 +964,8 @@ async def get_slot_assignment_snapshot(
                 template_id=template_id,
                 assignments=snapshot_data["assignments"],
                 proofread_results=snapshot_data["proofread_results"],
-                slot_consistency=snapshot_data["slot_consistency"]
+                slot_consistency=snapshot_data["slot_consistency"],
+                version=snapshot_data["version"]
             ),
             code=200,
             message="获取成功"
@@ -1004,6 +1017,57 @@ async def update_slot_assignment(
         )
 
 
+@router.put("/evidence-card-slot-assignments/{case_id}/bulk", response_model=SingleResponse[SlotAssignmentBulkUpdateResponse])
+async def bulk_update_slot_assignments(
+    case_id: int,
+    update_request: SlotAssignmentBulkUpdateRequest,
+    db: DBSession,
+    current_staff: Annotated[Staff, Depends(get_current_staff)],
+):
+    """批量更新槽位关联
+    
+    一次拖拽调整涉及的所有槽位在一个事务中写入，返回新的快照版本号。
+    提交 expected_version 时，若快照已被其他请求修改则返回409，前端需重新获取快照。
+    
+    Args:
+        case_id: 案件ID
+        update_request: 批量更新请求
+        db: 数据库会话
+        current_staff: 当前员工（认证）
+        
+    Returns:
+        SingleResponse[SlotAssignmentBulkUpdateResponse]: 变更后的快照版本号
+    """
+    try:
+        version = await evidence_service.bulk_update_slot_assignments(
+            db,
+            case_id,
+            update_request.template_id,
+            update_request.assignments,
+            expected_version=update_request.expected_version,
+        )
+        return SingleResponse(
+            data=SlotAssignmentBulkUpdateResponse(
+                case_id=case_id,
+                template_id=update_request.template_id,
+                version=version
+            ),
+            code=200,
+            message="更新成功"
+        )
+    except SlotSnapshotVersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"批量更新槽位关联失败: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量更新槽位关联失败: {str(e)}"
+        )
+
+
 @router.post("/evidence-card-slot-assignments/{case_id}/reset", response_model=SingleResponse[dict])
 async def reset_slot_assignment_snapshot(
     case_id: int,
@@ -1038,6 +1102,34 @@ async def reset_slot_assignment_snapshot(
             detail=f"重置槽位快照失败: {str(e)}"
         )
 
+@router.post("/card-slots/proofread/batch", response_model=SingleResponse[CardSlotBatchProofreadResponse])
+async def proofread_card_slots(
+    request: CardSlotBatchProofreadRequest,
+    db: DBSession,
+    current_staff: Annotated[Staff, Depends(get_current_staff)]
+):
+    """批量校对某个案件、某个模板快照中所有已放置卡片的槽位"""
+    try:
+        result = await evidence_service.proofread_card_slots(
+            db=db,
+            case_id=request.case_id,
+            template_id=request.template_id
+        )
+        return SingleResponse(data=result)
+    except ValueError as e:
+        logger.error(f"批量校对卡槽失败: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"批量校对卡槽失败: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量校对卡槽失败: {str(e)}"
+        )
+
+
 @router.post("/card-slots/proofread", response_model=SingleResponse[CardSlotProofreadResponse])
 async def proofread_card_slot(
     request: SlotProofreadRequest,
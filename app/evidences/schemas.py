@@ -6,6 +6,7 @@ from app.cases.schemas import Case
 from app.evidences.models import EvidenceStatus, EvidenceRole
 from app.agentic.agents.evidence_extractor_v2 import SlotExtraction
 from app.core.schemas import BaseSchema
+from app.core.response import ListResponse
     
     
 class AutoProcessRequest(BaseModel):
@@ -33,6 +34,8 @@ class UploadFileResponse(BaseModel):
     file_name: str = Field(..., description="证据文件名称")
     file_size: int = Field(..., description="证据文件体积")
     file_extension: str = Field(..., description="证据文件类型")
+    ai_file_url: Optional[str] = Field(None, description="AI使用的衍生图url（仅图片）")
+    content_hash: Optional[str] = Field(None, description="文件内容SHA-256")
     
 
 class EvidenceResponse(BaseSchema):
@@ -148,6 +151,19 @@ class EvidenceResponse(BaseSchema):
     #             self._dfs(neighbor, graph, visited, group)
     
 
+class DuplicateEvidence(BaseModel):
+    """批量上传时检测到的重复文件"""
+    file_name: str = Field(..., description="上传的文件名称")
+    content_hash: str = Field(..., description="文件内容SHA-256")
+    existing_evidence_id: Optional[int] = Field(None, description="案件中已存在的相同内容证据id")
+    duplicate_in: str = Field(..., description="重复来源：case（案件中已存在）、batch（本次上传中重复）")
+
+
+class EvidenceBatchCreateResponse(ListResponse[EvidenceResponse]):
+    """批量创建证据响应：data 为新建的证据，duplicates 为未重复创建的文件"""
+    duplicates: List[DuplicateEvidence] = Field(default_factory=list, description="重复的文件")
+
+
 class EvidenceCardCastingRequest(BaseModel):
     """证据卡片铸造请求模型"""
     case_id: int = Field(..., description="案件ID")
@@ -238,6 +254,21 @@ class SlotAssignmentSnapshotResponse(BaseModel):
     assignments: Dict[str, Optional[int]] = Field(..., description="槽位ID到卡片ID的映射")
     proofread_results: Dict[str, List["SlotProofreadResult"]] = Field(default_factory=dict, description="校对结果：{slotId: [校对结果列表]}")
     slot_consistency: Dict[str, bool] = Field(default_factory=dict, description="槽位整体一致性：{slotId: overall_consistency}")
+    version: int = Field(0, description="快照版本号，批量更新时作为 expected_version 提交")
+
+
+class SlotAssignmentBulkUpdateRequest(BaseModel):
+    """槽位关联批量更新请求"""
+    template_id: str = Field(..., description="模板ID")
+    assignments: Dict[str, Optional[int]] = Field(..., description="变更的槽位ID到卡片ID的映射，None表示移除关联")
+    expected_version: Optional[int] = Field(None, description="读取快照时的版本号，与当前版本不一致时返回409；不传则不做并发检查")
+
+
+class SlotAssignmentBulkUpdateResponse(BaseModel):
+    """槽位关联批量更新响应"""
+    case_id: int = Field(..., description="案件ID")
+    template_id: str = Field(..., description="模板ID")
+    version: int = Field(..., description="变更后的快照版本号")
 
 
 class SlotAssignmentResetRequest(BaseModel):
@@ -273,3 +304,17 @@ class CardSlotProofreadResponse(BaseModel):
     card_type: str = Field(..., description="卡片类型")
     proofread_results: List[SlotProofreadResult] = Field(default_factory=list, description="校对结果列表")
     overall_consistency: bool = Field(..., description="整体是否一致")
+
+
+class CardSlotBatchProofreadRequest(BaseModel):
+    """卡槽批量校对请求（校对快照中所有已放置卡片的槽位）"""
+    case_id: int = Field(..., description="案件ID")
+    template_id: str = Field(..., description="模板ID")
+
+
+class CardSlotBatchProofreadResponse(BaseModel):
+    """卡槽批量校对响应"""
+    case_id: int = Field(..., description="案件ID")
+    template_id: str = Field(..., description="模板ID")
+    results: Dict[str, CardSlotProofreadResponse] = Field(default_factory=dict, description="校对结果：{slotId: 校对结果}")
+    errors: Dict[str, str] = Field(default_factory=dict, description="校对失败的槽位：{slotId: 失败原因}")
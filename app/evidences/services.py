@@ -1,17 +1,16 @@
 import os
-from typing import BinaryIO, Dict, List, Optional, Union, Callable, Awaitable, Any, cast
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union, Callable, Awaitable, Any, cast
 from datetime import datetime
 from fastapi import UploadFile
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from datetime import datetime
-from app.agentic.agents.evidence_classifier_v2 import EvidenceClassifier, EvidenceClassifiResults
+from app.agentic.agents.evidence_classifier_v2 import EvidenceClassifiResults, classify_evidences_sharded
 from app.agentic.agents.evidence_extractor_v2 import EvidenceFeaturesExtractor, EvidenceExtractionResults, EvidenceImage
 import asyncio
-from urllib.parse import unquote
 from pydantic import BaseModel
-from app.evidences.models import EvidenceCard, Evidence, EvidenceCardSlotAssignment
+from app.evidences.models import EvidenceCard, EvidenceCardMember, Evidence, EvidenceCardSlotAssignment, CosDeletionOutbox
 
 from loguru import logger
 from agno.media import Image
@@ -21,11 +20,14 @@ from app.cases.models import Case
 from app.evidences.schemas import (
     EvidenceEditRequest, 
     UploadFileResponse,
+    DuplicateEvidence,
     EvidenceCardUpdateRequest
 )
 from app.integrations.cos import cos_service
+from app.utils.image_preprocess import AI_DERIVATIVE_FORMATS, build_ai_derivative, derivative_object_key
 from app.agentic.agents.evidence_proofreader import evidence_proofreader
 from app.cases.models import Case, CaseParty, PartyType, CaseType
+from app.core.config import settings
 from app.core.config_manager import config_manager
 from app.evidences.schemas import (
     EvidenceCardSlotTemplatesResponse,
@@ -33,6 +35,7 @@ from app.evidences.schemas import (
     EvidenceCardTemplate,
     EvidenceCardSlot,
     CardSlotProofreadResponse,
+    CardSlotBatchProofreadResponse,
     SlotProofreadResult
 )
 
@@ -245,8 +248,75 @@ async def get_by_id(db: AsyncSession, evidence_id: int) -> Optional[Evidence]:
 
 async def get_multi_by_ids(db: AsyncSession, evidence_ids: List[int]) -> List[Evidence]:
     """根据ID列表获取证据"""
-    result = await db.execute(select(Evidence).where(Evidence.id.in_(evidence_ids)))
-    return result.scalars().all()
+    evidences, _ = await load_evidences_by_ids(db, evidence_ids)
+    return evidences
+
+
+def _evidence_filters(case_id: Optional[int], classification_category: Optional[str]) -> list:
+    conditions = []
+    if case_id is not None:
+        conditions.append(Evidence.case_id == case_id)
+    if classification_category is not None:
+        conditions.append(Evidence.classification_category == classification_category)
+    return conditions
+
+
+async def load_evidences_by_ids(
+    db: AsyncSession,
+    evidence_ids: List[int],
+    case_id: Optional[int] = None,
+    classification_category: Optional[str] = None,
+) -> Tuple[List[Evidence], List[int]]:
+    """批量加载证据（一次查询）
+    
+    Args:
+        db: 数据库会话
+        evidence_ids: 证据ID列表（重复ID只返回一次）
+        case_id: 只加载该案件的证据
+        classification_category: 只加载该分类的证据
+        
+    Returns:
+        (按输入顺序排列的证据, 不存在或不满足过滤条件的ID)
+    """
+    evidence_ids = list(dict.fromkeys(int(evidence_id) for evidence_id in evidence_ids))
+    if not evidence_ids:
+        return [], []
+    result = await db.execute(
+        select(Evidence).where(Evidence.id.in_(evidence_ids), *_evidence_filters(case_id, classification_category))
+    )
+    by_id = {evidence.id: evidence for evidence in result.scalars().all()}
+    evidences = [by_id[evidence_id] for evidence_id in evidence_ids if evidence_id in by_id]
+    missing = [evidence_id for evidence_id in evidence_ids if evidence_id not in by_id]
+    return evidences, missing
+
+
+async def load_evidences_by_urls(
+    db: AsyncSession,
+    file_urls: List[str],
+    case_id: Optional[int] = None,
+    classification_category: Optional[str] = None,
+) -> Tuple[Dict[str, Evidence], List[str]]:
+    """按文件URL批量加载证据（一次查询）
+    
+    内容去重后多个证据可能共享同一文件URL，此时取ID最小的证据（与逐个查询 first() 的结果一致）。
+    
+    Returns:
+        (按输入顺序排列的 URL -> 证据, 没有对应证据的URL)
+    """
+    file_urls = list(dict.fromkeys(file_urls))
+    if not file_urls:
+        return {}, []
+    result = await db.execute(
+        select(Evidence)
+        .where(Evidence.file_url.in_(file_urls), *_evidence_filters(case_id, classification_category))
+        .order_by(Evidence.id)
+    )
+    by_url: Dict[str, Evidence] = {}
+    for evidence in result.scalars().all():
+        by_url.setdefault(evidence.file_url, evidence)
+    evidences = {url: by_url[url] for url in file_urls if url in by_url}
+    missing = [url for url in file_urls if url not in by_url]
+    return evidences, missing
 
 async def get_by_id_with_case(db: AsyncSession, evidence_id: int) -> Optional[Evidence]:
     """根据ID获取证据，包含案件信息"""
@@ -259,7 +329,7 @@ async def get_by_id_with_case(db: AsyncSession, evidence_id: int) -> Optional[Ev
 
 
 async def upload_file(
-    file: BinaryIO, filename: str, disposition: str = 'inline'
+    file: BinaryIO, filename: str, disposition: str = 'inline', content_hash: Optional[str] = None
 ) -> UploadFileResponse:
     """上传文件到COS"""
     from loguru import logger
@@ -321,14 +391,9 @@ async def upload_file(
             logger.error(f"文件内容为空: {filename}")
             raise ValueError("文件内容为空")
         
-        # 上传文件到COS
-        file_url = cos_service.upload_file(file, filename, folder, disposition)
-        
-        return UploadFileResponse(
-            file_url=file_url,
-            file_name=filename,
-            file_size=file_size,
-            file_extension=file_extension,
+        # 上传文件到COS（COS SDK 为同步调用，放到线程池执行，避免阻塞事件循环）
+        return await asyncio.to_thread(
+            _store_file, file, filename, folder, disposition, file_extension, file_size, content_hash
         )
     except Exception as e:
         logger.error(f"文件上传失败: {filename}, 错误: {str(e)}")
@@ -337,6 +402,60 @@ async def upload_file(
         raise
 
 
+def _store_file(
+    file: BinaryIO,
+    filename: str,
+    folder: str,
+    disposition: str,
+    file_extension: str,
+    file_size: int,
+    content_hash: Optional[str],
+) -> UploadFileResponse:
+    """上传原文件（大文件分块流式上传）并生成AI衍生图，在线程池中执行"""
+    file_url = cos_service.upload_file(file, filename, folder, disposition)
+
+    # 图片证据生成AI衍生图（校正方向、限制分辨率、重新压缩），失败不影响原图上传
+    ai_file_url = None
+    if file_extension in AI_DERIVATIVE_FORMATS:
+        ai_file_url = _upload_ai_derivative(file, file_url)
+
+    return UploadFileResponse(
+        file_url=file_url,
+        file_name=filename,
+        file_size=file_size,
+        file_extension=file_extension,
+        ai_file_url=ai_file_url,
+        content_hash=content_hash or compute_content_hash(file),
+    )
+
+
+def _upload_ai_derivative(file: BinaryIO, file_url: str) -> Optional[str]:
+    """生成并上传图片的AI衍生图，与原图存放在同一目录
+
+    Returns:
+        衍生图URL；图片无法解析或上传失败时返回 None（AI阶段回退使用原图）
+    """
+    from loguru import logger
+
+    try:
+        file.seek(0)
+        derivative = build_ai_derivative(file.read())
+        file.seek(0)
+        if derivative is None:
+            return None
+        object_key = derivative_object_key(file_url.split(".com/")[-1])
+        ai_file_url = cos_service.upload_bytes(derivative.content, object_key, derivative.content_type)
+        logger.debug(
+            f"AI衍生图上传成功: {object_key}, "
+            f"{derivative.original_width}x{derivative.original_height} -> {derivative.width}x{derivative.height}, "
+            f"{len(derivative.content)} 字节"
+        )
+        return ai_file_url
+    except Exception as e:
+        logger.warning(f"AI衍生图生成失败，将使用原图: {file_url}, 错误: {str(e)}")
+        return None
+
+
 async def update(db: AsyncSession, db_obj: Evidence, obj_in: EvidenceEditRequest) -> Evidence:
     """更新证据信息"""
     update_data = obj_in.model_dump(exclude_unset=True)
@@ -353,6 +472,53 @@ async def update(db: AsyncSession, db_obj: Evidence, obj_in: EvidenceEditRequest
     return updated_evidence
 
 
+def enqueue_object_deletions(db: AsyncSession, object_keys: List[str]) -> None:
+    """将待删除的COS对象写入删除发件箱，随调用方的事务一起提交"""
+    for object_key in object_keys:
+        db.add(CosDeletionOutbox(object_key=object_key))
+
+
+def trigger_object_deletion_drain() -> None:
+    """事务提交后触发一次发件箱清理；投递失败时由定时任务兜底"""
+    from app.core.celery_app import celery_app
+
+    try:
+        celery_app.send_task("app.tasks.cos_outbox_tasks.drain_cos_deletion_outbox_task")
+    except Exception as e:
+        logger.warning(f"触发COS删除任务失败，等待定时任务处理: {str(e)}")
+
+
+async def _collect_orphan_object_keys(db: AsyncSession, evidences: List[Evidence]) -> List[str]:
+    """收集可从COS删除的对象键
+
+    内容去重后多个证据可能共享同一COS对象，仅当没有其他证据引用时才删除。
+    """
+    from sqlalchemy import or_
+
+    if not evidences:
+        return []
+    evidence_ids = [e.id for e in evidences]
+    file_urls = {e.file_url for e in evidences}
+    result = await db.execute(
+        select(Evidence.file_url).where(
+            or_(Evidence.file_url.in_(file_urls), Evidence.ai_file_url.in_(file_urls)),
+            Evidence.id.not_in(evidence_ids),
+        )
+    )
+    shared_urls = set(result.scalars().all())
+
+    object_keys = []
+    for evidence in evidences:
+        if evidence.file_url in shared_urls:
+            continue
+        for url in (evidence.file_url, evidence.ai_file_url):
+            if url:
+                object_key = url.split(".com/")[-1] if ".com/" in url else url
+                if object_key not in object_keys:
+                    object_keys.append(object_key)
+    return object_keys
+
+
 async def delete(db: AsyncSession, evidence_id: int) -> bool:
     """删除证据
     
@@ -372,16 +538,16 @@ async def delete(db: AsyncSession, evidence_id: int) -> bool:
     if not evidence:
         return False
     
-    # 从COS删除文件
-    # 从URL中提取对象键
-    file_url = evidence.file_url
-    object_key = file_url.split(".com/")[-1] if ".com/" in file_url else file_url
-    cos_service.delete_file(object_key)
+    # COS文件写入删除发件箱（与删除记录同一事务），提交后由异步任务批量删除
+    # 其他证据仍引用的共享文件保留
+    enqueue_object_deletions(db, await _collect_orphan_object_keys(db, [evidence]))
     
     # 从数据库删除记录
     # 注意：不加载evidence_cards关系，让数据库外键约束SET NULL正常工作
     await db.delete(evidence)
+    await mark_cards_for_deleted_evidences(db, [evidence_id])
     await db.commit()
+    trigger_object_deletion_drain()
     return True
 
 
@@ -512,163 +678,303 @@ async def list_evidence_cards_by_case_id(
     return list(result.scalars().unique().all())
 
 
-async def batch_create(
+# 复用跨案件AI结果时需要复制的字段（证据角色等与案件相关的结果不复制）
+_REUSABLE_AI_FIELDS = (
+    "classification_category",
+    "classification_confidence",
+    "classification_reasoning",
+    "classified_at",
+    "evidence_features",
+    "features_extracted_at",
+)
+
+# 校对信息与案件当事人相关，复用特征时需要清除
+_PROOFREAD_KEYS = ("slot_proofread_at", "slot_is_consistent", "slot_expected_value", "slot_proofread_reasoning")
+
+
+def compute_content_hash(file: BinaryIO, chunk_size: int = 1024 * 1024) -> str:
+    """分块读取文件计算SHA-256，读取后文件指针复位"""
+    import hashlib
+
+    sha256 = hashlib.sha256()
+    file.seek(0)
+    while chunk := file.read(chunk_size):
+        sha256.update(chunk)
+    file.seek(0)
+    return sha256.hexdigest()
+
+
+def _reuse_evidence(source: Evidence, file_name: str, case_id: int, content_hash: str) -> Evidence:
+    """基于已有的相同内容证据创建新证据：复用COS对象与AI分类/特征提取结果"""
+    db_obj = Evidence(
+        file_url=source.file_url,
+        ai_file_url=source.ai_file_url,
+        file_name=file_name,
+        file_size=source.file_size,
+        file_extension=source.file_extension,
+        content_hash=content_hash,
+        case_id=case_id,
+        evidence_status=EvidenceStatus.UPLOADED.value,
+    )
+    for field in _REUSABLE_AI_FIELDS:
+        setattr(db_obj, field, getattr(source, field))
+
+    if db_obj.evidence_features:
+        db_obj.evidence_features = [
+            {k: v for k, v in feature.items() if k not in _PROOFREAD_KEYS} if isinstance(feature, dict) else feature
+            for feature in db_obj.evidence_features
+        ]
+    if db_obj.features_extracted_at:
+        db_obj.evidence_status = EvidenceStatus.FEATURES_EXTRACTED.value
+    elif db_obj.classified_at:
+        db_obj.evidence_status = EvidenceStatus.CLASSIFIED.value
+    return db_obj
+
+
+async def _load_evidences_by_hash(db: AsyncSession, content_hashes: List[str]) -> List[Evidence]:
+    """一次查询加载所有相同内容的已有证据，AI结果最完整的排在前面"""
+    if not content_hashes:
+        return []
+    result = await db.execute(
+        select(Evidence)
+        .where(Evidence.content_hash.in_(content_hashes))
+        .order_by(
+            Evidence.features_extracted_at.desc().nulls_last(),
+            Evidence.classified_at.desc().nulls_last(),
+            Evidence.id.desc(),
+        )
+    )
+    return list(result.scalars().all())
+
+
+async def batch_create_deduplicated(
     db: AsyncSession,
     case_id: int,
     files: List[UploadFile],
-) -> List[Evidence]:
-    """批量创建证据
-    
+) -> Tuple[List[Evidence], List[DuplicateEvidence]]:
+    """批量创建证据（按内容SHA-256去重）
+
+    - 案件中已存在相同内容的证据、或本次上传中重复的文件：不创建，作为重复项返回
+    - 其他案件中已存在相同内容的证据：不再上传COS，复用其文件与AI分类/特征提取结果
+    - 其余文件在线程池中并发上传（大文件分块流式上传），并发数受 EVIDENCE_UPLOAD_MAX_CONCURRENCY 限制
+
     Args:
         db: 数据库会话
         case_id: 案件ID
-        tags: 标签列表
         files: 文件列表
-        staff_id: 上传人员ID
-        
+
     Returns:
-        创建的证据列表
+        (创建的证据列表, 重复文件列表)
     """
     from loguru import logger
-    
-    evidences = []
-    
-    for index, file in enumerate(files):
+
+    hashed_files = []
+    for file in files:
         try:
-            # 上传单个文件
-            file_data = await upload_file(file.file, file.filename)
-            
+            # 读取并计算大文件哈希为同步IO，放到线程池执行，避免阻塞事件循环
+            hashed_files.append((file, await asyncio.to_thread(compute_content_hash, file.file)))
+        except Exception as e:
+            logger.error(f"文件读取失败: {file.filename}, 错误: {str(e)}")
+
+    existing_by_hash: Dict[str, Evidence] = {}
+    existing_in_case: Dict[str, Evidence] = {}
+    for existing in await _load_evidences_by_hash(db, list({h for _, h in hashed_files})):
+        existing_by_hash.setdefault(existing.content_hash, existing)
+        if existing.case_id == case_id:
+            existing_in_case.setdefault(existing.content_hash, existing)
+
+    duplicates: List[DuplicateEvidence] = []
+    batch_duplicates = []  # 本次上传中重复的文件，提交后回填已创建证据的id
+    unique_files = []  # 需要创建证据的文件（保持上传顺序）
+    seen_hashes = set()
+
+    for file, content_hash in hashed_files:
+        if content_hash in existing_in_case:
+            duplicates.append(DuplicateEvidence(
+                file_name=file.filename,
+                content_hash=content_hash,
+                existing_evidence_id=existing_in_case[content_hash].id,
+                duplicate_in="case",
+            ))
+        elif content_hash in seen_hashes:
+            batch_duplicates.append((file.filename, content_hash))
+        else:
+            seen_hashes.add(content_hash)
+            unique_files.append((file, content_hash))
+
+    # 需要上传的文件在线程池中并发上传，并发数受 EVIDENCE_UPLOAD_MAX_CONCURRENCY 限制
+    semaphore = asyncio.Semaphore(settings.EVIDENCE_UPLOAD_MAX_CONCURRENCY)
+
+    async def upload_one(file: UploadFile, content_hash: str) -> Optional[UploadFileResponse]:
+        async with semaphore:
+            try:
+                return await upload_file(file.file, file.filename, content_hash=content_hash)
+            except Exception as e:
+                # 如果上传失败，记录错误并继续处理其他文件
+                logger.error(f"文件处理失败: {file.filename}, 错误: {str(e)}")
+                import traceback
+                logger.error(f"错误详情: {traceback.format_exc()}")
+                return None
+
+    to_upload = [(file, content_hash) for file, content_hash in unique_files if content_hash not in existing_by_hash]
+    uploaded = await asyncio.gather(*(upload_one(file, content_hash) for file, content_hash in to_upload))
+    uploaded_by_hash = {content_hash: file_data for (_, content_hash), file_data in zip(to_upload, uploaded)}
+
+    evidences = []
+    batch_by_hash: Dict[str, Evidence] = {}
+    for file, content_hash in unique_files:
+        if source := existing_by_hash.get(content_hash):
+            logger.info(f"复用已有证据文件与AI结果: {file.filename} -> 证据ID {source.id}")
+            db_obj = _reuse_evidence(source, file.filename, case_id, content_hash)
+        elif file_data := uploaded_by_hash.get(content_hash):
             # 创建单个证据
             db_obj = Evidence(
                 file_url=file_data.file_url,
                 file_name=file_data.file_name,
                 file_size=file_data.file_size,
                 file_extension=file_data.file_extension,
+                ai_file_url=file_data.ai_file_url,
+                content_hash=content_hash,
                 case_id=case_id,
                 evidence_status=EvidenceStatus.UPLOADED.value,
             )
-            db.add(db_obj)
-            evidences.append(db_obj)
-        except Exception as e:
-            # 如果上传失败，记录错误并继续处理下一个文件
-            logger.error(f"文件处理失败: {file.filename}, 错误: {str(e)}")
-            import traceback
-            logger.error(f"错误详情: {traceback.format_exc()}")
+        else:
             continue
-    
+        db.add(db_obj)
+        evidences.append(db_obj)
+        batch_by_hash[content_hash] = db_obj
+
+    # 上传失败的文件，其重复项也不再报告
+    batch_duplicates = [(name, h) for name, h in batch_duplicates if h in batch_by_hash]
+
+    if duplicates or batch_duplicates:
+        logger.info(f"检测到重复文件: 案件中已存在={len(duplicates)}, 本次上传重复={len(batch_duplicates)}")
+
     if evidences:
         # 一次性提交所有证据
         try:
             await db.commit()
-            
+
+            duplicates.extend(
+                DuplicateEvidence(
+                    file_name=file_name,
+                    content_hash=content_hash,
+                    existing_evidence_id=batch_by_hash[content_hash].id,
+                    duplicate_in="batch",
+                )
+                for file_name, content_hash in batch_duplicates
+            )
+
             # 使用 select 查询并加载关联关系，避免 MissingGreenlet 错误
             # 直接 refresh 无法在异步会话中正确加载 lazy='joined' 的关系
             stmt = select(Evidence).options(
                 joinedload(Evidence.case)
             ).where(Evidence.id.in_([e.id for e in evidences]))
-            
+
             result = await db.execute(stmt)
             # 保持原始顺序（如果重要的话，或者直接返回查询结果）
             # 这里简单返回查询到的及其，顺序可能变但不影响功能
-            return result.scalars().all()
-            
+            return list(result.scalars().all()), duplicates
+
         except Exception as e:
             logger.error(f"数据库提交失败: {str(e)}")
             import traceback
             logger.error(f"错误详情: {traceback.format_exc()}")
-            return []
+            return [], duplicates
     else:
         logger.warning("没有成功创建任何证据")
+
+    return evidences, duplicates
+
+
+async def batch_create(
+    db: AsyncSession,
+    case_id: int,
+    files: List[UploadFile],
+) -> List[Evidence]:
+    """批量创建证据（重复文件不会重复创建，详见 batch_create_deduplicated）
     
+    Args:
+        db: 数据库会话
+        case_id: 案件ID
+        files: 文件列表
+        
+    Returns:
+        创建的证据列表
+    """
+    evidences, _ = await batch_create_deduplicated(db, case_id, files)
     return evidences
 
 
 async def batch_delete(
     db: AsyncSession, evidence_ids: List[int]
-) -> Dict[str, List[Union[int, str]]]:
-    """批量删除证据
+) -> Dict[str, List[Any]]:
+    """批量删除证据（集合操作，语句数量与证据数量无关）
     
     Args:
         db: 数据库会话
         evidence_ids: 证据ID列表
         
     Returns:
-        包含成功和失败删除的字典
+        包含成功和失败删除的字典，results 为每个证据ID的删除结果（与输入顺序一致）
         
     Note:
         - 删除证据时，不需要处理任何关联，EvidenceCard的evidence_ids字段保持不变
-        - 由于SQLAlchemy的relationship行为，我们需要确保不在删除前加载关联关系，让数据库外键约束正常工作
+        - 使用 DELETE ... RETURNING 一次删除并取回被删除证据的信息，不加载任何关联关系
     """
-    from sqlalchemy import select
-    
-    successful = []
-    failed = []
-    object_keys = []
-    deleted_evidences = []  # 保存被删除的证据信息，用于后续处理
+    from sqlalchemy import delete as sql_delete, or_
+    from app.cases.models import AssociationEvidenceFeature
     
-    # 先获取所有证据信息（在删除前）
-    # 使用select直接查询，不加载relationship，避免SQLAlchemy干预关联表的删除行为
-    for evidence_id in evidence_ids:
+    unique_ids = list(dict.fromkeys(evidence_ids))
+    deleted_evidences = []  # 被删除证据的信息（id/文件URL/分类），用于后续处理
+    if unique_ids:
         result = await db.execute(
-            select(Evidence).where(Evidence.id == evidence_id)
+            sql_delete(Evidence)
+            .where(Evidence.id.in_(unique_ids))
+            .returning(Evidence.id, Evidence.file_url, Evidence.ai_file_url, Evidence.classification_category)
+            .execution_options(synchronize_session="fetch")
         )
-        evidence = result.scalar_one_or_none()
-        
-        if not evidence:
-            failed.append(f"证据ID {evidence_id} 不存在")
-            continue
-        
-        # 保存证据信息用于后续处理
-        deleted_evidences.append(evidence)
-        
-        # 从URL中提取对象键
-        file_url = evidence.file_url
-        object_key = file_url.split(".com/")[-1] if ".com/" in file_url else file_url
-        object_keys.append(object_key)
-        
-        # 标记为删除
-        # 注意：不加载evidence_cards关系，让数据库外键约束SET NULL正常工作
-        await db.delete(evidence)
-        successful.append(evidence_id)
-    
-    # 删除关联的association_evidence_features记录
-    # 检查是否包含"微信聊天记录"类型的证据
-    from app.cases.models import AssociationEvidenceFeature
-    from sqlalchemy import select
+        deleted_evidences = result.all()
+    deleted_ids = {e.id for e in deleted_evidences}
     
-    # 获取被删除的"微信聊天记录"类型的证据ID
-    wechat_evidence_ids = [
-        e.id for e in deleted_evidences 
-        if e.classification_category == "微信聊天记录"
-    ]
+    # 更新引用了被删除证据的卡片的物化异常信息
+    await mark_cards_for_deleted_evidences(db, list(deleted_ids))
     
-    # 如果包含"微信聊天记录"类型的证据，删除所有相关的association_evidence_features记录
+    # 删除关联的association_evidence_features记录（包含任一被删除的"微信聊天记录"证据）
+    # association_evidence_ids 存储的是整数数组，JSONB 的 ?| 只匹配字符串元素，
+    # 因此用多个 @> 条件的 OR 在一条语句中表达"有交集"（可以使用 GIN 索引）
+    wechat_evidence_ids = [e.id for e in deleted_evidences if e.classification_category == "微信聊天记录"]
     if wechat_evidence_ids:
-        # 查找所有包含被删除证据ID的关联特征记录
-        for evidence_id in wechat_evidence_ids:
-            # 使用正确的 JSONB 操作符来检查数组是否包含特定值
-            # association_evidence_ids 存储的是整数列表，所以我们需要检查是否包含整数
-            association_features = await db.execute(
-                select(AssociationEvidenceFeature).where(
-                    AssociationEvidenceFeature.association_evidence_ids.contains([evidence_id])
-                )
-            )
-            association_features = association_features.scalars().all()
-            
-            # 直接删除所有包含被删除证据ID的关联特征记录
-            for feature in association_features:
-                await db.delete(feature)
+        await db.execute(
+            sql_delete(AssociationEvidenceFeature)
+            .where(or_(*(
+                AssociationEvidenceFeature.association_evidence_ids.contains([evidence_id])
+                for evidence_id in wechat_evidence_ids
+            )))
+            .execution_options(synchronize_session=False)
+        )
     
-    # 批量删除COS文件
-    if object_keys:
-        for object_key in object_keys:
-            cos_service.delete_file(object_key)
+    # COS文件写入删除发件箱（与删除记录同一事务），提交后由异步任务批量删除
+    # 其他证据仍引用的共享文件保留
+    enqueue_object_deletions(db, await _collect_orphan_object_keys(db, deleted_evidences))
     
     # 提交数据库事务
     # 注意：删除证据时，不需要处理任何关联，EvidenceCard的evidence_ids字段保持不变
     await db.commit()
+    trigger_object_deletion_drain()
+    
+    results = []
+    successful = []
+    failed = []
+    for evidence_id in evidence_ids:
+        if evidence_id in deleted_ids:
+            successful.append(evidence_id)
+            results.append({"evidence_id": evidence_id, "success": True, "message": "删除成功"})
+        else:
+            failed.append(f"证据ID {evidence_id} 不存在")
+            results.append({"evidence_id": evidence_id, "success": False, "message": "证据不存在"})
     
-    return {"successful": successful, "failed": failed}
+    return {"successful": successful, "failed": failed, "results": results}
 
 
 async def batch_check_evidence(
@@ -728,6 +1034,46 @@ async def batch_create_with_classification(
     return evidences
 
 
+# 证据处理流水线的阶段顺序，evidence_status 记录证据已完成的最后阶段
+EVIDENCE_STAGE_ORDER = {
+    EvidenceStatus.UPLOADED.value: 0,
+    EvidenceStatus.CLASSIFIED.value: 1,
+    EvidenceStatus.FEATURES_EXTRACTED.value: 2,
+    EvidenceStatus.CHECKED.value: 3,
+}
+
+
+def has_reached_stage(evidence: Evidence, stage: EvidenceStatus) -> bool:
+    """证据是否已完成某个阶段（检查点判断）"""
+    status = evidence.evidence_status.value if isinstance(evidence.evidence_status, EvidenceStatus) else evidence.evidence_status
+    reached = EVIDENCE_STAGE_ORDER.get(status, 0) >= EVIDENCE_STAGE_ORDER[stage.value]
+    if stage == EvidenceStatus.CLASSIFIED:
+        return reached and bool(evidence.classification_category)
+    return reached
+
+
+def _apply_classification_results(db: AsyncSession, evidences: List[Evidence], results) -> None:
+    """将分类结果写入对应的证据（结果URL由图片编号还原，与证据的AI图片URL一致），由调用方提交"""
+    evidence_by_url: Dict[str, Evidence] = {}
+    for evidence in evidences:
+        evidence_by_url.setdefault(evidence.ai_image_url, evidence)
+    for res in results:
+        if evidence := evidence_by_url.get(res.image_url):
+            # 检查分类结果是否有效
+            if res.evidence_type and res.evidence_type.strip() and res.confidence > 0:
+                # 只有有效的分类结果才更新状态
+                evidence.classification_category = res.evidence_type
+                evidence.classification_confidence = res.confidence
+                evidence.classification_reasoning = res.reasoning
+                evidence.classified_at = datetime.now()
+                evidence.evidence_status = EvidenceStatus.CLASSIFIED.value
+            else:
+                # 无效的分类结果，不更新状态
+                logger.warning(f"无效分类结果: {evidence.file_name} -> evidence_type='{res.evidence_type}', confidence={res.confidence}")
+                # 保持原有状态，不更新为已分类
+            db.add(evidence)
+
+
 async def auto_process(
     db: AsyncSession,
     case_id: int,
@@ -735,8 +1081,19 @@ async def auto_process(
     evidence_ids: Optional[List[int]] = None,
     auto_classification: bool = False,
     auto_feature_extraction: bool = False,
-    send_progress: Any = None
+    send_progress: Any = None,
+    resume: bool = False,
 )-> List[Evidence]:
+    """证据自动处理流水线：分类 -> 特征提取（OCR/LLM）-> 角色标注 -> 更新当事人信息
+
+    每个证据的 evidence_status 即为其检查点，各阶段的结果处理完即提交：
+    - 分类结果按分片提交，OCR 结果按证据提交，LLM 提取结果按批次提交
+    - 特征提取只处理状态为已分类的证据，角色标注与当事人更新可重复执行
+
+    Args:
+        resume: 从检查点继续（Celery 重试/重新投递时使用），已完成分类的证据不再重新分类，
+            已审核的证据不再处理；为 False 时按请求重新分类
+    """
     
     # 类型安全：确保 evidence_ids 为 int 列表
     if evidence_ids is not None:
@@ -764,11 +1121,9 @@ async def auto_process(
                 "total": len(evidences)
             })
     elif evidence_ids:
-        evidences = []
-        for evidence_id in evidence_ids:
-            q = await db.execute(select(Evidence).where(Evidence.id == evidence_id, Evidence.case_id == case_id))
-            if evidence := q.scalars().first():
-                evidences.append(evidence)
+        evidences, missing_ids = await load_evidences_by_ids(db, evidence_ids, case_id=case_id)
+        if missing_ids:
+            logger.warning(f"auto_process: 以下证据不存在或不属于案件 {case_id}: {missing_ids}")
     else:
         evidences = []
     # 支持多种文件格式，但AI处理可能只支持特定格式
@@ -807,42 +1162,39 @@ async def auto_process(
                     "progress": 10  # 固定进度：10%
                 })
             
-            evidence_classifier = EvidenceClassifier()
-            # message_parts = ["请对以下证据进行分类："]
-            # for i, ev in enumerate(evidences):
-            #     message_parts.append(f"{i+1}. file_url: {ev.file_url}")
-            # messages = "\n".join(message_parts)
-            
-            # 设置超时时间（3分钟）
-            import asyncio
-            run_response: RunResponse = await asyncio.wait_for(
-                evidence_classifier.arun([ev.file_url for ev in evidences]),
-                timeout=180.0
-            )
-            
-            evidence_classifi_results: EvidenceClassifiResults = run_response.content
-            if results := evidence_classifi_results.results:
-                from urllib.parse import unquote
-                for res in results:
-                    res_url = unquote(res.image_url)
-                    for evidence in evidences:
-                        ev_url = unquote(evidence.file_url)
-                        if ev_url == res_url:
-                            # 检查分类结果是否有效
-                            if res.evidence_type and res.evidence_type.strip() and res.confidence > 0:
-                                # 只有有效的分类结果才更新状态
-                                evidence.classification_category = res.evidence_type
-                                evidence.classification_confidence = res.confidence
-                                evidence.classification_reasoning = res.reasoning
-                                evidence.classified_at = datetime.now()
-                                evidence.evidence_status = EvidenceStatus.CLASSIFIED.value
-                            else:
-                                # 无效的分类结果，不更新状态
-                                logger.warning(f"无效分类结果: {evidence.file_name} -> evidence_type='{res.evidence_type}', confidence={res.confidence}")
-                                # 保持原有状态，不更新为已分类
-                            db.add(evidence)
-                            break
-                await db.commit()
+            # 从检查点继续时，已完成分类的证据跳过分类
+            classify_targets = [
+                ev for ev in evidences
+                if not (resume and has_reached_stage(ev, EvidenceStatus.CLASSIFIED))
+            ]
+            if len(classify_targets) < len(evidences):
+                logger.info(f"从检查点继续: {len(evidences) - len(classify_targets)} 个证据已完成分类，跳过")
+
+            # 每个分片完成后立即提交分类结果（检查点），分片并发完成，提交需要串行
+            checkpoint_lock = asyncio.Lock()
+
+            async def checkpoint_classification(chunk_results) -> None:
+                async with checkpoint_lock:
+                    _apply_classification_results(db, classify_targets, chunk_results)
+                    await db.commit()
+
+            if classify_targets:
+                # 分片并发分类：单个分片超时/失败只重试该分片，已成功的分片结果保留
+                evidence_classifi_results = await classify_evidences_sharded(
+                    [ev.ai_image_url for ev in classify_targets],
+                    on_chunk_done=checkpoint_classification,
+                )
+                if not evidence_classifi_results.results and evidence_classifi_results.failed_image_urls:
+                    raise asyncio.TimeoutError()
+                if evidence_classifi_results.failed_image_urls:
+                    logger.warning(f"部分证据分类失败，保留已成功的分类结果: 失败 {len(evidence_classifi_results.failed_image_urls)} 个")
+                    if send_progress:
+                        await send_progress({
+                            "status": "classifying",
+                            "message": f"{len(evidence_classifi_results.failed_image_urls)} 个证据分类失败，其余证据继续处理",
+                            "progress": 20
+                        })
+
                 for evidence in evidences:
                     await db.refresh(evidence)
             
@@ -932,7 +1284,7 @@ async def auto_process(
                         
                         # 调用OCR服务
                         ocr_result = ocr_service.extract_evidence_features(
-                            evidence.file_url, 
+                            evidence.ai_image_url, 
                             evidence.classification_category
                         )
                         
@@ -989,14 +1341,13 @@ async def auto_process(
                 extractor = EvidenceFeaturesExtractor()
                 images = [
                     EvidenceImage(
-                        url=ev.file_url,
+                        url=ev.ai_image_url,
                         evidence_type=ev.classification_category
                     )
                     for ev in llm_evidences
                 ]
                 
                 # 设置超时时间（3分钟）
-                import asyncio
                 llm_run_response: RunResponse = await asyncio.wait_for(
                     extractor.arun(images),
                     timeout=180.0
@@ -1004,17 +1355,15 @@ async def auto_process(
                 
                 evidence_extraction_results: EvidenceExtractionResults = llm_run_response.content
                 if results := evidence_extraction_results.results:
-                    from urllib.parse import unquote
+                    evidence_by_url: Dict[str, Evidence] = {}
+                    for evidence in llm_evidences:
+                        evidence_by_url.setdefault(evidence.ai_image_url, evidence)
                     for res in results:
-                        res_url = unquote(res.image_url)
-                        for evidence in evidences:
-                            ev_url = unquote(evidence.file_url)
-                            if ev_url == res_url:
-                                evidence.evidence_features = [s.model_dump() for s in res.slot_extraction]
-                                evidence.features_extracted_at = datetime.now()
-                                evidence.evidence_status = EvidenceStatus.FEATURES_EXTRACTED.value
-                                db.add(evidence)
-                                break
+                        if evidence := evidence_by_url.get(res.image_url):
+                            evidence.evidence_features = [s.model_dump() for s in res.slot_extraction]
+                            evidence.features_extracted_at = datetime.now()
+                            evidence.evidence_status = EvidenceStatus.FEATURES_EXTRACTED.value
+                            db.add(evidence)
                     await db.commit()
                     for evidence in evidences:
                         await db.refresh(evidence)
@@ -1064,137 +1413,12 @@ async def auto_process(
                 logger.error(f"未找到案件信息: case_id={case_id}")
                 return evidences
             
-            # 导入配置管理器
-            from app.core.config_manager import config_manager
-            
-            # 遍历所有证据，进行角色标注
-            for evidence in evidences:
-                # 只有已分类且有特征提取结果的证据才进行角色标注
-                if (evidence.evidence_status == EvidenceStatus.FEATURES_EXTRACTED.value and 
-                    evidence.classification_category and 
-                    evidence.evidence_features):
-                    
-                    # 获取证据类型配置
-                    evidence_type_config = config_manager.get_evidence_type_by_type_name(evidence.classification_category)
-                    if not evidence_type_config:
-                        logger.warning(f"未找到证据类型配置: {evidence.classification_category}")
-                        continue
-                    
-                    # 检查是否有proofread_rules配置
-                    extraction_slots = evidence_type_config.get("extraction_slots", [])
-                    if not extraction_slots:
-                        continue
-                    
-                    # 遍历每个词槽配置，检查是否有proofread_rules
-                    for slot_config in extraction_slots:
-                        proofread_rules = slot_config.get("proofread_rules", [])
-                        if not proofread_rules:
-                            continue
-                        
-                        slot_name = slot_config.get("slot_name")
-                        if not slot_name:
-                            continue
-                        
-                        # 从证据特征中查找对应的词槽值
-                        slot_value = None
-                        for feature in evidence.evidence_features:
-                            if isinstance(feature, dict) and feature.get("slot_name") == slot_name:
-                                slot_value = feature.get("slot_value")
-                                break
-                        
-                        if not slot_value or slot_value == "未知":
-                            continue
-                        
-                        # 执行角色标注规则
-                        for rule in proofread_rules:
-                            rule_name = rule.get("rule_name", "")
-                            target_type = rule.get("target_type", "case_party")
-                            party_role = rule.get("party_role", [])
-                            
-                            # 角色标注逻辑：尝试与所有当事人匹配
-                            if target_type == "case_party":
-                                # 确定目标角色
-                                if party_role and len(party_role) > 0:
-                                    # 如果指定了party_role，使用指定的角色
-                                    target_roles = party_role
-                                else:
-                                    # 如果没有指定角色，尝试与所有当事人匹配
-                                    target_roles = ["creditor", "debtor"]
-                                
-                                # 查找匹配的当事人
-                                for party in case.case_parties:
-                                    if party.party_role not in target_roles:
-                                        continue
-                                    
-                                    # 根据当事人类型匹配条件
-                                    conditions = rule.get("conditions", [])
-                                    if not conditions:
-                                        continue
-                                    
-                                    for condition in conditions:
-                                        if condition.get("party_type") != party.party_type:
-                                            continue
-                                        
-                                        target_fields = condition.get("target_fields", [])
-                                        match_strategy = condition.get("match_strategy", "exact")
-                                        match_condition = condition.get("match_condition", "any")
-                                        
-                                        if not target_fields:
-                                            continue
-                                        
-                                        # 执行匹配逻辑
-                                        match_results = []
-                                        for party_field in target_fields:
-                                            party_value = getattr(party, party_field, None)
-                                            if party_value is None:
-                                                continue
-                                            
-                                            # 根据匹配策略执行匹配
-                                            if match_strategy == "exact":
-                                                normalized_slot_value = _normalize_numeric_value(slot_value)
-                                                normalized_party_value = _normalize_numeric_value(party_value)
-                                                is_match = str(normalized_slot_value).strip() == str(normalized_party_value).strip()
-                                            elif match_strategy == "contains":
-                                                is_match = str(party_value).strip() in str(slot_value).strip()
-                                            elif match_strategy == "startswith":
-                                                is_match = str(slot_value).strip().startswith(str(party_value).strip())
-                                            elif match_strategy == "endswith":
-                                                is_match = str(slot_value).strip().endswith(str(party_value).strip())
-                                            else:
-                                                normalized_slot_value = _normalize_numeric_value(slot_value)
-                                                normalized_party_value = _normalize_numeric_value(party_value)
-                                                is_match = str(normalized_slot_value).strip() == str(normalized_party_value).strip()
-                                            
-                                            match_results.append(is_match)
-                                        
-                                        # 根据匹配条件判断是否匹配成功
-                                        match_success = False
-                                        if match_condition == "all" and match_results:
-                                            match_success = all(match_results)
-                                        elif match_condition == "any" and match_results:
-                                            match_success = any(match_results)
-                                        elif match_condition == "majority" and match_results:
-                                            match_success = sum(match_results) > len(match_results) / 2
-                                        
-                                        # 如果匹配成功，确定证据角色
-                                        if match_success:
-                                            evidence_role = party.party_role
-                                            evidence.evidence_role = evidence_role
-                                            db.add(evidence)
-                                            logger.info(f"证据角色标注成功: {evidence.file_name} -> {evidence_role} (规则: {rule_name})")
-                                            break
-                                    
-                                    # 如果已经找到匹配的角色，跳出当事人循环
-                                    if evidence.evidence_role:
-                                        break
-                            
-                            # 如果已经找到匹配的角色，跳出规则循环
-                            if evidence.evidence_role:
-                                break
-                        
-                        # 如果已经找到匹配的角色，跳出词槽循环
-                        if evidence.evidence_role:
-                            break
+            # 使用预编译规则和当事人索引批量标注
+            from app.evidences.role_annotation import annotate_evidence_roles
+
+            for evidence, rule_name in annotate_evidence_roles(evidences, case.case_parties):
+                db.add(evidence)
+                logger.info(f"证据角色标注成功: {evidence.file_name} -> {evidence.evidence_role} (规则: {rule_name})")
             
             # 提交所有更新
             await db.commit()
@@ -1661,6 +1885,18 @@ async def _update_party_from_company_gsxt_license(db, evidence, case_parties, up
         logger.error(f"更新公司全国企业公示系统截图当事人信息失败: {str(e)}")
 
 
+# 卡片铸造支持的证据格式
+CARD_CASTING_IMAGE_FORMATS = [
+    # 图片格式 - AI可以处理
+    "jpg", "jpeg", "png", "bmp", "webp",
+    # 其他格式暂时不支持AI处理，但可以上传
+    # "doc", "docx", "txt", "xls", "xlsx", "csv", "mp3", "mp4", "wav", "m4a", "avi", "mov", "wmv"
+]
+
+# 需要关联提取的卡片类型（同类证据一起提取并按分组生成卡片）
+CARD_CASTING_ASSOCIATION_TYPES = {"微信聊天记录"}
+
+
 class EvidenceCardSchema(BaseModel):
     """证据卡片数据模型（用于构建卡片）"""
     evidence_ids: List[int]  # 关联的证据ID列表（支持1到多个）
@@ -1674,6 +1910,8 @@ async def evidence_card_casting(
         card_id: Optional[int] = None,
         skip_classification: bool = False,
         target_card_type: Optional[str] = None,
+        classified_types: Optional[Dict[int, str]] = None,
+        raise_on_extraction_error: bool = False,
     ):
     """
     证据卡片铸造（从证据特征中铸造证据卡片）
@@ -1690,19 +1928,16 @@ async def evidence_card_casting(
         card_id: 重铸时的卡片ID（如果提供，则更新该卡片而不是创建新卡片）
         skip_classification: 是否跳过分类（重铸时使用，因为卡片已有分类）
         target_card_type: 目标分类（更新分类时使用，如果提供则使用此分类而不是重新分类）
+        classified_types: 预先完成的分类结果（evidence_id -> 证据类型），提供时跳过分类，
+            用于分布式铸造中每个子任务铸造已分类的卡片
+        raise_on_extraction_error: 特征提取失败或超时时抛出异常（默认只记录日志并铸造空特征卡片），
+            用于让分布式铸造的子任务失败后重试
     """
     # 检索证据列表
     evidences = await get_multi_by_ids(db, evidence_ids)
 
     # 过滤仅支持的处理类型
-    supported_ai_formats = [
-        # 图片格式 - AI可以处理
-        "jpg", "jpeg", "png", "bmp", "webp",
-        # 其他格式暂时不支持AI处理，但可以上传
-        # "doc", "docx", "txt", "xls", "xlsx", "csv", "mp3", "mp4", "wav", "m4a", "avi", "mov", "wmv"
-    ]
-
-    filtered_evidences = [evidence for evidence in evidences if evidence.file_extension in supported_ai_formats]
+    filtered_evidences = [evidence for evidence in evidences if evidence.file_extension in CARD_CASTING_IMAGE_FORMATS]
     
     # 静默过滤：如果没有有效的图片类型证据，返回空列表
     # 非图片类型（如PDF）会被静默忽略，不会抛出错误
@@ -1808,30 +2043,39 @@ async def evidence_card_casting(
                     card.card_info["card_is_associated"] = existing_card.card_info.get("card_is_associated", False) if existing_card and existing_card.card_info else False
                 if "card_features" not in card.card_info:
                     card.card_info["card_features"] = []
+    elif classified_types is not None:
+        # 使用预先完成的分类结果（分布式铸造的子任务），没有分类结果的证据不铸造卡片
+        logger.info(f"使用预先分类结果铸造卡片: {classified_types}")
+        for card in card_data:
+            card_type = classified_types.get(card.evidence_ids[0])
+            if card_type:
+                card.card_info = {
+                    "card_type": card_type,
+                    "card_is_associated": False,  # 当前是单个证据提取
+                    "card_features": []
+                }
     else:
         # 正常铸造流程：进行证据分类
         logger.info("正常铸造流程：进行证据分类")
-        evidence_classifier = EvidenceClassifier()
-        classification_response: RunResponse = await asyncio.wait_for(
-                    evidence_classifier.arun([evidence.file_url for evidence in filtered_evidences]),
-                    timeout=180.0
-                )
-        if classification_response.content is None:
+        # 分片并发分类：失败的分片单独重试，已成功分类的证据照常铸造卡片
+        sharded_results = await classify_evidences_sharded(
+            [evidence.ai_image_url for evidence in filtered_evidences]
+        )
+        if not sharded_results.results and sharded_results.failed_image_urls:
             raise ValueError("证据分类结果为空")
+        if sharded_results.failed_image_urls:
+            logger.warning(f"部分证据分类失败，将跳过这些证据的卡片铸造: {sharded_results.failed_image_urls}")
 
         # Step2: 证据分类结果处理
-        evidence_classifi_results = cast(EvidenceClassifiResults, classification_response.content)
-        
+        evidence_classifi_results = sharded_results
+
         if not evidence_classifi_results or not evidence_classifi_results.results:
             logger.warning("证据分类结果为空，无法构建卡片数据")
             return []
 
-    # 建立 URL -> evidence_id 映射关系，用于匹配分类结果
-    url_to_evidence_id: Dict[str, int] = {}
-    for evidence in filtered_evidences:
-        normalized_url = unquote(evidence.file_url)
-        url_to_evidence_id[normalized_url] = evidence.id
-        url_to_evidence_id[evidence.file_url] = evidence.id  # 同时保存原始 URL
+    # 建立 URL -> evidence_id 映射关系，用于匹配分类/特征提取结果
+    # （结果URL由图片编号还原，与发送给模型的AI图片URL完全一致）
+    url_to_evidence_id: Dict[str, int] = {evidence.ai_image_url: evidence.id for evidence in filtered_evidences}
     
     # 建立 evidence_id -> card 映射关系（由于当前是单个证据一个卡片）
     evidence_id_to_card: Dict[int, EvidenceCardSchema] = {
@@ -1841,8 +2085,7 @@ async def evidence_card_casting(
     # Step2: 证据分类结果处理（使用映射关系匹配，如果不是重铸且没有使用目标分类）
     if not skip_classification and not use_target_type and evidence_classifi_results:
         for result in evidence_classifi_results.results:
-            normalized_result_url = unquote(result.image_url)
-            evidence_id = url_to_evidence_id.get(normalized_result_url) or url_to_evidence_id.get(result.image_url)
+            evidence_id = url_to_evidence_id.get(result.image_url)
             
             if evidence_id is None:
                 logger.warning(f"无法找到对应的证据ID，image_url: {result.image_url}")
@@ -1914,115 +2157,125 @@ async def evidence_card_casting(
                 else:
                     agent_cards.append(card)
         
-        # Step3.1: OCR 特征提取
+        # Step3.1 / Step3.2: OCR 与 Agent 特征提取按卡片并发执行
+        # 每张卡片单独调用、单独超时，服务商并发由信号量限制；
+        # 单张卡片失败或超时只影响该卡片，与 Step3.3 的关联提取同时进行
+        from app.agentic.llm.concurrency import get_provider_semaphore
+
+        card_feature_timeout = settings.EVIDENCE_CARD_FEATURE_TIMEOUT
+        ocr_semaphore = get_provider_semaphore("xunfei", settings.EVIDENCE_OCR_MAX_CONCURRENCY)
+        agent_semaphore = get_provider_semaphore("qwen", settings.EVIDENCE_CLASSIFY_MAX_CONCURRENCY)
+        # 关联提取是一次耗时较长的批次调用，使用单独的信号量，避免长时间占用单卡提取的并发名额
+        association_semaphore = get_provider_semaphore("qwen_association", settings.EVIDENCE_ASSOCIATION_MAX_CONCURRENCY)
+        ocr_service = None
         if ocr_cards:
+            from app.utils.xunfei_ocr import XunfeiOcrService
+            ocr_service = XunfeiOcrService()
+
+        async def extract_ocr_card(card: EvidenceCardSchema) -> None:
+            evidence_id = card.evidence_ids[0]
+            evidence = evidence_map.get(evidence_id)
+            card_type = card.card_info.get("card_type")
+            if not evidence or not card_type:
+                return
             try:
-                from app.utils.xunfei_ocr import XunfeiOcrService
-                ocr_service = XunfeiOcrService()
-                
-                for card in ocr_cards:
-                    if len(card.evidence_ids) == 1 and card.card_info:
-                        evidence_id = card.evidence_ids[0]
-                        evidence = evidence_map.get(evidence_id)
-                        card_type = card.card_info.get("card_type")
-                        
-                        if evidence and card_type:
-                            # 调用 OCR 服务提取特征
-                            ocr_result = ocr_service.extract_evidence_features(
-                                image_url=evidence.file_url,
-                                evidence_type=card_type
-                            )
-                            
-                            if "error" in ocr_result:
-                                logger.warning(f"OCR识别失败，evidence_id: {evidence_id}, 错误: {ocr_result['error']}")
-                                continue
-                            
-                            # 将 OCR 结果转换为 card_features 格式
-                            evidence_features = ocr_result.get("evidence_features", [])
-                            if evidence_features:
-                                if "card_features" not in card.card_info:
-                                    card.card_info["card_features"] = []
-                                
-                                # OCR 返回的格式已经是字典列表，直接添加 slot_group_info
-                                for feature in evidence_features:
-                                    card.card_info["card_features"].append({
-                                        "slot_name": feature.get("slot_name", ""),
-                                        "slot_value_type": feature.get("slot_value_type", "string"),
-                                        "slot_value": feature.get("slot_value", ""),
-                                        "confidence": feature.get("confidence", 0.0),
-                                        "reasoning": feature.get("reasoning", "OCR识别"),
-                                        "slot_group_info": None  # 单个证据提取，没有关联信息
-                                    })
+                async with ocr_semaphore:
+                    # 讯飞 OCR 客户端是同步 HTTP 调用，放到线程中执行，避免阻塞事件循环
+                    ocr_result = await asyncio.wait_for(
+                        asyncio.to_thread(
+                            ocr_service.extract_evidence_features,
+                            image_url=evidence.ai_image_url,
+                            evidence_type=card_type
+                        ),
+                        timeout=card_feature_timeout
+                    )
+            except asyncio.TimeoutError:
+                logger.warning(f"OCR识别超时，evidence_id: {evidence_id}, timeout={card_feature_timeout}s")
+                if raise_on_extraction_error:
+                    raise
+                return
             except Exception as e:
-                logger.error(f"OCR特征提取失败: {str(e)}")
-        
-        # Step3.2: Agent 特征提取（单个证据，非微信聊天记录）
-        if agent_cards:
+                logger.error(f"OCR特征提取失败，evidence_id: {evidence_id}, 错误: {str(e)}")
+                if raise_on_extraction_error:
+                    raise
+                return
+
+            if "error" in ocr_result:
+                logger.warning(f"OCR识别失败，evidence_id: {evidence_id}, 错误: {ocr_result['error']}")
+                if raise_on_extraction_error:
+                    raise ValueError(f"OCR识别失败，evidence_id: {evidence_id}, 错误: {ocr_result['error']}")
+                return
+
+            # OCR 返回的格式已经是字典列表，直接添加 slot_group_info
+            card_features = card.card_info.setdefault("card_features", [])
+            for feature in ocr_result.get("evidence_features", []):
+                card_features.append({
+                    "slot_name": feature.get("slot_name", ""),
+                    "slot_value_type": feature.get("slot_value_type", "string"),
+                    "slot_value": feature.get("slot_value", ""),
+                    "confidence": feature.get("confidence", 0.0),
+                    "reasoning": feature.get("reasoning", "OCR识别"),
+                    "slot_group_info": None  # 单个证据提取，没有关联信息
+                })
+
+        async def extract_agent_card(card: EvidenceCardSchema) -> None:
+            evidence_id = card.evidence_ids[0]
+            evidence = evidence_map.get(evidence_id)
+            card_type = card.card_info.get("card_type")
+            if not evidence or not card_type:
+                return
             try:
-                features_extract_data = []
-                for card in agent_cards:
-                    if len(card.evidence_ids) == 1 and card.card_info:
-                        evidence_id = card.evidence_ids[0]
-                        evidence = evidence_map.get(evidence_id)
-                        card_type = card.card_info.get("card_type")
-                        if evidence and card_type:
-                            features_extract_data.append(
-                                EvidenceImage(
-                                    url=evidence.file_url, 
-                                    evidence_type=card_type
-                                )
-                            )
-                
-                if features_extract_data:
-                    evidence_features_extractor = EvidenceFeaturesExtractor()
+                async with agent_semaphore:
                     features_response: RunResponse = await asyncio.wait_for(
-                        evidence_features_extractor.arun(features_extract_data),
-                        timeout=180.0
+                        EvidenceFeaturesExtractor().arun(
+                            [EvidenceImage(url=evidence.ai_image_url, evidence_type=card_type)]
+                        ),
+                        timeout=card_feature_timeout
                     )
-                    
-                    if features_response.content is None:
-                        logger.warning("Agent特征提取结果为空")
-                    else:
-                        evidence_features_results = cast(EvidenceExtractionResults, features_response.content)
-                        if evidence_features_results.results:
-                            for result in evidence_features_results.results:
-                                normalized_result_url = unquote(result.image_url)
-                                evidence_id = url_to_evidence_id.get(normalized_result_url) or url_to_evidence_id.get(result.image_url)
-                                
-                                if evidence_id is None:
-                                    logger.warning(f"无法找到对应的证据ID，image_url: {result.image_url}")
-                                    continue
-                                
-                                card = evidence_id_to_card.get(evidence_id)
-                                if card and card.card_info:
-                                    if "card_features" not in card.card_info:
-                                        card.card_info["card_features"] = []
-                                    
-                                    # 将 slot_extraction 转换为 card_features 格式
-                                    for item in result.slot_extraction:
-                                        if hasattr(item, 'model_dump'):
-                                            slot_dict = item.model_dump()
-                                        else:
-                                            slot_dict = {
-                                                "slot_name": item.slot_name,
-                                                "slot_value_type": item.slot_value_type,
-                                                "slot_value": item.slot_value,
-                                                "confidence": item.confidence,
-                                                "reasoning": item.reasoning,
-                                            }
-                                        
-                                        card.card_info["card_features"].append({
-                                            "slot_name": slot_dict["slot_name"],
-                                            "slot_value_type": slot_dict.get("slot_value_type", "string"),
-                                            "slot_value": slot_dict["slot_value"],
-                                            "confidence": slot_dict.get("confidence", 0.0),
-                                            "reasoning": slot_dict.get("reasoning", ""),
-                                            "slot_group_info": None  # 单个证据提取，没有关联信息
-                                        })
-                        else:
-                            logger.warning("Agent特征提取结果列表为空")
+            except asyncio.TimeoutError:
+                logger.warning(f"Agent特征提取超时，evidence_id: {evidence_id}, timeout={card_feature_timeout}s")
+                if raise_on_extraction_error:
+                    raise
+                return
             except Exception as e:
-                logger.error(f"Agent特征提取失败: {str(e)}")
+                logger.error(f"Agent特征提取失败，evidence_id: {evidence_id}, 错误: {str(e)}")
+                if raise_on_extraction_error:
+                    raise
+                return
+
+            if features_response.content is None:
+                logger.warning(f"Agent特征提取结果为空，evidence_id: {evidence_id}")
+                return
+            evidence_features_results = cast(EvidenceExtractionResults, features_response.content)
+            card_features = card.card_info.setdefault("card_features", [])
+            for result in evidence_features_results.results:
+                # 每次调用只发送一张图片，结果 URL 已由图片编号还原
+                if result.image_url != evidence.ai_image_url:
+                    logger.warning(f"无法找到对应的证据ID，image_url: {result.image_url}")
+                    continue
+                # 将 slot_extraction 转换为 card_features 格式
+                for item in result.slot_extraction:
+                    card_features.append({
+                        "slot_name": item.slot_name,
+                        "slot_value_type": item.slot_value_type,
+                        "slot_value": item.slot_value,
+                        "confidence": item.confidence,
+                        "reasoning": item.reasoning,
+                        "slot_group_info": None  # 单个证据提取，没有关联信息
+                    })
+
+        single_card_jobs = [
+            extract_ocr_card(card) for card in ocr_cards if card.card_info
+        ] + [
+            extract_agent_card(card) for card in agent_cards if card.card_info
+        ]
+        single_cards_task = asyncio.ensure_future(asyncio.gather(*single_card_jobs)) if single_card_jobs else None
+
+        async def cancel_single_cards():
+            """关联提取失败退出前取消仍在运行的 OCR / Agent 卡片提取，避免其继续占用并发名额、写入卡片数据"""
+            if single_cards_task is not None:
+                single_cards_task.cancel()
+                await asyncio.gather(single_cards_task, return_exceptions=True)
         
         # Step3.3: 关联特征提取（多个证据，如微信聊天记录）
         if association_cards:
@@ -2045,22 +2298,19 @@ async def evidence_card_casting(
                         for evidence_id in card.evidence_ids:
                             evidence = evidence_map.get(evidence_id)
                             if evidence:
-                                all_association_urls.append(evidence.file_url)
-                                # 记录URL到evidence_id的映射（支持原始URL和归一化URL）
-                                association_url_to_evidence_id[evidence.file_url] = evidence_id
-                                normalized_url = unquote(evidence.file_url)
-                                if normalized_url != evidence.file_url:
-                                    association_url_to_evidence_id[normalized_url] = evidence_id
+                                all_association_urls.append(evidence.ai_image_url)
+                                association_url_to_evidence_id[evidence.ai_image_url] = evidence_id
                 
                 if all_association_urls:
                     logger.info(f"批次关联特征提取：共 {len(all_association_urls)} 个微信聊天记录证据")
                     
                     # 批次调用关联特征提取器（一次性处理所有微信聊天记录）
                     association_extractor = AssociationFeaturesExtractor()
-                    association_response = await asyncio.wait_for(
-                        association_extractor.arun(all_association_urls),
-                        timeout=300.0  # 关联提取可能需要更长时间
-                    )
+                    async with association_semaphore:
+                        association_response = await asyncio.wait_for(
+                            association_extractor.arun(all_association_urls),
+                            timeout=settings.EVIDENCE_ASSOCIATION_TIMEOUT
+                        )
                     
                     # 检查返回类型并提取内容
                     # 注意：arun 实际上返回 RunResponse（从 self.agent.arun），而不是直接返回 AssociationFeaturesExtractionResults
@@ -2086,9 +2336,8 @@ async def evidence_card_casting(
                                     # 提取该分组涉及的证据ID
                                     reference_evidence_ids = []
                                     for img_seq in result_item.image_sequence_info:
-                                        # 根据 URL 找到对应的 evidence_id
-                                        normalized_url = unquote(img_seq.url)
-                                        evidence_id = association_url_to_evidence_id.get(normalized_url) or association_url_to_evidence_id.get(img_seq.url)
+                                        # 根据还原后的 URL 找到对应的 evidence_id
+                                        evidence_id = association_url_to_evidence_id.get(img_seq.url)
                                         if evidence_id:
                                             reference_evidence_ids.append(evidence_id)
                                     
@@ -2219,9 +2468,19 @@ async def evidence_card_casting(
                         logger.warning(f"关联特征提取返回了未知类型: {type(association_response)}")
                 else:
                     logger.warning("没有找到需要关联提取的证据URL")
+            except asyncio.CancelledError:
+                await cancel_single_cards()
+                raise
             except Exception as e:
                 logger.error(f"关联特征提取失败: {str(e)}")
+                if raise_on_extraction_error:
+                    await cancel_single_cards()
+                    raise
                 # 关联提取失败不影响卡片的创建
+
+        # 等待 OCR / Agent 卡片全部完成（各卡片已自行处理失败和超时）
+        if single_cards_task is not None:
+            await single_cards_task
     
     # Step4: 按 slot_group_name 重新组织卡片数据
     # 如果有 slot_group_name，则按 slot_group_name 分组，每个分组生成一张卡片
@@ -2356,6 +2615,19 @@ async def evidence_card_casting(
                         logger.info(f"为卡片添加缺失的 slot_name: {slot_name}")
     
     # Step6: 证据卡片批量创建（使用 update_or_create 方法）
+    # 每张卡片提交后立即序列化返回数据：后续卡片失败回滚时会使会话中的对象过期，
+    # 之后再读取已提交卡片的属性会触发重新加载
+    def card_result(card: EvidenceCard) -> Dict[str, Any]:
+        # 直接使用evidence_ids字段，不需要加载关系
+        return {
+            "id": card.id,
+            "evidence_ids": card.evidence_ids or [],
+            "card_info": card.card_info,
+            "updated_times": card.updated_times,
+            "created_at": card.created_at.isoformat() if card.created_at else None,
+            "updated_at": card.updated_at.isoformat() if card.updated_at else None,
+        }
+
     created_cards = []
     for card in final_card_data:
         try:
@@ -2387,6 +2659,8 @@ async def evidence_card_casting(
                 if existing_card:
                     # 更新卡片的 evidence_ids 和 card_info
                     existing_card.evidence_ids = card.evidence_ids
+                    await existing_card.sync_members(db)
+                    await refresh_card_integrity(db, [existing_card])
                     # 确保 card_info 被正确更新（使用深拷贝避免引用问题）
                     import copy
                     from sqlalchemy.orm.attributes import flag_modified
@@ -2407,7 +2681,7 @@ async def evidence_card_casting(
                     saved_card_type = existing_card.card_info.get('card_type') if existing_card.card_info else None
                     logger.info(f"重铸卡片 #{card_id}，保存后的 card_type: {saved_card_type}")
                     
-                    created_cards.append(existing_card)
+                    created_cards.append(card_result(existing_card))
                     logger.info(f"重铸卡片 #{card_id}，更新 evidence_ids: {card.evidence_ids}, card_type: {final_card_type}")
                 else:
                     logger.error(f"重铸失败：找不到卡片 #{card_id}")
@@ -2419,25 +2693,58 @@ async def evidence_card_casting(
                     evidence_ids=card.evidence_ids,
                     card_info=card.card_info
                 )
-                created_cards.append(created_card)
+                created_cards.append(card_result(created_card))
         except Exception as e:
             logger.error(f"创建卡片失败，evidence_ids: {card.evidence_ids}, 错误: {str(e)}")
+            # 每张卡片独立提交，回滚失败卡片的未提交修改，不影响后续卡片
+            await db.rollback()
             continue
     
-    # 返回创建的卡片数据
-    # 直接使用evidence_ids字段，不需要加载关系
-    result_cards = []
-    for card in created_cards:
-        result_cards.append({
-            "id": card.id,
-            "evidence_ids": card.evidence_ids or [],
-            "card_info": card.card_info,
-            "updated_times": card.updated_times,
-            "created_at": card.created_at.isoformat() if card.created_at else None,
-            "updated_at": card.updated_at.isoformat() if card.updated_at else None,
-        })
-    
-    return result_cards
+    return created_cards
+
+
+async def classify_casting_evidences(db: AsyncSession, evidence_ids: List[int]) -> Dict[int, str]:
+    """对待铸造的证据进行一次分类（分布式铸造的第一步）
+
+    Returns:
+        Dict[int, str]: evidence_id -> 证据类型，按输入顺序；非图片证据和分类失败的证据不包含在内
+    """
+    evidences = await get_multi_by_ids(db, evidence_ids)
+    filtered_evidences = [evidence for evidence in evidences if evidence.file_extension in CARD_CASTING_IMAGE_FORMATS]
+    if not filtered_evidences:
+        return {}
+
+    sharded_results = await classify_evidences_sharded(
+        [evidence.ai_image_url for evidence in filtered_evidences]
+    )
+    if not sharded_results.results and sharded_results.failed_image_urls:
+        raise ValueError("证据分类结果为空")
+    if sharded_results.failed_image_urls:
+        logger.warning(f"部分证据分类失败，将跳过这些证据的卡片铸造: {sharded_results.failed_image_urls}")
+
+    type_by_url = {result.image_url: result.evidence_type for result in sharded_results.results}
+    return {
+        evidence.id: type_by_url[evidence.ai_image_url]
+        for evidence in filtered_evidences
+        if evidence.ai_image_url in type_by_url
+    }
+
+
+def plan_card_casting_groups(classified_types: Dict[int, str]) -> List[List[int]]:
+    """将已分类的证据拆分为可独立铸造的证据组
+
+    关联类型（微信聊天记录）的证据需要一起提取才能识别分组，合并为一组；
+    其余证据每个单独一组。各组之间互不依赖，可以分发到不同 worker 并行铸造。
+    """
+    association_ids = [
+        evidence_id for evidence_id, card_type in classified_types.items()
+        if card_type in CARD_CASTING_ASSOCIATION_TYPES
+    ]
+    groups = [[evidence_id] for evidence_id, card_type in classified_types.items()
+              if card_type not in CARD_CASTING_ASSOCIATION_TYPES]
+    if association_ids:
+        groups.insert(0, association_ids)
+    return groups
 
 
 async def get_card_by_id(db: AsyncSession, card_id: int) -> Optional[EvidenceCard]:
@@ -2473,19 +2780,91 @@ async def check_evidence_is_minted(db: AsyncSession, evidence_id: int) -> bool:
     Returns:
         bool: True表示已铸造（有卡片在evidence_ids字段中包含该证据ID），False表示未铸造
     """
-    from app.evidences.models import EvidenceCard
-    from sqlalchemy import select
-    
-    # 使用JSONB的@>操作符检查数组是否包含该证据ID
+    # 卡片成员索引按 evidence_id 建有索引
     result = await db.execute(
-        select(EvidenceCard.id)
-        .where(EvidenceCard.evidence_ids.contains([evidence_id]))
+        select(EvidenceCardMember.card_id)
+        .where(EvidenceCardMember.evidence_id == evidence_id)
         .limit(1)
     )
     
     return result.scalar_one_or_none() is not None
 
 
+def card_integrity(card: EvidenceCard) -> tuple[List[int], bool, List[int]]:
+    """根据卡片的物化异常信息返回完整性（不查询数据库）
+    
+    Returns:
+        tuple[List[int], bool, List[int]]: 
+            - 证据ID列表（过滤掉已删除的证据，保持原有顺序）
+            - 是否存在异常关联（有证据被删除）
+            - 异常关联的索引列表（在evidence_ids中的位置）
+    """
+    abnormal_indices = list(card.abnormal_indices or [])
+    abnormal = set(abnormal_indices)
+    evidence_ids = [
+        evidence_id for idx, evidence_id in enumerate(card.evidence_ids or []) if idx not in abnormal
+    ]
+    return evidence_ids, bool(abnormal_indices), abnormal_indices
+
+
+async def find_dangling_card_members(db: AsyncSession, card_ids: List[int]) -> Dict[int, List[int]]:
+    """查找卡片中引用了已删除证据的位置（成员索引左连接证据表）
+
+    Returns:
+        Dict[int, List[int]]: card_id -> 已删除证据在 evidence_ids 中的位置（升序），无悬空引用的卡片不包含在内
+    """
+    if not card_ids:
+        return {}
+    result = await db.execute(
+        select(EvidenceCardMember.card_id, EvidenceCardMember.position)
+        .outerjoin(Evidence, Evidence.id == EvidenceCardMember.evidence_id)
+        .where(EvidenceCardMember.card_id.in_(card_ids), Evidence.id.is_(None))
+        .order_by(EvidenceCardMember.card_id, EvidenceCardMember.position)
+    )
+    dangling: Dict[int, List[int]] = {}
+    for card_id, position in result.all():
+        dangling.setdefault(card_id, []).append(position)
+    return dangling
+
+
+async def refresh_card_integrity(db: AsyncSession, cards: List[EvidenceCard]) -> None:
+    """重新计算一批卡片的异常信息（一次查询），在同步成员索引（sync_members）后调用，由调用方提交"""
+    dangling = await find_dangling_card_members(db, [card.id for card in cards])
+    for card in cards:
+        card.abnormal_indices = dangling.get(card.id, [])
+        card.is_normal = not card.abnormal_indices
+
+
+async def mark_cards_for_deleted_evidences(db: AsyncSession, evidence_ids: List[int]) -> int:
+    """证据删除后更新引用这些证据的卡片的异常信息（与删除同一事务，由调用方提交）
+    
+    Returns:
+        int: 更新的卡片数量
+    """
+    from sqlalchemy import update
+    
+    if not evidence_ids:
+        return 0
+    # 通过卡片成员索引找到引用这些证据的卡片及其位置
+    result = await db.execute(
+        select(EvidenceCardMember.card_id, EvidenceCardMember.position, EvidenceCard.abnormal_indices)
+        .join(EvidenceCard, EvidenceCard.id == EvidenceCardMember.card_id)
+        .where(EvidenceCardMember.evidence_id.in_(set(evidence_ids)))
+    )
+    card_indices: Dict[int, set] = {}
+    for card_id, position, abnormal_indices in result.all():
+        indices = card_indices.setdefault(card_id, set(abnormal_indices or []))
+        indices.add(position)
+    updates = [
+        {"id": card_id, "abnormal_indices": sorted(indices), "is_normal": not indices}
+        for card_id, indices in card_indices.items()
+    ]
+    if updates:
+        # 按主键批量更新（executemany）
+        await db.execute(update(EvidenceCard), updates)
+    return len(updates)
+
+
 async def get_card_evidence_ids_sorted(db: AsyncSession, card_id: int) -> tuple[List[int], bool, List[int]]:
     """获取卡片关联的证据ID列表（按顺序返回），同时返回异常信息
     
@@ -2499,45 +2878,17 @@ async def get_card_evidence_ids_sorted(db: AsyncSession, card_id: int) -> tuple[
             - 是否存在异常关联（有证据被删除）
             - 异常关联的索引列表（在evidence_ids中的位置）
     """
-    from app.evidences.models import EvidenceCard, Evidence
-    from sqlalchemy import select
-    
-    # 获取卡片
-    result = await db.execute(
-        select(EvidenceCard).where(EvidenceCard.id == card_id)
-    )
-    card = result.scalar_one_or_none()
-    
+    card = await db.get(EvidenceCard, card_id)
     if not card or not card.evidence_ids:
         return [], False, []
-    
-    # 检查每个evidence_id是否存在
-    evidence_ids_result = await db.execute(
-        select(Evidence.id).where(Evidence.id.in_(card.evidence_ids))
-    )
-    existing_evidence_ids = set(evidence_ids_result.scalars().all())
-    
-    # 过滤掉不存在的证据，保持原有顺序
-    evidence_ids = []
-    abnormal_indices = []
-    
-    for idx, evidence_id in enumerate(card.evidence_ids):
-        if evidence_id in existing_evidence_ids:
-            evidence_ids.append(evidence_id)
-        else:
-            # 证据不存在，记录索引
-            abnormal_indices.append(idx)
-    
-    has_abnormal = len(abnormal_indices) > 0
-    return evidence_ids, has_abnormal, abnormal_indices
+    return card_integrity(card)
 
 
-async def card_to_response(card: EvidenceCard, db: AsyncSession) -> Any:
-    """将 EvidenceCard 转换为 EvidenceCardResponse
+def card_to_response(card: EvidenceCard) -> Any:
+    """将 EvidenceCard 转换为 EvidenceCardResponse（完整性已物化在卡片上，无需查询数据库）
     
     Args:
         card: 卡片实例
-        db: 数据库会话（用于检查证据是否存在）
         
     Returns:
         EvidenceCardResponse: 响应模型
@@ -2548,7 +2899,7 @@ async def card_to_response(card: EvidenceCard, db: AsyncSession) -> Any:
     all_evidence_ids = card.evidence_ids or []
     
     # 获取存在的证据ID列表，以及异常信息
-    evidence_ids, has_abnormal, abnormal_indices = await get_card_evidence_ids_sorted(db, card.id)
+    evidence_ids, has_abnormal, abnormal_indices = card_integrity(card)
     
     # has_abnormal为True表示有异常，is_normal应该为False（反转逻辑）
     is_normal = not has_abnormal
@@ -2717,9 +3068,12 @@ async def update_card(
         sorted_refs = sorted(update_request.referenced_evidences, key=lambda x: x.sequence_number)
         evidence_ids_ordered = [ref.evidence_id for ref in sorted_refs]
         
-        # 直接更新evidence_ids字段
+        # 直接更新evidence_ids字段（上面已验证所有证据存在）
         card.evidence_ids = evidence_ids_ordered
         flag_modified(card, 'evidence_ids')
+        await card.sync_members(db)
+        card.abnormal_indices = []
+        card.is_normal = True
     
     # 更新时间戳和更新次数
     shanghai_tz = pytz.timezone('Asia/Shanghai')
@@ -2748,12 +3102,8 @@ async def get_cards_with_evidence_ids_sorted(
         List[tuple[EvidenceCard, List[int], bool, List[int]]]: 
             卡片及其按序号排序的证据ID列表、是否存在异常关联、异常序号列表
     """
-    result = []
-    for card in cards:
-        evidence_ids, has_abnormal, abnormal_sequence_numbers = await get_card_evidence_ids_sorted(db, card.id)
-        result.append((card, evidence_ids, has_abnormal, abnormal_sequence_numbers))
-    
-    return result
+    # 完整性已物化在卡片上，无需逐个查询
+    return [(card, *card_integrity(card)) for card in cards]
 
 
 async def get_cards_with_count(
@@ -2926,52 +3276,18 @@ demo_cards_data = [
 ]
 
 
-async def get_evidence_card_slot_templates(db: AsyncSession, case_id: int) -> EvidenceCardSlotTemplatesResponse:
-    """获取案件的证据卡槽模板
-    
-    Args:
-        db: 数据库会话
-        case_id: 案件ID
-        
-    Returns:
-        EvidenceCardSlotTemplatesResponse: 证据卡槽模板响应
-    """
-    # 获取案件信息
-    result = await db.execute(
-        select(Case)
-        .options(joinedload(Case.case_parties))
-        .where(Case.id == case_id)
-    )
-    case = result.unique().scalar_one_or_none()
-    
-    if not case:
-        raise ValueError(f"案件不存在: {case_id}")
-    
-    # 获取案由
-    case_cause = None
-    if case.case_type:
-        case_cause = case.case_type.value  # "contract" 或 "debt"
-    
-    # 获取债权人和债务人类型
-    creditor_type = None
-    debtor_type = None
-    if case.case_parties:
-        for party in case.case_parties:
-            if party.party_role == "creditor":
-                creditor_type = party.party_type  # "person", "company", "individual"
-            elif party.party_role == "debtor":
-                debtor_type = party.party_type
-    
-    # 加载证据卡槽配置
-    config = config_manager.load_evidence_card_slots_config()
-    
-    # 类型映射（数据库枚举值到配置值）
-    type_mapping = {
-        'person': 'person',
-        'company': 'company',
-        'individual': 'individual'
-    }
-    
+# 已解析的卡槽模板缓存：(配置对象, {(案由, 债权人类型, 债务人类型): 解析结果})
+# 模板只取决于这三个案件属性和配置本身，配置重新加载后对象会变化，缓存随之清空
+_card_slot_templates_cache: Optional[Tuple[Any, Dict[Tuple[Optional[str], Optional[str], Optional[str]], Dict[str, Any]]]] = None
+
+
+def _build_evidence_card_slot_templates(
+    config: Any,
+    case_cause: Optional[str],
+    creditor_type: Optional[str],
+    debtor_type: Optional[str],
+) -> Dict[str, Any]:
+    """根据案由和债权人、债务人类型解析卡槽模板（不依赖具体案件）"""
     # 筛选适用的场景规则
     applicable_rules = []
     if case_cause:
@@ -2979,16 +3295,6 @@ async def get_evidence_card_slot_templates(db: AsyncSession, case_id: int) -> Ev
             if rule.get('case_cause') == case_cause:
                 applicable_rules.append(rule)
     
-    # 如果没有适用的规则，返回空列表
-    if not applicable_rules:
-        return EvidenceCardSlotTemplatesResponse(
-            case_id=case_id,
-            case_cause=config.case_causes.get(case_cause) if case_cause else None,
-            creditor_type=config.party_types.get(creditor_type) if creditor_type else None,
-            debtor_type=config.party_types.get(debtor_type) if debtor_type else None,
-            templates=[]
-        )
-    
     # 生成模板列表
     templates = []
     for rule in applicable_rules:
@@ -3097,13 +3403,72 @@ async def get_evidence_card_slot_templates(db: AsyncSession, case_id: int) -> Ev
             required_card_types=required_card_types
         ))
     
-    return EvidenceCardSlotTemplatesResponse(
-        case_id=case_id,
-        case_cause=config.case_causes.get(case_cause) if case_cause else None,
-        creditor_type=config.party_types.get(creditor_type) if creditor_type else None,
-        debtor_type=config.party_types.get(debtor_type) if debtor_type else None,
-        templates=templates
+    return {
+        "case_cause": config.case_causes.get(case_cause) if case_cause else None,
+        "creditor_type": config.party_types.get(creditor_type) if creditor_type else None,
+        "debtor_type": config.party_types.get(debtor_type) if debtor_type else None,
+        "templates": templates,
+    }
+
+
+def resolve_evidence_card_slot_templates(
+    case_cause: Optional[str],
+    creditor_type: Optional[str],
+    debtor_type: Optional[str],
+) -> Dict[str, Any]:
+    """按 (案由, 债权人类型, 债务人类型, 配置版本) 缓存的卡槽模板解析结果
+
+    返回的模板对象在请求之间共享，调用方不应修改。
+    """
+    global _card_slot_templates_cache
+    config = config_manager.load_evidence_card_slots_config()
+    if _card_slot_templates_cache is None or _card_slot_templates_cache[0] is not config:
+        _card_slot_templates_cache = (config, {})
+    resolved = _card_slot_templates_cache[1]
+    key = (case_cause, creditor_type, debtor_type)
+    if key not in resolved:
+        resolved[key] = _build_evidence_card_slot_templates(config, case_cause, creditor_type, debtor_type)
+    return resolved[key]
+
+
+async def get_evidence_card_slot_templates(db: AsyncSession, case_id: int) -> EvidenceCardSlotTemplatesResponse:
+    """获取案件的证据卡槽模板
+    
+    只查询案由和当事人角色/类型，模板按这些属性缓存。
+    
+    Args:
+        db: 数据库会话
+        case_id: 案件ID
+        
+    Returns:
+        EvidenceCardSlotTemplatesResponse: 证据卡槽模板响应
+    """
+    result = await db.execute(
+        select(Case.case_type, CaseParty.party_role, CaseParty.party_type)
+        .outerjoin(CaseParty, CaseParty.case_id == Case.id)
+        .where(Case.id == case_id)
+        .order_by(CaseParty.id)
     )
+    rows = result.all()
+    
+    if not rows:
+        raise ValueError(f"案件不存在: {case_id}")
+    
+    # 获取案由
+    case_type = rows[0][0]
+    case_cause = case_type.value if case_type else None  # "contract" 或 "debt"
+    
+    # 获取债权人和债务人类型（同一角色有多个当事人时以最后一个为准）
+    creditor_type = None
+    debtor_type = None
+    for _, party_role, party_type in rows:
+        if party_role == "creditor":
+            creditor_type = party_type  # "person", "company", "individual"
+        elif party_role == "debtor":
+            debtor_type = party_type
+    
+    resolved = resolve_evidence_card_slot_templates(case_cause, creditor_type, debtor_type)
+    return EvidenceCardSlotTemplatesResponse(case_id=case_id, **resolved)
 
 
 # ==================== 槽位关联快照相关函数 ====================
@@ -3112,6 +3477,7 @@ async def get_slot_assignment_snapshot(
     db: AsyncSession,
     case_id: int,
     template_id: str,
+    include_proofread: bool = True,
 ) -> Dict[str, Any]:
     """
     获取某个案件、某个模板的槽位快照（包含校对结果）
@@ -3122,20 +3488,23 @@ async def get_slot_assignment_snapshot(
         db: 数据库会话
         case_id: 案件ID
         template_id: 模板ID
+        include_proofread: 是否附带校对结果（批量校对，共享案件、卡片和校对规则）
         
     Returns:
         Dict包含:
             - assignments: Dict[str, Optional[int]] - 槽位ID到卡片ID的映射（已过滤异常卡片）
             - proofread_results: Dict[str, List[SlotProofreadResult]] - 校对结果：{slotId: [校对结果列表]}
+            - slot_consistency: Dict[str, bool] - 槽位整体一致性
+            - version: int - 快照版本号（批量更新时作为 expected_version 提交）
     """
-    from sqlalchemy import select
-    
-    # 获取槽位关联
+    # 获取槽位关联，一次加载所有关联的卡片
     assignments = await EvidenceCardSlotAssignment.get_snapshot(db, case_id, template_id)
+    cards = await _load_cards_by_ids(db, [card_id for card_id in assignments.values() if card_id is not None])
     
     # 检查并清理异常卡片所在的槽位关联
     slots_to_cleanup: List[str] = []
     cleaned_assignments: Dict[str, Optional[int]] = {}
+    slot_cards: Dict[str, EvidenceCard] = {}
     
     for slot_id, card_id in assignments.items():
         if card_id is None:
@@ -3143,79 +3512,59 @@ async def get_slot_assignment_snapshot(
             cleaned_assignments[slot_id] = None
             continue
         
-        # 检查卡片是否存在且正常
-        try:
-            # 查询卡片
-            result = await db.execute(
-                select(EvidenceCard).where(EvidenceCard.id == card_id)
-            )
-            card = result.scalar_one_or_none()
-            
-            if card is None:
-                # 卡片不存在，标记为需要清理
-                logger.warning(f"槽位 {slot_id} 关联的卡片 {card_id} 不存在，将自动清理")
-                slots_to_cleanup.append(slot_id)
-                continue
-            
-            # 检查卡片是否异常
-            evidence_ids, has_abnormal, abnormal_indices = await get_card_evidence_ids_sorted(db, card_id)
-            is_normal = not has_abnormal
-            
-            if not is_normal:
-                # 卡片异常，标记为需要清理
-                logger.warning(f"槽位 {slot_id} 关联的卡片 {card_id} 异常（is_normal=False），将自动清理")
-                slots_to_cleanup.append(slot_id)
-                continue
-            
-            # 卡片正常，保留关联
-            cleaned_assignments[slot_id] = card_id
-            
-        except Exception as e:
-            logger.error(f"检查槽位 {slot_id} 关联的卡片 {card_id} 时出错: {e}")
-            # 检查失败时，为了安全起见，也标记为需要清理
+        card = cards.get(card_id)
+        if card is None:
+            # 卡片不存在，标记为需要清理
+            logger.warning(f"槽位 {slot_id} 关联的卡片 {card_id} 不存在，将自动清理")
+            slots_to_cleanup.append(slot_id)
+            continue
+        
+        # 检查卡片是否异常（使用卡片上物化的完整性信息）
+        _, has_abnormal, _ = card_integrity(card)
+        if has_abnormal:
+            # 卡片异常，标记为需要清理
+            logger.warning(f"槽位 {slot_id} 关联的卡片 {card_id} 异常（is_normal=False），将自动清理")
             slots_to_cleanup.append(slot_id)
+            continue
+        
+        # 卡片正常，保留关联
+        cleaned_assignments[slot_id] = card_id
+        slot_cards[slot_id] = card
     
-    # 批量清理异常卡片所在的槽位关联
+    # 批量清理异常卡片所在的槽位关联（一个事务，快照版本加一）
     if slots_to_cleanup:
         logger.info(f"自动清理 {len(slots_to_cleanup)} 个异常卡片所在的槽位关联: {slots_to_cleanup}")
-        for slot_id in slots_to_cleanup:
-            try:
-                await EvidenceCardSlotAssignment.update_assignment(
-                    db, case_id, template_id, slot_id, None
-                )
-            except Exception as e:
-                logger.error(f"清理槽位 {slot_id} 关联失败: {e}")
+        try:
+            version = await EvidenceCardSlotAssignment.bulk_update_assignments(
+                db, case_id, template_id, {slot_id: None for slot_id in slots_to_cleanup}
+            )
+        except Exception as e:
+            logger.error(f"清理槽位 {slots_to_cleanup} 关联失败: {e}")
+            await db.rollback()
+            version = await EvidenceCardSlotAssignment.get_version(db, case_id, template_id)
+    else:
+        version = await EvidenceCardSlotAssignment.get_version(db, case_id, template_id)
     
     # 为每个有卡片的槽位获取校对结果（只处理正常卡片）
     proofread_results: Dict[str, List[SlotProofreadResult]] = {}
     slot_consistency: Dict[str, bool] = {}
     
-    for slot_id, card_id in cleaned_assignments.items():
-        if card_id is not None:
-            try:
-                # 调用校对函数获取校对结果
-                proofread_response = await proofread_card_slot(
-                    db=db,
-                    case_id=case_id,
-                    template_id=template_id,
-                    slot_id=slot_id,
-                    card_id=card_id
-                )
-                # 将校对结果存入字典
-                proofread_results[slot_id] = proofread_response.proofread_results
-                # 保存整体一致性状态
-                slot_consistency[slot_id] = proofread_response.overall_consistency
-            except Exception as e:
-                logger.error(f"获取槽位 {slot_id} 的校对结果失败: {e}")
-                # 校对失败时，不添加校对结果（空列表表示无校对结果）
-                proofread_results[slot_id] = []
-                # 校对失败时，视为不一致
-                slot_consistency[slot_id] = False
+    if include_proofread and slot_cards:
+        case = await _load_case_with_parties(db, case_id)
+        results, errors = await _proofread_slot_cards(case, template_id, slot_cards)
+        for slot_id, proofread_response in results.items():
+            proofread_results[slot_id] = proofread_response.proofread_results
+            slot_consistency[slot_id] = proofread_response.overall_consistency
+        for slot_id in errors:
+            # 校对失败时，不添加校对结果（空列表表示无校对结果），并视为不一致
+            proofread_results[slot_id] = []
+            slot_consistency[slot_id] = False
     
     return {
         "assignments": cleaned_assignments,  # 返回清理后的关联（已过滤异常卡片）
         "proofread_results": proofread_results,
-        "slot_consistency": slot_consistency
+        "slot_consistency": slot_consistency,
+        "version": version,
     }
 
 
@@ -3244,52 +3593,113 @@ async def update_slot_assignment(
     )
 
 
-async def reset_slot_assignment_snapshot(
+async def bulk_update_slot_assignments(
     db: AsyncSession,
     case_id: int,
     template_id: str,
+    assignments: Dict[str, Optional[int]],
+    expected_version: Optional[int] = None,
 ) -> int:
     """
-    重置某个案件、某个模板的所有槽位关联（删除所有关联记录）
+    批量更新槽位关联（一次拖拽调整涉及的所有槽位在一个事务中写入）
     
     Args:
         db: 数据库会话
         case_id: 案件ID
         template_id: 模板ID
+        assignments: 变更的槽位ID到卡片ID的映射（None表示删除关联记录）
+        expected_version: 客户端读取快照时的版本号，None表示不做并发检查
         
     Returns:
-        int: 删除的记录数
+        int: 变更后的快照版本号
+        
+    Raises:
+        SlotSnapshotVersionConflict: 快照已被其他请求修改
     """
-    return await EvidenceCardSlotAssignment.reset_snapshot(db, case_id, template_id)
-
+    return await EvidenceCardSlotAssignment.bulk_update_assignments(
+        db, case_id, template_id, assignments, expected_version=expected_version
+    )
 
-# ==================== 卡槽校对相关函数 ====================
 
-async def proofread_card_slot(
+async def reset_slot_assignment_snapshot(
     db: AsyncSession,
     case_id: int,
     template_id: str,
-    slot_id: str,
-    card_id: int,
-) -> CardSlotProofreadResponse:
+) -> int:
     """
-    校对卡槽中的卡片
+    重置某个案件、某个模板的所有槽位关联（删除所有关联记录）
     
     Args:
         db: 数据库会话
         case_id: 案件ID
         template_id: 模板ID
-        slot_id: 槽位ID，格式：slot::{role}::{cardType}::{index}
-        card_id: 卡片ID
         
     Returns:
-        CardSlotProofreadResponse: 校对结果
+        int: 删除的记录数
     """
-    from app.agentic.agents.evidence_proofreader import EvidenceProofreader, ProofreadRule, ProofreadResult, EvidenceFeatureItem
-    from sqlalchemy.orm import joinedload
-    from sqlalchemy import select
-    
-    # 获取案件信息（包含当事人信息）
+    return await EvidenceCardSlotAssignment.reset_snapshot(db, case_id, template_id)
+
+
+# ==================== 卡槽校对相关函数 ====================
+
+# 字段名同义词映射表（用于处理不同来源的字段名差异）
+CARD_SLOT_NAME_ALIASES: Dict[str, List[str]] = {
+    '经营名称': ['公司名称', '经营名称', '名称', '企业名称', '个体工商户名称'],
+    '公司名称': ['公司名称', '企业名称', '名称', '经营名称'],
+    '住所地': ['住所地', '地址', '住址', '注册地址', '经营场所', '住所'],
+    '统一社会信用代码': ['统一社会信用代码', '社会信用代码', '信用代码', '统一代码'],
+    '法定代表人': ['法定代表人', '法人代表', '负责人', '法人'],
+    '经营者姓名': ['经营者姓名', '经营者', '姓名', '经营者名称'],
+    '经营类型': ['经营类型', '公司类型', '企业类型', '类型'],
+    # 身份证相关字段的同义词
+    '出生': ['出生', '出生日期', '生日', '出生年月日'],
+    '住址': ['住址', '地址', '住所地', '居住地址', '户籍地址'],
+    '公民身份号码': ['公民身份号码', '身份证号', '身份证号码', '身份证'],
+    '姓名': ['姓名', '名字', '真名', '名称'],
+    # 其他常见字段的同义词
+    '真名': ['真名', '姓名', '名字', '名称'],
+    '地址': ['地址', '住址', '住所地', '居住地址', '注册地址', '经营场所'],
+}
+
+# 预解析的卡槽校对规则缓存：(配置对象, {card_type: [(slot_name, 可能的字段名, 校对规则列表)]})
+# 配置重新加载后对象会变化，缓存随之失效
+_card_slot_rules_cache: Optional[Tuple[Any, Dict[str, List[Tuple[str, List[str], List[Any]]]]]] = None
+
+
+def get_compiled_card_slot_rules() -> Dict[str, List[Tuple[str, List[str], List[Any]]]]:
+    """获取按卡片类型预解析的卡槽校对规则（只包含有可用校对规则的槽位）"""
+    from app.agentic.agents.evidence_proofreader import ProofreadRule
+
+    global _card_slot_rules_cache
+    config = config_manager.load_evidence_card_slots_config()
+    if _card_slot_rules_cache is not None and _card_slot_rules_cache[0] is config:
+        return _card_slot_rules_cache[1]
+
+    compiled: Dict[str, List[Tuple[str, List[str], List[Any]]]] = {}
+    for template in config.evidence_card_templates:
+        card_type = template.get('card_type')
+        # 与逐个查找时一致：同一卡片类型以第一个模板为准
+        if card_type in compiled:
+            continue
+        slots = []
+        for slot_config in template.get('required_slots', []):
+            slot_name = slot_config.get('slot_name')
+            rules = []
+            for rule_data in slot_config.get('proofread_rules', []) or []:
+                try:
+                    rules.append(ProofreadRule(**rule_data))
+                except Exception as e:
+                    logger.error(f"解析校对规则失败: {e}")
+            if rules:
+                slots.append((slot_name, CARD_SLOT_NAME_ALIASES.get(slot_name, [slot_name]), rules))
+        compiled[card_type] = slots
+
+    _card_slot_rules_cache = (config, compiled)
+    return compiled
+
+
+async def _load_case_with_parties(db: AsyncSession, case_id: int) -> Case:
+    """获取案件信息（包含当事人信息），案件不存在时抛出 ValueError"""
     case_result = await db.execute(
         select(Case)
         .options(joinedload(Case.case_parties))
@@ -3298,15 +3708,28 @@ async def proofread_card_slot(
     case = case_result.unique().scalar_one_or_none()
     if not case:
         raise ValueError(f"案件不存在: {case_id}")
-    
-    # 获取卡片信息
-    card_result = await db.execute(
-        select(EvidenceCard).where(EvidenceCard.id == card_id)
-    )
-    card = card_result.scalar_one_or_none()
-    if not card:
-        raise ValueError(f"卡片不存在: {card_id}")
-    
+    return case
+
+
+async def _load_cards_by_ids(db: AsyncSession, card_ids: List[int]) -> Dict[int, EvidenceCard]:
+    """一次查询加载多张卡片"""
+    if not card_ids:
+        return {}
+    result = await db.execute(select(EvidenceCard).where(EvidenceCard.id.in_(set(card_ids))))
+    return {card.id: card for card in result.scalars().all()}
+
+
+async def _proofread_slot_card(
+    case: Case,
+    card: EvidenceCard,
+    template_id: str,
+    slot_id: str,
+    compiled_rules: Dict[str, List[Tuple[str, List[str], List[Any]]]],
+) -> CardSlotProofreadResponse:
+    """校对单个槽位中的卡片（案件、卡片和校对规则由调用方加载，批量校对时共享）"""
+    from app.agentic.agents.evidence_proofreader import EvidenceFeatureItem
+    from types import SimpleNamespace
+
     # 从slot_id中提取card_type信息
     # slot_id格式: slot::{role}::{cardType}::{index}
     slot_id_parts = slot_id.split('::')
@@ -3321,17 +3744,8 @@ async def proofread_card_slot(
     if actual_card_type != card_type:
         raise ValueError(f"卡片类型不匹配: 期望 {card_type}, 实际 {actual_card_type}")
     
-    # 加载证据卡槽配置
-    config = config_manager.load_evidence_card_slots_config()
-    
     # 查找对应的卡槽模板配置
-    card_template = None
-    for template in config.evidence_card_templates:
-        if template.get('card_type') == card_type:
-            card_template = template
-            break
-    
-    if not card_template:
+    if card_type not in compiled_rules:
         raise ValueError(f"未找到卡片类型 {card_type} 的配置")
     
     # 获取卡片的特征列表
@@ -3339,84 +3753,33 @@ async def proofread_card_slot(
     if not card_features:
         # 如果没有特征，返回空结果
         return CardSlotProofreadResponse(
-            case_id=case_id,
+            case_id=case.id,
             template_id=template_id,
             slot_id=slot_id,
-            card_id=card_id,
+            card_id=card.id,
             card_type=card_type,
             proofread_results=[],
             overall_consistency=True
         )
     
-    # 创建校对器实例
-    proofreader = EvidenceProofreader()
+    # 从slot_id中提取role信息，校对器只需要证据的 evidence_role 属性
+    slot_evidence = SimpleNamespace(evidence_role=slot_id_parts[1] if len(slot_id_parts) > 1 else None)
     
-    # 构建校对任务列表
     proofread_results = []
-    required_slots = card_template.get('required_slots', [])
-    
-    for slot_config in required_slots:
-        slot_name = slot_config.get('slot_name')
-        proofread_rules_config = slot_config.get('proofread_rules', [])
-        
-        # 如果没有校对规则，跳过
-        if not proofread_rules_config:
-            continue
-        
+    for slot_name, possible_names, rules in compiled_rules[card_type]:
         # 查找对应的卡片特征值（支持字段名同义词映射）
         slot_value = None
-        
-        # 字段名同义词映射表（用于处理不同来源的字段名差异）
-        slot_name_aliases = {
-            '经营名称': ['公司名称', '经营名称', '名称', '企业名称', '个体工商户名称'],
-            '公司名称': ['公司名称', '企业名称', '名称', '经营名称'],
-            '住所地': ['住所地', '地址', '住址', '注册地址', '经营场所', '住所'],
-            '统一社会信用代码': ['统一社会信用代码', '社会信用代码', '信用代码', '统一代码'],
-            '法定代表人': ['法定代表人', '法人代表', '负责人', '法人'],
-            '经营者姓名': ['经营者姓名', '经营者', '姓名', '经营者名称'],
-            '经营类型': ['经营类型', '公司类型', '企业类型', '类型'],
-            # 身份证相关字段的同义词
-            '出生': ['出生', '出生日期', '生日', '出生年月日'],
-            '住址': ['住址', '地址', '住所地', '居住地址', '户籍地址'],
-            '公民身份号码': ['公民身份号码', '身份证号', '身份证号码', '身份证'],
-            '姓名': ['姓名', '名字', '真名', '名称'],
-            # 其他常见字段的同义词
-            '真名': ['真名', '姓名', '名字', '名称'],
-            '地址': ['地址', '住址', '住所地', '居住地址', '注册地址', '经营场所'],
-        }
-        
-        # 获取目标字段名的所有可能别名
-        possible_names = slot_name_aliases.get(slot_name, [slot_name])
-        
-        # 查找匹配的字段（支持同义词匹配）
         for feature in card_features:
-            if isinstance(feature, dict):
-                feature_slot_name = feature.get('slot_name')
-                if feature_slot_name:
-                    # 检查是否匹配任何可能的别名
-                    if feature_slot_name in possible_names:
-                        slot_value = feature.get('slot_value')
-                        logger.info(f"[proofread_card_slot] 找到字段值: slot_name={slot_name}, feature_slot_name={feature_slot_name}, slot_value={slot_value}")
-                        break
+            if isinstance(feature, dict) and feature.get('slot_name') in possible_names:
+                slot_value = feature.get('slot_value')
+                logger.info(f"[proofread_card_slot] 找到字段值: slot_name={slot_name}, feature_slot_name={feature.get('slot_name')}, slot_value={slot_value}")
+                break
         
         # 如果没有找到值，记录日志并跳过
         if slot_value is None or slot_value == '':
             logger.warning(f"[proofread_card_slot] 未找到字段值: slot_name={slot_name}, possible_names={possible_names}, card_features={[f.get('slot_name') for f in card_features if isinstance(f, dict)]}")
             continue
         
-        # 解析校对规则
-        rules = []
-        for rule_data in proofread_rules_config:
-            try:
-                rule = ProofreadRule(**rule_data)
-                rules.append(rule)
-            except Exception as e:
-                logger.error(f"解析校对规则失败: {e}")
-                continue
-        
-        if not rules:
-            continue
-        
         # 创建特征项（模拟EvidenceFeatureItem，用于校对）
         feature_item = EvidenceFeatureItem(
             slot_name=slot_name,
@@ -3428,28 +3791,16 @@ async def proofread_card_slot(
             slot_required=True
         )
         
-        # 创建最小化的Evidence对象（用于校对器API）
-        # 从slot_id中提取role信息（格式：slot::{role}::{cardType}::{index}）
-        # slot_id_parts 已在前面定义
-        evidence_role = slot_id_parts[1] if len(slot_id_parts) > 1 else None
-        
-        # 创建最小化的Evidence对象
-        class MinimalEvidence:
-            def __init__(self, evidence_role):
-                self.evidence_role = evidence_role
-        
-        minimal_evidence = MinimalEvidence(evidence_role)
-        
         # 应用校对规则
         for rule in rules:
             try:
                 # 使用cast来绕过类型检查，因为校对器只需要evidence_role属性
-                result = await proofreader._apply_proofread_rule(
+                result = await evidence_proofreader._apply_proofread_rule(
                     slot_name=slot_name,
                     rule=rule,
                     evidence_features=[feature_item],
                     case=case,
-                    evidence=cast(Evidence, minimal_evidence)  # type: ignore
+                    evidence=cast(Evidence, slot_evidence)  # type: ignore
                 )
                 
                 if result:
@@ -3478,11 +3829,105 @@ async def proofread_card_slot(
     overall_consistency = all(r.is_consistent for r in proofread_results) if proofread_results else True
     
     return CardSlotProofreadResponse(
-        case_id=case_id,
+        case_id=case.id,
         template_id=template_id,
         slot_id=slot_id,
-        card_id=card_id,
+        card_id=card.id,
         card_type=card_type,
         proofread_results=proofread_results,
         overall_consistency=overall_consistency
-    )
\ No newline at end of file
+    )
+
+
+async def proofread_card_slot(
+    db: AsyncSession,
+    case_id: int,
+    template_id: str,
+    slot_id: str,
+    card_id: int,
+) -> CardSlotProofreadResponse:
+    """
+    校对卡槽中的卡片
+    
+    Args:
+        db: 数据库会话
+        case_id: 案件ID
+        template_id: 模板ID
+        slot_id: 槽位ID，格式：slot::{role}::{cardType}::{index}
+        card_id: 卡片ID
+        
+    Returns:
+        CardSlotProofreadResponse: 校对结果
+    """
+    case = await _load_case_with_parties(db, case_id)
+    
+    card = await db.get(EvidenceCard, card_id)
+    if not card:
+        raise ValueError(f"卡片不存在: {card_id}")
+    
+    return await _proofread_slot_card(case, card, template_id, slot_id, get_compiled_card_slot_rules())
+
+
+async def _proofread_slot_cards(
+    case: Case,
+    template_id: str,
+    slot_cards: Dict[str, EvidenceCard],
+) -> Tuple[Dict[str, CardSlotProofreadResponse], Dict[str, str]]:
+    """批量校对槽位中的卡片，共享已加载的案件、卡片和预解析的校对规则
+
+    Returns:
+        (槽位ID -> 校对结果, 槽位ID -> 校对失败原因)
+    """
+    compiled_rules = get_compiled_card_slot_rules()
+    results: Dict[str, CardSlotProofreadResponse] = {}
+    errors: Dict[str, str] = {}
+    for slot_id, card in slot_cards.items():
+        try:
+            results[slot_id] = await _proofread_slot_card(case, card, template_id, slot_id, compiled_rules)
+        except Exception as e:
+            logger.error(f"获取槽位 {slot_id} 的校对结果失败: {e}")
+            errors[slot_id] = str(e)
+    return results, errors
+
+
+async def proofread_card_slots(
+    db: AsyncSession,
+    case_id: int,
+    template_id: str,
+) -> CardSlotBatchProofreadResponse:
+    """
+    批量校对某个案件、某个模板快照中所有已放置卡片的槽位
+    
+    一次加载案件（含当事人）和全部卡片，校对规则按配置预解析，
+    替代前端逐个槽位调用 proofread_card_slot。
+    
+    Args:
+        db: 数据库会话
+        case_id: 案件ID
+        template_id: 模板ID
+        
+    Returns:
+        CardSlotBatchProofreadResponse: 各槽位的校对结果，以及校对失败的槽位
+    """
+    case = await _load_case_with_parties(db, case_id)
+    assignments = await EvidenceCardSlotAssignment.get_snapshot(db, case_id, template_id)
+    cards = await _load_cards_by_ids(db, [card_id for card_id in assignments.values() if card_id is not None])
+    
+    slot_cards: Dict[str, EvidenceCard] = {}
+    errors: Dict[str, str] = {}
+    for slot_id, card_id in assignments.items():
+        if card_id is None:
+            continue
+        if card_id in cards:
+            slot_cards[slot_id] = cards[card_id]
+        else:
+            errors[slot_id] = f"卡片不存在: {card_id}"
+    
+    results, proofread_errors = await _proofread_slot_cards(case, template_id, slot_cards)
+    errors.update(proofread_errors)
+    return CardSlotBatchProofreadResponse(
+        case_id=case_id,
+        template_id=template_id,
+        results=results,
+        errors=errors
+    )
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from datetime import datetime
 from typing import BinaryIO, Dict, List, Optional, Tuple, Union
@@ -87,21 +88,33 @@ class COSService:
                 object_key = unique_filename
             logger.debug(f"对象键: {object_key}")
     
-            # 读取文件内容
-            file_content = file.read()
-            file.seek(0)
-            
-            # 上传文件
+            # 上传文件（流式读取，不把整个文件读入内存）
             logger.debug(f"开始上传到COS: Bucket={self.bucket}, Key={object_key}, disposition={disposition}")
-            self.client.put_object(
-                Bucket=self.bucket,
-                Body=file_content,
-                Key=object_key,
-                StorageClass="MAZ_STANDARD",
-                EnableMD5=False,
-                ContentType=content_type,
-                ContentDisposition=disposition
-            )
+            if file_size >= settings.COS_MULTIPART_THRESHOLD_MB * 1024 * 1024:
+                # 大文件（音视频等）分块上传，内存占用受 MaxBufferSize 和线程数限制
+                logger.debug(f"使用分块上传: {object_key}, 分块大小={settings.COS_MULTIPART_PART_SIZE_MB}MB")
+                self.client.upload_file_from_buffer(
+                    Bucket=self.bucket,
+                    Key=object_key,
+                    Body=file,
+                    MaxBufferSize=settings.COS_MULTIPART_MAX_BUFFER_MB,
+                    PartSize=settings.COS_MULTIPART_PART_SIZE_MB,
+                    MAXThread=settings.COS_MULTIPART_THREADS,
+                    StorageClass="MAZ_STANDARD",
+                    ContentType=content_type,
+                    ContentDisposition=disposition
+                )
+            else:
+                self.client.put_object(
+                    Bucket=self.bucket,
+                    Body=file,
+                    Key=object_key,
+                    StorageClass="MAZ_STANDARD",
+                    EnableMD5=False,
+                    ContentType=content_type,
+                    ContentDisposition=disposition
+                )
+            file.seek(0)
             logger.debug(f"COS上传成功: {object_key}")
     
             # 返回文件URL
@@ -114,6 +127,30 @@ class COSService:
             logger.error(f"错误详情: {traceback.format_exc()}")
             raise
 
+    def upload_bytes(
+        self, content: bytes, object_key: str, content_type: str, disposition: str = 'inline'
+    ) -> str:
+        """按指定对象键上传二进制内容到COS（用于与原图同目录的衍生文件）
+
+        Args:
+            content: 文件内容
+            object_key: 对象键
+            content_type: 内容类型
+
+        Returns:
+            文件的URL
+        """
+        self.client.put_object(
+            Bucket=self.bucket,
+            Body=content,
+            Key=object_key,
+            StorageClass="MAZ_STANDARD",
+            EnableMD5=False,
+            ContentType=content_type,
+            ContentDisposition=disposition
+        )
+        return f"{settings.COS_BUCKET_SERVICE}/{object_key}"
+
     def delete_file(self, object_key: str) -> bool:
         """从COS删除文件
 
@@ -205,10 +242,11 @@ class COSService:
                 target_folder = folder if folder else file_folder
                 logger.debug(f"目标存储文件夹: {target_folder}")
                 
-                # 获取文件大小和内容
-                logger.debug(f"开始读取文件内容: {file.filename}")
-                file_content = await file.read()
-                file_size = len(file_content)
+                # 获取文件大小（不读取整个文件到内存）
+                file_obj = file.file
+                file_obj.seek(0, os.SEEK_END)
+                file_size = file_obj.tell()
+                file_obj.seek(0)
                 logger.debug(f"文件大小: {file_size} 字节")
                 
                 # 检查文件内容是否为空
@@ -217,14 +255,9 @@ class COSService:
                     failed.append(f"{file.filename}: 文件内容为空")
                     continue
                 
-                # 创建一个内存文件对象
-                import io
-                file_obj = io.BytesIO(file_content)
-                logger.debug(f"创建内存文件对象成功: {file.filename}")
-                
-                # 上传文件到COS
+                # 上传文件到COS（同步SDK调用放到线程池，大文件分块流式上传）
                 logger.debug(f"开始上传文件到COS: {file.filename}")
-                file_url = self.upload_file(file_obj, f"{target_folder}/{file.filename}")
+                file_url = await asyncio.to_thread(self.upload_file, file_obj, f"{target_folder}/{file.filename}")
                 logger.debug(f"文件上传成功: {file.filename}, URL: {file_url}")
                 
                 # 添加到成功列表
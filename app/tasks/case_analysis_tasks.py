@@ -18,7 +18,8 @@ def run_case_analysis_task(
     case_id: int,
     report_id: int,
     trigger_type: str = "manual",
-    ref_commit_ids: List[int] = None
+    ref_commit_ids: List[int] = None,
+    full_analysis: bool = False
 ):
     """
     Celery 任务：执行案件分析
@@ -28,6 +29,7 @@ def run_case_analysis_task(
         report_id: 预创建的报告ID（用于更新状态）
         trigger_type: 触发类型
         ref_commit_ids: 引用的 commit IDs
+        full_analysis: 是否强制全量分析
         
     Returns:
         分析结果
@@ -45,7 +47,8 @@ def run_case_analysis_task(
                 case_id=case_id,
                 report_id=report_id,
                 trigger_type=trigger_type,
-                ref_commit_ids=ref_commit_ids or []
+                ref_commit_ids=ref_commit_ids or [],
+                full_analysis=full_analysis
             )
         )
         return result
@@ -63,14 +66,16 @@ async def _execute_analysis(
     case_id: int,
     report_id: int,
     trigger_type: str,
-    ref_commit_ids: List[int]
+    ref_commit_ids: List[int],
+    full_analysis: bool = False
 ) -> dict:
     """
     执行分析的异步核心逻辑
     """
     from app.db.session import async_session_factory
-    from app.cases.services import get_by_id as get_case_by_id, get_commits_by_case_id
-    from app.cases.models import CaseAnalysisReport, AnalysisReportStatus
+    from app.cases.services import get_by_id as get_case_by_id, get_commits_by_case_id, get_latest_report_by_case_id
+    from app.cases.models import CaseAnalysisReport, AnalysisReportStatus, AnalysisTriggerType
+    from app.core.config import settings
     from app.agentic.agents.case_analysis_agent import run_case_analysis
     from sqlalchemy import select
     
@@ -135,12 +140,34 @@ async def _execute_analysis(
                 "id": c.id,
                 "statement": c.statement,
                 "materials": c.materials,
-                "created_at": c.created_at.isoformat() if c.created_at else None
+                "created_at": c.created_at.isoformat() if c.created_at else None,
+                "updated_at": c.updated_at.isoformat() if c.updated_at else None
             } for c in commits
         ]
         
         logger.info(f"[分析准备] 案件 #{case_id}: 获取到 {len(commits_data)} 条提交记录")
         
+        # 上一版已完成报告（增量分析只需发送它和新增的提交记录）。
+        # 提交记录被修改或删除时，上一版报告中的事实认定可能已失效，需要全量分析；
+        # 除触发类型外，分析时还会比较上一版引用的提交记录的修改时间与上一版的完成时间（见 select_new_commits），
+        # 覆盖修改提交记录后触发的分析失败或尚未完成时又新增提交记录的情况
+        previous_report = None
+        incremental_allowed = (
+            settings.CASE_ANALYSIS_INCREMENTAL_ENABLED
+            and not full_analysis
+            and trigger_type not in (AnalysisTriggerType.COMMIT_UPDATED, AnalysisTriggerType.COMMIT_REMOVED)
+        )
+        if incremental_allowed:
+            latest = await get_latest_report_by_case_id(db, case_id)
+            if latest and latest.id != report_id and latest.content and latest.completed_at:
+                previous_report = {
+                    "id": latest.id,
+                    "content": latest.content,
+                    "ref_commit_ids": latest.ref_commit_ids or [],
+                    "completed_at": latest.completed_at.isoformat(),
+                    "num_turns": (latest.run_stats or {}).get("num_turns")
+                }
+        
         # 4. 定义进度回调
         async def progress_callback(data: dict):
             progress = data.get('progress', 0)
@@ -172,12 +199,16 @@ async def _execute_analysis(
             'message': '正在调用 AI 进行案件分析...'
         })
         
+        run_stats = {}
         report_content = await run_case_analysis(
             case_id=case_id,
             case_info=case_info,
             commits=commits_data,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            previous_report=previous_report,
+            run_stats=run_stats
         )
+        logger.info(f"[分析统计] 案件 #{case_id}: {run_stats}")
         
         # 6. 更新报告内容
         task.update_state(state='PROCESSING', meta={
@@ -194,6 +225,9 @@ async def _execute_analysis(
             report.status = AnalysisReportStatus.COMPLETED
             report.completed_at = datetime.now()
             report.ref_commit_ids = [c.id for c in commits]  # 记录参与分析的所有 commits
+            report.analysis_mode = run_stats.get("mode")
+            report.base_report_id = previous_report["id"] if run_stats.get("mode") == "incremental" else None
+            report.run_stats = run_stats
             await db.commit()
         
         logger.info(f"[分析完成] 案件 #{case_id} 分析完成，报告ID: {report_id}")
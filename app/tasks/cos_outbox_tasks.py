@@ -0,0 +1,124 @@
+"""
+COS对象删除发件箱任务
+
+证据删除时，待删除的COS对象与业务删除写在同一事务中（cos_deletion_outbox），
+本任务在事务提交后批量删除这些对象：
+- 每次请求最多删除 COS_DELETION_BATCH_SIZE 个对象（COS 批量删除上限 1000）
+- 删除失败的记录按指数退避延后重试，超过 COS_DELETION_MAX_ATTEMPTS 后不再自动重试
+- 删除前再次确认对象没有被其他证据引用（内容去重后对象可能被新证据复用）
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pytz
+from loguru import logger
+from sqlalchemy import delete, or_, select
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.db.session import async_session_factory
+from app.evidences.models import CosDeletionOutbox, Evidence
+from app.integrations.cos import cos_service
+
+# 确保所有模型都被正确导入，避免 SQLAlchemy 关系解析问题
+from app.users.models import User  # noqa
+from app.staffs.models import Staff  # noqa
+from app.cases.models import Case  # noqa
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """第 attempts 次失败后的重试间隔：30秒起指数退避，最长1小时"""
+    return timedelta(seconds=min(30 * 2 ** max(attempts - 1, 0), 3600))
+
+
+async def _drain_once(batch_size: int) -> Dict[str, int]:
+    """处理一批到期的删除记录"""
+    async with async_session_factory() as db:
+        now = datetime.now(pytz.utc)
+        result = await db.execute(
+            select(CosDeletionOutbox)
+            .where(
+                CosDeletionOutbox.next_attempt_at <= now,
+                CosDeletionOutbox.attempts < settings.COS_DELETION_MAX_ATTEMPTS,
+            )
+            .order_by(CosDeletionOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = list(result.scalars().all())
+        if not rows:
+            return {"deleted": 0, "failed": 0, "skipped": 0}
+
+        # 仍被证据引用的对象不删除（去重复用后的共享文件）
+        urls = {f"{settings.COS_BUCKET_SERVICE}/{row.object_key}": row.object_key for row in rows}
+        referenced = await db.execute(
+            select(Evidence.file_url, Evidence.ai_file_url).where(
+                or_(Evidence.file_url.in_(urls), Evidence.ai_file_url.in_(urls))
+            )
+        )
+        referenced_keys = {urls[url] for pair in referenced.all() for url in pair if url in urls}
+
+        object_keys = list(dict.fromkeys(row.object_key for row in rows if row.object_key not in referenced_keys))
+        delete_result = cos_service.batch_delete_files(object_keys) if object_keys else {"successful": [], "failed": []}
+        deleted_keys = set(delete_result["successful"])
+        errors = {key: message for key in object_keys for message in delete_result["failed"] if message.startswith(f"{key}: ")}
+
+        done_ids: List[int] = []
+        stats = {"deleted": 0, "failed": 0, "skipped": 0}
+        for row in rows:
+            if row.object_key in referenced_keys:
+                stats["skipped"] += 1
+                done_ids.append(row.id)
+                continue
+            if row.object_key in deleted_keys:
+                stats["deleted"] += 1
+                done_ids.append(row.id)
+                continue
+            stats["failed"] += 1
+            row.attempts += 1
+            row.last_error = errors.get(row.object_key, "COS未返回删除结果")
+            row.next_attempt_at = now + retry_delay(row.attempts)
+
+        if done_ids:
+            await db.execute(delete(CosDeletionOutbox).where(CosDeletionOutbox.id.in_(done_ids)))
+        await db.commit()
+        return stats
+
+
+async def drain_cos_deletion_outbox(batch_size: Optional[int] = None, max_batches: int = 20) -> Dict[str, int]:
+    """清理删除发件箱，直到没有到期记录或达到批次上限"""
+    batch_size = min(batch_size or settings.COS_DELETION_BATCH_SIZE, 1000)
+    totals = {"deleted": 0, "failed": 0, "skipped": 0}
+    for _ in range(max_batches):
+        stats = await _drain_once(batch_size)
+        for key, value in stats.items():
+            totals[key] += value
+        # 本批全部失败或不足一批时停止，失败记录等待退避后重试
+        if sum(stats.values()) < batch_size or stats["failed"] == sum(stats.values()):
+            break
+    return totals
+
+
+@celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
+def drain_cos_deletion_outbox_task(self) -> Dict[str, Any]:
+    """批量删除发件箱中的COS对象"""
+    try:
+        totals = asyncio.run(drain_cos_deletion_outbox())
+    except Exception as e:
+        # 数据库或COS整体不可用，稍后重试整个任务
+        logger.error(f"COS删除发件箱处理失败: {str(e)}")
+        raise self.retry(exc=e)
+
+    if totals["deleted"] or totals["failed"]:
+        logger.info(f"COS删除发件箱处理完成: {totals}")
+    return totals
+
+
+# 定时兜底：事务提交后的即时触发失败、或失败记录到期后重试
+celery_app.conf.beat_schedule.update({
+    'cos-deletion-outbox-drain': {
+        'task': 'app.tasks.cos_outbox_tasks.drain_cos_deletion_outbox_task',
+        'schedule': settings.COS_DELETION_DRAIN_INTERVAL,
+    },
+})
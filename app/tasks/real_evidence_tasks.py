@@ -1,4 +1,5 @@
 from app.core.celery_app import celery_app
+from app.core.config import settings
 from loguru import logger
 import asyncio
 from typing import List, Optional, Dict, Any, Callable
@@ -10,6 +11,9 @@ from app.cases.models import Case
 from app.cases.services import auto_process as cases_auto_process
 from sqlalchemy import select
 from sqlalchemy.orm import joinedload
+from celery import chord
+from celery.exceptions import Ignore
+from celery.utils import uuid
 
 # 确保所有模型都被正确导入，避免 SQLAlchemy 关系解析问题
 from app.users.models import User  # 导入 User 模型
@@ -18,13 +22,16 @@ from app.cases.models import CaseParty  # 导入 CaseParty 模型
 
 
 
-@celery_app.task(bind=True)
+@celery_app.task(bind=True, max_retries=settings.EVIDENCE_PIPELINE_MAX_RETRIES)
 def analyze_evidences_task(self, case_id: int, evidence_ids: List[int], 
                           auto_classification: bool = True, 
                           auto_feature_extraction: bool = True) -> Dict[str, Any]:
     """
     真实的证据分析任务
     
+    以每个证据的 evidence_status 作为阶段检查点：失败重试或 worker 重启后重新投递
+    （task_acks_late=True）时，从检查点继续，已完成的分类/特征提取不会重复调用模型。
+
     Args:
         case_id: 案件ID
         evidence_ids: 证据ID列表
@@ -57,13 +64,17 @@ def analyze_evidences_task(self, case_id: int, evidence_ids: List[int],
         # 更新任务状态为开始
         update_progress("started", "开始证据分析任务", 0)
         
+        # 失败重试或 worker 重启后重新投递时，从检查点继续
+        resume = self.request.retries > 0 or bool((self.request.delivery_info or {}).get('redelivered'))
+
         # 运行异步任务
         result = asyncio.run(_analyze_evidences_async(
             case_id=case_id,
             evidence_ids=evidence_ids,
             auto_classification=auto_classification,
             auto_feature_extraction=auto_feature_extraction,
-            update_progress=update_progress
+            update_progress=update_progress,
+            resume=resume
         ))
         
         # 更新任务状态为完成
@@ -78,6 +89,12 @@ def analyze_evidences_task(self, case_id: int, evidence_ids: List[int],
         error_traceback = traceback.format_exc()
         logger.error(f"错误详情: {error_traceback}")
         
+        # 未超过重试次数时，从检查点继续重试
+        if self.request.retries < self.max_retries:
+            countdown = settings.EVIDENCE_PIPELINE_RETRY_BACKOFF * 2 ** self.request.retries
+            update_progress("retrying", f"证据分析失败，{countdown} 秒后从检查点继续: {str(e)}")
+            raise self.retry(exc=e, countdown=countdown)
+        
         # 更新任务状态为失败，确保异常信息可以被正确序列化
         self.update_state(
             state="FAILURE",
@@ -98,7 +115,8 @@ async def _analyze_evidences_async(
     evidence_ids: List[int],
     auto_classification: bool,
     auto_feature_extraction: bool,
-    update_progress: Callable
+    update_progress: Callable,
+    resume: bool = False
 ) -> Dict[str, Any]:
     """
     异步执行证据分析
@@ -109,6 +127,7 @@ async def _analyze_evidences_async(
         auto_classification: 是否自动分类
         auto_feature_extraction: 是否自动特征提取
         update_progress: 进度更新函数
+        resume: 是否从检查点继续（重试/重新投递时跳过已完成的阶段）
         
     Returns:
         dict: 分析结果
@@ -127,7 +146,7 @@ async def _analyze_evidences_async(
             # 验证证据是否存在 - 使用简单的查询避免关系解析
             update_progress("validating", "验证证据信息", 10)
             evidence_query = await db.execute(
-                select(Evidence.id, Evidence.file_name, Evidence.file_url, Evidence.evidence_status, 
+                select(Evidence.id, Evidence.file_name, Evidence.file_url, Evidence.ai_file_url, Evidence.evidence_status, 
                        Evidence.classification_category, Evidence.evidence_features, Evidence.evidence_role)
                 .where(
                     Evidence.id.in_(evidence_ids),
@@ -145,6 +164,7 @@ async def _analyze_evidences_async(
                 evidence.id = row.id
                 evidence.file_name = row.file_name
                 evidence.file_url = row.file_url
+                evidence.ai_file_url = row.ai_file_url
                 evidence.evidence_status = row.evidence_status
                 evidence.classification_category = row.classification_category
                 evidence.evidence_features = row.evidence_features
@@ -188,7 +208,8 @@ async def _analyze_evidences_async(
                 evidence_ids=evidence_ids,
                 auto_classification=auto_classification,
                 auto_feature_extraction=auto_feature_extraction,
-                send_progress=send_progress
+                send_progress=send_progress,
+                resume=resume
             )
             
             # 准备返回结果
@@ -447,6 +468,26 @@ def cast_evidence_cards_task(self, case_id: int, evidence_ids: List[int], card_i
             update_progress("started", f"开始重铸卡片 #{card_id}", 0)
         else:
             update_progress("started", "开始证据卡片铸造任务", 0)
+
+        # 正常铸造：分类一次后按证据组分发子任务（chord），由汇总任务以当前任务ID返回结果；
+        # 只有一个证据组时直接在当前任务中使用分类结果铸造
+        classified_types = None
+        if not card_id and not skip_classification and not target_card_type:
+            casting_plan = asyncio.run(_plan_card_casting_async(case_id, evidence_ids, update_progress))
+            if len(casting_plan["groups"]) > 1:
+                update_progress(
+                    "processing",
+                    f"已分发 {len(casting_plan['groups'])} 个卡片铸造子任务",
+                    CARD_CASTING_FANOUT_PROGRESS_START
+                )
+                raise self.replace(build_card_casting_chord(
+                    parent_task_id=self.request.id,
+                    case_id=case_id,
+                    evidence_ids=evidence_ids,
+                    groups=casting_plan["groups"],
+                    classified_types=casting_plan["classified_types"],
+                ))
+            classified_types = casting_plan["classified_types"]
         
         # 运行异步任务
         result = asyncio.run(_cast_evidence_cards_async(
@@ -455,7 +496,8 @@ def cast_evidence_cards_task(self, case_id: int, evidence_ids: List[int], card_i
             update_progress=update_progress,
             card_id=card_id,
             skip_classification=skip_classification,
-            target_card_type=target_card_type
+            target_card_type=target_card_type,
+            classified_types=classified_types
         ))
         
         # 更新任务状态为完成
@@ -466,7 +508,10 @@ def cast_evidence_cards_task(self, case_id: int, evidence_ids: List[int], card_i
         
         logger.info(f"证据卡片铸造任务完成: {result}")
         return result
-        
+
+    except Ignore:
+        # 已替换为分布式铸造的 chord，结果由汇总任务写入
+        raise
     except Exception as e:
         logger.error(f"证据卡片铸造任务失败: {str(e)}")
         import traceback
@@ -499,7 +544,8 @@ async def _cast_evidence_cards_async(
     update_progress: Callable,
     card_id: Optional[int] = None,
     skip_classification: bool = False,
-    target_card_type: Optional[str] = None
+    target_card_type: Optional[str] = None,
+    classified_types: Optional[Dict[int, str]] = None
 ) -> Dict[str, Any]:
     """
     异步执行证据卡片铸造
@@ -508,6 +554,7 @@ async def _cast_evidence_cards_async(
         case_id: 案件ID
         evidence_ids: 证据ID列表
         update_progress: 进度更新函数
+        classified_types: 已完成的分类结果（提供时不再重复分类）
         
     Returns:
         dict: 铸造结果
@@ -552,7 +599,8 @@ async def _cast_evidence_cards_async(
                 evidence_ids=evidence_ids,
                 card_id=card_id,
                 skip_classification=skip_classification,
-                target_card_type=target_card_type
+                target_card_type=target_card_type,
+                classified_types=classified_types
             )
             
             # 静默过滤：如果没有有效的图片类型证据，cards_data 可能为空列表
@@ -583,19 +631,7 @@ async def _cast_evidence_cards_async(
                 "case_id": case_id,
                 "evidence_ids": evidence_ids,
                 "cards_count": len(cards_data),
-                "cards": [
-                    {
-                        "id": card["id"],
-                        "evidence_ids": card["evidence_ids"],
-                        "card_type": card["card_info"].get("card_type") if card.get("card_info") else None,
-                        "card_is_associated": card["card_info"].get("card_is_associated") if card.get("card_info") else False,
-                        "features_count": len(card["card_info"].get("card_features", [])) if card.get("card_info") else 0,
-                        "updated_times": card["updated_times"],
-                        "created_at": card["created_at"],
-                        "updated_at": card["updated_at"],
-                    }
-                    for card in cards_data
-                ],
+                "cards": [_summarize_cast_card(card) for card in cards_data],
                 "summary": {
                     "total_cards": len(cards_data),
                     "associated_cards": len([c for c in cards_data if c.get("card_info", {}).get("card_is_associated")]),
@@ -612,3 +648,194 @@ async def _cast_evidence_cards_async(
             error_traceback = traceback.format_exc()
             logger.error(f"异步证据卡片铸造错误详情: {error_traceback}")
             raise Exception(f"异步证据卡片铸造失败: {str(e)}")
+
+
+def _summarize_cast_card(card: Dict[str, Any]) -> Dict[str, Any]:
+    """铸造结果中单张卡片的摘要"""
+    return {
+        "id": card["id"],
+        "evidence_ids": card["evidence_ids"],
+        "card_type": card["card_info"].get("card_type") if card.get("card_info") else None,
+        "card_is_associated": card["card_info"].get("card_is_associated") if card.get("card_info") else False,
+        "features_count": len(card["card_info"].get("card_features", [])) if card.get("card_info") else 0,
+        "updated_times": card["updated_times"],
+        "created_at": card["created_at"],
+        "updated_at": card["updated_at"],
+    }
+
+
+# 分布式铸造的进度区间：分类完成后为起点，子任务全部完成时为终点
+CARD_CASTING_FANOUT_PROGRESS_START = 20
+CARD_CASTING_FANOUT_PROGRESS_END = 95
+# 已完成子任务计数器的过期时间（秒），汇总任务正常结束时会提前删除
+CARD_CASTING_PROGRESS_COUNTER_TTL = 24 * 3600
+
+
+async def _plan_card_casting_async(case_id: int, evidence_ids: List[int], update_progress: Callable) -> Dict[str, Any]:
+    """
+    分布式铸造的第一步：验证案件、对全部证据分类一次，并拆分为可独立铸造的证据组
+
+    Returns:
+        dict: classified_types（evidence_id -> 证据类型）和 groups（证据ID分组）
+    """
+    from app.evidences.services import classify_casting_evidences, plan_card_casting_groups
+
+    async with async_session_factory() as db:
+        update_progress("validating", "验证案件信息", 5)
+        case_query = await db.execute(select(Case.id).where(Case.id == case_id))
+        if not case_query.first():
+            raise ValueError(f"案件不存在: ID={case_id}")
+
+        update_progress("classifying", "证据分类中", 10)
+        classified_types = await classify_casting_evidences(db, evidence_ids)
+
+    groups = plan_card_casting_groups(classified_types)
+    logger.info(f"卡片铸造拆分为 {len(groups)} 个证据组: {groups}")
+    return {"classified_types": classified_types, "groups": groups}
+
+
+def build_card_casting_chord(
+    parent_task_id: str,
+    case_id: int,
+    evidence_ids: List[int],
+    groups: List[List[int]],
+    classified_types: Dict[int, str],
+):
+    """
+    构建分布式铸造的 chord：每个证据组一个子任务，全部完成后由汇总任务合并结果
+
+    子任务ID预先生成并传给每个子任务，子任务据此得知子任务总数、汇报合并进度。
+    """
+    subtask_ids = [uuid() for _ in groups]
+    header = [
+        cast_card_group_task.s(
+            case_id=case_id,
+            evidence_ids=group,
+            # JSON 序列化会把字典的整数键转为字符串，这里使用 [evidence_id, 类型] 列表传递
+            classified_types=[[evidence_id, classified_types[evidence_id]] for evidence_id in group],
+            parent_task_id=parent_task_id,
+            subtask_ids=subtask_ids,
+        ).set(task_id=subtask_id)
+        for group, subtask_id in zip(groups, subtask_ids)
+    ]
+    return chord(header, aggregate_card_casting_task.s(case_id=case_id, evidence_ids=evidence_ids))
+
+
+def _card_casting_progress_key(parent_task_id: str) -> str:
+    return f"card-casting-finished-{parent_task_id}"
+
+
+def _report_card_casting_progress(task, parent_task_id: str, subtask_ids: List[str]) -> None:
+    """子任务结束时更新父任务的合并进度（已结束的子任务数 / 子任务总数）
+
+    已结束的子任务数由结果后端（Redis）的原子计数器累加，每个子任务只需一次 INCR，
+    不再逐个查询兄弟子任务的状态。
+    """
+    try:
+        key = _card_casting_progress_key(parent_task_id)
+        # 子任务被重新投递时可能重复计数，不超过子任务总数
+        finished = min(int(task.backend.incr(key)), len(subtask_ids))
+        task.backend.expire(key, CARD_CASTING_PROGRESS_COUNTER_TTL)
+        span = CARD_CASTING_FANOUT_PROGRESS_END - CARD_CASTING_FANOUT_PROGRESS_START
+        progress = CARD_CASTING_FANOUT_PROGRESS_START + span * finished // len(subtask_ids)
+        task.backend.store_result(
+            parent_task_id,
+            {
+                "status": "processing",
+                "message": f"已完成 {finished}/{len(subtask_ids)} 个卡片铸造子任务",
+                "progress": str(progress),
+            },
+            "PROGRESS",
+        )
+    except Exception as e:
+        # 进度汇报失败不影响铸造结果
+        logger.warning(f"更新卡片铸造进度失败: {str(e)}")
+
+
+@celery_app.task(bind=True, max_retries=settings.EVIDENCE_PIPELINE_MAX_RETRIES,
+                 name="app.tasks.real_evidence_tasks.cast_card_group_task")
+def cast_card_group_task(self, case_id: int, evidence_ids: List[int], classified_types: List[List[Any]],
+                         parent_task_id: str, subtask_ids: List[str]) -> Dict[str, Any]:
+    """
+    分布式铸造的子任务：铸造一个证据组（单个证据，或全部微信聊天记录）的卡片
+
+    特征提取失败或超时时按指数退避重试；重试耗尽后返回失败标记而不是抛出异常，
+    避免单个子任务失败导致整个 chord 的汇总任务不执行。
+    """
+    from app.evidences.services import evidence_card_casting
+
+    async def run() -> List[Dict[str, Any]]:
+        async with async_session_factory() as db:
+            return await evidence_card_casting(
+                db=db,
+                case_id=case_id,
+                evidence_ids=evidence_ids,
+                classified_types={int(evidence_id): card_type for evidence_id, card_type in classified_types},
+                raise_on_extraction_error=True,
+            )
+
+    try:
+        cards_data = asyncio.run(run())
+        result = {
+            "status": "success",
+            "evidence_ids": evidence_ids,
+            "cards": cards_data,
+        }
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            countdown = settings.EVIDENCE_PIPELINE_RETRY_BACKOFF * 2 ** self.request.retries
+            logger.warning(f"卡片铸造子任务失败，{countdown} 秒后重试: evidence_ids={evidence_ids}, 错误: {str(e)}")
+            raise self.retry(exc=e, countdown=countdown)
+        logger.error(f"卡片铸造子任务重试耗尽: evidence_ids={evidence_ids}, 错误: {str(e)}")
+        result = {
+            "status": "failed",
+            "evidence_ids": evidence_ids,
+            "cards": [],
+            "error": str(e),
+        }
+
+    _report_card_casting_progress(self, parent_task_id, subtask_ids)
+    return result
+
+
+def merge_card_casting_results(case_id: int, evidence_ids: List[int],
+                               group_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并各子任务的铸造结果，格式与单任务铸造结果一致，并列出铸造失败的证据"""
+    cards_data = [card for group_result in group_results for card in group_result.get("cards", [])]
+    failed_groups = [
+        {"evidence_ids": group_result["evidence_ids"], "error": group_result.get("error")}
+        for group_result in group_results
+        if group_result.get("status") == "failed"
+    ]
+    return {
+        "case_id": case_id,
+        "evidence_ids": evidence_ids,
+        "cards_count": len(cards_data),
+        "cards": [_summarize_cast_card(card) for card in cards_data],
+        "summary": {
+            "total_cards": len(cards_data),
+            "associated_cards": len([c for c in cards_data if (c.get("card_info") or {}).get("card_is_associated")]),
+            "single_cards": len([c for c in cards_data if not (c.get("card_info") or {}).get("card_is_associated")]),
+            "failed_groups": len(failed_groups),
+        },
+        # 失败的证据组可以重新提交铸造
+        "failed_groups": failed_groups,
+        "failed_evidence_ids": [evidence_id for group in failed_groups for evidence_id in group["evidence_ids"]],
+    }
+
+
+@celery_app.task(bind=True, name="app.tasks.real_evidence_tasks.aggregate_card_casting_task")
+def aggregate_card_casting_task(self, group_results: List[Dict[str, Any]], case_id: int,
+                                evidence_ids: List[int]) -> Dict[str, Any]:
+    """
+    分布式铸造的汇总任务（chord 回调）
+
+    该任务使用原铸造任务的ID执行，前端轮询原任务ID即可拿到合并后的结果。
+    """
+    result = merge_card_casting_results(case_id, evidence_ids, group_results)
+    logger.info(f"分布式证据卡片铸造完成: {result['summary']}")
+    try:
+        self.backend.delete(_card_casting_progress_key(self.request.id))
+    except Exception as e:
+        logger.warning(f"删除卡片铸造进度计数器失败: {str(e)}")
+    return result
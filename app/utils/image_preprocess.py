@@ -0,0 +1,126 @@
+"""
+证据图片预处理
+
+上传时为图片证据生成一份面向 LLM/OCR 的衍生图：
+- 按 EXIF 方向信息校正旋转（手机拍照常见）
+- 长边限制在 settings.EVIDENCE_AI_IMAGE_MAX_SIDE 以内
+- 统一重新压缩为 JPEG
+
+衍生图与原图存放在 COS 的同一目录下（``xxx.png`` -> ``xxx.ai.jpg``），
+AI 分类/特征提取/OCR 使用衍生图，员工在前端看到的仍是原图。
+"""
+import io
+import math
+import os
+from typing import Optional, Tuple
+
+from loguru import logger
+from PIL import Image, ImageOps, UnidentifiedImageError
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+# 可以生成衍生图的图片格式（gif/svg 不处理）
+AI_DERIVATIVE_FORMATS = {"jpg", "jpeg", "png", "bmp", "webp"}
+
+# 衍生图对象键后缀
+AI_DERIVATIVE_SUFFIX = ".ai.jpg"
+
+
+class ImageDerivative(BaseModel):
+    """图片衍生图"""
+    content: bytes
+    width: int
+    height: int
+    original_width: int
+    original_height: int
+    content_type: str = "image/jpeg"
+
+
+def derivative_object_key(object_key: str) -> str:
+    """根据原图对象键生成衍生图对象键（与原图同目录）
+
+    例如：images/20250710070805_发票.png -> images/20250710070805_发票.ai.jpg
+    """
+    root, _ = os.path.splitext(object_key)
+    return f"{root}{AI_DERIVATIVE_SUFFIX}"
+
+
+def fit_within(width: int, height: int, max_side: int) -> Tuple[int, int]:
+    """等比缩放尺寸，使长边不超过 max_side"""
+    longest = max(width, height)
+    if longest <= max_side:
+        return width, height
+    scale = max_side / longest
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def build_ai_derivative(
+    data: bytes,
+    max_side: Optional[int] = None,
+    quality: Optional[int] = None,
+) -> Optional[ImageDerivative]:
+    """生成面向 LLM/OCR 的衍生图
+
+    Args:
+        data: 原图二进制内容
+        max_side: 长边上限，默认 settings.EVIDENCE_AI_IMAGE_MAX_SIDE
+        quality: JPEG 压缩质量，默认 settings.EVIDENCE_AI_IMAGE_QUALITY
+
+    Returns:
+        ImageDerivative: 衍生图；无法解析的图片返回 None
+    """
+    max_side = max_side or settings.EVIDENCE_AI_IMAGE_MAX_SIDE
+    quality = quality or settings.EVIDENCE_AI_IMAGE_QUALITY
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            original_width, original_height = image.size
+
+            # 透明通道铺白底，避免转 RGB 后背景变黑
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+
+            width, height = fit_within(original_width, original_height, max_side)
+            if (width, height) != (original_width, original_height):
+                image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        logger.warning(f"图片无法生成AI衍生图: {str(e)}")
+        return None
+
+    return ImageDerivative(
+        content=buffer.getvalue(),
+        width=width,
+        height=height,
+        original_width=original_width,
+        original_height=original_height,
+    )
+
+
+def estimate_qwen_vl_tokens(width: int, height: int) -> int:
+    """估算 Qwen-VL 的图片 token 数（每 28x28 像素一个 token）"""
+    return math.ceil(width / 28) * math.ceil(height / 28)
+
+
+def estimate_openai_image_tokens(width: int, height: int) -> int:
+    """估算 OpenAI 高精度模式的图片 token 数
+
+    先缩放到 2048x2048 以内，再将短边缩放到 768，按 512x512 切片计费：
+    85 + 170 * 切片数
+    """
+    width, height = fit_within(width, height, 2048)
+    shortest = min(width, height)
+    if shortest > 768:
+        scale = 768 / shortest
+        width, height = round(width * scale), round(height * scale)
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
@@ -0,0 +1,147 @@
+"""
+基准测试使用的原实现（仅用于对比）
+
+由 scripts/benchmark_suite.py 导入，与当前实现在同一份合成案件上测量耗时并校验结果一致：
+- legacy_annotate: 原 auto_process 中逐层循环的证据角色标注
+- ScanningEvidenceIndex: 原证据链计算中每个要求重新扫描全部证据和关联特征的查找方式
+- ScanningFingerprintIndex: 原依赖指纹计算中每个要求重新扫描全部证据行和关联特征行的查找方式
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.cases.models import CaseParty
+from app.core.config_manager import config_manager
+from app.evidence_chains.evidence_index import EvidenceIndex, FingerprintIndex
+from app.evidence_chains.requirement_graph import RequirementNode, TypeMatcher
+from app.evidences.models import Evidence, EvidenceStatus
+from app.evidences.services import _normalize_numeric_value
+
+
+def legacy_annotate(evidences: List[Evidence], case_parties: List[CaseParty]) -> Dict[int, str]:
+    """原 auto_process 中的逐层循环实现（仅用于对比）"""
+    roles = {}
+    for index, evidence in enumerate(evidences):
+        evidence_role = None
+        if not (evidence.evidence_status == EvidenceStatus.FEATURES_EXTRACTED.value
+                and evidence.classification_category and evidence.evidence_features):
+            continue
+        evidence_type_config = config_manager.get_evidence_type_by_type_name(evidence.classification_category)
+        if not evidence_type_config:
+            continue
+        for slot_config in evidence_type_config.get("extraction_slots", []):
+            proofread_rules = slot_config.get("proofread_rules", [])
+            slot_name = slot_config.get("slot_name")
+            if not proofread_rules or not slot_name:
+                continue
+            slot_value = None
+            for feature in evidence.evidence_features:
+                if isinstance(feature, dict) and feature.get("slot_name") == slot_name:
+                    slot_value = feature.get("slot_value")
+                    break
+            if not slot_value or slot_value == "未知":
+                continue
+            for rule in proofread_rules:
+                if rule.get("target_type", "case_party") != "case_party":
+                    continue
+                target_roles = rule.get("party_role") or ["creditor", "debtor"]
+                for party in case_parties:
+                    if party.party_role not in target_roles:
+                        continue
+                    for condition in rule.get("conditions", []):
+                        if condition.get("party_type") != party.party_type:
+                            continue
+                        match_strategy = condition.get("match_strategy", "exact")
+                        match_condition = condition.get("match_condition", "any")
+                        match_results = []
+                        for party_field in condition.get("target_fields", []):
+                            party_value = getattr(party, party_field, None)
+                            if party_value is None:
+                                continue
+                            if match_strategy == "contains":
+                                is_match = str(party_value).strip() in str(slot_value).strip()
+                            elif match_strategy == "startswith":
+                                is_match = str(slot_value).strip().startswith(str(party_value).strip())
+                            elif match_strategy == "endswith":
+                                is_match = str(slot_value).strip().endswith(str(party_value).strip())
+                            else:
+                                is_match = (str(_normalize_numeric_value(slot_value)).strip()
+                                            == str(_normalize_numeric_value(party_value)).strip())
+                            match_results.append(is_match)
+                        match_success = False
+                        if match_condition == "all" and match_results:
+                            match_success = all(match_results)
+                        elif match_condition == "any" and match_results:
+                            match_success = any(match_results)
+                        elif match_condition == "majority" and match_results:
+                            match_success = sum(match_results) > len(match_results) / 2
+                        if match_success:
+                            evidence_role = party.party_role
+                            break
+                    if evidence_role:
+                        break
+                if evidence_role:
+                    break
+            if evidence_role:
+                break
+        if evidence_role:
+            roles[index] = evidence_role
+    return roles
+
+
+class ScanningEvidenceIndex(EvidenceIndex):
+    """原实现的查找方式：每个要求重新扫描全部证据和关联特征（仅用于对比）"""
+
+    def get(self, evidence_id: int) -> Optional[Any]:
+        for evidence in self.evidences:
+            if evidence.id == evidence_id:
+                return evidence
+        return None
+
+    def evidences_for(self, matcher: TypeMatcher) -> List[Any]:
+        return [e for e in self.evidences if matcher.matches(e.classification_category)]
+
+    def evidences_for_role(self, matcher: TypeMatcher, role: str) -> List[Any]:
+        return [
+            e for e in self.evidences
+            if matcher.matches(e.classification_category) and getattr(e, "evidence_role", None) == role
+        ]
+
+    def associations_for(self, matcher: TypeMatcher) -> List[Any]:
+        return [
+            feature for feature in self.association_features
+            if any(
+                evidence.id == evidence_id and matcher.matches(evidence.classification_category)
+                for evidence_id in feature.association_evidence_ids
+                for evidence in self.evidences
+            )
+        ]
+
+    def slot_features(self, evidence: Any):
+        features = {}
+        for feature in evidence.evidence_features or []:
+            features[feature.get("slot_name")] = feature
+        return features
+
+    def first_slot_feature(self, evidence: Any, slot_name: str):
+        for feature in evidence.evidence_features or []:
+            if feature.get("slot_name") == slot_name:
+                return feature
+        return None
+
+
+class ScanningFingerprintIndex(FingerprintIndex):
+    """原依赖指纹的查找方式：每个要求重新扫描全部证据行和关联特征行（仅用于对比）"""
+
+    def __init__(self, evidence_rows: Iterable[Any], association_rows: Iterable[Any] = ()):
+        self.evidence_rows = list(evidence_rows)
+        self.association_rows = list(association_rows)
+
+    def evidence_rows_for(self, node: RequirementNode) -> List[Any]:
+        return [row for row in self.evidence_rows if node.matches(row.classification_category)]
+
+    def association_rows_for(self, evidence_ids: Iterable[int]) -> List[Any]:
+        evidence_ids = set(evidence_ids)
+        return [
+            row for row in self.association_rows
+            if any(evidence_id in evidence_ids for evidence_id in row.association_evidence_ids or [])
+        ]
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+案件分析增量模式基准测试脚本
+
+对比全量分析（全部提交记录）与增量分析（上一版报告 + 新增提交记录）：
+- 默认（离线）：在合成案件上比较两种模式发送给 Claude 的提示词长度和预估输入量（提示词长度×轮数），不调用模型；
+  同时给出上一版报告压缩前后的长度，以及不压缩时增量提示词的长度
+- --live: 在合成案件上实际调用 Claude（需要 claude-agent-sdk 和 ANTHROPIC_* 配置），
+  先全量分析前 N 条提交生成上一版报告，再分别用全量和增量模式分析全部提交，比较耗时和 token 用量
+- --from-db: 汇总数据库中已完成报告记录的 run_stats，按分析模式比较线上的耗时和 token 用量
+
+注：离线模式只比较字符数，没有本地分词器，token 数以 --live / --from-db 的实际用量为准。
+
+使用方法:
+    python scripts/benchmark_case_analysis.py                          # 默认 10 条已分析提交 + 1 条新增
+    python scripts/benchmark_case_analysis.py --commits 30 --new-commits 2
+    python scripts/benchmark_case_analysis.py --commits 3 --previous-turns 4   # 按上一版实际轮数估算输入量
+    python scripts/benchmark_case_analysis.py --previous-report report.json
+    python scripts/benchmark_case_analysis.py --live
+    python scripts/benchmark_case_analysis.py --from-db --json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.agentic.agents.case_analysis_agent import (
+    CaseAnalysisAgent,
+    condense_report,
+    estimate_input_chars,
+    select_new_commits,
+)
+from app.cases.schemas import LegalReport
+from app.core.config import settings
+
+STATEMENTS = [
+    "我于{date}通过微信转账借给对方{amount}元，对方承诺三个月内归还。",
+    "对方在{date}的聊天记录中承认欠款{amount}元，但至今未还。",
+    "{date}我多次电话催收，对方表示资金周转困难，请求延期。",
+    "补充借条照片，借条上写明借款金额{amount}元和还款日期{date}。",
+]
+
+
+def build_case(commit_count: int, seed: int):
+    rng = random.Random(seed)
+    case_info = {
+        "id": 1,
+        "case_type": "debt",
+        "loan_amount": 50000.0,
+        "loan_date": "2025-03-01",
+        "court_name": "示例区人民法院",
+        "description": "民间借贷纠纷",
+        "parties": [
+            {"party_name": "张三", "party_role": "creditor", "party_type": "person", "name": "张三", "phone": "13800000001"},
+            {"party_name": "李四", "party_role": "debtor", "party_type": "person", "name": "李四", "phone": "13800000002"},
+        ],
+    }
+    commits = []
+    for commit_id in range(1, commit_count + 1):
+        date = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        commits.append({
+            "id": commit_id,
+            "statement": rng.choice(STATEMENTS).format(date=date, amount=rng.choice([5000, 20000, 50000])),
+            "materials": [
+                {"name": f"材料{commit_id}-{index}.jpg", "url": f"https://example.com/materials/{commit_id}/{index}.jpg"}
+                for index in range(rng.randint(0, 4))
+            ],
+            "created_at": f"{date}T10:00:00",
+        })
+    return case_info, commits
+
+
+def _sample_from_schema(schema: Dict[str, Any], definitions: Dict[str, Any], rng: random.Random) -> Any:
+    """按 JSON Schema 生成示例值（用于合成上一版报告）"""
+    if "$ref" in schema:
+        return _sample_from_schema(definitions[schema["$ref"].split("/")[-1]], definitions, rng)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return _sample_from_schema(options[0], definitions, rng) if options else None
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {
+            name: _sample_from_schema(field, definitions, rng)
+            for name, field in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        count = max(1, schema.get("minItems", 0))
+        return [_sample_from_schema(schema.get("items", {}), definitions, rng) for _ in range(count)]
+    if schema_type == "number":
+        return round(rng.random(), 2)
+    if schema_type == "integer":
+        return rng.randint(1, 10)
+    if schema_type == "boolean":
+        return True
+    return "根据现有陈述与材料的分析内容" * rng.randint(1, 2)
+
+
+def build_previous_report(seed: int) -> Dict[str, Any]:
+    schema = LegalReport.model_json_schema()
+    report = _sample_from_schema(schema, schema.get("$defs", {}), random.Random(seed))
+    return LegalReport.model_validate(report).model_dump(mode="json")
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def compare_prompts(agent: CaseAnalysisAgent, case_info, commits, previous_report, new_commit_count) -> Dict[str, Any]:
+    new_commits = select_new_commits(commits, previous_report["ref_commit_ids"])
+    full_prompt = agent._build_analysis_prompt(agent._build_case_context(case_info, commits))
+    incremental_prompt = agent._build_incremental_prompt(case_info, previous_report, new_commits)
+    previous_report_chars = len(_compact_json(previous_report["content"]))
+    condensed_report_chars = len(_compact_json(condense_report(previous_report["content"])))
+    previous_turns = previous_report.get("num_turns")
+    full_input = estimate_input_chars(len(full_prompt), settings.CASE_ANALYSIS_MAX_TURNS, previous_turns)
+    incremental_input = estimate_input_chars(
+        len(incremental_prompt), settings.CASE_ANALYSIS_INCREMENTAL_MAX_TURNS, previous_turns
+    )
+    return {
+        "commits": len(commits),
+        "new_commits": new_commit_count,
+        "previous_report_chars": previous_report_chars,
+        "condensed_report_chars": condensed_report_chars,
+        "full_prompt_chars": len(full_prompt),
+        "incremental_prompt_chars": len(incremental_prompt),
+        # 不压缩上一版报告时的增量提示词长度
+        "uncondensed_incremental_prompt_chars": len(incremental_prompt) - condensed_report_chars + previous_report_chars,
+        "prompt_ratio": round(len(incremental_prompt) / len(full_prompt), 3),
+        "full_input_chars": full_input,
+        "incremental_input_chars": incremental_input,
+        "input_ratio": round(incremental_input / full_input, 3),
+        # analyze 只在预估输入量之比小于 CASE_ANALYSIS_INCREMENTAL_MAX_INPUT_RATIO 时使用增量模式
+        "selected_mode": "incremental"
+        if incremental_input < full_input * settings.CASE_ANALYSIS_INCREMENTAL_MAX_INPUT_RATIO
+        else "full",
+    }
+
+
+def _input_tokens(usage: Dict[str, Any]) -> int:
+    usage = usage or {}
+    return sum(usage.get(key) or 0 for key in ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"))
+
+
+def _stats_summary(stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "mode": stats.get("mode"),
+        "prompt_chars": stats.get("prompt_chars"),
+        "latency_ms": stats.get("latency_ms"),
+        "num_turns": stats.get("num_turns"),
+        "input_tokens": _input_tokens(stats.get("usage")),
+        "output_tokens": (stats.get("usage") or {}).get("output_tokens"),
+        "total_cost_usd": stats.get("total_cost_usd"),
+    }
+
+
+async def run_live(agent: CaseAnalysisAgent, case_info, commits, new_commit_count) -> Dict[str, Any]:
+    analyzed = commits[:len(commits) - new_commit_count]
+    base_stats: Dict[str, Any] = {}
+    base_report = await agent.analyze(case_info["id"], case_info, analyzed, run_stats=base_stats)
+    previous_report = {
+        "content": base_report,
+        "ref_commit_ids": [c["id"] for c in analyzed],
+        "num_turns": base_stats.get("num_turns"),
+    }
+
+    full_stats: Dict[str, Any] = {}
+    await agent.analyze(case_info["id"], case_info, commits, run_stats=full_stats)
+    incremental_stats: Dict[str, Any] = {}
+    await agent.analyze(
+        case_info["id"], case_info, commits, previous_report=previous_report, run_stats=incremental_stats
+    )
+    return {"full": _stats_summary(full_stats), "incremental": _stats_summary(incremental_stats)}
+
+
+async def summarize_db() -> Dict[str, Any]:
+    from sqlalchemy import select
+
+    from app.cases.models import CaseAnalysisReport
+    from app.db.session import SessionLocal
+
+    async with SessionLocal() as db:
+        result = await db.execute(
+            select(CaseAnalysisReport.analysis_mode, CaseAnalysisReport.run_stats)
+            .where(CaseAnalysisReport.run_stats.is_not(None))
+        )
+        rows = result.all()
+
+    by_mode: Dict[str, List[Dict[str, Any]]] = {}
+    for mode, stats in rows:
+        by_mode.setdefault(mode or "unknown", []).append(_stats_summary(stats))
+
+    def median(values):
+        values = [value for value in values if value is not None]
+        return round(statistics.median(values), 2) if values else None
+
+    return {
+        mode: {
+            "reports": len(items),
+            "median_latency_ms": median([item["latency_ms"] for item in items]),
+            "median_input_tokens": median([item["input_tokens"] for item in items]),
+            "median_output_tokens": median([item["output_tokens"] for item in items]),
+            "median_num_turns": median([item["num_turns"] for item in items]),
+        }
+        for mode, items in sorted(by_mode.items())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="案件分析增量模式基准测试")
+    parser.add_argument("--commits", type=int, default=10, help="上一版报告已分析的提交记录数量")
+    parser.add_argument("--new-commits", type=int, default=1, help="新增的提交记录数量")
+    parser.add_argument("--previous-report", help="使用已有报告 JSON 文件作为上一版报告（默认按 LegalReport 结构合成）")
+    parser.add_argument("--previous-turns", type=int, default=None, help="上一版分析的实际轮数（默认按最大轮数估算输入量）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--live", action="store_true", help="实际调用 Claude 比较耗时和 token 用量")
+    parser.add_argument("--from-db", action="store_true", help="汇总数据库中报告记录的 run_stats")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    if args.from_db:
+        result = asyncio.run(summarize_db())
+    else:
+        agent = CaseAnalysisAgent()
+        case_info, commits = build_case(args.commits + args.new_commits, args.seed)
+        if args.live:
+            result = asyncio.run(run_live(agent, case_info, commits, args.new_commits))
+        else:
+            if args.previous_report:
+                content = json.loads(Path(args.previous_report).read_text(encoding="utf-8"))
+            else:
+                content = build_previous_report(args.seed)
+            previous_report = {
+                "content": content,
+                "ref_commit_ids": [c["id"] for c in commits[:args.commits]],
+                "num_turns": args.previous_turns,
+            }
+            result = compare_prompts(agent, case_info, commits, previous_report, args.new_commits)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+证据图片AI衍生图基准测试脚本
+
+对比原图与AI衍生图（校正方向、限制分辨率、重新压缩）的体积、分辨率、
+估算图片 token 数、预处理耗时以及按带宽估算的传输耗时。
+
+使用方法:
+    python scripts/benchmark_image_derivatives.py path/to/images           # 测试目录下所有图片
+    python scripts/benchmark_image_derivatives.py a.jpg b.png --max-side 1280 --quality 80
+    python scripts/benchmark_image_derivatives.py path/to/images --bandwidth-mbps 20 --json
+    python scripts/benchmark_image_derivatives.py --synthetic 5           # 无样本时生成手机拍照尺寸的合成图片
+
+说明:
+    - Qwen-VL 按每 28x28 像素 1 个 token 估算（未计入模型侧的最大像素限制）
+    - OpenAI 按高精度模式 512x512 切片估算
+    - 传输耗时 = 体积 / 带宽，用于估算模型服务商拉取图片的时间
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from PIL import Image
+
+from app.utils.image_preprocess import (
+    AI_DERIVATIVE_FORMATS,
+    build_ai_derivative,
+    estimate_openai_image_tokens,
+    estimate_qwen_vl_tokens,
+)
+
+
+def collect_samples(paths: List[str]) -> List[Tuple[str, bytes]]:
+    """收集样本图片"""
+    samples = []
+    for raw in paths:
+        path = Path(raw)
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for file in files:
+            if file.is_file() and file.suffix.lower().lstrip(".") in AI_DERIVATIVE_FORMATS:
+                samples.append((str(file), file.read_bytes()))
+    return samples
+
+
+def synthetic_samples(count: int) -> List[Tuple[str, bytes]]:
+    """生成手机拍照尺寸（4032x3024）的合成图片，带噪声以接近真实压缩率"""
+    samples = []
+    for i in range(count):
+        image = Image.effect_noise((4032, 3024), 40 + i * 10).convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=95)
+        samples.append((f"synthetic_{i + 1}.jpg", buffer.getvalue()))
+    return samples
+
+
+def measure(name: str, data: bytes, max_side: int, quality: int, bandwidth_mbps: float) -> Dict:
+    """测量单张图片"""
+    with Image.open(io.BytesIO(data)) as image:
+        original_size = image.size
+
+    started = time.perf_counter()
+    derivative = build_ai_derivative(data, max_side=max_side, quality=quality)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if derivative is None:
+        return {"name": name, "error": "无法解析图片"}
+
+    bytes_per_ms = bandwidth_mbps * 1_000_000 / 8 / 1000
+    derivative_size = (derivative.width, derivative.height)
+    return {
+        "name": name,
+        "original_bytes": len(data),
+        "derivative_bytes": len(derivative.content),
+        "original_resolution": f"{original_size[0]}x{original_size[1]}",
+        "derivative_resolution": f"{derivative_size[0]}x{derivative_size[1]}",
+        "original_qwen_tokens": estimate_qwen_vl_tokens(*original_size),
+        "derivative_qwen_tokens": estimate_qwen_vl_tokens(*derivative_size),
+        "original_openai_tokens": estimate_openai_image_tokens(*original_size),
+        "derivative_openai_tokens": estimate_openai_image_tokens(*derivative_size),
+        "preprocess_ms": round(elapsed_ms, 1),
+        "original_transfer_ms": round(len(data) / bytes_per_ms, 1),
+        "derivative_transfer_ms": round(len(derivative.content) / bytes_per_ms, 1),
+    }
+
+
+def summarize(rows: List[Dict]) -> Dict:
+    """汇总节省比例"""
+    rows = [r for r in rows if "error" not in r]
+    if not rows:
+        return {}
+
+    def total(key: str) -> float:
+        return sum(r[key] for r in rows)
+
+    def saving(before: str, after: str) -> float:
+        return round(1 - total(after) / total(before), 4) if total(before) else 0.0
+
+    return {
+        "images": len(rows),
+        "bytes_saving": saving("original_bytes", "derivative_bytes"),
+        "qwen_token_saving": saving("original_qwen_tokens", "derivative_qwen_tokens"),
+        "openai_token_saving": saving("original_openai_tokens", "derivative_openai_tokens"),
+        "transfer_saving": saving("original_transfer_ms", "derivative_transfer_ms"),
+        "avg_preprocess_ms": round(total("preprocess_ms") / len(rows), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="证据图片AI衍生图基准测试")
+    parser.add_argument("paths", nargs="*", help="图片文件或目录")
+    parser.add_argument("--synthetic", type=int, default=0, help="生成合成图片数量")
+    parser.add_argument("--max-side", type=int, default=None, help="衍生图长边上限，默认取配置")
+    parser.add_argument("--quality", type=int, default=None, help="JPEG压缩质量，默认取配置")
+    parser.add_argument("--bandwidth-mbps", type=float, default=50.0, help="估算传输耗时使用的带宽（Mbps）")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    samples = collect_samples(args.paths) + synthetic_samples(args.synthetic)
+    if not samples:
+        parser.error("没有可测试的图片，请指定图片路径或使用 --synthetic")
+
+    rows = [measure(name, data, args.max_side, args.quality, args.bandwidth_mbps) for name, data in samples]
+    summary = summarize(rows)
+
+    if args.json:
+        print(json.dumps({"results": rows, "summary": summary}, ensure_ascii=False, indent=2))
+        return
+
+    header = f"{'图片':<40} {'原图':>20} {'衍生图':>20} {'Qwen tokens':>16} {'预处理ms':>10} {'传输ms':>16}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        if "error" in r:
+            print(f"{r['name']:<40} {r['error']}")
+            continue
+        print(
+            f"{Path(r['name']).name[:40]:<40} "
+            f"{r['original_resolution']:>11} {r['original_bytes'] // 1024:>6}KB "
+            f"{r['derivative_resolution']:>11} {r['derivative_bytes'] // 1024:>6}KB "
+            f"{r['original_qwen_tokens']:>7}->{r['derivative_qwen_tokens']:<7} "
+            f"{r['preprocess_ms']:>10} "
+            f"{r['original_transfer_ms']:>7}->{r['derivative_transfer_ms']:<7}"
+        )
+    print()
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
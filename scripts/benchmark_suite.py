@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+核心领域逻辑基准测试套件
+
+基于 scripts/synthetic_cases.py 按真实 YAML 配置生成的合成案件，测量：
+- evidence_chain_evaluation: EvidenceChainService 计算案件全部适用证据链（内存中，不含数据库）
+- evidence_chain_evaluation_scanning: 同上，使用每个要求重新扫描全部证据的原查找方式（对比基线）
+- evidence_chain_fingerprints: 看板接口计算全部证据要求依赖指纹、判断是否需要重算的耗时（无物化结果）
+- evidence_chain_fingerprints_scanning: 同上，使用每个要求重新扫描全部证据行的原查找方式（对比基线）
+- evidence_proofreading: EvidenceProofreader 逐个校对全部证据的特征
+- role_annotation: 按当事人校对规则标注全部证据的角色
+- role_annotation_legacy: 同上，使用原 auto_process 中逐层循环的实现（对比基线）
+- card_slot_proofreading: 批量校对模板快照中全部槽位的卡片
+- evidence_chain_dashboard_cold / _warm（--database）: 在本地 PostgreSQL 中写入合成案件，
+  测量首次计算（全部要求重算并物化）和复用物化结果的看板接口耗时，结束后删除写入的数据
+
+对比基线的原实现在 scripts/benchmark_baselines.py 中，运行前先校验其结果与当前实现一致。
+
+结果写入 JSON 文件（默认 benchmark_results.json），包含规模参数、数据量、git 提交和每项测试的耗时统计，
+便于在不同提交之间比较。
+
+注：模型使用 JSONB 和 PostgreSQL 的 ON CONFLICT，SQLite 无法作为替代数据库，数据库测试只支持 PostgreSQL。
+
+使用方法:
+    python scripts/benchmark_suite.py                                   # 默认规模，只运行内存中的测试
+    python scripts/benchmark_suite.py --parties 6 --evidences-per-type 20 --association-groups 50 --repeat 5
+    python scripts/benchmark_suite.py --only role_annotation --only evidence_proofreading
+    python scripts/benchmark_suite.py --database --output results/bench.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import app.db.base  # noqa: F401
+from loguru import logger
+
+from app.agentic.agents.evidence_proofreader import EvidenceProofreader
+from app.evidence_chains.evidence_index import EvidenceIndex, FingerprintIndex
+from app.evidence_chains.services import EvidenceChainService
+from app.evidences.role_annotation import RuleRegistry, annotate_evidence_roles
+from app.evidences.services import _proofread_slot_cards
+from benchmark_baselines import ScanningEvidenceIndex, ScanningFingerprintIndex, legacy_annotate
+from synthetic_cases import SyntheticCase, SyntheticCaseSpec, build_synthetic_case
+
+BENCHMARKS = [
+    "evidence_chain_evaluation",
+    "evidence_chain_evaluation_scanning",
+    "evidence_chain_fingerprints",
+    "evidence_chain_fingerprints_scanning",
+    "evidence_proofreading",
+    "role_annotation",
+    "role_annotation_legacy",
+    "card_slot_proofreading",
+]
+TEMPLATE_ID = "synthetic-benchmark"
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽业务代码中的调试输出和日志，避免输出耗时干扰测量"""
+    logger.disable("app")
+    logging.disable(logging.CRITICAL)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+        logger.enable("app")
+
+
+def summarize(durations: List[float]) -> Dict[str, Any]:
+    return {
+        "repeat": len(durations),
+        "median_ms": round(statistics.median(durations), 3),
+        "min_ms": round(min(durations), 3),
+        "max_ms": round(max(durations), 3),
+    }
+
+
+def measure(func: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    with quiet():
+        for _ in range(warmup):
+            func()
+        durations = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - started) * 1000)
+    return summarize(durations)
+
+
+def run_async(factory: Callable[[], Awaitable[Any]]) -> Callable[[], Any]:
+    return lambda: asyncio.run(factory())
+
+
+def benchmark_in_memory(name: str, synthetic: SyntheticCase, repeat: int) -> Dict[str, Any]:
+    case = synthetic.case
+    evidences = synthetic.evidences
+
+    if name in ("evidence_chain_evaluation", "evidence_chain_evaluation_scanning"):
+        service = EvidenceChainService(None)
+        with quiet():
+            chains = service._get_applicable_chains_for_case(case)
+
+        def evaluate(index_class=EvidenceIndex):
+            # 与 _check_evidence_chain_status 相同：每条证据链建立一次索引
+            results = []
+            for chain in chains:
+                index = index_class(evidences, synthetic.association_features)
+                requirements = [(node, service._evaluate_requirement(node, index)) for node in chain.requirements]
+                results.append(service._summarize_chain(chain, requirements))
+            return results
+
+        func = evaluate
+        if name == "evidence_chain_evaluation_scanning":
+            func = functools.partial(evaluate, ScanningEvidenceIndex)
+            with quiet():
+                if [c.model_dump() for c in func()] != [c.model_dump() for c in evaluate()]:
+                    raise RuntimeError("原查找方式与证据索引计算出的证据链不一致")
+        return {**measure(func, repeat), "items": sum(len(chain.requirements) for chain in chains)}
+
+    if name in ("evidence_chain_fingerprints", "evidence_chain_fingerprints_scanning"):
+        service = EvidenceChainService(None)
+
+        def plan(index_class=FingerprintIndex):
+            # 与 get_case_evidence_dashboard 相同：每个案件建立一次索引，合成证据即包含指纹所需的列
+            return service._plan_requirements(case, index_class(evidences, synthetic.association_features), {})
+
+        func = plan
+        if name == "evidence_chain_fingerprints_scanning":
+            func = functools.partial(plan, ScanningFingerprintIndex)
+            with quiet():
+                if func() != plan():
+                    raise RuntimeError("原查找方式与分桶索引计算出的依赖指纹不一致")
+        with quiet():
+            entries = plan()[0]
+        return {**measure(func, repeat), "items": sum(len(requirements) for _, requirements in entries)}
+
+    if name == "evidence_proofreading":
+        proofreader = EvidenceProofreader()
+
+        async def proofread_all():
+            for evidence in evidences:
+                await proofreader.proofread_evidence_features(None, evidence, case)
+        return {**measure(run_async(proofread_all), repeat), "items": len(evidences)}
+
+    if name == "role_annotation":
+        roles = [evidence.evidence_role for evidence in evidences]
+
+        def annotate():
+            for evidence in evidences:
+                evidence.evidence_role = None
+            # 每次使用新的规则缓存，计入编译开销
+            annotate_evidence_roles(evidences, synthetic.parties, RuleRegistry())
+        result = measure(annotate, repeat)
+        # 恢复标注结果，后续测试使用相同的数据
+        for evidence, role in zip(evidences, roles):
+            evidence.evidence_role = role
+        return {**result, "items": len(evidences)}
+
+    if name == "role_annotation_legacy":
+        # main 中已用当前实现标注过角色
+        expected = {index: evidence.evidence_role for index, evidence in enumerate(evidences) if evidence.evidence_role}
+        with quiet():
+            if legacy_annotate(evidences, synthetic.parties) != expected:
+                raise RuntimeError("原实现与预编译匹配器的角色标注结果不一致")
+        return {**measure(lambda: legacy_annotate(evidences, synthetic.parties), repeat), "items": len(evidences)}
+
+    if name == "card_slot_proofreading":
+        return {
+            **measure(run_async(lambda: _proofread_slot_cards(case, TEMPLATE_ID, synthetic.slot_cards)), repeat),
+            "items": len(synthetic.slot_cards),
+        }
+
+    raise ValueError(f"未知的基准测试: {name}")
+
+
+async def benchmark_database(synthetic: SyntheticCase, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """在本地数据库中写入合成案件，测量看板接口首次计算和复用物化结果的耗时"""
+    from sqlalchemy import delete
+
+    from app.cases.models import AssociationEvidenceFeature, Case, CaseParty
+    from app.db.session import SessionLocal
+    from app.evidence_chains.models import EvidenceChainDashboardSnapshot
+    from app.evidences.models import Evidence
+    from app.users.models import User
+
+    async with SessionLocal() as db:
+        user = User(name="基准测试用户")
+        db.add(user)
+        await db.flush()
+        case = Case(user_id=user.id, case_type=synthetic.case.case_type, loan_amount=synthetic.case.loan_amount)
+        db.add(case)
+        await db.flush()
+        case_id = case.id
+        for party in synthetic.parties:
+            db.add(CaseParty(
+                case_id=case_id,
+                party_name=party.party_name, party_role=party.party_role, party_type=party.party_type,
+                name=party.name, company_name=party.company_name, id_card=party.id_card, phone=party.phone,
+                bank_account=party.bank_account, owner_name=party.owner_name,
+            ))
+        rows = [
+            Evidence(
+                case_id=case_id,
+                file_url=evidence.file_url, file_name=evidence.file_name,
+                file_size=evidence.file_size, file_extension=evidence.file_extension,
+                evidence_status=evidence.evidence_status,
+                classification_category=evidence.classification_category,
+                evidence_role=evidence.evidence_role,
+                evidence_features=evidence.evidence_features,
+            )
+            for evidence in synthetic.evidences
+        ]
+        db.add_all(rows)
+        await db.flush()
+        id_map = {evidence.id: row.id for evidence, row in zip(synthetic.evidences, rows)}
+        for feature in synthetic.association_features:
+            db.add(AssociationEvidenceFeature(
+                case_id=case_id,
+                slot_group_name=feature.slot_group_name,
+                normalized_key=feature.slot_group_name,
+                association_evidence_ids=[id_map[evidence_id] for evidence_id in feature.association_evidence_ids],
+                evidence_features=feature.evidence_features,
+                features_extracted_at=feature.features_extracted_at,
+            ))
+        await db.commit()
+        user_id = user.id
+
+    async def invalidate():
+        async with SessionLocal() as db:
+            await db.execute(delete(EvidenceChainDashboardSnapshot).where(EvidenceChainDashboardSnapshot.case_id == case_id))
+            await db.commit()
+
+    async def dashboard():
+        async with SessionLocal() as db:
+            await EvidenceChainService(db).get_case_evidence_dashboard(case_id)
+
+    async def timed(cold: bool) -> List[float]:
+        durations = []
+        with quiet():
+            await dashboard()
+            for _ in range(repeat):
+                if cold:
+                    await invalidate()
+                started = time.perf_counter()
+                await dashboard()
+                durations.append((time.perf_counter() - started) * 1000)
+        return durations
+
+    try:
+        results = {}
+        for name, cold in (("evidence_chain_dashboard_cold", True), ("evidence_chain_dashboard_warm", False)):
+            results[name] = {**summarize(await timed(cold)), "items": len(synthetic.evidences)}
+        return results
+    finally:
+        await invalidate()
+        async with SessionLocal() as db:
+            await db.execute(delete(AssociationEvidenceFeature).where(AssociationEvidenceFeature.case_id == case_id))
+            await db.execute(delete(Evidence).where(Evidence.case_id == case_id))
+            await db.execute(delete(CaseParty).where(CaseParty.case_id == case_id))
+            await db.execute(delete(Case).where(Case.id == case_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="核心领域逻辑基准测试套件")
+    parser.add_argument("--parties", type=int, default=4, help="当事人数量")
+    parser.add_argument("--evidences-per-type", type=int, default=5, help="每个证据类型的证据数量")
+    parser.add_argument("--features-per-evidence", type=int, default=None, help="每个证据的特征数量上限（默认全部词槽）")
+    parser.add_argument("--association-groups", type=int, default=10, help="关联特征分组数量")
+    parser.add_argument("--cards-per-type", type=int, default=2, help="每个卡片类型、每个角色的卡片数量")
+    parser.add_argument("--case-type", default="debt", help="案件类型")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    parser.add_argument("--only", action="append", choices=BENCHMARKS, help="只运行指定的测试（可重复）")
+    parser.add_argument("--database", action="store_true", help="同时运行本地 PostgreSQL 上的看板接口测试")
+    parser.add_argument("--output", default="benchmark_results.json", help="结果文件路径")
+    args = parser.parse_args()
+
+    spec = SyntheticCaseSpec(
+        parties=args.parties,
+        evidences_per_type=args.evidences_per_type,
+        features_per_evidence=args.features_per_evidence,
+        association_groups=args.association_groups,
+        cards_per_type=args.cards_per_type,
+        case_type=args.case_type,
+        seed=args.seed,
+    )
+    synthetic = build_synthetic_case(spec)
+    # 先标注角色，证据链计算使用与线上一致的带角色证据
+    with quiet():
+        annotate_evidence_roles(synthetic.evidences, synthetic.parties, RuleRegistry())
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        results[name] = benchmark_in_memory(name, synthetic, args.repeat)
+        print(f"{name}: {results[name]['median_ms']} ms (items={results[name]['items']})")
+    if args.database:
+        for name, result in asyncio.run(benchmark_database(synthetic, args.repeat)).items():
+            results[name] = result
+            print(f"{name}: {result['median_ms']} ms (items={result['items']})")
+
+    report = {
+        "suite": "core-domain",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "spec": asdict(spec),
+        "counts": {
+            "parties": len(synthetic.parties),
+            "evidences": len(synthetic.evidences),
+            "features": sum(len(e.evidence_features or []) for e in synthetic.evidences),
+            "association_features": len(synthetic.association_features),
+            "cards": len(synthetic.cards),
+        },
+        "results": results,
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"结果已写入 {output}")
+
+
+if __name__ == "__main__":
+    main()
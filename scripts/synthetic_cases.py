@@ -0,0 +1,190 @@
+"""
+合成案件生成器（基准测试使用）
+
+基于真实的 YAML 配置生成内存中的合成案件，不依赖数据库：
+- 当事人：按 债权人/债务人 交替、个人/公司/个体工商户 轮换生成
+- 证据：evidence_types_v2.yaml 中每个证据类型生成指定数量的证据，词槽来自证据类型的提取词槽
+- 关联特征：从证据中抽取若干分组，词槽来自分组首个证据的证据类型
+- 卡片：evidence_card_slots.yaml 中每个卡片类型按当事人角色生成卡片并放入槽位
+
+一部分词槽值取自当事人或案件信息，使校对和角色标注的匹配分支都能被覆盖。
+"""
+
+import random
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.cases.models import AssociationEvidenceFeature, Case, CaseParty, CaseType
+from app.core.config_manager import config_manager
+from app.evidences.models import Evidence, EvidenceCard, EvidenceStatus
+
+PARTY_ROLES = ["creditor", "debtor"]
+PARTY_TYPES = ["person", "company", "individual"]
+PARTY_FIELDS = ["party_name", "name", "company_name", "id_card", "phone", "bank_account", "owner_name"]
+NOISE_VALUES = ["未知", "", "无关值"]
+LOAN_AMOUNT = 10000.0
+
+
+@dataclass
+class SyntheticCaseSpec:
+    """合成案件规模"""
+    parties: int = 2  # 当事人数量（至少包含一个债权人和一个债务人）
+    evidences_per_type: int = 5  # 每个证据类型的证据数量
+    features_per_evidence: Optional[int] = None  # 每个证据的特征数量上限，None 表示全部提取词槽
+    association_groups: int = 10  # 关联特征分组数量
+    cards_per_type: int = 2  # 每个卡片类型、每个角色的卡片数量
+    case_type: str = "debt"
+    match_ratio: float = 0.5  # 词槽值取自当事人/案件信息的比例
+    seed: int = 42
+
+
+@dataclass
+class SyntheticCase:
+    case: Case
+    parties: List[CaseParty]
+    evidences: List[Evidence]
+    association_features: List[AssociationEvidenceFeature]
+    cards: List[EvidenceCard]
+    slot_cards: Dict[str, EvidenceCard] = field(default_factory=dict)  # 槽位ID -> 卡片
+
+
+def _build_parties(spec: SyntheticCaseSpec, case_id: int) -> List[CaseParty]:
+    parties = []
+    for i in range(max(spec.parties, 2)):
+        values = {party_field: f"{party_field}-{i}" for party_field in PARTY_FIELDS}
+        values["id_card"] = f"11010119900101{i:04d}"
+        values["phone"] = f"138{i:08d}"
+        values["bank_account"] = f"62220000{i:08d}"
+        parties.append(CaseParty(
+            id=case_id * 1000 + i + 1,
+            case_id=case_id,
+            party_role=PARTY_ROLES[i % len(PARTY_ROLES)],
+            party_type=PARTY_TYPES[(i // len(PARTY_ROLES)) % len(PARTY_TYPES)],
+            **values,
+        ))
+    return parties
+
+
+def _slot_value(rng: random.Random, spec: SyntheticCaseSpec, parties: List[CaseParty]) -> Any:
+    if rng.random() < spec.match_ratio:
+        if rng.random() < 0.2:
+            return str(int(LOAN_AMOUNT))
+        return getattr(rng.choice(parties), rng.choice(PARTY_FIELDS))
+    return rng.choice(NOISE_VALUES) or f"随机值-{rng.randint(0, 10 ** 6)}"
+
+
+def _features(rng: random.Random, spec: SyntheticCaseSpec, parties: List[CaseParty], slot_names: List[str]):
+    if spec.features_per_evidence is not None:
+        slot_names = slot_names[:spec.features_per_evidence]
+    return [
+        {
+            "slot_name": slot_name,
+            "slot_value": _slot_value(rng, spec, parties),
+            "confidence": round(rng.uniform(0.5, 1.0), 3),
+            "reasoning": "",
+            "slot_desc": "",
+            "slot_value_type": "string",
+            "slot_required": True,
+        }
+        for slot_name in slot_names
+    ]
+
+
+def evidence_type_slots() -> Dict[str, List[str]]:
+    """证据类型 -> 提取词槽名（来自 evidence_types_v2.yaml）"""
+    return {
+        config["type"]: [slot["slot_name"] for slot in config.get("extraction_slots", []) if slot.get("slot_name")]
+        for config in config_manager.get_all_evidence_types().values()
+        if config.get("type")
+    }
+
+
+def card_type_slots() -> Dict[str, List[str]]:
+    """卡片类型 -> 卡槽词槽名（来自 evidence_card_slots.yaml）"""
+    slots: Dict[str, List[str]] = {}
+    for template in config_manager.load_evidence_card_slots_config().evidence_card_templates:
+        card_type = template.get("card_type")
+        if card_type and card_type not in slots:
+            slots[card_type] = [slot["slot_name"] for slot in template.get("required_slots", []) if slot.get("slot_name")]
+    return slots
+
+
+def build_synthetic_case(spec: SyntheticCaseSpec, case_id: int = 1) -> SyntheticCase:
+    """按规模生成一个合成案件（对象未加入任何会话，ID 已预先分配）"""
+    rng = random.Random(spec.seed)
+    now = datetime.now()
+    parties = _build_parties(spec, case_id)
+    case = Case(
+        id=case_id,
+        case_type=CaseType(spec.case_type),
+        loan_amount=LOAN_AMOUNT,
+        updated_at=now,
+    )
+    case.case_parties = parties
+
+    evidences = []
+    for type_name, slot_names in sorted(evidence_type_slots().items()):
+        for _ in range(spec.evidences_per_type):
+            evidences.append(Evidence(
+                id=case_id * 100000 + len(evidences) + 1,
+                case_id=case_id,
+                file_url=f"https://example.com/synthetic/{len(evidences)}.jpg",
+                file_name="synthetic.jpg",
+                file_size=1024,
+                file_extension="jpg",
+                evidence_status=EvidenceStatus.FEATURES_EXTRACTED.value,
+                classification_category=type_name,
+                evidence_features=_features(rng, spec, parties, slot_names),
+                updated_at=now,
+            ))
+    for evidence in evidences:
+        evidence.case = case
+
+    type_slots = evidence_type_slots()
+    association_features = []
+    for group_id in range(1, spec.association_groups + 1):
+        if not evidences:
+            break
+        members = rng.sample(evidences, min(5, len(evidences)))
+        association_features.append(AssociationEvidenceFeature(
+            id=case_id * 100000 + group_id,
+            case_id=case_id,
+            slot_group_name=f"group-{group_id}",
+            association_evidence_ids=[e.id for e in members],
+            evidence_features=_features(rng, spec, parties, type_slots[members[0].classification_category]),
+            features_extracted_at=now,
+            updated_at=now,
+        ))
+
+    cards = []
+    slot_cards: Dict[str, EvidenceCard] = {}
+    for card_type, slot_names in sorted(card_type_slots().items()):
+        for role in PARTY_ROLES:
+            for index in range(spec.cards_per_type):
+                card = EvidenceCard(
+                    id=case_id * 100000 + len(cards) + 1,
+                    case_id=case_id,
+                    card_info={
+                        "card_type": card_type,
+                        "card_features": [
+                            {"slot_name": slot_name, "slot_value": _slot_value(rng, spec, parties)}
+                            for slot_name in slot_names
+                        ],
+                    },
+                    evidence_ids=[],
+                    updated_times=0,
+                    is_normal=True,
+                    abnormal_indices=[],
+                )
+                cards.append(card)
+                slot_cards[f"slot::{role}::{card_type}::{index}"] = card
+
+    return SyntheticCase(
+        case=case,
+        parties=parties,
+        evidences=evidences,
+        association_features=association_features,
+        cards=cards,
+        slot_cards=slot_cards,
+    )
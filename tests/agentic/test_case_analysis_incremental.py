@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timezone
+
+import app.agentic.agents.case_analysis_agent as analysis_module
+from app.agentic.agents.case_analysis_agent import CaseAnalysisAgent, condense_report, select_new_commits
+
+CASE_INFO = {"id": 1, "case_type": "debt", "loan_amount": 1000.0, "parties": []}
+COMMITS = [
+    {"id": 1, "statement": "旧陈述一", "materials": [{"name": "借条.jpg", "url": "https://example.com/1.jpg"}]},
+    {"id": 2, "statement": "旧陈述二", "materials": []},
+    {"id": 3, "statement": "新增陈述", "materials": []},
+]
+PREVIOUS_REPORT = {"id": 7, "content": {"case_title": "上一版报告"}, "ref_commit_ids": [1, 2]}
+
+
+def make_agent(monkeypatch, fail_incremental=False):
+    agent = CaseAnalysisAgent()
+    calls = []
+
+    async def fake_call(prompt, case_id, progress_callback=None, max_turns=None, run_stats=None):
+        calls.append({"prompt": prompt, "max_turns": max_turns})
+        if fail_incremental and "上一版论证报告" in prompt:
+            raise ValueError("无法解析")
+        if run_stats is not None:
+            run_stats.update(usage={"input_tokens": len(prompt)}, num_turns=1)
+        return "{}"
+
+    monkeypatch.setattr(agent, "_call_claude_agent", fake_call)
+    monkeypatch.setattr(agent, "_parse_response", lambda response, case_id, case_info: {"case_id": str(case_id)})
+    return agent, calls
+
+
+def test_select_new_commits():
+    assert [c["id"] for c in select_new_commits(COMMITS, [1, 2])] == [3]
+    assert select_new_commits(COMMITS, [1, 2, 3]) == []
+    # 上一版引用的提交记录已被删除，或没有上一版引用
+    assert select_new_commits(COMMITS, [1, 4]) is None
+    assert select_new_commits(COMMITS, []) is None
+
+
+def test_select_new_commits_detects_commits_updated_after_previous_report():
+    commits = [
+        {**COMMITS[0], "updated_at": "2026-10-01T09:00:00"},
+        {**COMMITS[1], "updated_at": "2026-10-01T11:00:00"},
+        {**COMMITS[2], "updated_at": "2026-10-01T12:00:00"},
+    ]
+    assert [c["id"] for c in select_new_commits(commits, [1, 2], "2026-10-01T11:30:00")] == [3]
+    # 上一版引用的提交记录 2 在上一版完成后被修改
+    assert select_new_commits(commits, [1, 2], "2026-10-01T10:00:00") is None
+
+
+def test_select_new_commits_compares_aware_updated_at_with_naive_completed_at():
+    # 提交记录的修改时间来自 timestamptz 列（带时区），报告完成时间由 datetime.now() 写入（本地时间、不带时区）
+    completed_at = datetime(2026, 10, 1, 3, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None).isoformat()
+    commits = [
+        {**COMMITS[0], "updated_at": "2026-10-01T09:00:00+08:00"},
+        {**COMMITS[1], "updated_at": "2026-10-01T11:00:00+08:00"},
+        {**COMMITS[2], "updated_at": "2026-10-01T12:00:00+08:00"},
+    ]
+    assert [c["id"] for c in select_new_commits(commits, [1, 2], completed_at)] == [3]
+    # 提交记录 2 的修改时间（UTC 04:00）晚于上一版完成时间（UTC 03:30）
+    commits[1]["updated_at"] = "2026-10-01T12:00:00+08:00"
+    assert select_new_commits(commits, [1, 2], completed_at) is None
+
+
+def test_condense_report_keeps_answers_and_conclusions_only():
+    block = {
+        "view_points": {"results": [{"question": "案由是什么", "answer": "民间借贷", "reason": "陈述称借款"}]},
+        "evidences": {"results": [{
+            "question": "有何证据", "answer": "有借条", "reason": "借条载明金额",
+            "refs_case_resources": {"statement": "补充借条", "materials": ["借条.jpg"]},
+        }]},
+        "laws": {"results": {"question": "适用法律", "answer": "民法典第六百六十七条", "reason": "借款合同"}},
+        "conclusion": {"results": [{"answer": "成立", "probability_assessment": {"positive": "有借条"}}]},
+    }
+    content = {
+        "case_title": "张三诉李四",
+        "cause_of_action": block,
+        "parties": {"plaintiff": block},
+        "conclusion": {
+            "summary": "借贷关系成立",
+            "probability_assessment": {"positive": "有借条", "negative": "", "conflict": ""},
+            "follow_up_questions": [{"question": "是否有转账记录", "type": "guidance"}],
+        },
+    }
+
+    condensed = condense_report(content)
+
+    assert condensed["cause_of_action"] == {
+        "view_points": ["民间借贷"],
+        "evidences": [{"answer": "有借条", "materials": ["借条.jpg"]}],
+        "conclusion": ["成立"],
+    }
+    assert condensed["parties.plaintiff"] == condensed["cause_of_action"]
+    assert "parties.defendant" not in condensed
+    assert condensed["conclusion"] == {
+        "summary": "借贷关系成立",
+        "probability_assessment": {"positive": "有借条", "negative": "", "conflict": ""},
+    }
+    text = str(condensed)
+    assert "陈述称借款" not in text and "民法典" not in text and "是否有转账记录" not in text
+
+
+def test_incremental_sends_previous_report_and_new_commits_only(monkeypatch):
+    monkeypatch.setattr(analysis_module.settings, "CASE_ANALYSIS_INCREMENTAL_MAX_INPUT_RATIO", 10.0)
+    agent, calls = make_agent(monkeypatch)
+    stats = {}
+
+    asyncio.run(agent.analyze(1, CASE_INFO, COMMITS, previous_report=PREVIOUS_REPORT, run_stats=stats))
+
+    assert len(calls) == 1
+    prompt = calls[0]["prompt"]
+    assert "上一版报告" in prompt and "新增陈述" in prompt
+    assert "旧陈述一" not in prompt and "借条.jpg" not in prompt
+    assert calls[0]["max_turns"] == analysis_module.settings.CASE_ANALYSIS_INCREMENTAL_MAX_TURNS
+    assert stats["mode"] == "incremental"
+    assert stats["new_commit_count"] == 1
+    assert stats["prompt_chars"] == len(prompt) < stats["full_prompt_chars"] * 10
+
+
+def test_falls_back_to_full_analysis(monkeypatch):
+    monkeypatch.setattr(analysis_module.settings, "CASE_ANALYSIS_INCREMENTAL_MAX_INPUT_RATIO", 10.0)
+
+    # 增量分析失败
+    agent, calls = make_agent(monkeypatch, fail_incremental=True)
+    stats = {}
+    asyncio.run(agent.analyze(1, CASE_INFO, COMMITS, previous_report=PREVIOUS_REPORT, run_stats=stats))
+    assert len(calls) == 2
+    assert "旧陈述一" in calls[1]["prompt"]
+    assert stats["mode"] == "full" and stats["fallback_reason"] == "无法解析"
+
+    # 增量提示词过长
+    monkeypatch.setattr(analysis_module.settings, "CASE_ANALYSIS_INCREMENTAL_MAX_INPUT_RATIO", 0.1)
+    agent, calls = make_agent(monkeypatch)
+    stats = {}
+    asyncio.run(agent.analyze(1, CASE_INFO, COMMITS, previous_report=PREVIOUS_REPORT, run_stats=stats))
+    assert len(calls) == 1 and "旧陈述一" in calls[0]["prompt"]
+    assert stats["mode"] == "full" and stats["fallback_reason"] == "增量分析预估输入量过大"
+
+    # 上一版引用的提交记录已被删除
+    agent, calls = make_agent(monkeypatch)
+    stats = {}
+    previous = {**PREVIOUS_REPORT, "ref_commit_ids": [1, 2, 99]}
+    asyncio.run(agent.analyze(1, CASE_INFO, COMMITS, previous_report=previous, run_stats=stats))
+    assert calls[0]["max_turns"] == analysis_module.settings.CASE_ANALYSIS_MAX_TURNS
+    assert stats["mode"] == "full" and "fallback_reason" not in stats
+
+
+def test_default_settings_prefer_incremental_unless_previous_run_was_short(monkeypatch):
+    # 上一版报告的推理原因很长：压缩后不再发送
+    previous = {**PREVIOUS_REPORT, "content": {
+        "case_title": "上一版报告",
+        "claims": {"view_points": {"results": [{"answer": "偿还借款", "reason": "很长的推理" * 2000}]}},
+    }}
+
+    agent, calls = make_agent(monkeypatch)
+    stats = {}
+    asyncio.run(agent.analyze(1, CASE_INFO, COMMITS, previous_report=previous, run_stats=stats))
+    assert stats["mode"] == "incremental"
+    assert "很长的推理" not in calls[0]["prompt"] and "偿还借款" in calls[0]["prompt"]
+
+    # 上一版只用了 1 轮：两种模式轮数相同，按提示词长度比较
+    agent, calls = make_agent(monkeypatch)
+    stats = {}
+    asyncio.run(agent.analyze(1, CASE_INFO, COMMITS, previous_report={**previous, "num_turns": 1}, run_stats=stats))
+    assert stats["mode"] == "full" and stats["fallback_reason"] == "增量分析预估输入量过大"
@@ -0,0 +1,110 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.agentic.agents import evidence_classifier_v2
+from app.agentic.agents.evidence_classifier_v2 import (
+    EvidenceClassifiResult,
+    EvidenceClassifiResults,
+    classify_evidences_sharded,
+)
+
+
+def make_fake_classifier(calls, fail_once=None, hang=None):
+    """构造假的分类器：记录每次调用的分片，可指定首次失败或超时的图片"""
+    failed = set()
+
+    class FakeClassifier:
+        async def arun(self, image_urls):
+            calls.append(list(image_urls))
+            if hang and hang in image_urls:
+                await asyncio.sleep(10)
+            if fail_once and fail_once in image_urls and fail_once not in failed:
+                failed.add(fail_once)
+                raise RuntimeError("provider error")
+            return SimpleNamespace(content=EvidenceClassifiResults(results=[
+                EvidenceClassifiResult(image_id=f"E{i + 1}", image_url=url, evidence_type="借款借条", confidence=0.9, reasoning="")
+                for i, url in enumerate(image_urls)
+            ]))
+
+    return FakeClassifier
+
+
+def test_sharded_classification_splits_and_preserves_order(monkeypatch):
+    calls = []
+    monkeypatch.setattr(evidence_classifier_v2, "EvidenceClassifier", make_fake_classifier(calls))
+    urls = [f"https://cos/images/{i}.png" for i in range(7)]
+
+    result = asyncio.run(classify_evidences_sharded(urls, chunk_size=3, max_concurrency=2))
+
+    assert [len(c) for c in calls] == [3, 3, 1]
+    assert [r.image_url for r in result.results] == urls
+    assert result.failed_image_urls == []
+
+
+def test_sharded_classification_retries_only_failed_chunk(monkeypatch):
+    calls = []
+    urls = [f"https://cos/images/{i}.png" for i in range(6)]
+    monkeypatch.setattr(evidence_classifier_v2, "EvidenceClassifier", make_fake_classifier(calls, fail_once=urls[4]))
+
+    result = asyncio.run(classify_evidences_sharded(urls, chunk_size=3, max_concurrency=2, max_retries=1))
+
+    assert calls[-1] == urls[3:]
+    assert len(calls) == 3
+    assert len(result.results) == 6
+
+
+def test_sharded_classification_keeps_partial_results_on_timeout(monkeypatch):
+    calls = []
+    urls = [f"https://cos/images/{i}.png" for i in range(4)]
+    monkeypatch.setattr(evidence_classifier_v2, "EvidenceClassifier", make_fake_classifier(calls, hang=urls[3]))
+
+    result = asyncio.run(classify_evidences_sharded(urls, chunk_size=2, chunk_timeout=0.05, max_retries=1))
+
+    assert [r.image_url for r in result.results] == urls[:2]
+    assert result.failed_image_urls == urls[2:]
+
+
+def test_sharded_classification_reports_each_chunk_for_checkpointing(monkeypatch):
+    calls = []
+    checkpoints = []
+    urls = [f"https://cos/images/{i}.png" for i in range(5)]
+    monkeypatch.setattr(evidence_classifier_v2, "EvidenceClassifier", make_fake_classifier(calls, fail_once=urls[4]))
+
+    async def on_chunk_done(results):
+        checkpoints.append([r.image_url for r in results])
+
+    asyncio.run(classify_evidences_sharded(urls, chunk_size=2, max_retries=1, on_chunk_done=on_chunk_done))
+
+    assert sorted(checkpoints) == [urls[0:2], urls[2:4], urls[4:5]]
+
+
+def test_sharded_classification_honors_per_call_concurrency(monkeypatch):
+    from app.agentic.llm.concurrency import get_provider_semaphore
+
+    active = 0
+    peak = 0
+
+    class SlowClassifier:
+        async def arun(self, image_urls):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return SimpleNamespace(content=EvidenceClassifiResults(results=[
+                EvidenceClassifiResult(image_id="E1", image_url=url, evidence_type="借款借条", confidence=0.9, reasoning="")
+                for url in image_urls
+            ]))
+
+    monkeypatch.setattr(evidence_classifier_v2, "EvidenceClassifier", SlowClassifier)
+    urls = [f"https://cos/images/{i}.png" for i in range(8)]
+
+    async def run():
+        # 其他调用方已按更大的上限创建了服务商共享信号量
+        get_provider_semaphore("qwen", 8)
+        return await classify_evidences_sharded(urls, chunk_size=1, max_concurrency=2)
+
+    result = asyncio.run(run())
+
+    assert len(result.results) == 8
+    assert peak == 2
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from app.agentic.llm.image_refs import ImageRefs
+
+
+URLS = [
+    "https://cos/images/20250711072414_%E5%80%9F%E6%9D%A1.ai.jpg",
+    "https://cos/images/20250711072415_2.ai.jpg",
+]
+
+
+def test_prompt_uses_short_ids_in_image_order():
+    refs = ImageRefs(URLS + URLS[:1])
+
+    assert refs.ids == ["E1", "E2"]
+    assert refs.prompt_lines({URLS[1]: "证据类型: 身份证"}) == [
+        "E1: 第1张图片",
+        "E2: 第2张图片，证据类型: 身份证",
+    ]
+    assert not any("https://" in line for line in refs.prompt_lines())
+
+
+def test_resolve_ids_and_echoed_urls():
+    refs = ImageRefs(URLS)
+
+    assert refs.resolve("E2") == URLS[1]
+    assert refs.resolve(" e1 ") == URLS[0]
+    # 模型回显了解码后的 URL 时仍能还原为发送时的 URL
+    assert refs.resolve("https://cos/images/20250711072414_借条.ai.jpg") == URLS[0]
+    assert refs.resolve("E3") is None
+    assert refs.resolve_all(["E2", "E9", "E1"]) == [URLS[1], URLS[0]]
+
+
+def test_resolve_results_drops_unknown_ids():
+    refs = ImageRefs(URLS)
+    results = [SimpleNamespace(image_id="E2"), SimpleNamespace(image_id="E7")]
+
+    resolved = refs.resolve_results(results)
+
+    assert [r.image_url for r in resolved] == [URLS[1]]
@@ -0,0 +1,112 @@
+import asyncio
+import sys
+import unicodedata
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.cases.models import AssociationEvidenceFeature
+from app.cases.services import (
+    normalize_slot_group_name,
+    update_association_evidence_feature,
+    upsert_association_evidence_features,
+)
+from conftest import FakeSession
+
+
+def legacy_normalize(s):
+    """原 auto_process 中逐个 str.replace 的实现（仅用于对比）"""
+    s = unicodedata.normalize('NFKC', s)
+    s = ''.join(s.split())
+    replacements = {
+        '（': '(', '）': ')', '【': '[', '】': ']', '｛': '{', '｝': '}',
+        '＋': '+', '－': '-', '×': '*', '÷': '/', '＝': '=', '≠': '!=',
+        '：': ':', '；': ';', '，': ',', '。': '.', '！': '!', '？': '?',
+        '、': ',', '…': '...', '—': '-', '–': '-',
+        '『': '"', '』': '"',
+        '～': '~', '＠': '@', '＃': '#', '＄': '$', '％': '%', '＆': '&',
+        '＊': '*', '＼': '\\', '｜': '|', '／': '/',
+    }
+    for old, new in replacements.items():
+        s = s.replace(old, new)
+    return s
+
+
+def test_translate_table_matches_legacy_normalization():
+    names = [
+        "张三 与 李四 的 聊天（借款）",
+        "『还款计划』：第一期…",
+        "金额≠１０００　元\t—\n确认、签字",
+        "ＡＢＣ【附件】／｛备注｝～＠＃＄％＆＊＼｜",
+        "　借款 记录 ",
+        "",
+    ]
+    for name in names:
+        assert normalize_slot_group_name(name) == legacy_normalize(name)
+    assert normalize_slot_group_name("聊天记录（一）") == normalize_slot_group_name("聊天记录 (一)")
+
+
+def test_translate_table_removes_every_whitespace_character():
+    whitespace = "".join(chr(c) for c in range(sys.maxunicode + 1) if chr(c).isspace())
+    assert normalize_slot_group_name(f"甲{whitespace}乙") == "甲乙"
+
+
+class RenameSession(FakeSession):
+    """提交时违反 (case_id, normalized_key) 唯一约束"""
+
+    def __init__(self, feature):
+        super().__init__(rows=[feature])
+
+    async def commit(self):
+        raise IntegrityError("UPDATE association_evidence_features", {}, Exception("duplicate key"))
+
+
+def test_rename_to_existing_group_returns_conflict():
+    feature = AssociationEvidenceFeature(id=2, case_id=1, slot_group_name="乙", normalized_key="乙")
+    db = RenameSession(feature)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(update_association_evidence_feature(db, 2, {"slot_group_name": "甲 "}))
+
+    assert exc_info.value.status_code == 409
+    assert feature.normalized_key == "甲"
+    assert db.rollbacks == 1
+
+
+class UpsertSession(FakeSession):
+    def respond(self, sql, statement):
+        # 模拟 RETURNING 顺序与 VALUES 不一致
+        return [
+            AssociationEvidenceFeature(id=2, case_id=1, slot_group_name="乙", normalized_key="乙"),
+            AssociationEvidenceFeature(id=1, case_id=1, slot_group_name="甲", normalized_key="甲"),
+        ]
+
+
+def test_upsert_runs_single_on_conflict_statement():
+    now = datetime(2026, 10, 1, 12, 0, 0)
+    rows = [
+        {
+            "case_id": 1,
+            "slot_group_name": key,
+            "normalized_key": key,
+            "association_evidence_ids": [1],
+            "evidence_features": [],
+            "features_extracted_at": now,
+            "evidence_feature_status": "features_extracted",
+        }
+        for key in ("甲", "乙")
+    ]
+    db = UpsertSession()
+
+    features = asyncio.run(upsert_association_evidence_features(db, rows))
+
+    assert len(db.statements) == 1
+    sql = db.statements[0]
+    assert sql.startswith("INSERT INTO association_evidence_features")
+    assert "ON CONFLICT (case_id, normalized_key) DO UPDATE" in sql
+    assert "slot_group_name = excluded.slot_group_name" not in sql
+    assert [feature.normalized_key for feature in features] == ["甲", "乙"]
+    assert asyncio.run(upsert_association_evidence_features(db, [])) == []
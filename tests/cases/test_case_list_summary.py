@@ -0,0 +1,59 @@
+import asyncio
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.cases.models import Case
+from app.cases.services import get_multi_with_count
+from conftest import FakeSession
+
+
+class SummarySession(FakeSession):
+    """按语句类型返回数据，语句编译时内联参数"""
+
+    def __init__(self, total, page_ids):
+        super().__init__(literal_binds=True)
+        self.total = total
+        self.page_ids = page_ids
+
+    def respond(self, sql, statement):
+        if sql.startswith("SELECT count(*)"):
+            return [self.total]
+        if sql.startswith("SELECT case_search_summaries.case_id"):
+            return self.page_ids
+        if "FROM cases" in sql:
+            # 数据库返回顺序与分页顺序无关
+            return [Case(id=case_id) for case_id in sorted(self.page_ids)]
+        raise AssertionError(f"unexpected statement: {sql}")
+
+
+def test_list_filters_and_paginates_on_summary_table():
+    db = SummarySession(total=7, page_ids=[5, 2, 9])
+
+    items, total = asyncio.run(get_multi_with_count(
+        db, skip=3, limit=3, user_id=1, party_name="张", party_type="person", party_role="debtor",
+        min_loan_amount=100, sort_by="loan_amount", sort_order="asc",
+    ))
+
+    assert total == 7
+    assert [case.id for case in items] == [5, 2, 9]
+    count_sql, page_sql, cases_sql = db.statements
+    for sql in (count_sql, page_sql):
+        assert "FROM case_search_summaries" in sql
+        assert "case_partys" not in sql
+        assert "case_search_summaries.debtor_name ILIKE '%%张%%'" in sql
+        assert "case_search_summaries.debtor_type = 'person'" in sql
+        assert "creditor" not in sql
+    assert "ORDER BY case_search_summaries.loan_amount ASC, case_search_summaries.case_id ASC" in page_sql
+    assert "LIMIT 3 OFFSET 3" in page_sql
+    assert "cases.id IN (5, 2, 9)" in cases_sql
+
+
+def test_party_filter_without_role_matches_either_party():
+    db = SummarySession(total=0, page_ids=[])
+
+    items, total = asyncio.run(get_multi_with_count(db, party_type="company", sort_by="unknown"))
+
+    assert (items, total) == ([], 0)
+    # 没有结果时不再加载案件
+    count_sql, page_sql = db.statements
+    assert "case_search_summaries.creditor_type = 'company' OR case_search_summaries.debtor_type = 'company'" in count_sql
+    assert "ORDER BY case_search_summaries.case_created_at DESC, case_search_summaries.case_id DESC" in page_sql
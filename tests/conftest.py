@@ -1,7 +1,89 @@
 import sys
 from pathlib import Path
 
+from sqlalchemy.dialects import postgresql
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+
+class FakeResult:
+    """模拟 SQLAlchemy 的查询结果，rows 为返回的行（标量查询时为值列表）"""
+
+    def __init__(self, rows=None):
+        self._rows = list(rows) if rows is not None else []
+
+    def scalars(self):
+        return self
+
+    def unique(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+    def first(self):
+        return self._rows[0] if self._rows else None
+
+    def scalar_one(self):
+        return self._rows[0]
+
+    def scalar_one_or_none(self):
+        return self.first()
+
+
+class FakeSession:
+    """模拟 AsyncSession，供服务层测试共用
+
+    - 执行的语句按 PostgreSQL 方言编译后记录在 statements，执行参数记录在 params
+    - 默认每条语句都返回 rows；按语句类型返回数据的测试在子类中覆盖 respond
+    - respond 返回列表时包装为 FakeResult
+    """
+
+    def __init__(self, rows=None, literal_binds=False):
+        self.rows = rows if rows is not None else []
+        self.literal_binds = literal_binds
+        self.statements = []
+        self.params = []
+        self.added = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def compile(self, statement) -> str:
+        compile_kwargs = {"literal_binds": True} if self.literal_binds else {}
+        return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs=compile_kwargs))
+
+    def respond(self, sql, statement):
+        return self.rows
+
+    async def execute(self, statement, params=None):
+        sql = self.compile(statement)
+        self.statements.append(sql)
+        self.params.append(params)
+        result = self.respond(sql, statement)
+        return result if isinstance(result, FakeResult) else FakeResult(result)
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def expunge(self, obj):
+        pass
+
+    async def flush(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
@@ -0,0 +1,177 @@
+import asyncio
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+import app.evidence_chains.services as chain_services
+import app.evidences.services as evidence_services
+from app.cases.models import Case, CaseParty, CaseType
+from app.evidence_chains.services import EvidenceChainService
+from app.evidences.models import Evidence, EvidenceStatus
+from conftest import FakeSession
+
+UPDATED_AT = datetime(2026, 10, 1, 12, 0, 0)
+
+
+class DashboardSession(FakeSession):
+    """按语句类型返回多个案件的数据"""
+
+    def __init__(self, cases, evidences):
+        super().__init__()
+        self.cases = cases
+        self.evidences = evidences
+
+    def respond(self, sql, statement):
+        if sql.startswith("INSERT INTO evidence_chain_dashboards"):
+            return []
+        if "FROM evidence_chain_dashboards" in sql or "FROM association_evidence_features" in sql:
+            return []
+        if sql.startswith("SELECT evidences.id, evidences.file_url"):
+            return self.evidences
+        if sql.startswith("SELECT evidences.case_id, evidences.id"):
+            return [
+                SimpleNamespace(
+                    case_id=e.case_id,
+                    id=e.id,
+                    classification_category=e.classification_category,
+                    evidence_role=e.evidence_role,
+                    updated_at=e.updated_at,
+                )
+                for e in self.evidences
+            ]
+        if "FROM cases" in sql:
+            return self.cases
+        raise AssertionError(f"unexpected statement: {sql}")
+
+
+def make_case(case_id):
+    case = Case(id=case_id, case_type=CaseType.DEBT, updated_at=UPDATED_AT)
+    case.case_parties = [
+        CaseParty(id=case_id * 10 + 1, party_name="张三", party_role="creditor", party_type="person", updated_at=UPDATED_AT),
+        CaseParty(id=case_id * 10 + 2, party_name="李四", party_role="debtor", party_type="person", updated_at=UPDATED_AT),
+    ]
+    return case
+
+
+def make_evidences(case_id):
+    def features(*slots):
+        return [{"slot_name": slot, "slot_value": "有效值", "confidence": 0.9} for slot in slots]
+
+    return [
+        Evidence(
+            id=case_id * 100 + offset,
+            case_id=case_id,
+            file_name="synthetic.jpg",
+            evidence_status=EvidenceStatus.FEATURES_EXTRACTED.value,
+            classification_category=category,
+            evidence_role=role,
+            evidence_features=slots,
+            updated_at=UPDATED_AT,
+        )
+        for offset, (category, role, slots) in enumerate([
+            ("借款借条", None, features("借款金额", "借款人", "出借人")),
+            ("身份证", "creditor", features("姓名", "公民身份号码")),
+            ("微信聊天记录", None, features("欠款金额") if case_id % 2 else []),
+        ])
+    ]
+
+
+async def no_proofreading(evidence, db):
+    return evidence
+
+
+def expected_dashboard(service, case, evidences):
+    chains = [
+        service._check_evidence_chain_status(chain, evidences, [])
+        for chain in service._get_applicable_chains_for_case(case)
+    ]
+    return service._build_dashboard(case.id, chains)
+
+
+def test_batch_dashboard_loads_cases_with_set_based_queries(monkeypatch):
+    monkeypatch.setattr(evidence_services, "enhance_evidence_with_proofreading", no_proofreading)
+    cases = [make_case(case_id) for case_id in (1, 2, 3)]
+    evidences = [e for case in cases for e in make_evidences(case.id)]
+    db = DashboardSession(cases, evidences)
+    service = EvidenceChainService(db)
+
+    batch = asyncio.run(service.get_cases_evidence_dashboards([3, 1, 2, 404, 1], include_details=True))
+
+    # 案件、证据轻量列、关联特征轻量列、物化结果、完整证据（没有关联特征，不再加载）、批量回写
+    assert len(db.statements) == 6
+    assert db.statements[-1].startswith("INSERT INTO evidence_chain_dashboards")
+    assert db.commits == 1
+    assert [item.case_id for item in batch.items] == [3, 1, 2]
+    assert batch.missing_case_ids == [404]
+
+    for item in batch.items:
+        case = next(c for c in cases if c.id == item.case_id)
+        expected = expected_dashboard(service, case, [e for e in evidences if e.case_id == case.id])
+        assert item.dashboard.model_dump() == expected.model_dump()
+        assert item.overall_completion == expected.overall_completion
+        assert item.feasible_chains_count == expected.feasible_chains_count
+        assert item.activated_chains_count == expected.activated_chains_count
+        assert [chain.chain_id for chain in item.chains] == [chain.chain_id for chain in expected.chains]
+
+    compact_service = EvidenceChainService(DashboardSession([cases[0]], make_evidences(1)))
+    compact = asyncio.run(compact_service.get_cases_evidence_dashboards([1]))
+    assert compact.items[0].dashboard is None
+
+
+def test_large_batches_evaluate_in_process_pool(monkeypatch):
+    monkeypatch.setattr(evidence_services, "enhance_evidence_with_proofreading", no_proofreading)
+    monkeypatch.setattr(chain_services.settings, "EVIDENCE_CHAIN_PROCESS_POOL_THRESHOLD", 1)
+    submitted = []
+
+    class PicklingExecutor(ThreadPoolExecutor):
+        """在线程中执行，但任务和结果都经过序列化（与进程池一致）"""
+
+        def submit(self, fn, *args):
+            submitted.append(args[0])
+            return super().submit(lambda: pickle.loads(pickle.dumps(fn(*pickle.loads(pickle.dumps(args))))))
+
+    monkeypatch.setattr(chain_services, "_get_evaluation_pool", lambda: PicklingExecutor(max_workers=2))
+
+    cases = [make_case(case_id) for case_id in (1, 2)]
+    evidences = [e for case in cases for e in make_evidences(case.id)]
+    service = EvidenceChainService(DashboardSession(cases, evidences))
+
+    batch = asyncio.run(service.get_cases_evidence_dashboards([1, 2], include_details=True))
+
+    assert sorted(job[0] for job in submitted) == [1, 2]
+    for item in batch.items:
+        case = next(c for c in cases if c.id == item.case_id)
+        expected = expected_dashboard(service, case, [e for e in evidences if e.case_id == case.id])
+        assert item.dashboard.model_dump() == expected.model_dump()
+
+
+def test_pool_worker_recompiles_requirement_graph_when_caller_config_differs():
+    graph = chain_services.get_requirement_graph()
+
+    assert chain_services.evaluate_case_requirements((1, [], [], [], graph.config_digest)) == (1, {})
+    assert chain_services.get_requirement_graph() is graph
+
+    # 调用方 reload_config() 后摘要不同：worker 重新加载配置并编译，不再使用进程内缓存的要求图
+    chain_services.evaluate_case_requirements((1, [], [], [], "caller-digest"))
+    assert chain_services.get_requirement_graph() is not graph
+
+
+def test_evaluation_pool_shuts_down_at_exit(monkeypatch):
+    registered = []
+    monkeypatch.setattr(chain_services.atexit, "register", registered.append)
+    monkeypatch.setattr(chain_services.settings, "EVIDENCE_CHAIN_PROCESS_POOL_WORKERS", 1)
+    monkeypatch.setattr(chain_services, "_evaluation_pool", None)
+
+    pool = chain_services._get_evaluation_pool()
+
+    assert chain_services._get_evaluation_pool() is pool
+    assert registered == [chain_services.shutdown_evaluation_pool]
+    chain_services.shutdown_evaluation_pool()
+    assert chain_services._evaluation_pool is None
+    # 已关闭的进程池不再接受任务
+    with pytest.raises(RuntimeError):
+        pool.submit(len, [])
@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+import app.evidences.services as evidence_services
+from app.cases.models import Case, CaseParty, CaseType
+from app.evidence_chains.services import EvidenceChainService
+from app.evidences.models import Evidence, EvidenceStatus
+from conftest import FakeSession
+
+UPDATED_AT = datetime(2026, 10, 1, 12, 0, 0)
+
+
+class DashboardSession(FakeSession):
+    """按语句类型返回案件、证据（轻量列或完整对象）、关联特征和物化结果，并记录物化结果的写入"""
+
+    def __init__(self, case, evidences):
+        super().__init__()
+        self.case = case
+        self.evidences = evidences
+        self.materialized = None
+        self.full_evidence_loads = 0
+        self.saves = 0
+
+    def respond(self, sql, statement):
+        if sql.startswith("INSERT INTO evidence_chain_dashboards"):
+            self.materialized = statement.compile(dialect=postgresql.dialect()).params["requirements"]
+            self.saves += 1
+            return []
+        if "FROM evidence_chain_dashboards" in sql:
+            return [self.materialized] if self.materialized is not None else []
+        if "FROM association_evidence_features" in sql:
+            return []
+        if sql.startswith("SELECT evidences.id, evidences.file_url"):
+            self.full_evidence_loads += 1
+            return self.evidences
+        if sql.startswith("SELECT evidences.id, evidences.classification_category, evidences.evidence_role"):
+            return [
+                SimpleNamespace(
+                    id=e.id,
+                    classification_category=e.classification_category,
+                    evidence_role=e.evidence_role,
+                    updated_at=e.updated_at,
+                )
+                for e in self.evidences
+            ]
+        if "FROM cases" in sql:
+            return [self.case]
+        raise AssertionError(f"unexpected statement: {sql}")
+
+
+def make_case():
+    case = Case(id=1, case_type=CaseType.CONTRACT, updated_at=UPDATED_AT)
+    case.case_parties = [
+        CaseParty(id=1, party_name="张三", party_role="creditor", party_type="person", updated_at=UPDATED_AT),
+        CaseParty(id=2, party_name="李四", party_role="debtor", party_type="person", updated_at=UPDATED_AT),
+    ]
+    return case
+
+
+def make_evidence(evidence_id, category, features, role=None):
+    return Evidence(
+        id=evidence_id,
+        case_id=1,
+        file_name=f"{evidence_id}.jpg",
+        evidence_status=EvidenceStatus.FEATURES_EXTRACTED.value,
+        classification_category=category,
+        evidence_role=role,
+        evidence_features=features,
+        updated_at=UPDATED_AT,
+    )
+
+
+async def no_proofreading(evidence, db):
+    return evidence
+
+
+def test_dashboard_reuses_materialized_requirements(monkeypatch):
+    monkeypatch.setattr(evidence_services, "enhance_evidence_with_proofreading", no_proofreading)
+    evidences = [
+        make_evidence(1, "货款欠条", [
+            {"slot_name": "欠款金额", "slot_value": "1000", "confidence": 0.9},
+            {"slot_name": "欠款合意", "slot_value": "是", "confidence": 0.9},
+        ]),
+        make_evidence(2, "微信聊天记录", [{"slot_name": "欠款金额", "slot_value": "500", "confidence": 0.9}]),
+    ]
+    db = DashboardSession(make_case(), evidences)
+    service = EvidenceChainService(db)
+
+    first = asyncio.run(service.get_case_evidence_dashboard(1))
+    assert db.full_evidence_loads == 1
+    assert db.saves == 1
+
+    # 依赖未变化：直接复用物化结果，不再加载完整证据、不再回写
+    second = asyncio.run(service.get_case_evidence_dashboard(1))
+    assert db.full_evidence_loads == 1
+    assert db.saves == 1
+    assert second.model_dump() == first.model_dump()
+
+    # 修改一个证据后，只有匹配其证据类型的要求重算
+    evidences[0].evidence_features = [{"slot_name": "欠款金额", "slot_value": "未知", "confidence": 0.9}]
+    evidences[0].updated_at = datetime(2026, 10, 2, 12, 0, 0)
+    recomputed = []
+    original_evaluate = service._evaluate_requirement
+
+    def tracking_evaluate(node, index):
+        recomputed.append(node.types[0].evidence_type)
+        return original_evaluate(node, index)
+
+    monkeypatch.setattr(service, "_evaluate_requirement", tracking_evaluate)
+    third = asyncio.run(service.get_case_evidence_dashboard(1))
+
+    assert db.full_evidence_loads == 2
+    assert set(recomputed) == {"货款欠条"}
+    chain = next(c for c in third.chains if any(r.evidence_type == "货款欠条" for r in c.requirements))
+    requirement = next(r for r in chain.requirements if r.evidence_type == "货款欠条")
+    assert requirement.core_slots_satisfied == 0
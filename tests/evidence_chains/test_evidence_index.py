@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+from app.evidence_chains.evidence_index import EvidenceIndex, FingerprintIndex
+from app.evidence_chains.requirement_graph import TypeMatcher
+
+
+def make_evidence(evidence_id, category, role=None, features=None):
+    return SimpleNamespace(
+        id=evidence_id,
+        classification_category=category,
+        evidence_role=role,
+        evidence_features=features or [],
+    )
+
+
+def test_lookups_keep_original_order_across_aliases():
+    evidences = [
+        make_evidence(1, "身份证", "creditor"),
+        make_evidence(2, "微信聊天记录"),
+        make_evidence(3, "居民身份证", "debtor"),
+        make_evidence(4, " 身份证 ", "debtor"),
+        make_evidence(5, None),
+    ]
+    index = EvidenceIndex(evidences)
+    matcher = TypeMatcher.of("身份证")
+
+    assert [e.id for e in index.evidences_for(matcher)] == [1, 3, 4]
+    assert [e.id for e in index.evidences_for_role(matcher, "debtor")] == [3, 4]
+    assert index.evidences_for(TypeMatcher.of("借款借条")) == []
+    assert index.get(2) is evidences[1]
+
+
+def test_associations_match_by_referenced_evidence_categories():
+    evidences = [make_evidence(1, "微信聊天记录"), make_evidence(2, "身份证")]
+    associations = [
+        SimpleNamespace(id=1, association_evidence_ids=[1, 99]),
+        SimpleNamespace(id=2, association_evidence_ids=[2]),
+        SimpleNamespace(id=3, association_evidence_ids=None),
+    ]
+    index = EvidenceIndex(evidences, associations)
+
+    assert [a.id for a in index.associations_for(TypeMatcher.of("微信聊天记录"))] == [1]
+    assert [a.id for a in index.associations_for(TypeMatcher.of("身份证"))] == [2]
+
+
+def test_fingerprint_index_buckets_rows_by_category():
+    evidences = [
+        make_evidence(1, "身份证"),
+        make_evidence(2, "微信聊天记录"),
+        make_evidence(3, "居民身份证"),
+        make_evidence(4, None),
+    ]
+    associations = [
+        SimpleNamespace(id=1, association_evidence_ids=[2, 3, 3]),
+        SimpleNamespace(id=2, association_evidence_ids=[2]),
+        SimpleNamespace(id=3, association_evidence_ids=None),
+    ]
+    index = FingerprintIndex(evidences, associations)
+    node = SimpleNamespace(types=(
+        SimpleNamespace(matcher=TypeMatcher.of("身份证")),
+        SimpleNamespace(matcher=TypeMatcher.of("微信聊天记录")),
+    ))
+
+    assert sorted(e.id for e in index.evidence_rows_for(node)) == [1, 2, 3]
+    assert index.categories_for(TypeMatcher.of("身份证")) == {"身份证", "居民身份证"}
+    # 同一关联特征引用多个匹配的证据时只返回一次
+    assert sorted(a.id for a in index.association_rows_for({1, 2, 3})) == [1, 2]
+    assert index.association_rows_for({1}) == []
+
+
+def test_slot_features_follow_duplicate_slot_semantics():
+    evidence = make_evidence(1, "借款借条", features=[
+        {"slot_name": "借款金额", "slot_value": "100"},
+        {"slot_name": "借款人", "slot_value": "张三"},
+        {"slot_name": "借款金额", "slot_value": "200"},
+    ])
+    index = EvidenceIndex([evidence])
+
+    # 分组统计取最后一个同名特征，槽位详情取第一个
+    assert list(index.slot_features(evidence)) == ["借款金额", "借款人"]
+    assert index.slot_features(evidence)["借款金额"]["slot_value"] == "200"
+    assert index.first_slot_feature(evidence, "借款金额")["slot_value"] == "100"
+    assert index.first_slot_feature(evidence, "出借人") is None
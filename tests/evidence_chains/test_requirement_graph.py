@@ -0,0 +1,56 @@
+from app.core.config_manager import config_manager
+from app.evidence_chains.requirement_graph import PARTY_TYPE_LABELS, RequirementGraph, get_requirement_graph
+
+
+def legacy_applicable_chain_ids(case_type, creditor_type, debtor_type):
+    """原 _get_applicable_chains_for_case 中的逐条字符串比较（仅用于对比）"""
+    chains = config_manager.get_evidence_chains_by_case_type(case_type)
+    if not creditor_type or not debtor_type:
+        return [chain["chain_id"] for chain in chains]
+    return [
+        chain["chain_id"] for chain in chains
+        if chain.get("applicable_creditor_type") == PARTY_TYPE_LABELS[creditor_type]
+        and chain.get("applicable_debtor_type") == PARTY_TYPE_LABELS[debtor_type]
+    ]
+
+
+def test_chains_indexed_by_case_profile_match_legacy_filtering():
+    graph = get_requirement_graph()
+    for case_type in ("debt", "contract"):
+        for creditor_type in (None, *PARTY_TYPE_LABELS):
+            for debtor_type in (None, *PARTY_TYPE_LABELS):
+                chain_ids = [chain.chain_id for chain in graph.chains_for(case_type, creditor_type, debtor_type)]
+                assert chain_ids == legacy_applicable_chain_ids(case_type, creditor_type, debtor_type)
+    assert graph.chains_for(None) == ()
+
+
+def test_or_groups_are_merged_and_slots_precomputed():
+    graph = RequirementGraph(
+        [{
+            "chain_id": "测试证据链",
+            "applicable_case_types": ["debt"],
+            "applicable_creditor_type": "个人",
+            "applicable_debtor_type": "个人",
+            "required_evidence_types": [
+                {"evidence_type": "借款借条", "core_evidence_slot": ["借款金额"]},
+                {"evidence_type": "身份证", "role_group": ["creditor", "debtor"], "or_group": "居民身份"},
+                {"evidence_type": "中华人民共和国居民户籍档案", "or_group": "居民身份"},
+            ],
+        }],
+        {
+            "iou": {"type": "借款借条", "extraction_slots": [
+                {"slot_name": "借款金额"}, {"slot_name": "借款日期", "slot_required": False},
+            ]},
+            "id_card": {"type": "身份证", "supported_roles": ["creditor", "debtor"], "extraction_slots": [{"slot_name": "姓名"}]},
+        },
+    )
+
+    chain, = graph.chains_for("debt", "person", "person")
+    iou, identity = chain.requirements
+    assert (iou.kind, identity.kind) == ("evidence_type", "or_group")
+    assert iou.types[0].required_slots == ("借款金额",)
+    assert iou.types[0].extraction_slots == ("借款金额", "借款日期")
+    assert [t.evidence_type for t in identity.types] == ["身份证", "中华人民共和国居民户籍档案"]
+    assert identity.matches("户口簿") and not identity.matches("借条")
+    assert iou.matches("借条") and not iou.matches("货款欠条")
+    assert graph.supported_roles == {"身份证": ("creditor", "debtor")}
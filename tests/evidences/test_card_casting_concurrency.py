@@ -0,0 +1,194 @@
+import asyncio
+from types import SimpleNamespace
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.agentic.agents.evidence_extractor_v2 import EvidenceExtractionResults, ResultItem, SlotExtraction
+from app.evidences import services as evidence_services
+from conftest import FakeSession
+
+
+def make_evidence(evidence_id):
+    return SimpleNamespace(
+        id=evidence_id,
+        file_extension="jpg",
+        ai_image_url=f"https://cos.com/images/{evidence_id}.ai.jpg",
+    )
+
+
+class FakeExtractor:
+    """单张图片的 Agent 提取：证据 3 永不返回，其余证据记录并发数后返回一个词槽"""
+
+    active = 0
+    max_active = 0
+
+    async def arun(self, images):
+        assert len(images) == 1
+        url = images[0].url
+        FakeExtractor.active += 1
+        FakeExtractor.max_active = max(FakeExtractor.max_active, FakeExtractor.active)
+        try:
+            if url.endswith("/3.ai.jpg"):
+                await asyncio.sleep(60)
+            await asyncio.sleep(0.05)
+        finally:
+            FakeExtractor.active -= 1
+        item = ResultItem(
+            image_id="E1",
+            image_url=url,
+            classification_category="借条",
+            slot_extraction=[SlotExtraction(
+                slot_name="借款金额", slot_desc="", slot_value_type="number",
+                slot_required=True, slot_value=100, confidence=0.9, reasoning="",
+            )],
+        )
+        return SimpleNamespace(content=EvidenceExtractionResults(results=[item]))
+
+
+def test_agent_cards_run_concurrently_and_timeouts_are_isolated(monkeypatch):
+    evidences = [make_evidence(i) for i in range(1, 5)]
+    created = []
+
+    async def fake_get_multi_by_ids(db, ids):
+        return evidences
+
+    async def fake_classify(urls):
+        return SimpleNamespace(
+            results=[SimpleNamespace(image_url=url, evidence_type="借条") for url in urls],
+            failed_image_urls=[],
+        )
+
+    async def fake_update_or_create(db, case_id, evidence_ids, card_info):
+        if evidence_ids == [4]:
+            raise RuntimeError("写入失败")
+        card = SimpleNamespace(
+            id=len(created) + 1, evidence_ids=evidence_ids, card_info=card_info,
+            updated_times=0, created_at=None, updated_at=None,
+        )
+        created.append(card)
+        return card
+
+    monkeypatch.setattr(evidence_services, "get_multi_by_ids", fake_get_multi_by_ids)
+    monkeypatch.setattr(evidence_services, "classify_evidences_sharded", fake_classify)
+    monkeypatch.setattr(evidence_services, "EvidenceFeaturesExtractor", FakeExtractor)
+    monkeypatch.setattr(evidence_services.EvidenceCard, "update_or_create", fake_update_or_create)
+    monkeypatch.setattr(evidence_services.settings, "EVIDENCE_CARD_FEATURE_TIMEOUT", 0.5)
+    db = FakeSession()
+
+    cards = asyncio.run(evidence_services.evidence_card_casting(db, case_id=1, evidence_ids=[1, 2, 3, 4]))
+
+    assert FakeExtractor.max_active > 1
+    features = {card["evidence_ids"][0]: card["card_info"]["card_features"] for card in cards}
+    # 证据 3 超时只留下空特征，证据 4 写入失败被回滚，其余卡片照常提交
+    assert set(features) == {1, 2, 3}
+    assert features[1][0]["slot_value"] == 100
+    assert features[3] == []
+    assert db.rollbacks == 1
+
+
+def test_association_extraction_does_not_hold_card_extraction_slots(monkeypatch):
+    import app.agentic.agents.association_features_extractor_v2 as association_module
+
+    evidences = [make_evidence(1), make_evidence(2)]
+    card_extracted = asyncio.Event()
+
+    async def fake_get_multi_by_ids(db, ids):
+        return evidences
+
+    async def fake_classify(urls):
+        types = {"https://cos.com/images/1.ai.jpg": "借条", "https://cos.com/images/2.ai.jpg": "微信聊天记录"}
+        return SimpleNamespace(
+            results=[SimpleNamespace(image_url=url, evidence_type=types[url]) for url in urls],
+            failed_image_urls=[],
+        )
+
+    class CardExtractor(FakeExtractor):
+        async def arun(self, images):
+            result = await super().arun(images)
+            card_extracted.set()
+            return result
+
+    class BlockingAssociationExtractor:
+        """关联提取在单卡提取完成前不返回：若两者共用并发名额且上限为1，会一直等到超时"""
+
+        async def arun(self, urls):
+            await card_extracted.wait()
+            return SimpleNamespace(content=None, run_id="run")
+
+    async def fake_update_or_create(db, case_id, evidence_ids, card_info):
+        return SimpleNamespace(
+            id=evidence_ids[0], evidence_ids=evidence_ids, card_info=card_info,
+            updated_times=0, created_at=None, updated_at=None,
+        )
+
+    monkeypatch.setattr(evidence_services, "get_multi_by_ids", fake_get_multi_by_ids)
+    monkeypatch.setattr(evidence_services, "classify_evidences_sharded", fake_classify)
+    monkeypatch.setattr(evidence_services, "EvidenceFeaturesExtractor", CardExtractor)
+    monkeypatch.setattr(association_module, "AssociationFeaturesExtractor", BlockingAssociationExtractor)
+    monkeypatch.setattr(evidence_services.EvidenceCard, "update_or_create", fake_update_or_create)
+    monkeypatch.setattr(evidence_services.settings, "EVIDENCE_CLASSIFY_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(evidence_services.settings, "EVIDENCE_ASSOCIATION_TIMEOUT", 2.0)
+
+    async def run():
+        return await asyncio.wait_for(
+            evidence_services.evidence_card_casting(
+                FakeSession(), case_id=1, evidence_ids=[1, 2], raise_on_extraction_error=True
+            ),
+            timeout=5,
+        )
+
+    cards = asyncio.run(run())
+
+    assert card_extracted.is_set()
+    assert {card["evidence_ids"][0] for card in cards} == {1, 2}
+
+
+def test_failed_association_extraction_cancels_card_extraction(monkeypatch):
+    import app.agentic.agents.association_features_extractor_v2 as association_module
+
+    evidences = [make_evidence(1), make_evidence(2)]
+    card_started = asyncio.Event()
+    card_cancelled = []
+
+    async def fake_get_multi_by_ids(db, ids):
+        return evidences
+
+    async def fake_classify(urls):
+        types = {"https://cos.com/images/1.ai.jpg": "借条", "https://cos.com/images/2.ai.jpg": "微信聊天记录"}
+        return SimpleNamespace(
+            results=[SimpleNamespace(image_url=url, evidence_type=types[url]) for url in urls],
+            failed_image_urls=[],
+        )
+
+    class HangingExtractor:
+        async def arun(self, images):
+            card_started.set()
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                card_cancelled.append(images[0].url)
+                raise
+
+    class FailingAssociationExtractor:
+        async def arun(self, urls):
+            await card_started.wait()
+            raise RuntimeError("关联提取失败")
+
+    monkeypatch.setattr(evidence_services, "get_multi_by_ids", fake_get_multi_by_ids)
+    monkeypatch.setattr(evidence_services, "classify_evidences_sharded", fake_classify)
+    monkeypatch.setattr(evidence_services, "EvidenceFeaturesExtractor", HangingExtractor)
+    monkeypatch.setattr(association_module, "AssociationFeaturesExtractor", FailingAssociationExtractor)
+
+    async def run():
+        try:
+            await evidence_services.evidence_card_casting(
+                FakeSession(), case_id=1, evidence_ids=[1, 2], raise_on_extraction_error=True
+            )
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("关联提取失败时应抛出异常")
+        # 函数退出时单卡提取已被取消，不再有后台任务
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
+    assert card_cancelled == ["https://cos.com/images/1.ai.jpg"]
@@ -0,0 +1,122 @@
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.evidences.services import plan_card_casting_groups
+from app.tasks import real_evidence_tasks
+
+
+CLASSIFIED = {1: "借条", 2: "微信聊天记录", 3: "身份证", 4: "微信聊天记录"}
+
+
+def make_card(card_id, evidence_ids, associated=False):
+    return {
+        "id": card_id,
+        "evidence_ids": evidence_ids,
+        "card_info": {"card_type": "借条", "card_is_associated": associated, "card_features": [{}]},
+        "updated_times": 0,
+        "created_at": None,
+        "updated_at": None,
+    }
+
+
+def test_wechat_evidences_are_cast_together_and_others_one_per_group():
+    assert plan_card_casting_groups(CLASSIFIED) == [[2, 4], [1], [3]]
+    assert plan_card_casting_groups({}) == []
+
+
+def test_chord_has_one_subtask_per_group_with_known_ids():
+    groups = plan_card_casting_groups(CLASSIFIED)
+
+    fanout = real_evidence_tasks.build_card_casting_chord("parent", 7, [1, 2, 3, 4], groups, CLASSIFIED)
+
+    header = list(fanout.tasks)
+    assert len(header) == 3
+    subtask_ids = [sig.options["task_id"] for sig in header]
+    assert header[0].kwargs["classified_types"] == [[2, "微信聊天记录"], [4, "微信聊天记录"]]
+    assert all(sig.kwargs["subtask_ids"] == subtask_ids for sig in header)
+    assert all(sig.kwargs["parent_task_id"] == "parent" for sig in header)
+    assert fanout.body.task == "app.tasks.real_evidence_tasks.aggregate_card_casting_task"
+
+
+def test_merge_keeps_successful_cards_and_lists_failed_groups():
+    result = real_evidence_tasks.merge_card_casting_results(7, [1, 2, 3, 4], [
+        {"status": "success", "evidence_ids": [2, 4], "cards": [make_card(10, [2, 4], associated=True)]},
+        {"status": "failed", "evidence_ids": [1], "cards": [], "error": "超时"},
+        {"status": "success", "evidence_ids": [3], "cards": [make_card(11, [3])]},
+    ])
+
+    assert [card["id"] for card in result["cards"]] == [10, 11]
+    assert result["summary"] == {"total_cards": 2, "associated_cards": 1, "single_cards": 1, "failed_groups": 1}
+    assert result["failed_evidence_ids"] == [1]
+
+
+def test_casting_with_classified_types_skips_classification(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    from app.evidences import services as evidence_services
+
+    evidences = [
+        SimpleNamespace(id=i, file_extension="jpg", ai_image_url=f"https://cos.com/{i}.ai.jpg") for i in (1, 3)
+    ]
+    created = []
+
+    async def fake_get_multi_by_ids(db, ids):
+        return [evidence for evidence in evidences if evidence.id in ids]
+
+    async def fail_classify(urls):
+        raise AssertionError("不应重复分类")
+
+    async def fake_update_or_create(db, case_id, evidence_ids, card_info):
+        created.append((evidence_ids, card_info["card_type"]))
+        return SimpleNamespace(id=len(created), evidence_ids=evidence_ids, card_info=card_info,
+                               updated_times=0, created_at=None, updated_at=None)
+
+    monkeypatch.setattr(evidence_services, "get_multi_by_ids", fake_get_multi_by_ids)
+    monkeypatch.setattr(evidence_services, "classify_evidences_sharded", fail_classify)
+    class EmptyExtractor:
+        async def arun(self, images):
+            return SimpleNamespace(content=None)
+
+    monkeypatch.setattr(evidence_services, "EvidenceFeaturesExtractor", EmptyExtractor)
+    monkeypatch.setattr(evidence_services.EvidenceCard, "update_or_create", fake_update_or_create)
+
+    # 未分类的证据 3 不铸造卡片
+    cards = asyncio.run(evidence_services.evidence_card_casting(
+        None, case_id=7, evidence_ids=[1, 3], classified_types={1: "借条"},
+    ))
+
+    assert len(cards) == 1
+    assert created == [([1], "借条")]
+
+
+class FakeBackend:
+    """模拟结果后端的原子计数器和进度写入"""
+
+    def __init__(self):
+        self.counters = {}
+        self.stored = []
+
+    def incr(self, key):
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, key):
+        self.counters.pop(key, None)
+
+    def store_result(self, task_id, meta, state):
+        self.stored.append((task_id, meta["progress"], state))
+
+
+def test_progress_counts_finished_subtasks_with_atomic_counter():
+    from types import SimpleNamespace
+
+    backend = FakeBackend()
+    subtask_ids = ["a", "b", "c", "d"]
+    for subtask_id in subtask_ids + ["d"]:  # 最后一个子任务被重新投递
+        task = SimpleNamespace(backend=backend, request=SimpleNamespace(id=subtask_id))
+        real_evidence_tasks._report_card_casting_progress(task, "parent", subtask_ids)
+
+    assert [progress for _, progress, _ in backend.stored] == ["38", "57", "76", "95", "95"]
+    assert all(task_id == "parent" and state == "PROGRESS" for task_id, _, state in backend.stored)
@@ -0,0 +1,62 @@
+import asyncio
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.evidences.models import EvidenceCard
+from app.evidences.services import (
+    card_integrity,
+    card_to_response,
+    mark_cards_for_deleted_evidences,
+    refresh_card_integrity,
+)
+from conftest import FakeSession
+
+
+def test_card_integrity_uses_materialized_indices():
+    card = EvidenceCard(id=1, evidence_ids=[5, 6, 7], abnormal_indices=[1], is_normal=False, updated_times=0)
+
+    assert card_integrity(card) == ([5, 7], True, [1])
+
+    response = card_to_response(card)
+    assert response.evidence_ids == [5, 7]
+    assert response.all_evidence_ids == [5, 6, 7]
+    assert response.is_normal is False
+    assert response.abnormal_sequence_numbers == [1]
+
+
+def test_mark_cards_for_deleted_evidences_merges_existing_indices():
+    # 成员索引行：(card_id, position, abnormal_indices)
+    db = FakeSession([(1, 2, [0]), (2, 0, [])])
+
+    updated = asyncio.run(mark_cards_for_deleted_evidences(db, [7]))
+
+    assert updated == 2
+    assert db.params[-1] == [
+        {"id": 1, "abnormal_indices": [0, 2], "is_normal": False},
+        {"id": 2, "abnormal_indices": [0], "is_normal": False},
+    ]
+
+
+def test_sync_members_rebuilds_positions():
+    db = FakeSession([])
+    card = EvidenceCard(id=3, evidence_ids=[9, 4, 9])
+
+    asyncio.run(card.sync_members(db))
+
+    assert db.statements[0].startswith("DELETE FROM evidence_card_members")
+    assert db.params[-1] == [
+        {"card_id": 3, "evidence_id": 9, "position": 0},
+        {"card_id": 3, "evidence_id": 4, "position": 1},
+        {"card_id": 3, "evidence_id": 9, "position": 2},
+    ]
+
+
+def test_refresh_card_integrity_uses_dangling_members():
+    # 左连接证据表得到的悬空成员行：(card_id, position)
+    db = FakeSession([(1, 0), (1, 2)])
+    cards = [EvidenceCard(id=1, evidence_ids=[5, 6, 7]), EvidenceCard(id=2, evidence_ids=[8])]
+
+    asyncio.run(refresh_card_integrity(db, cards))
+
+    assert "LEFT OUTER JOIN evidences" in db.statements[0]
+    assert (cards[0].abnormal_indices, cards[0].is_normal) == ([0, 2], False)
+    assert (cards[1].abnormal_indices, cards[1].is_normal) == ([], True)
@@ -0,0 +1,44 @@
+import asyncio
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.cases.models import Case, CaseParty
+from app.evidences.models import EvidenceCard
+from app.evidences.services import _proofread_slot_cards, get_compiled_card_slot_rules
+
+
+def make_card(card_id, card_type, name):
+    return EvidenceCard(
+        id=card_id,
+        evidence_ids=[card_id],
+        card_info={
+            "card_type": card_type,
+            "card_features": [{"slot_name": "姓名", "slot_value": name}],
+        },
+    )
+
+
+def test_compiled_card_slot_rules_are_cached_per_config():
+    rules = get_compiled_card_slot_rules()
+
+    assert get_compiled_card_slot_rules() is rules
+    slot_names = [slot_name for slot_name, _, _ in rules["身份证"]]
+    assert "姓名" in slot_names
+
+
+def test_batch_proofread_shares_case_and_reports_errors_per_slot():
+    case = Case(id=1, case_parties=[
+        CaseParty(party_role="debtor", party_type="person", party_name="张三", name="张三"),
+    ])
+    slot_cards = {
+        "slot::debtor::身份证::0": make_card(10, "身份证", "张三"),
+        "slot::debtor::身份证::1": make_card(11, "身份证", "李四"),
+        "slot::debtor::借款借条::0": make_card(12, "身份证", "张三"),
+    }
+
+    results, errors = asyncio.run(_proofread_slot_cards(case, "模板", slot_cards))
+
+    assert results["slot::debtor::身份证::0"].overall_consistency is True
+    assert results["slot::debtor::身份证::1"].overall_consistency is False
+    assert results["slot::debtor::身份证::1"].card_id == 11
+    assert set(errors) == {"slot::debtor::借款借条::0"}
+    assert "卡片类型不匹配" in errors["slot::debtor::借款借条::0"]
@@ -0,0 +1,44 @@
+import asyncio
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.cases.models import CaseType
+from app.core.config_manager import config_manager
+from app.evidences import services as evidence_services
+from conftest import FakeSession
+
+
+def test_templates_are_memoized_per_party_types_and_config():
+    first = evidence_services.resolve_evidence_card_slot_templates("debt", "person", "company")
+
+    assert evidence_services.resolve_evidence_card_slot_templates("debt", "person", "company") is first
+    assert evidence_services.resolve_evidence_card_slot_templates("debt", "person", "person") is not first
+    assert first["templates"]
+
+    config_manager.reload_evidence_card_slots_config()
+    reloaded = evidence_services.resolve_evidence_card_slot_templates("debt", "person", "company")
+    assert reloaded is not first
+    assert reloaded == first
+
+
+def test_case_templates_use_one_attribute_query():
+    db = FakeSession([
+        (CaseType.DEBT, "creditor", "person"),
+        (CaseType.DEBT, "debtor", "company"),
+    ])
+
+    response = asyncio.run(evidence_services.get_evidence_card_slot_templates(db, 5))
+
+    assert len(db.statements) == 1
+    assert response.case_id == 5
+    assert response.templates == evidence_services.resolve_evidence_card_slot_templates(
+        "debt", "person", "company"
+    )["templates"]
+
+
+def test_case_without_cause_has_no_templates():
+    db = FakeSession([(None, None, None)])
+
+    response = asyncio.run(evidence_services.get_evidence_card_slot_templates(db, 5))
+
+    assert response.templates == []
+    assert response.case_cause is None
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytz
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+import app.tasks.cos_outbox_tasks as outbox_tasks
+from app.core.config import settings
+from app.evidences.models import CosDeletionOutbox
+from conftest import FakeSession
+
+
+def object_url(key):
+    return f"{settings.COS_BUCKET_SERVICE}/{key}"
+
+
+class OutboxSession(FakeSession):
+    """锁定发件箱记录返回给定的行，引用检查返回给定的 (file_url, ai_file_url)"""
+
+    def __init__(self, rows, referenced=()):
+        super().__init__(literal_binds=True)
+        self.outbox_rows = rows
+        self.referenced = list(referenced)
+
+    def respond(self, sql, statement):
+        if sql.startswith("SELECT cos_deletion_outbox"):
+            return self.outbox_rows
+        if sql.startswith("SELECT evidences.file_url, evidences.ai_file_url"):
+            return self.referenced
+        if sql.startswith("DELETE FROM cos_deletion_outbox"):
+            return []
+        raise AssertionError(f"unexpected statement: {sql}")
+
+
+def use_session(monkeypatch, db, delete_result):
+    deleted = []
+
+    def fake_batch_delete(keys):
+        deleted.append(list(keys))
+        return delete_result
+
+    monkeypatch.setattr(outbox_tasks, "async_session_factory", lambda: db)
+    monkeypatch.setattr(outbox_tasks.cos_service, "batch_delete_files", fake_batch_delete)
+    return deleted
+
+
+def test_drain_skips_referenced_objects_and_removes_finished_rows(monkeypatch):
+    rows = [
+        CosDeletionOutbox(id=1, object_key="shared.jpg", attempts=0),
+        CosDeletionOutbox(id=2, object_key="gone.jpg", attempts=0),
+        CosDeletionOutbox(id=3, object_key="broken.jpg", attempts=2),
+    ]
+    # 去重后 shared.jpg 被新证据复用为AI衍生图
+    db = OutboxSession(rows, referenced=[(object_url("other.jpg"), object_url("shared.jpg"))])
+    deleted = use_session(monkeypatch, db, {"successful": ["gone.jpg"], "failed": ["broken.jpg: AccessDenied"]})
+
+    started = datetime.now(pytz.utc)
+    stats = asyncio.run(outbox_tasks._drain_once(10))
+
+    assert stats == {"deleted": 1, "failed": 1, "skipped": 1}
+    assert deleted == [["gone.jpg", "broken.jpg"]]
+    # 已删除和仍被引用的记录从发件箱移除，失败的记录保留等待重试
+    assert db.statements[-1].startswith("DELETE FROM cos_deletion_outbox")
+    assert "cos_deletion_outbox.id IN (1, 2)" in db.statements[-1]
+    assert db.commits == 1
+    failed = rows[2]
+    assert failed.attempts == 3
+    assert failed.last_error == "broken.jpg: AccessDenied"
+    assert started + timedelta(seconds=120) <= failed.next_attempt_at <= datetime.now(pytz.utc) + timedelta(seconds=120)
+
+
+def test_drain_only_locks_due_rows_below_max_attempts(monkeypatch):
+    monkeypatch.setattr(outbox_tasks.settings, "COS_DELETION_MAX_ATTEMPTS", 4)
+    db = OutboxSession([])
+    deleted = use_session(monkeypatch, db, {"successful": [], "failed": []})
+
+    assert asyncio.run(outbox_tasks._drain_once(50)) == {"deleted": 0, "failed": 0, "skipped": 0}
+
+    assert len(db.statements) == 1
+    sql = db.statements[0]
+    assert "cos_deletion_outbox.next_attempt_at <= " in sql
+    assert "cos_deletion_outbox.attempts < 4" in sql
+    assert "LIMIT 50 FOR UPDATE SKIP LOCKED" in sql
+    assert deleted == []
+
+
+def test_retry_delay_backs_off_exponentially_up_to_one_hour():
+    assert [outbox_tasks.retry_delay(n).total_seconds() for n in range(1, 6)] == [30, 60, 120, 240, 480]
+    assert outbox_tasks.retry_delay(20) == timedelta(hours=1)
+
+
+def test_drain_stops_on_partial_or_fully_failed_batch(monkeypatch):
+    batches = []
+
+    async def fake_drain_once(batch_size):
+        batches.append(batch_size)
+        return results.pop(0)
+
+    monkeypatch.setattr(outbox_tasks, "_drain_once", fake_drain_once)
+
+    results = [
+        {"deleted": 2, "failed": 0, "skipped": 0},
+        {"deleted": 1, "failed": 0, "skipped": 0},
+    ]
+    totals = asyncio.run(outbox_tasks.drain_cos_deletion_outbox(batch_size=2))
+    assert totals == {"deleted": 3, "failed": 0, "skipped": 0}
+    assert batches == [2, 2]
+
+    # 整批失败时不再继续，等待退避后重试
+    batches.clear()
+    results = [{"deleted": 0, "failed": 2, "skipped": 0}, {"deleted": 2, "failed": 0, "skipped": 0}]
+    totals = asyncio.run(outbox_tasks.drain_cos_deletion_outbox(batch_size=2))
+    assert totals == {"deleted": 0, "failed": 2, "skipped": 0}
+    assert batches == [2]
@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.evidences import services as evidence_services
+from conftest import FakeSession
+
+
+class DeleteSession(FakeSession):
+    """DELETE 证据返回给定的行，其余语句返回空结果"""
+
+    def respond(self, sql, statement):
+        return self.rows if len(self.statements) == 1 else []
+
+
+def make_row(evidence_id, category="身份证"):
+    return SimpleNamespace(
+        id=evidence_id,
+        file_url=f"https://cos.com/images/{evidence_id}.jpg",
+        ai_file_url=None,
+        classification_category=category,
+    )
+
+
+def test_batch_delete_uses_constant_number_of_statements(monkeypatch):
+    monkeypatch.setattr(evidence_services, "trigger_object_deletion_drain", lambda: None)
+    evidence_ids = list(range(1, 501))
+    rows = [make_row(i, "微信聊天记录" if i % 2 else "身份证") for i in evidence_ids[:-1]]
+    db = DeleteSession(rows)
+
+    data = asyncio.run(evidence_services.batch_delete(db, evidence_ids))
+
+    # 删除证据、查找引用卡片、删除关联特征、检查共享文件
+    assert len(db.statements) == 4
+    assert db.statements[0].startswith("DELETE FROM evidences") and "RETURNING" in db.statements[0]
+    assert "FROM evidence_card_members JOIN evidence_cards" in db.statements[1]
+    assert db.statements[2].startswith("DELETE FROM association_evidence_features")
+    assert db.commits == 1
+    assert len(db.added) == 499
+    assert data["successful"] == evidence_ids[:-1]
+    assert data["failed"] == ["证据ID 500 不存在"]
+    assert data["results"][-1] == {"evidence_id": 500, "success": False, "message": "证据不存在"}
+
+
+def test_batch_delete_skips_association_cleanup_without_wechat_evidences(monkeypatch):
+    monkeypatch.setattr(evidence_services, "trigger_object_deletion_drain", lambda: None)
+    db = DeleteSession([make_row(1)])
+
+    data = asyncio.run(evidence_services.batch_delete(db, [1]))
+
+    assert len(db.statements) == 3
+    assert not any("association_evidence_features" in statement for statement in db.statements)
+    assert data["results"] == [{"evidence_id": 1, "success": True, "message": "删除成功"}]
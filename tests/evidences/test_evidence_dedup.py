@@ -0,0 +1,45 @@
+import hashlib
+import io
+from datetime import datetime
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.evidences.models import Evidence, EvidenceStatus
+from app.evidences.services import _reuse_evidence, compute_content_hash
+
+
+def test_compute_content_hash_reads_in_chunks_and_rewinds():
+    data = b"wechat-screenshot" * 1000
+    file = io.BytesIO(data)
+    file.read(5)
+
+    assert compute_content_hash(file, chunk_size=64) == hashlib.sha256(data).hexdigest()
+    assert file.tell() == 0
+
+
+def test_reuse_evidence_copies_file_and_ai_results_but_not_case_specific_fields():
+    source = Evidence(
+        id=1,
+        case_id=100,
+        file_url="https://bucket.cos.ap-guangzhou.myqcloud.com/images/a.png",
+        ai_file_url="https://bucket.cos.ap-guangzhou.myqcloud.com/images/a.ai.jpg",
+        file_name="a.png",
+        file_size=1024,
+        file_extension="png",
+        evidence_role="creditor",
+        classification_category="微信聊天记录",
+        classification_confidence=0.9,
+        classified_at=datetime.now(),
+        evidence_features=[{"slot_name": "金额", "slot_value": "100", "slot_is_consistent": False}],
+        features_extracted_at=datetime.now(),
+    )
+
+    reused = _reuse_evidence(source, "a(1).png", case_id=200, content_hash="abc")
+
+    assert reused.file_url == source.file_url
+    assert reused.ai_file_url == source.ai_file_url
+    assert reused.case_id == 200
+    assert reused.file_name == "a(1).png"
+    assert reused.evidence_role is None
+    assert reused.classification_category == "微信聊天记录"
+    assert reused.evidence_features == [{"slot_name": "金额", "slot_value": "100"}]
+    assert reused.evidence_status == EvidenceStatus.FEATURES_EXTRACTED.value
@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.evidences.services import load_evidences_by_ids, load_evidences_by_urls
+from conftest import FakeSession
+
+
+def make_evidence(evidence_id, file_url=None):
+    return SimpleNamespace(id=evidence_id, file_url=file_url or f"https://cos.com/{evidence_id}.jpg")
+
+
+def test_load_by_ids_preserves_input_order_and_reports_missing():
+    db = FakeSession([make_evidence(3), make_evidence(1)])
+
+    evidences, missing = asyncio.run(load_evidences_by_ids(db, [1, "3", 2, 1], case_id=7))
+
+    assert len(db.statements) == 1
+    assert [e.id for e in evidences] == [1, 3]
+    assert missing == [2]
+
+
+def test_load_by_ids_skips_query_for_empty_input():
+    db = FakeSession([])
+
+    assert asyncio.run(load_evidences_by_ids(db, [])) == ([], [])
+    assert len(db.statements) == 0
+
+
+def test_load_by_urls_keeps_first_evidence_for_shared_url():
+    shared = "https://cos.com/shared.jpg"
+    db = FakeSession([make_evidence(2, shared), make_evidence(5, shared), make_evidence(6)])
+
+    evidences, missing = asyncio.run(load_evidences_by_urls(db, ["https://cos.com/6.jpg", shared, "https://cos.com/x.jpg"]))
+
+    assert len(db.statements) == 1
+    assert [(url, e.id) for url, e in evidences.items()] == [("https://cos.com/6.jpg", 6), (shared, 2)]
+    assert missing == ["https://cos.com/x.jpg"]
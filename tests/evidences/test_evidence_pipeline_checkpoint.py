@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.evidences import services as evidence_services
+from app.evidences.models import Evidence, EvidenceStatus
+from app.evidences.services import has_reached_stage
+from conftest import FakeSession
+
+
+def make_evidence(status, category=None):
+    return Evidence(evidence_status=status, classification_category=category)
+
+
+def test_uploaded_evidence_has_not_reached_classification():
+    assert not has_reached_stage(make_evidence(EvidenceStatus.UPLOADED.value), EvidenceStatus.CLASSIFIED)
+
+
+def test_later_stages_count_as_classified():
+    for status in (EvidenceStatus.CLASSIFIED, EvidenceStatus.FEATURES_EXTRACTED, EvidenceStatus.CHECKED):
+        assert has_reached_stage(make_evidence(status.value, "身份证"), EvidenceStatus.CLASSIFIED)
+
+
+def test_classified_status_without_category_is_not_a_checkpoint():
+    assert not has_reached_stage(make_evidence(EvidenceStatus.CLASSIFIED.value), EvidenceStatus.CLASSIFIED)
+
+
+def test_classified_evidence_has_not_reached_feature_extraction():
+    evidence = make_evidence(EvidenceStatus.CLASSIFIED, "借款借条")
+    assert not has_reached_stage(evidence, EvidenceStatus.FEATURES_EXTRACTED)
+
+
+def run_classification(monkeypatch, resume):
+    evidences = [
+        Evidence(id=1, file_url="https://cos.com/1.jpg", file_extension="jpg",
+                 evidence_status=EvidenceStatus.CLASSIFIED.value, classification_category="身份证"),
+        Evidence(id=2, file_url="https://cos.com/2.jpg", file_extension="jpg",
+                 evidence_status=EvidenceStatus.UPLOADED.value),
+    ]
+    classified = []
+
+    async def fake_load(db, evidence_ids, case_id=None):
+        return evidences, []
+
+    async def fake_classify(urls, on_chunk_done=None):
+        classified.extend(urls)
+        return SimpleNamespace(results=[], failed_image_urls=[])
+
+    monkeypatch.setattr(evidence_services, "load_evidences_by_ids", fake_load)
+    monkeypatch.setattr(evidence_services, "classify_evidences_sharded", fake_classify)
+    asyncio.run(evidence_services.auto_process(
+        FakeSession(), case_id=1, evidence_ids=[1, 2], auto_classification=True, resume=resume,
+    ))
+    return classified
+
+
+def test_auto_process_resume_skips_classified_evidences(monkeypatch):
+    assert run_classification(monkeypatch, resume=True) == ["https://cos.com/2.jpg"]
+
+
+def test_auto_process_without_resume_reclassifies_all_evidences(monkeypatch):
+    assert run_classification(monkeypatch, resume=False) == ["https://cos.com/1.jpg", "https://cos.com/2.jpg"]
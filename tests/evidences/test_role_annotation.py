@@ -0,0 +1,129 @@
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.cases.models import CaseParty
+from app.evidences.models import Evidence, EvidenceStatus
+from app.evidences.role_annotation import annotate_evidence_roles, compile_slot_rules
+
+
+def rule(rule_name, party_role, conditions):
+    return {"rule_name": rule_name, "target_type": "case_party", "party_role": party_role, "conditions": conditions}
+
+
+def condition(party_type, target_fields, match_strategy="exact", match_condition="any"):
+    return {
+        "party_type": party_type,
+        "target_fields": target_fields,
+        "match_strategy": match_strategy,
+        "match_condition": match_condition,
+    }
+
+
+class StaticRegistry:
+    """直接使用给定的证据类型配置，不依赖 YAML"""
+
+    def __init__(self, type_configs):
+        self._compiled = {name: compile_slot_rules(config) for name, config in type_configs.items()}
+
+    def get(self, evidence_type):
+        return self._compiled.get(evidence_type, ())
+
+
+def slots(*slot_rules):
+    return {"extraction_slots": [
+        {"slot_name": slot_name, "proofread_rules": rules} for slot_name, rules in slot_rules
+    ]}
+
+
+def make_evidence(category, features, status=EvidenceStatus.FEATURES_EXTRACTED.value, role=None):
+    return Evidence(
+        file_name=f"{category}.jpg",
+        evidence_status=status,
+        classification_category=category,
+        evidence_features=[{"slot_name": name, "slot_value": value} for name, value in features],
+        evidence_role=role,
+    )
+
+
+def make_party(party_role, party_type="person", **fields):
+    return CaseParty(party_role=party_role, party_type=party_type, **fields)
+
+
+def test_exact_match_normalizes_numbers_and_whitespace():
+    registry = StaticRegistry({"银行卡": slots(("卡号", [
+        rule("卡号校对", [], [condition("person", ["bank_account"])]),
+    ]))})
+    evidence = make_evidence("银行卡", [("卡号", " 1000.00 ")])
+    parties = [make_party("creditor", bank_account="1000")]
+
+    annotated = annotate_evidence_roles([evidence], parties, registry)
+
+    assert annotated == [(evidence, "卡号校对")]
+    assert evidence.evidence_role == "creditor"
+
+
+def test_party_role_and_type_filter_candidates():
+    registry = StaticRegistry({"借条": slots(("借款人", [
+        rule("债务人名称校对", ["debtor"], [condition("company", ["company_name"], "contains")]),
+    ]))})
+    evidence = make_evidence("借条", [("借款人", "上海某某科技有限公司")])
+    parties = [
+        make_party("creditor", "company", company_name="某某科技"),
+        make_party("debtor", "person", company_name="某某科技"),
+        make_party("debtor", "company", company_name="某某科技"),
+    ]
+
+    annotate_evidence_roles([evidence], parties, registry)
+
+    assert evidence.evidence_role == "debtor"
+
+
+def test_first_matching_party_wins_in_case_order():
+    registry = StaticRegistry({"身份证": slots(("姓名", [
+        rule("当事人名称校对", [], [condition("person", ["party_name", "name"])]),
+    ]))})
+    evidence = make_evidence("身份证", [("姓名", "张三")])
+    parties = [make_party("debtor", party_name="张三"), make_party("creditor", party_name="张三")]
+
+    annotate_evidence_roles([evidence], parties, registry)
+
+    assert evidence.evidence_role == "debtor"
+
+
+def test_match_conditions_ignore_missing_fields():
+    registry = StaticRegistry({"身份证": slots(
+        ("姓名", [rule("全部匹配", [], [condition("person", ["party_name", "name", "id_card"], match_condition="all")])]),
+        ("住址", [rule("多数匹配", [], [condition("person", ["address", "party_name", "name"], "startswith", "majority")])]),
+    )})
+    all_match = make_evidence("身份证", [("姓名", "李四")])
+    majority_match = make_evidence("身份证", [("姓名", "王五"), ("住址", "北京市朝阳区")])
+    parties = [make_party("creditor", party_name="李四", name="李四", address="北京市")]
+
+    annotate_evidence_roles([all_match, majority_match], parties, registry)
+
+    assert all_match.evidence_role == "creditor"
+    # 住址 startswith 命中 1/3，不满足多数
+    assert majority_match.evidence_role is None
+
+
+def test_unknown_values_and_unprocessed_evidences_are_skipped():
+    registry = StaticRegistry({"身份证": slots(("姓名", [
+        rule("当事人名称校对", [], [condition("person", ["party_name"])]),
+    ]))})
+    unknown = make_evidence("身份证", [("姓名", "未知")])
+    classified = make_evidence("身份证", [("姓名", "张三")], status=EvidenceStatus.CLASSIFIED.value)
+    unconfigured = make_evidence("微信聊天记录", [("姓名", "张三")], role="debtor")
+    parties = [make_party("creditor", party_name="张三")]
+
+    annotated = annotate_evidence_roles([unknown, classified, unconfigured], parties, registry)
+
+    assert annotated == []
+    assert unknown.evidence_role is None
+    assert classified.evidence_role is None
+    assert unconfigured.evidence_role == "debtor"
+
+
+def test_case_rules_are_not_compiled():
+    compiled = compile_slot_rules(slots(("欠款金额", [
+        {"rule_name": "欠款金额校对", "target_type": "case", "target_fields": ["loan_amount"]},
+    ])))
+
+    assert compiled == ()
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+import app.db.base  # noqa: F401  注册全部模型，保证关系映射可以完成配置
+from app.evidences.models import EvidenceCardSlotAssignment, SlotSnapshotVersionConflict
+from conftest import FakeSession
+
+
+class SnapshotSession(FakeSession):
+    """版本递增语句返回给定的版本号，版本查询返回当前版本"""
+
+    def __init__(self, bumped_version, current_version=0):
+        super().__init__()
+        self.bumped_version = bumped_version
+        self.current_version = current_version
+
+    def respond(self, sql, statement):
+        if sql.startswith("INSERT INTO evidence_card_slot_snapshots"):
+            return [self.bumped_version] if self.bumped_version is not None else []
+        if sql.startswith("SELECT evidence_card_slot_snapshots.version"):
+            return [self.current_version]
+        return []
+
+
+def test_bulk_update_applies_diff_in_one_transaction():
+    db = SnapshotSession(bumped_version=4)
+    assignments = {f"slot::creditor::身份证::{i}": 100 + i for i in range(5)}
+    assignments["slot::debtor::身份证::0"] = None
+
+    version = asyncio.run(EvidenceCardSlotAssignment.bulk_update_assignments(
+        db, 1, "模板", assignments, expected_version=3
+    ))
+
+    assert version == 4
+    # 版本递增、批量 upsert、批量删除
+    assert len(db.statements) == 3
+    assert "ON CONFLICT (case_id, template_id) DO UPDATE" in db.statements[0]
+    assert "WHERE evidence_card_slot_snapshots.version = " in db.statements[0]
+    assert db.statements[1].startswith("INSERT INTO evidence_card_slot_assignments")
+    assert "ON CONFLICT (case_id, template_id, slot_id) DO UPDATE SET card_id = excluded.card_id" in db.statements[1]
+    assert db.statements[2].startswith("DELETE FROM evidence_card_slot_assignments")
+    assert db.commits == 1
+
+
+def test_bulk_update_rejects_stale_version():
+    # 版本行未被更新（当前版本已不是期望版本）
+    db = SnapshotSession(bumped_version=None, current_version=5)
+
+    with pytest.raises(SlotSnapshotVersionConflict) as exc_info:
+        asyncio.run(EvidenceCardSlotAssignment.bulk_update_assignments(
+            db, 1, "模板", {"slot::creditor::身份证::0": 100}, expected_version=3
+        ))
+
+    assert exc_info.value.current_version == 5
+    assert db.rollbacks == 1
+    assert db.commits == 0
+    assert not any(s.startswith("INSERT INTO evidence_card_slot_assignments") for s in db.statements)
+
+
+def test_bulk_update_rejects_nonzero_version_for_new_snapshot():
+    # 版本行不存在时插入版本1，客户端却期望已有版本
+    db = SnapshotSession(bumped_version=1, current_version=0)
+
+    with pytest.raises(SlotSnapshotVersionConflict):
+        asyncio.run(EvidenceCardSlotAssignment.bulk_update_assignments(
+            db, 1, "模板", {"slot::creditor::身份证::0": None}, expected_version=2
+        ))
+
+    assert db.commits == 0
@@ -0,0 +1,49 @@
+import io
+
+from app.core.config import settings
+from app.integrations.cos import COSService
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def put_object(self, **kwargs):
+        self.calls.append(("put_object", kwargs))
+
+    def upload_file_from_buffer(self, **kwargs):
+        self.calls.append(("upload_file_from_buffer", kwargs))
+
+
+def make_service():
+    service = COSService.__new__(COSService)
+    service.client = FakeClient()
+    service.bucket = "bucket"
+    return service
+
+
+def test_small_file_streams_file_object_with_put_object():
+    service = make_service()
+    file = io.BytesIO(b"small evidence")
+
+    service.upload_file(file, "a.png", "images")
+
+    method, kwargs = service.client.calls[0]
+    assert method == "put_object"
+    assert kwargs["Body"] is file
+    assert file.tell() == 0
+
+
+def test_large_file_uses_bounded_multipart_upload(monkeypatch):
+    monkeypatch.setattr(settings, "COS_MULTIPART_THRESHOLD_MB", 1)
+    service = make_service()
+    file = io.BytesIO(b"0" * (2 * 1024 * 1024))
+
+    url = service.upload_file(file, "video.mp4", "videos")
+
+    method, kwargs = service.client.calls[0]
+    assert method == "upload_file_from_buffer"
+    assert kwargs["Body"] is file
+    assert kwargs["MaxBufferSize"] == settings.COS_MULTIPART_MAX_BUFFER_MB
+    assert kwargs["ContentType"] == "video/mp4"
+    assert url.startswith(f"{settings.COS_BUCKET_SERVICE}/videos/")
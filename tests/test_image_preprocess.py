@@ -0,0 +1,52 @@
+import io
+
+from PIL import Image
+
+from app.utils.image_preprocess import (
+    build_ai_derivative,
+    derivative_object_key,
+    estimate_qwen_vl_tokens,
+)
+
+
+def make_image(size, mode="RGB", fmt="JPEG", orientation=None):
+    image = Image.new(mode, size, (200, 10, 10) if mode == "RGB" else (200, 10, 10, 0))
+    buffer = io.BytesIO()
+    kwargs = {}
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        kwargs["exif"] = exif
+    image.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def test_derivative_bounds_long_side_and_keeps_ratio():
+    derivative = build_ai_derivative(make_image((4000, 3000)), max_side=1600, quality=80)
+
+    assert (derivative.width, derivative.height) == (1600, 1200)
+    assert (derivative.original_width, derivative.original_height) == (4000, 3000)
+    assert Image.open(io.BytesIO(derivative.content)).format == "JPEG"
+
+
+def test_derivative_applies_exif_orientation():
+    # orientation=6：需要顺时针旋转90度，宽高互换
+    derivative = build_ai_derivative(make_image((400, 300), orientation=6), max_side=1600)
+
+    assert (derivative.width, derivative.height) == (300, 400)
+
+
+def test_derivative_flattens_transparent_png():
+    derivative = build_ai_derivative(make_image((100, 50), mode="RGBA", fmt="PNG"), max_side=1600)
+
+    assert Image.open(io.BytesIO(derivative.content)).mode == "RGB"
+    assert (derivative.width, derivative.height) == (100, 50)
+
+
+def test_unreadable_image_returns_none():
+    assert build_ai_derivative(b"not an image", max_side=1600) is None
+
+
+def test_derivative_object_key_and_token_estimate():
+    assert derivative_object_key("images/20250710_发票.png") == "images/20250710_发票.ai.jpg"
+    assert estimate_qwen_vl_tokens(4032, 3024) > estimate_qwen_vl_tokens(1600, 1200)